@@ -17,6 +17,7 @@ from app.core.config import settings
 from app.core.logger import get_logger
 from app.core.redis_client import redis_client
 from app.database.database import init_db, close_db
+from app.database.loaders import user_load_options
 from app.admin.keyboards.inline import (
     unlimited_links_menu,
     promo_menu,
@@ -277,6 +278,7 @@ async def _show_users_page_message(message: Message, page: int = 0):
 
         result = await session.execute(
             select(User)
+            .options(*user_load_options("admin_view"))
             .order_by(User.created_at.desc())
             .limit(users_per_page)
             .offset(offset)
@@ -319,7 +321,10 @@ async def _show_give_tokens_message(message: Message):
 
     async with async_session_maker() as session:
         result = await session.execute(
-            select(User).order_by(User.last_activity.desc().nullslast()).limit(10)
+            select(User)
+            .options(*user_load_options("admin_view"))
+            .order_by(User.last_activity.desc().nullslast())
+            .limit(10)
         )
         recent_users = result.scalars().all()
 
@@ -506,6 +511,7 @@ async def show_users_page(callback: CallbackQuery, page: int = 0):
         # Get users for this page
         result = await session.execute(
             select(User)
+            .options(*user_load_options("admin_view"))
             .order_by(User.created_at.desc())
             .limit(users_per_page)
             .offset(offset)
@@ -734,7 +740,9 @@ async def user_details_callback(callback: CallbackQuery):
         async with async_session_maker() as session:
             # Get user
             result = await session.execute(
-                select(User).where(User.telegram_id == telegram_id)
+                select(User)
+                .options(*user_load_options("admin_view"))
+                .where(User.telegram_id == telegram_id)
             )
             user = result.scalar_one_or_none()
 
@@ -988,6 +996,11 @@ async def process_user_message(message: Message, state: FSMContext):
     except Exception as e:
         error_msg = str(e)
         logger.error("admin_user_message_error", target_user_id=target_user_id, error=error_msg)
+
+        from app.services.user.delivery_outcomes import DeliveryOutcomeSink, classify_delivery_error
+        outcomes = DeliveryOutcomeSink()
+        outcomes.add(target_user_id, classify_delivery_error(e), error=error_msg)
+        await outcomes.flush()
         await message.answer(
             f"❌ Ошибка отправки: {error_msg}",
             reply_markup=back_keyboard()
@@ -1909,7 +1922,10 @@ async def start_give_tokens(callback: CallbackQuery, state: FSMContext):
     async with async_session_maker() as session:
         # Get last 10 users
         result = await session.execute(
-            select(User).order_by(User.last_activity.desc().nullslast()).limit(10)
+            select(User)
+            .options(*user_load_options("admin_view"))
+            .order_by(User.last_activity.desc().nullslast())
+            .limit(10)
         )
         recent_users = result.scalars().all()
 
@@ -2032,7 +2048,7 @@ async def process_give_tokens_amount(message: Message, state: FSMContext):
         async with async_session_maker() as session:
             # Check if user exists
             user_service = UserService(session)
-            user = await user_service.get_user_by_telegram_id(user_id)
+            user = await user_service.get_user_by_telegram_id(user_id, profile="admin_view")
 
             # Give tokens (add eternal subscription with tokens)
             sub_service = SubscriptionService(session)
@@ -2823,6 +2839,12 @@ async def process_broadcast_message(message: Message, state: FSMContext):
     from app.database.database import async_session_maker
     from app.database.models import User
     from app.admin.services import send_broadcast_message
+    from app.services.user.delivery_outcomes import (
+        BLOCKED,
+        DEACTIVATED,
+        DeliveryOutcomeSink,
+        classify_delivery_error,
+    )
     from sqlalchemy import select
     from aiogram import Bot
 
@@ -2838,7 +2860,11 @@ async def process_broadcast_message(message: Message, state: FSMContext):
 
         async with async_session_maker() as session:
             # Build query based on filter (exclude blocked users)
-            query = select(User).where(User.is_banned == False, User.is_bot_blocked == False)
+            query = (
+                select(User)
+                .options(*user_load_options("admin_view"))
+                .where(User.is_banned == False, User.is_bot_blocked == False)
+            )
 
             if filter_type == "test":
                 # Send to admin IDs only
@@ -2877,8 +2903,8 @@ async def process_broadcast_message(message: Message, state: FSMContext):
                 f"❌ Ошибок: 0"
             )
 
-            # Send messages
-            blocked_users = []
+            # Send messages; outcomes mark users who blocked the bot in bulk
+            outcomes = DeliveryOutcomeSink()
             for i, user in enumerate(users, 1):
                 try:
                     await send_broadcast_message(
@@ -2890,9 +2916,7 @@ async def process_broadcast_message(message: Message, state: FSMContext):
                 except Exception as e:
                     failed_count += 1
                     error_msg = str(e)
-                    # Mark user as blocked if they blocked the bot or deactivated
-                    if "bot was blocked by the user" in error_msg or "user is deactivated" in error_msg:
-                        blocked_users.append(user.id)
+                    outcomes.add(user.telegram_id, classify_delivery_error(e), user_id=user.id, error=error_msg)
                     errors.append(f"User {user.telegram_id}: {error_msg[:50]}")
                     logger.error(
                         "broadcast_send_error",
@@ -2914,18 +2938,12 @@ async def process_broadcast_message(message: Message, state: FSMContext):
                         pass
 
             # Mark blocked users in database
-            if blocked_users:
-                for uid in blocked_users:
-                    blocked_user_result = await session.execute(
-                        select(User).where(User.id == uid)
-                    )
-                    blocked_user = blocked_user_result.scalar_one_or_none()
-                    if blocked_user:
-                        blocked_user.is_bot_blocked = True
-                await session.commit()
+            blocked_count = outcomes.counts[BLOCKED] + outcomes.counts[DEACTIVATED]
+            if blocked_count:
+                await outcomes.flush()
                 logger.info(
                     "broadcast_blocked_users_marked",
-                    count=len(blocked_users)
+                    count=blocked_count
                 )
 
             # Final status with error details
@@ -3484,6 +3502,133 @@ async def select_broadcast_filter(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
+# Seconds between refreshes of a broadcast's progress message
+BROADCAST_PROGRESS_INTERVAL = 10
+
+BROADCAST_STATUS_LABELS = {
+    "queued": "⏳ в очереди",
+    "running": "📤 отправляется",
+    "paused": "⏸ на паузе",
+    "completed": "✅ завершена",
+    "cancelled": "⏹ остановлена",
+}
+
+# Broadcast ID -> task refreshing its progress message
+_broadcast_watchers: dict = {}
+
+
+def _broadcast_progress_text(broadcast) -> str:
+    """Progress of a broadcast for the admin."""
+    handled = broadcast.sent_count + broadcast.error_count
+    total = max(broadcast.total_count, handled)
+    errors = broadcast.error_count - broadcast.blocked_count
+
+    text = f"📤 Рассылка #{broadcast.id}: {BROADCAST_STATUS_LABELS.get(broadcast.status, broadcast.status)}\n\n"
+    text += f"📊 Обработано: {handled}/{total}\n"
+    text += f"  • Отправлено: {broadcast.sent_count}\n"
+    if broadcast.blocked_count > 0:
+        text += f"  • Заблокировали бота: {broadcast.blocked_count}\n"
+    if errors > 0:
+        text += f"  • Ошибки: {errors}\n"
+    if broadcast.status == "completed":
+        text += f"  • Успешность: {broadcast.sent_count * 100 // handled if handled > 0 else 0}%\n\n"
+        text += "Статистика доступна в разделе [📊 Статистика]"
+    return text
+
+
+async def _refresh_broadcast_progress(message: Message, broadcast_id: int):
+    """Show a broadcast's current progress in ``message``; returns its status."""
+    from app.database.database import async_session_maker
+    from app.database.models.broadcast import BroadcastMessage
+    from app.admin.keyboards.inline import broadcast_progress_keyboard
+
+    async with async_session_maker() as session:
+        broadcast = await session.get(BroadcastMessage, broadcast_id)
+    if broadcast is None:
+        return None
+
+    try:
+        await message.edit_text(
+            _broadcast_progress_text(broadcast),
+            reply_markup=broadcast_progress_keyboard(broadcast.id, broadcast.status)
+        )
+    except Exception:
+        pass  # Unchanged since the last refresh
+    return broadcast.status
+
+
+async def _watch_broadcast(message: Message, broadcast_id: int):
+    """Refresh the progress message while the broadcast is queued or sending."""
+    try:
+        while True:
+            await asyncio.sleep(BROADCAST_PROGRESS_INTERVAL)
+            status = await _refresh_broadcast_progress(message, broadcast_id)
+            if status not in ("queued", "running"):
+                return
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning("broadcast_progress_watch_failed", broadcast_id=broadcast_id, error=str(e))
+    finally:
+        if _broadcast_watchers.get(broadcast_id) is asyncio.current_task():
+            del _broadcast_watchers[broadcast_id]
+
+
+def _start_broadcast_watch(message: Message, broadcast_id: int):
+    """(Re)start refreshing a broadcast's progress message."""
+    previous = _broadcast_watchers.get(broadcast_id)
+    if previous is not None:
+        previous.cancel()
+    _broadcast_watchers[broadcast_id] = asyncio.create_task(_watch_broadcast(message, broadcast_id))
+
+
+async def _send_broadcast_progress(message: Message, broadcast):
+    """Answer with the progress of a just queued broadcast and keep it updated."""
+    from app.admin.keyboards.inline import broadcast_progress_keyboard
+
+    status_msg = await message.answer(
+        _broadcast_progress_text(broadcast),
+        reply_markup=broadcast_progress_keyboard(broadcast.id, broadcast.status)
+    )
+    _start_broadcast_watch(status_msg, broadcast.id)
+
+
+@admin_router.callback_query(F.data.startswith("admin:bcast:"))
+async def control_broadcast_handler(callback: CallbackQuery):
+    """Pause, resume, stop or refresh a broadcast."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ Нет доступа")
+        return
+
+    from app.database.database import async_session_maker
+    from app.admin.services import control_broadcast
+
+    _, _, action, broadcast_id = callback.data.split(":")
+    broadcast_id = int(broadcast_id)
+
+    answer = None
+    if action != "refresh":
+        async with async_session_maker() as session:
+            changed = await control_broadcast(session, broadcast_id, action)
+        answer = {
+            "pause": "⏸ Рассылка приостановлена",
+            "resume": "▶️ Рассылка продолжится",
+            "cancel": "⏹ Рассылка остановлена",
+        }[action] if changed else "Статус рассылки уже изменился"
+        logger.info(
+            "admin_broadcast_control",
+            admin_id=callback.from_user.id,
+            broadcast_id=broadcast_id,
+            action=action,
+            changed=changed
+        )
+
+    status = await _refresh_broadcast_progress(callback.message, broadcast_id)
+    if status in ("queued", "running"):
+        _start_broadcast_watch(callback.message, broadcast_id)
+    await callback.answer(answer)
+
+
 @admin_router.callback_query(F.data == "admin:broadcast_confirm_send")
 async def confirm_broadcast_send(callback: CallbackQuery, state: FSMContext):
     """Confirm and send broadcast."""
@@ -3492,18 +3637,11 @@ async def confirm_broadcast_send(callback: CallbackQuery, state: FSMContext):
         return
 
     # Answer callback immediately to prevent "query is too old" error
-    # (broadcast sending takes longer than Telegram's 30s callback timeout)
+    # (counting the recipients of a large broadcast takes a while)
     await callback.answer()
 
     from app.database.database import async_session_maker
-    from app.admin.services import (
-        send_broadcast_message,
-        create_broadcast_message,
-        get_recipients,
-        update_broadcast_stats
-    )
-    from app.admin.keyboards.inline import build_user_broadcast_keyboard
-    from aiogram import Bot
+    from app.admin.services import create_broadcast_message
     from app.database.models import User
     from sqlalchemy import select
 
@@ -3537,153 +3675,37 @@ async def confirm_broadcast_send(callback: CallbackQuery, state: FSMContext):
     )
 
     try:
-        # Create broadcast record
         async with async_session_maker() as session:
-            broadcast = await create_broadcast_message(
-                session=session,
-                admin_id=internal_admin_id,
-                text=text,
-                image_file_id=image_file_id,
-                buttons=buttons,
-                filter_type=filter_type
-            )
-
-            # Get recipients based on filter type
+            # Explicit recipients; other filters are resolved while sending
+            recipient_ids = None
             if filter_type == "test":
-                from sqlalchemy import select as sa_sel
                 r = await session.execute(
-                    sa_sel(User).where(User.telegram_id.in_(settings.admin_user_ids))
+                    select(User.id).where(User.telegram_id.in_(settings.admin_user_ids))
                 )
-                recipients = list(r.scalars().all())
+                recipient_ids = list(r.scalars().all())
             elif filter_type == "specific":
                 specific_users = data.get("specific_users", [])
-                recipients = await _resolve_specific_users(session, specific_users)
-            else:
-                recipients = await get_recipients(session, filter_type)
-
-        # Send broadcast - create bot without default parse_mode to avoid Markdown issues
-        from aiogram.client.default import DefaultBotProperties
-        from aiogram.types import BufferedInputFile
-        main_bot = Bot(token=settings.telegram_bot_token, default=DefaultBotProperties())
-        keyboard = build_user_broadcast_keyboard(buttons) if buttons else None
+                recipient_ids = [user.id for user in await _resolve_specific_users(session, specific_users)]
 
-        # Re-upload photo from admin bot to main bot if needed
-        # (file_id is bot-specific in Telegram and cannot be shared between bots)
-        main_bot_photo = None
-        if image_file_id:
-            try:
-                admin_bot = Bot(token=settings.telegram_admin_bot_token, default=DefaultBotProperties())
-                file = await admin_bot.get_file(image_file_id)
-                photo_bytes = await admin_bot.download_file(file.file_path)
-                main_bot_photo = BufferedInputFile(
-                    file=photo_bytes.read(),
-                    filename="broadcast_photo.jpg"
-                )
-                await admin_bot.session.close()
-                logger.info("broadcast_photo_downloaded", file_id=image_file_id)
-            except Exception as e:
-                logger.error("broadcast_photo_download_error", error=str(e))
-                main_bot_photo = None
-
-        total_users = len(recipients)
-        success_count = 0
-        error_count = 0
-        blocked_count = 0
-
-        status_msg = await callback.message.answer(
-            f"⏳ Отправка... 0/{total_users}"
-        )
-
-        blocked_user_ids = []
-        for i, user in enumerate(recipients, 1):
-            try:
-                result = await send_broadcast_message(
-                    bot=main_bot,
-                    chat_id=user.telegram_id,
-                    text=text,
-                    photo=main_bot_photo if main_bot_photo else None,
-                    keyboard=keyboard,
-                )
-                # After first successful photo send, use the returned file_id
-                # for faster sending (avoids re-uploading the file each time)
-                if main_bot_photo and isinstance(main_bot_photo, BufferedInputFile) and result:
-                    try:
-                        new_file_id = result.photo[-1].file_id
-                        main_bot_photo = new_file_id
-                        logger.info("broadcast_photo_cached", new_file_id=new_file_id)
-                    except (AttributeError, IndexError):
-                        pass
-                success_count += 1
-            except Exception as e:
-                error_msg = str(e)
-                if "bot was blocked by the user" in error_msg or "user is deactivated" in error_msg:
-                    blocked_count += 1
-                    blocked_user_ids.append(user.id)
-                else:
-                    error_count += 1
-                    logger.error("broadcast_send_error", user_id=user.telegram_id, error=error_msg)
-
-            # Update progress every 100 messages
-            if i % 100 == 0 or i == total_users:
-                try:
-                    await status_msg.edit_text(
-                        f"⏳ Отправка... {i}/{total_users}\n"
-                        f"✅ Успешно: {success_count}\n"
-                        f"🚫 Заблокировали: {blocked_count}\n"
-                        f"❌ Ошибок: {error_count}"
-                    )
-                except:
-                    pass
-
-        # Mark blocked users in database
-        if blocked_user_ids:
-            async with async_session_maker() as session:
-                for uid in blocked_user_ids:
-                    blocked_user_result = await session.execute(
-                        select(User).where(User.id == uid)
-                    )
-                    blocked_user = blocked_user_result.scalar_one_or_none()
-                    if blocked_user:
-                        blocked_user.is_bot_blocked = True
-                await session.commit()
-                logger.info(
-                    "broadcast_blocked_users_marked",
-                    count=len(blocked_user_ids)
-                )
-
-        # Update statistics
-        async with async_session_maker() as session:
-            await update_broadcast_stats(
+            # Queue the broadcast; the main bot's BroadcastWorker sends it
+            broadcast = await create_broadcast_message(
                 session=session,
-                broadcast_id=broadcast.id,
-                sent_count=success_count,
-                error_count=error_count + blocked_count
+                admin_id=internal_admin_id,
+                text=text,
+                image_file_id=image_file_id,
+                buttons=buttons,
+                filter_type=filter_type,
+                recipient_ids=recipient_ids
             )
 
-        # Final status
-        final_text = f"✅ Рассылка завершена!\n\n"
-        final_text += f"📊 Статистика:\n"
-        final_text += f"  • Отправлено: {success_count}\n"
-        if blocked_count > 0:
-            final_text += f"  • Заблокировали бота: {blocked_count}\n"
-        if error_count > 0:
-            final_text += f"  • Ошибки: {error_count}\n"
-        final_text += f"  • Успешность: {success_count*100//total_users if total_users > 0 else 0}%\n\n"
-        final_text += f"🔗 ID рассылки: #{broadcast.id}\n"
-        final_text += f"Статистика доступна в разделе [📊 Статистика]"
-
-        await status_msg.edit_text(final_text, reply_markup=back_keyboard())
-
-        await main_bot.session.close()
+        await _send_broadcast_progress(callback.message, broadcast)
 
         logger.info(
-            "admin_broadcast_with_buttons_complete",
+            "admin_broadcast_with_buttons_queued",
             admin_id=callback.from_user.id,
             broadcast_id=broadcast.id,
             filter=filter_type,
-            total=total_users,
-            success=success_count,
-            failed=error_count,
+            total=broadcast.total_count,
             buttons_count=len(buttons)
         )
 
@@ -4535,16 +4557,8 @@ async def confirm_cb_broadcast_send(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
     from app.database.database import async_session_maker
-    from app.admin.services import (
-        send_broadcast_message,
-        create_broadcast_message,
-        get_recipients,
-        update_broadcast_stats,
-    )
+    from app.admin.services import create_broadcast_message
     from app.services.channel_bonus import ChannelBonusService
-    from aiogram import Bot
-    from aiogram.client.default import DefaultBotProperties
-    from aiogram.types import BufferedInputFile, InlineKeyboardMarkup, InlineKeyboardButton
 
     data = await state.get_data()
     text = data.get("text", "")
@@ -4563,30 +4577,15 @@ async def confirm_cb_broadcast_send(callback: CallbackQuery, state: FSMContext):
         await state.clear()
         return
 
-    # Build the subscription check button
-    channel_link = f"https://t.me/{bonus.channel_username}" if bonus.channel_username else None
-    check_button_rows = []
-    if channel_link:
-        check_button_rows.append([
-            InlineKeyboardButton(
-                text=f"📢 Подписаться на канал",
-                url=channel_link
-            )
-        ])
-    check_button_rows.append([
-        InlineKeyboardButton(
-            text=f"✅ Проверить подписку и получить {bonus.bonus_tokens:,} токенов",
-            callback_data=f"bot.check_channel_sub:{bonus.id}"
-        )
-    ])
-    keyboard = InlineKeyboardMarkup(inline_keyboard=check_button_rows)
-
-    # Create broadcast record
+    # Buttons: subscribe to the channel, then check the subscription
     buttons_data = []
-    if channel_link:
-        buttons_data.append({"text": "Подписаться на канал", "url": channel_link})
+    if bonus.channel_username:
+        buttons_data.append({
+            "text": "📢 Подписаться на канал",
+            "url": f"https://t.me/{bonus.channel_username}",
+        })
     buttons_data.append({
-        "text": f"Проверить подписку ({bonus.bonus_tokens:,} токенов)",
+        "text": f"✅ Проверить подписку и получить {bonus.bonus_tokens:,} токенов",
         "callback_data": f"bot.check_channel_sub:{bonus.id}",
     })
 
@@ -4604,144 +4603,38 @@ async def confirm_cb_broadcast_send(callback: CallbackQuery, state: FSMContext):
         internal_admin_id = None
 
     async with async_session_maker() as session:
-        broadcast = await create_broadcast_message(
-            session=session,
-            admin_id=internal_admin_id,
-            text=text,
-            image_file_id=image_file_id,
-            buttons=buttons_data,
-            filter_type=filter_type,
-        )
-
-    # Get recipients
-    async with async_session_maker() as session:
+        # Explicit recipients; other filters are resolved while sending
+        recipient_ids = None
         if filter_type == "test":
-            # Send to admin IDs only
             from app.database.models import User
             from sqlalchemy import select as sa_select
             result = await session.execute(
-                sa_select(User).where(User.telegram_id.in_(settings.admin_user_ids))
+                sa_select(User.id).where(User.telegram_id.in_(settings.admin_user_ids))
             )
-            recipients = list(result.scalars().all())
+            recipient_ids = list(result.scalars().all())
         elif filter_type == "specific":
-            recipients = await _resolve_specific_users(session, specific_users)
-        else:
-            recipients = await get_recipients(session, filter_type)
-
-    # Create main bot without parse_mode to avoid Markdown issues
-    main_bot = Bot(token=settings.telegram_bot_token, default=DefaultBotProperties())
-
-    # Re-upload photo if needed
-    main_bot_photo = None
-    if image_file_id:
-        try:
-            admin_bot_instance = Bot(token=settings.telegram_admin_bot_token, default=DefaultBotProperties())
-            file = await admin_bot_instance.get_file(image_file_id)
-            photo_bytes = await admin_bot_instance.download_file(file.file_path)
-            main_bot_photo = BufferedInputFile(
-                file=photo_bytes.read(),
-                filename="broadcast_photo.jpg"
-            )
-            await admin_bot_instance.session.close()
-        except Exception as e:
-            logger.error("cb_broadcast_photo_download_error", error=str(e))
-            main_bot_photo = None
-
-    total_users = len(recipients)
-    success_count = 0
-    error_count = 0
-    blocked_count = 0
-    blocked_user_ids = []
-
-    status_msg = await callback.message.answer(f"⏳ Отправка... 0/{total_users}")
+            recipient_ids = [user.id for user in await _resolve_specific_users(session, specific_users)]
 
-    for i, user in enumerate(recipients, 1):
-        try:
-            result = await send_broadcast_message(
-                bot=main_bot,
-                chat_id=user.telegram_id,
-                text=text,
-                photo=main_bot_photo if main_bot_photo else None,
-                keyboard=keyboard,
-            )
-            # Cache photo file_id after first successful send
-            if main_bot_photo and isinstance(main_bot_photo, BufferedInputFile) and result:
-                try:
-                    new_file_id = result.photo[-1].file_id
-                    main_bot_photo = new_file_id
-                except (AttributeError, IndexError):
-                    pass
-            success_count += 1
-        except Exception as e:
-            error_msg = str(e)
-            if "bot was blocked by the user" in error_msg or "user is deactivated" in error_msg:
-                blocked_count += 1
-                blocked_user_ids.append(user.id)
-            else:
-                error_count += 1
-                logger.error("cb_broadcast_send_error", user_id=user.telegram_id, error=error_msg)
-
-        if i % 100 == 0 or i == total_users:
-            try:
-                await status_msg.edit_text(
-                    f"⏳ Отправка... {i}/{total_users}\n"
-                    f"✅ Успешно: {success_count}\n"
-                    f"🚫 Заблокировали: {blocked_count}\n"
-                    f"❌ Ошибок: {error_count}"
-                )
-            except:
-                pass
-
-    # Mark blocked users
-    if blocked_user_ids:
-        from app.database.models import User
-        from sqlalchemy import select as sa_select
-        async with async_session_maker() as session:
-            for uid in blocked_user_ids:
-                r = await session.execute(sa_select(User).where(User.id == uid))
-                blocked_user = r.scalar_one_or_none()
-                if blocked_user:
-                    blocked_user.is_bot_blocked = True
-            await session.commit()
-
-    # Update stats
-    async with async_session_maker() as session:
-        await update_broadcast_stats(
+        # Queue the broadcast; the main bot's BroadcastWorker sends it
+        broadcast = await create_broadcast_message(
             session=session,
-            broadcast_id=broadcast.id,
-            sent_count=success_count,
-            error_count=error_count + blocked_count,
+            admin_id=internal_admin_id,
+            text=text,
+            image_file_id=image_file_id,
+            buttons=buttons_data,
+            filter_type=filter_type,
+            recipient_ids=recipient_ids,
         )
 
-    # Final status
-    final_text = (
-        f"✅ Рассылка с бонусом за подписку завершена!\n\n"
-        f"📊 Статистика:\n"
-        f"  • Отправлено: {success_count}\n"
-    )
-    if blocked_count > 0:
-        final_text += f"  • Заблокировали бота: {blocked_count}\n"
-    if error_count > 0:
-        final_text += f"  • Ошибки: {error_count}\n"
-    rate = success_count * 100 // total_users if total_users > 0 else 0
-    final_text += (
-        f"  • Успешность: {rate}%\n\n"
-        f"🔗 ID рассылки: #{broadcast.id}\n"
-        f"📢 Канал: {bonus.channel_title}\n"
-        f"💰 Бонус: {bonus.bonus_tokens:,} токенов"
-    )
-
-    await status_msg.edit_text(final_text, reply_markup=back_keyboard())
-    await main_bot.session.close()
+    await _send_broadcast_progress(callback.message, broadcast)
 
     logger.info(
-        "cb_broadcast_complete",
+        "cb_broadcast_queued",
         admin_id=callback.from_user.id,
         broadcast_id=broadcast.id,
         bonus_id=bonus.id,
         filter=filter_type,
-        total=total_users,
-        success=success_count,
+        total=broadcast.total_count,
     )
 
     await state.clear()
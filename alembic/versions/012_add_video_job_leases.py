@@ -0,0 +1,50 @@
+"""add lease columns to video generation jobs
+
+Workers claim jobs atomically (FOR UPDATE SKIP LOCKED) and record who owns
+them until when, so several bot replicas can share the queue safely.
+
+Revision ID: 012_add_video_job_leases
+Revises: 011_unique_yukassa_payment_id
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '012_add_video_job_leases'
+down_revision = '011_unique_yukassa_payment_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'video_generation_jobs',
+        sa.Column(
+            'lease_owner',
+            sa.String(length=100),
+            nullable=True,
+            comment='Worker that currently owns the job'
+        )
+    )
+    op.add_column(
+        'video_generation_jobs',
+        sa.Column(
+            'lease_expires_at',
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment='Lease expiry; other workers may claim the job afterwards'
+        )
+    )
+    op.create_index(
+        'ix_video_generation_jobs_lease_expires_at',
+        'video_generation_jobs',
+        ['lease_expires_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_video_generation_jobs_lease_expires_at', table_name='video_generation_jobs')
+    op.drop_column('video_generation_jobs', 'lease_expires_at')
+    op.drop_column('video_generation_jobs', 'lease_owner')
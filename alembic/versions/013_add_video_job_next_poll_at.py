@@ -0,0 +1,41 @@
+"""add next_poll_at to video generation jobs
+
+Submitted generations are no longer awaited by a worker coroutine: the job
+records when its provider task should be checked next, and any worker picks
+it up then for a single status check.
+
+Revision ID: 013_add_video_job_next_poll_at
+Revises: 012_add_video_job_leases
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '013_add_video_job_next_poll_at'
+down_revision = '012_add_video_job_leases'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'video_generation_jobs',
+        sa.Column(
+            'next_poll_at',
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment='When to check the provider task next (NULL = not polled)'
+        )
+    )
+    op.create_index(
+        'ix_video_generation_jobs_next_poll_at',
+        'video_generation_jobs',
+        ['next_poll_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_video_generation_jobs_next_poll_at', table_name='video_generation_jobs')
+    op.drop_column('video_generation_jobs', 'next_poll_at')
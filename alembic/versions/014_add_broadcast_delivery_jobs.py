@@ -0,0 +1,84 @@
+"""add delivery job state to broadcast messages
+
+Broadcasts are no longer sent by the admin bot handler: the admin bot queues
+the broadcast and a worker of the main bot sends it, recording how far it
+got (cursor_user_id) so a paused or interrupted broadcast resumes where it
+stopped. Broadcasts that existed before are marked completed.
+
+Revision ID: 014_add_broadcast_delivery_jobs
+Revises: 013_add_video_job_next_poll_at
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '014_add_broadcast_delivery_jobs'
+down_revision = '013_add_video_job_next_poll_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'broadcast_messages',
+        sa.Column('blocked_count', sa.Integer(), nullable=False, server_default='0',
+                  comment='Failed deliveries because the user blocked the bot (part of error_count)')
+    )
+    op.add_column(
+        'broadcast_messages',
+        sa.Column('total_count', sa.Integer(), nullable=False, server_default='0',
+                  comment='Number of recipients when the broadcast was queued')
+    )
+    op.add_column(
+        'broadcast_messages',
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='completed',
+                  comment='queued, running, paused, completed, cancelled')
+    )
+    op.add_column(
+        'broadcast_messages',
+        sa.Column('recipient_ids', postgresql.JSON(astext_type=sa.Text()), nullable=True,
+                  comment='Explicit recipients (users.id) for test/specific filters')
+    )
+    op.add_column(
+        'broadcast_messages',
+        sa.Column('cursor_user_id', sa.BigInteger(), nullable=False, server_default='0',
+                  comment='Recipients up to this users.id have been handled')
+    )
+    op.add_column(
+        'broadcast_messages',
+        sa.Column('photo_file_id', sa.String(length=255), nullable=True,
+                  comment="Main bot file_id of the photo after its first upload")
+    )
+    op.add_column(
+        'broadcast_messages',
+        sa.Column('lease_owner', sa.String(length=100), nullable=True,
+                  comment='Worker currently sending the broadcast')
+    )
+    op.add_column(
+        'broadcast_messages',
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True,
+                  comment='Lease expiry; another worker resumes the broadcast after it')
+    )
+    op.add_column('broadcast_messages', sa.Column('started_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('broadcast_messages', sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_broadcast_messages_status', 'broadcast_messages', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_broadcast_messages_status', table_name='broadcast_messages')
+    for column in (
+        'finished_at',
+        'started_at',
+        'lease_expires_at',
+        'lease_owner',
+        'photo_file_id',
+        'cursor_user_id',
+        'recipient_ids',
+        'status',
+        'total_count',
+        'blocked_count',
+    ):
+        op.drop_column('broadcast_messages', column)
@@ -0,0 +1,47 @@
+"""add broadcast delivery log
+
+One row per broadcast recipient with its delivery outcome, written in bulk
+by DeliveryOutcomeSink.
+
+Revision ID: 015_add_broadcast_deliveries
+Revises: 014_add_broadcast_delivery_jobs
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '015_add_broadcast_deliveries'
+down_revision = '014_add_broadcast_delivery_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'broadcast_deliveries',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('broadcast_id', sa.BigInteger(), nullable=False, comment='Reference to broadcast message'),
+        sa.Column('user_id', sa.BigInteger(), nullable=False, comment='Recipient'),
+        sa.Column('outcome', sa.String(length=20), nullable=False, comment='sent, blocked, deactivated, error'),
+        sa.Column('error', sa.String(length=255), nullable=True, comment='Telegram error of a failed delivery'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['broadcast_id'], ['broadcast_messages.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_broadcast_deliveries_user_id', 'broadcast_deliveries', ['user_id'])
+    op.create_index(
+        'uq_broadcast_deliveries_broadcast_user',
+        'broadcast_deliveries',
+        ['broadcast_id', 'user_id'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_broadcast_deliveries_broadcast_user', table_name='broadcast_deliveries')
+    op.drop_index('ix_broadcast_deliveries_user_id', table_name='broadcast_deliveries')
+    op.drop_table('broadcast_deliveries')
@@ -269,6 +269,25 @@ def broadcast_confirmation_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def broadcast_progress_keyboard(broadcast_id: int, status: str) -> InlineKeyboardMarkup:
+    """Controls of a queued or running broadcast."""
+    builder = InlineKeyboardBuilder()
+
+    if status in ("queued", "running"):
+        builder.button(text="⏸ Пауза", callback_data=f"admin:bcast:pause:{broadcast_id}")
+    elif status == "paused":
+        builder.button(text="▶️ Продолжить", callback_data=f"admin:bcast:resume:{broadcast_id}")
+
+    if status in ("queued", "running", "paused"):
+        builder.button(text="⏹ Остановить", callback_data=f"admin:bcast:cancel:{broadcast_id}")
+        builder.button(text="🔄 Обновить", callback_data=f"admin:bcast:refresh:{broadcast_id}")
+
+    builder.button(text="🔙 Назад в меню", callback_data="admin:back")
+
+    builder.adjust(2, 1, 1)
+    return builder.as_markup()
+
+
 def build_user_broadcast_keyboard(buttons_data: list[dict]) -> InlineKeyboardMarkup:
     """
     Build inline keyboard for user broadcast message.
@@ -5,6 +5,8 @@ from app.admin.services.broadcast_service import (
     update_broadcast_stats,
     get_recipients_count,
     get_recipients,
+    get_recipient_page,
+    control_broadcast,
     record_broadcast_click,
     get_broadcast_by_callback,
     get_broadcast_statistics,
@@ -17,6 +19,8 @@ __all__ = [
     "update_broadcast_stats",
     "get_recipients_count",
     "get_recipients",
+    "get_recipient_page",
+    "control_broadcast",
     "record_broadcast_click",
     "get_broadcast_by_callback",
     "get_broadcast_statistics",
@@ -13,6 +13,8 @@ from app.core.logger import get_logger
 from app.database.models.broadcast import BroadcastMessage, BroadcastClick
 from app.database.models.user import User
 from app.database.models.subscription import Subscription
+from app.database.repositories.broadcast import BroadcastRepository
+from app.services.cache.broadcast_index import broadcast_callback_index
 
 logger = get_logger(__name__)
 
@@ -64,22 +66,34 @@ async def create_broadcast_message(
     image_file_id: Optional[str],
     buttons: list[dict],
     filter_type: str,
+    recipient_ids: Optional[list[int]] = None,
 ) -> BroadcastMessage:
     """
-    Create a new broadcast message record.
+    Create a new broadcast message record, queued for delivery.
+
+    The main bot's BroadcastWorker picks it up and sends it; the caller only
+    watches its progress.
 
     Args:
         session: Database session
         admin_id: Internal user ID (from users.id) or None.
                   Caller must resolve telegram_id to internal ID before calling.
         text: Message text
-        image_file_id: Telegram file_id for photo (optional)
-        buttons: List of button dicts with 'text' and 'callback_data'
-        filter_type: Recipient filter (all/subscribed/free)
+        image_file_id: Telegram file_id for photo (optional, admin bot's)
+        buttons: List of button dicts with 'text' and 'callback_data' or 'url'
+        filter_type: Recipient filter (all/subscribed/free/test/specific)
+        recipient_ids: Internal user IDs to send to instead of the filter
+                       (test/specific broadcasts)
 
     Returns:
         Created BroadcastMessage instance
     """
+    if recipient_ids is not None:
+        recipient_ids = sorted(set(recipient_ids))
+        total_count = len(recipient_ids)
+    else:
+        total_count = await get_recipients_count(session, filter_type)
+
     broadcast = BroadcastMessage(
         admin_id=admin_id,
         text=text,
@@ -88,12 +102,20 @@ async def create_broadcast_message(
         filter_type=filter_type,
         sent_count=0,
         error_count=0,
+        blocked_count=0,
+        total_count=total_count,
+        status="queued",
+        recipient_ids=recipient_ids,
+        cursor_user_id=0,
     )
 
     session.add(broadcast)
     await session.commit()
     await session.refresh(broadcast)
 
+    # Let the main bot replicas track clicks on its buttons
+    await broadcast_callback_index.publish(broadcast)
+
     return broadcast
 
 
@@ -123,6 +145,22 @@ async def update_broadcast_stats(
         await session.commit()
 
 
+def _recipient_conditions(filter_type: str) -> list:
+    """WHERE conditions on User selecting the recipients of ``filter_type``."""
+    conditions = [User.is_banned == False, User.is_bot_blocked == False]
+    active_subscribers = select(Subscription.user_id).where(
+        and_(
+            Subscription.is_active == True,
+            Subscription.expires_at > datetime.now(timezone.utc)
+        )
+    )
+    if filter_type == "subscribed":
+        conditions.append(User.id.in_(active_subscribers))
+    elif filter_type != "all":  # free
+        conditions.append(User.id.notin_(active_subscribers))
+    return conditions
+
+
 async def get_recipients_count(session: AsyncSession, filter_type: str) -> int:
     """
     Get count of users matching filter.
@@ -134,42 +172,9 @@ async def get_recipients_count(session: AsyncSession, filter_type: str) -> int:
     Returns:
         Count of matching users
     """
-    if filter_type == "all":
-        result = await session.execute(
-            select(func.count(User.id)).where(
-                and_(User.is_banned == False, User.is_bot_blocked == False)
-            )
-        )
-    elif filter_type == "subscribed":
-        result = await session.execute(
-            select(func.count(User.id))
-            .join(Subscription, User.id == Subscription.user_id)
-            .where(
-                and_(
-                    User.is_banned == False,
-                    User.is_bot_blocked == False,
-                    Subscription.is_active == True,
-                    Subscription.expires_at > datetime.now(timezone.utc)
-                )
-            )
-        )
-    else:  # free
-        subquery = select(Subscription.user_id).where(
-            and_(
-                Subscription.is_active == True,
-                Subscription.expires_at > datetime.now(timezone.utc)
-            )
-        )
-        result = await session.execute(
-            select(func.count(User.id)).where(
-                and_(
-                    User.is_banned == False,
-                    User.is_bot_blocked == False,
-                    User.id.notin_(subquery)
-                )
-            )
-        )
-
+    result = await session.execute(
+        select(func.count(User.id)).where(*_recipient_conditions(filter_type))
+    )
     return result.scalar() or 0
 
 
@@ -184,45 +189,75 @@ async def get_recipients(session: AsyncSession, filter_type: str) -> list[User]:
     Returns:
         List of User instances
     """
-    if filter_type == "all":
-        result = await session.execute(
-            select(User).where(
-                and_(User.is_banned == False, User.is_bot_blocked == False)
-            )
-        )
-    elif filter_type == "subscribed":
-        result = await session.execute(
-            select(User)
-            .join(Subscription, User.id == Subscription.user_id)
-            .where(
-                and_(
-                    User.is_banned == False,
-                    User.is_bot_blocked == False,
-                    Subscription.is_active == True,
-                    Subscription.expires_at > datetime.now(timezone.utc)
-                )
-            )
-        )
-    else:  # free
-        subquery = select(Subscription.user_id).where(
-            and_(
-                Subscription.is_active == True,
-                Subscription.expires_at > datetime.now(timezone.utc)
-            )
-        )
-        result = await session.execute(
-            select(User).where(
-                and_(
-                    User.is_banned == False,
-                    User.is_bot_blocked == False,
-                    User.id.notin_(subquery)
-                )
-            )
-        )
-
+    result = await session.execute(
+        select(User).where(*_recipient_conditions(filter_type))
+    )
     return list(result.scalars().all())
 
 
+async def get_recipient_page(
+    session: AsyncSession,
+    broadcast: BroadcastMessage,
+    after_user_id: int,
+    limit: int,
+) -> list[tuple[int, int]]:
+    """
+    Next recipients of a broadcast, in users.id order (keyset pagination).
+
+    Only the IDs are loaded, and each page is a short query on the primary
+    key, so a broadcast can stop after any page and resume from its cursor.
+
+    Args:
+        session: Database session
+        broadcast: Broadcast being sent
+        after_user_id: Cursor - the last users.id already handled
+        limit: Page size
+
+    Returns:
+        List of (users.id, telegram_id)
+    """
+    if broadcast.recipient_ids is not None:
+        # Chosen by the admin, already filtered when the broadcast was queued
+        conditions = [User.id.in_(broadcast.recipient_ids)]
+    else:
+        conditions = _recipient_conditions(broadcast.filter_type)
+
+    result = await session.execute(
+        select(User.id, User.telegram_id)
+        .where(User.id > after_user_id, *conditions)
+        .order_by(User.id)
+        .limit(limit)
+    )
+    return [(row.id, row.telegram_id) for row in result.all()]
+
+
+# Admin actions on a broadcast: (statuses it applies to, resulting status)
+BROADCAST_ACTIONS = {
+    "pause": (("queued", "running"), "paused"),
+    "resume": (("paused",), "queued"),
+    "cancel": (("queued", "running", "paused"), "cancelled"),
+}
+
+
+async def control_broadcast(session: AsyncSession, broadcast_id: int, action: str) -> bool:
+    """
+    Pause, resume or cancel a broadcast.
+
+    Args:
+        session: Database session
+        broadcast_id: Broadcast message ID
+        action: One of BROADCAST_ACTIONS
+
+    Returns:
+        True if the broadcast's status changed
+    """
+    from_statuses, to_status = BROADCAST_ACTIONS[action]
+    changed = await BroadcastRepository(session).transition(broadcast_id, from_statuses, to_status)
+    if changed:
+        logger.info("broadcast_status_changed", broadcast_id=broadcast_id, action=action, status=to_status)
+    return changed
+
+
 async def record_broadcast_click(
     session: AsyncSession,
     broadcast_id: int,
@@ -267,6 +302,9 @@ async def get_broadcast_by_callback(
     """
     Find broadcast message containing button with given callback_data.
 
+    Loads and scans every recent broadcast; the click tracking hot path uses
+    broadcast_callback_index instead.
+
     Args:
         session: Database session
         callback_data: Callback data to search for
@@ -2,7 +2,6 @@
 Main bot instance initialization.
 """
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.redis import RedisStorage
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
@@ -22,9 +21,10 @@ bot = Bot(
 async def setup_bot() -> Dispatcher:
     """Setup bot (middlewares, handlers, etc.)."""
     from app.core.redis_client import redis_client
+    from app.bot.middlewares.context_loader import ContextLoaderMiddleware, PrefetchingRedisStorage
 
-    # Create dispatcher with Redis storage
-    redis_storage = RedisStorage(redis=redis_client.fsm_client)
+    # Create dispatcher with Redis storage (serves FSM reads prefetched per update)
+    redis_storage = PrefetchingRedisStorage(redis=redis_client.fsm_client)
     dp = Dispatcher(storage=redis_storage)
 
     from app.bot.middlewares.throttling import ThrottlingMiddleware
@@ -36,6 +36,9 @@ async def setup_bot() -> Dispatcher:
     # Register middlewares (order matters: throttling first to drop spam early)
     dp.message.middleware(ThrottlingMiddleware(rate_limit=0.5, max_burst=5))
     dp.callback_query.middleware(ThrottlingMiddleware(rate_limit=0.3, max_burst=8))
+    # One Redis round trip for the update's user-scoped keys, before anyone reads them
+    dp.message.middleware(ContextLoaderMiddleware())
+    dp.callback_query.middleware(ContextLoaderMiddleware())
     dp.message.middleware(AuthMiddleware())
     dp.callback_query.middleware(AuthMiddleware())
     dp.message.middleware(LoggingMiddleware())
@@ -102,6 +105,15 @@ async def setup_bot() -> Dispatcher:
     video_worker.start()
     logger.info("video_worker_started")
 
+    # Send broadcasts queued by the admin bot
+    from app.workers.broadcast_worker import BroadcastWorker
+    broadcast_worker = BroadcastWorker(bot)
+    broadcast_worker.start()
+
+    # Keep the broadcast button index (click tracking) loaded and in sync
+    from app.services.cache.broadcast_index import broadcast_callback_index
+    broadcast_callback_index.start()
+
     logger.info("bot_setup_completed")
 
     return dp
@@ -146,7 +146,7 @@ async def create_grok_video_job(
 
         async with async_session_maker() as session:
             sub_service = SubscriptionService(session)
-            await sub_service.rollback_tokens(user.id, estimated_tokens)
+            await sub_service.rollback_tokens(user.id, estimated_tokens, model_id=model_id)
 
         await progress_msg.edit_text(
             f"❌ Ошибка создания задачи: {str(e)[:200]}\n\nТокены возвращены."
@@ -20,6 +20,7 @@ from app.core.exceptions import InsufficientTokensError
 from app.core.billing_config import get_kling_tokens_cost, get_kling_api_model
 from app.bot.states.media import KlingSettings
 from app.bot.states.media import clear_state_preserve_settings
+from app.bot.utils.duplicate_guard import dedupe_generation
 from sqlalchemy import select
 
 logger = get_logger(__name__)
@@ -42,6 +43,11 @@ async def is_async_enabled() -> bool:
         return True  # Default enabled
 
 
+@dedupe_generation(
+    "kling",
+    inputs=("kling_images", "image_path"),
+    params=("kling_version", "kling_duration", "kling_aspect_ratio")
+)
 async def create_kling_video_job(
     message: Message,
     user: User,
@@ -170,7 +176,7 @@ async def create_kling_video_job(
         # Refund tokens via rollback (creates refund subscription to avoid wrong-sub bug)
         async with async_session_maker() as session:
             sub_service = SubscriptionService(session)
-            await sub_service.rollback_tokens(user.id, estimated_tokens)
+            await sub_service.rollback_tokens(user.id, estimated_tokens, model_id=model_id)
 
         await progress_msg.edit_text(
             f"❌ Ошибка создания задачи: {str(e)[:200]}\n\n"
@@ -6,6 +6,7 @@ import json
 from typing import Optional, Dict, Any
 from app.core.logger import get_logger
 from app.core.billing_config import get_text_model_billing
+from app.bot.utils.update_context import NOT_LOADED, get_update_context
 
 logger = get_logger(__name__)
 
@@ -22,6 +23,19 @@ def _get_redis_client():
     return redis_client
 
 
+def _remember_dialog(user_id: int, dialog: Optional[Dict[str, Any]]) -> None:
+    """Keep the running update's prefetched dialog in step with a write."""
+    context = get_update_context(user_id)
+    if context is not None:
+        context.dialog = dialog
+
+
+def _get_dialog_history():
+    """Get dialog history store lazily (it imports this module)."""
+    from app.services.cache.dialog_history import dialog_history
+    return dialog_history
+
+
 # Model ID to AI service mapping with new billing system
 MODEL_MAPPINGS = {
     340: {
@@ -249,7 +263,13 @@ async def set_active_dialog(user_id: int, dialog_id: int, history_enabled: bool
     try:
         redis = _get_redis_client()
         key = f"{DIALOG_KEY_PREFIX}{user_id}"
+        # Toggling settings re-sets the same dialog; only a model switch
+        # starts a new conversation
+        previous = await redis.get_json(key)
+        if not previous or previous.get("dialog_id") != dialog_id:
+            await _get_dialog_history().clear(user_id)
         await redis.set_json(key, dialog_data, expire=DIALOG_TTL_SECONDS)
+        _remember_dialog(user_id, dialog_data)
         logger.info(f"Active dialog set for user {user_id}: dialog_id={dialog_id}, model={model_config['name']}")
         return True
     except Exception as e:
@@ -276,6 +296,11 @@ def get_active_dialog(user_id: int) -> Optional[Dict[str, Any]]:
 
 async def get_active_dialog_async(user_id: int) -> Optional[Dict[str, Any]]:
     """Get active dialog for user from Redis (async version)."""
+    context = get_update_context(user_id)
+    if context is not None and context.dialog is not NOT_LOADED:
+        # Prefetched with its TTL already refreshed (ContextLoaderMiddleware)
+        return context.dialog
+
     try:
         redis = _get_redis_client()
         key = f"{DIALOG_KEY_PREFIX}{user_id}"
@@ -295,6 +320,8 @@ async def clear_active_dialog(user_id: int) -> bool:
         redis = _get_redis_client()
         key = f"{DIALOG_KEY_PREFIX}{user_id}"
         await redis.delete(key)
+        _remember_dialog(user_id, None)
+        await _get_dialog_history().clear(user_id)
         logger.info(f"Clearing active dialog for user {user_id}")
         return True
     except Exception as e:
@@ -317,6 +344,7 @@ async def update_dialog_settings(user_id: int, history_enabled: bool = None, sho
         redis = _get_redis_client()
         key = f"{DIALOG_KEY_PREFIX}{user_id}"
         await redis.set_json(key, dialog, expire=DIALOG_TTL_SECONDS)
+        _remember_dialog(user_id, dialog)
         return True
     except Exception as e:
         logger.error(f"Failed to update dialog settings in Redis: {e}")
@@ -325,6 +353,10 @@ async def update_dialog_settings(user_id: int, history_enabled: bool = None, sho
 
 async def has_active_dialog(user_id: int) -> bool:
     """Check if user has active dialog in Redis."""
+    context = get_update_context(user_id)
+    if context is not None and context.dialog is not NOT_LOADED:
+        return context.dialog is not None
+
     try:
         redis = _get_redis_client()
         key = f"{DIALOG_KEY_PREFIX}{user_id}"
@@ -332,3 +364,44 @@ async def has_active_dialog(user_id: int) -> bool:
     except Exception as e:
         logger.error(f"Failed to check active dialog in Redis: {e}")
         return False
+
+
+# Capability a fallback model needs for each message type
+_MESSAGE_CAPABILITIES = {
+    "photo": "supports_vision",
+    "voice": "supports_voice",
+    "document": "supports_files",
+}
+
+
+def get_fallback_dialog(dialog: Dict[str, Any], message_type: str) -> Optional[Dict[str, Any]]:
+    """
+    Dialog settings rerouted to the fallback model while the dialog's model
+    is unavailable (its circuit breaker is open, see app.core.circuit_breaker).
+
+    Returns None when the model is healthy, no fallback is configured or the
+    fallback can't handle the message type.
+    """
+    from app.core.circuit_breaker import circuit_breakers
+
+    fallback = circuit_breakers.fallback_for(dialog["provider"], dialog["model_id"])
+    if fallback is None:
+        return None
+
+    provider, model_id = fallback
+    capability = _MESSAGE_CAPABILITIES.get(message_type)
+    for config in MODEL_MAPPINGS.values():
+        if config["provider"] != provider or (model_id and config["model_id"] != model_id):
+            continue
+        if capability and not config.get(capability, False):
+            continue
+        return {
+            **dialog,
+            "model_name": config["name"],
+            "provider": provider,
+            "model_id": config["model_id"],
+            "billing_id": config.get("billing_id", config["model_id"]),
+            "cost_per_request": config["cost_per_request"],
+            "fallback_from": dialog["model_name"],
+        }
+    return None
@@ -3,89 +3,36 @@
 """
 Universal message handler for active dialogs.
 """
+import time
+from typing import Dict, List, Optional
+
 from aiogram import Router, F
 from aiogram.types import Message
 from aiogram.filters import Command
-from aiogram.enums import ParseMode
 
 from app.bot.handlers.dialog_context import (
     get_active_dialog_async,
+    get_fallback_dialog,
     clear_active_dialog,
     has_active_dialog
 )
 from app.bot.utils.menu import is_menu_text
+from app.bot.utils.stream_renderer import StreamingReply
 from app.database.models.user import User
 from app.database.database import async_session_maker
 from app.services.subscription.subscription_service import SubscriptionService
 from app.core.logger import get_logger
 from app.core.exceptions import InsufficientTokensError
+from app.services.ai.base import StreamCallback
+from app.services.ai.context_compactor import context_compactor
+from app.services.cache.dialog_history import dialog_history, trim_history, with_summary
 
 logger = get_logger(__name__)
 
 router = Router(name="dialog_handler")
 
-
-def escape_html_text(text: str) -> str:
-    """
-    Escape special HTML characters to prevent Telegram parse errors.
-
-    Args:
-        text: Raw text that may contain HTML special characters
-
-    Returns:
-        Text with HTML special characters escaped
-    """
-    if not text:
-        return ""
-
-    # Escape HTML special characters
-    text = text.replace("&", "&amp;")  # Must be first!
-    text = text.replace("<", "&lt;")
-    text = text.replace(">", "&gt;")
-
-    return text
-
-
-def split_long_message(text: str, max_length: int = 4000) -> list[str]:
-    """
-    Split long message into chunks that fit Telegram's message limit.
-    Telegram has a 4096 character limit, but we use 4000 to leave room for formatting.
-    """
-    if len(text) <= max_length:
-        return [text]
-
-    chunks = []
-    current_chunk = ""
-
-    # Split by paragraphs first
-    paragraphs = text.split('\n\n')
-
-    for paragraph in paragraphs:
-        # If adding this paragraph exceeds limit, save current chunk
-        if len(current_chunk) + len(paragraph) + 2 > max_length:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-                current_chunk = ""
-
-            # If single paragraph is too long, split by sentences
-            if len(paragraph) > max_length:
-                sentences = paragraph.split('. ')
-                for sentence in sentences:
-                    if len(current_chunk) + len(sentence) + 2 > max_length:
-                        if current_chunk:
-                            chunks.append(current_chunk.strip())
-                        current_chunk = sentence + '. '
-                    else:
-                        current_chunk += sentence + '. '
-            else:
-                current_chunk = paragraph + '\n\n'
-        else:
-            current_chunk += paragraph + '\n\n'
-
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
-
-    return chunks
+# Minimum seconds between queue position updates in the processing message
+QUEUE_POSITION_EDIT_INTERVAL = 3.0
 
 
 @router.message(Command("end"))
@@ -112,9 +59,7 @@ async def cmd_clear_history(message: Message, user: User):
         return
 
     dialog = await get_active_dialog_async(user.telegram_id)
-
-    # TODO: Clear dialog history in database
-    # For now just send confirmation
+    await dialog_history.clear(user.telegram_id)
 
     await message.answer(
         f"✅ История диалога с {dialog['model_name']} очищена.\n\n"
@@ -237,7 +182,13 @@ async def process_dialog_message(
     """Process message with AI model using new billing system."""
     from app.services.billing.billing_service import BillingService
     from app.core.billing_config import get_text_model_billing, ModelType
-    from app.core.ai_limiter import check_user_rate_limit, acquire_ai_slot, release_ai_slot
+    from app.core.ai_limiter import (
+        QUEUED_SLOT_TIMEOUT,
+        acquire_ai_slot,
+        check_user_rate_limit,
+        release_ai_slot,
+    )
+    from app.core.fair_queue import get_priority_class
 
     # Check user rate limit first
     allowed, wait_seconds = await check_user_rate_limit(user.telegram_id)
@@ -247,6 +198,17 @@ async def process_dialog_message(
         )
         return
 
+    # The dialog's model is failing: answer with its fallback model (billed as such)
+    fallback_dialog = get_fallback_dialog(dialog, message_type)
+    if fallback_dialog:
+        logger.info(
+            "dialog_model_fallback",
+            user_id=user.id,
+            model=dialog["model_id"],
+            fallback=fallback_dialog["model_id"]
+        )
+        dialog = fallback_dialog
+
     # For text models, estimate minimum cost for balance check
     # For other types, use fixed cost from dialog
     model_billing_id = dialog.get("billing_id", dialog["model_id"])
@@ -334,8 +296,28 @@ async def process_dialog_message(
     # Show processing message
     processing_msg = await message.answer("⏳ Обрабатываю запрос...")
 
-    # Acquire AI slot (limits concurrent requests)
-    slot_acquired = await acquire_ai_slot(timeout=30.0)
+    last_position_edit = 0.0
+
+    async def show_queue_position(position: int):
+        nonlocal last_position_edit
+        if time.monotonic() - last_position_edit < QUEUE_POSITION_EDIT_INTERVAL:
+            return
+        last_position_edit = time.monotonic()
+        try:
+            await processing_msg.edit_text(
+                f"⏳ Высокая нагрузка — вы {position}-й в очереди. Запрос выполнится автоматически."
+            )
+        except Exception:
+            pass
+
+    # Acquire AI slot: fair queue across users, then the provider's concurrency limit
+    slot_acquired = await acquire_ai_slot(
+        timeout=QUEUED_SLOT_TIMEOUT,
+        provider=dialog["provider"],
+        user_id=user.id,
+        priority=await get_priority_class(user.id),
+        on_position=show_queue_position
+    )
     if not slot_acquired:
         if fixed_cost_precharged:
             try:
@@ -357,6 +339,14 @@ async def process_dialog_message(
         )
         return
 
+    # Streams the answer into the processing message as it is generated
+    reply = StreamingReply(processing_msg, message)
+
+    # Outcome of the provider call, fed back into its concurrency limit
+    request_started = time.monotonic()
+    request_latency = None
+    request_error = None
+
     try:
         # Route to appropriate AI service based on provider
         provider = dialog["provider"]
@@ -365,6 +355,9 @@ async def process_dialog_message(
         # Get bot instance for voice file downloads
         from app.bot.bot_instance import bot as bot_instance
 
+        # Earlier turns of the conversation (trimmed to the model's budget later)
+        history = await dialog_history.get(user.telegram_id) if dialog["history_enabled"] else None
+
         if provider == "openai":
             response = await process_openai_message(
                 message_type=message_type,
@@ -372,8 +365,10 @@ async def process_dialog_message(
                 model_id=model_id,
                 caption=message.caption,
                 history_enabled=dialog["history_enabled"],
+                history=history,
                 system_prompt=dialog.get("system_prompt"),
-                bot_instance=bot_instance
+                bot_instance=bot_instance,
+                on_delta=reply.push
             )
         elif provider == "google":
             response = await process_google_message(
@@ -382,8 +377,10 @@ async def process_dialog_message(
                 model_id=model_id,
                 caption=message.caption,
                 history_enabled=dialog["history_enabled"],
+                history=history,
                 system_prompt=dialog.get("system_prompt"),
-                bot_instance=bot_instance
+                bot_instance=bot_instance,
+                on_delta=reply.push
             )
         elif provider == "anthropic":
             response = await process_anthropic_message(
@@ -392,8 +389,10 @@ async def process_dialog_message(
                 model_id=model_id,
                 caption=message.caption,
                 history_enabled=dialog["history_enabled"],
+                history=history,
                 system_prompt=dialog.get("system_prompt"),
-                bot_instance=bot_instance
+                bot_instance=bot_instance,
+                on_delta=reply.push
             )
         elif provider == "deepseek":
             response = await process_deepseek_message(
@@ -402,8 +401,10 @@ async def process_dialog_message(
                 model_id=model_id,
                 caption=message.caption,
                 history_enabled=dialog["history_enabled"],
+                history=history,
                 system_prompt=dialog.get("system_prompt"),
-                bot_instance=bot_instance
+                bot_instance=bot_instance,
+                on_delta=reply.push
             )
         elif provider == "perplexity":
             response = await process_perplexity_message(
@@ -412,8 +413,10 @@ async def process_dialog_message(
                 model_id=model_id,
                 caption=message.caption,
                 history_enabled=dialog["history_enabled"],
+                history=history,
                 system_prompt=dialog.get("system_prompt"),
-                bot_instance=bot_instance
+                bot_instance=bot_instance,
+                on_delta=reply.push
             )
         elif provider == "xai":
             response = await process_xai_message(
@@ -422,8 +425,10 @@ async def process_dialog_message(
                 model_id=model_id,
                 caption=message.caption,
                 history_enabled=dialog["history_enabled"],
+                history=history,
                 system_prompt=dialog.get("system_prompt"),
-                bot_instance=bot_instance
+                bot_instance=bot_instance,
+                on_delta=reply.push
             )
         else:
             response = {
@@ -431,6 +436,10 @@ async def process_dialog_message(
                 "error": f"Unknown provider: {provider}"
             }
 
+        request_latency = time.monotonic() - request_started
+        if not response["success"]:
+            request_error = response.get("error") or "failed"
+
         # Send response
         if response["success"]:
             # Calculate actual cost for text models
@@ -474,26 +483,38 @@ async def process_dialog_message(
                             ai_req.status = "completed"
                             await session.commit()
 
-            # Escape HTML special characters to prevent parse errors
-            response_text = escape_html_text(response["content"])
+            footer = ""
+
+            if dialog.get("fallback_from"):
+                footer += (
+                    f"\n\n⚠️ <i>{dialog['fallback_from']} временно недоступна — "
+                    f"ответила {dialog['model_name']}</i>"
+                )
 
             # Add cost info if enabled
             if dialog["show_costs"]:
-                response_text += f"\n\n💰 <i>Списано: {actual_cost:,} токенов</i>"
+                footer += f"\n\n💰 <i>Списано: {actual_cost:,} токенов</i>"
 
             # Add mock warning if using mock service
             if response.get("mock"):
-                response_text += "\n\n⚠️ <i>Используется тестовый режим (API ключи не настроены)</i>"
-
-            # Split long messages to fit Telegram's limit
-            message_chunks = split_long_message(response_text)
-
-            # Send first chunk as edit to processing message
-            await processing_msg.edit_text(message_chunks[0], parse_mode=ParseMode.HTML)
-
-            # Send remaining chunks as new messages
-            for chunk in message_chunks[1:]:
-                await message.answer(chunk, parse_mode=ParseMode.HTML)
+                footer += "\n\n⚠️ <i>Используется тестовый режим (API ключи не настроены)</i>"
+
+            # Final render: escaped text plus footer, split to fit Telegram's limit
+            await reply.finish(response["content"], footer)
+
+            if dialog["history_enabled"] and response.get("prompt"):
+                await dialog_history.append(user.telegram_id, response["prompt"], response["content"])
+                dialog_history.archive(
+                    user.id,
+                    user.telegram_id,
+                    dialog,
+                    response["prompt"],
+                    response["content"],
+                    prompt_tokens=response.get("prompt_tokens", 0),
+                    completion_tokens=response.get("completion_tokens", 0)
+                )
+                # Summarize the oldest turns once the conversation gets long
+                context_compactor.schedule(user.telegram_id, model_id)
 
             logger.info(
                 "dialog_message_processed",
@@ -514,7 +535,7 @@ async def process_dialog_message(
                 model=dialog.get("model_id"),
                 user_id=user.id
             )
-            await processing_msg.edit_text(f"❌ {user_message}")
+            await reply.fail(f"❌ {user_message}")
 
             if fixed_cost_precharged:
                 async with async_session_maker() as session:
@@ -537,6 +558,7 @@ async def process_dialog_message(
             )
 
     except Exception as e:
+        request_error = str(e)
         from app.core.error_handlers import format_user_error
         user_message = format_user_error(
             e,
@@ -544,7 +566,7 @@ async def process_dialog_message(
             model=dialog.get("model_id"),
             user_id=user.id
         )
-        await processing_msg.edit_text(f"❌ {user_message}")
+        await reply.fail(f"❌ {user_message}")
 
         if fixed_cost_precharged:
             try:
@@ -565,7 +587,12 @@ async def process_dialog_message(
         logger.error("dialog_message_exception", user_id=user.id, error=str(e), exc_info=True)
     finally:
         # Always release AI slot
-        release_ai_slot()
+        release_ai_slot(
+            dialog["provider"],
+            latency=request_latency,
+            error=request_error,
+            user_id=user.id
+        )
 
 
 async def transcribe_voice(voice_content, bot_instance) -> str:
@@ -614,14 +641,38 @@ async def transcribe_voice(voice_content, bot_instance) -> str:
             os.remove(tmp_path)
 
 
+async def _generate_reply(
+    service,
+    on_delta: Optional[StreamCallback],
+    history: Optional[List[Dict]] = None,
+    **kwargs
+):
+    """
+    Stream the reply into ``on_delta`` when given, otherwise wait for it whole.
+
+    ``history`` (stored turns) is trimmed to the model's budget and sent
+    before the prompt; the summary of compacted turns joins the system prompt.
+    """
+    if history:
+        kwargs["system_prompt"] = with_summary(kwargs.get("system_prompt"), history)
+        kwargs["history"] = trim_history(
+            history, kwargs["model"], kwargs["prompt"], kwargs.get("system_prompt")
+        )
+    if on_delta:
+        return await service.stream_text(on_delta=on_delta, **kwargs)
+    return await service.generate_text(**kwargs)
+
+
 async def process_openai_message(
     message_type: str,
     content: any,
     model_id: str,
     caption: str = None,
     history_enabled: bool = False,
+    history: Optional[List[Dict]] = None,
     system_prompt: str = None,
-    bot_instance=None
+    bot_instance=None,
+    on_delta: Optional[StreamCallback] = None
 ) -> dict:
     """Process message with OpenAI models."""
     from app.services.ai.openai_service import OpenAIService
@@ -630,17 +681,24 @@ async def process_openai_message(
         service = OpenAIService()
 
         if message_type == "text":
-            result = await service.generate_text(
+            prompt = content
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=model_id,
-                prompt=content,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         elif message_type == "voice":
             # Transcribe voice first, then send to model
-            transcribed_text = await transcribe_voice(content, bot_instance)
-            result = await service.generate_text(
+            prompt = await transcribe_voice(content, bot_instance)
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=model_id,
-                prompt=transcribed_text,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         elif message_type == "photo":
@@ -656,6 +714,7 @@ async def process_openai_message(
             "success": result.success,
             "content": result.content if result.success else result.error,
             "error": result.error if not result.success else None,
+            "prompt": prompt,
             "prompt_tokens": result.prompt_tokens,
             "completion_tokens": result.completion_tokens,
             "mock": result.metadata.get("mock", False)
@@ -673,8 +732,10 @@ async def process_google_message(
     model_id: str,
     caption: str = None,
     history_enabled: bool = False,
+    history: Optional[List[Dict]] = None,
     system_prompt: str = None,
-    bot_instance=None
+    bot_instance=None,
+    on_delta: Optional[StreamCallback] = None
 ) -> dict:
     """Process message with Google Gemini models."""
     from app.services.ai.google_service import GoogleService
@@ -683,16 +744,23 @@ async def process_google_message(
         service = GoogleService()
 
         if message_type == "text":
-            result = await service.generate_text(
+            prompt = content
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=model_id,
-                prompt=content,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         elif message_type == "voice":
-            transcribed_text = await transcribe_voice(content, bot_instance)
-            result = await service.generate_text(
+            prompt = await transcribe_voice(content, bot_instance)
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=model_id,
-                prompt=transcribed_text,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         else:
@@ -702,6 +770,7 @@ async def process_google_message(
             "success": result.success,
             "content": result.content if result.success else result.error,
             "error": result.error if not result.success else None,
+            "prompt": prompt,
             "prompt_tokens": result.prompt_tokens,
             "completion_tokens": result.completion_tokens,
             "mock": result.metadata.get("mock", False)
@@ -719,8 +788,10 @@ async def process_anthropic_message(
     model_id: str,
     caption: str = None,
     history_enabled: bool = False,
+    history: Optional[List[Dict]] = None,
     system_prompt: str = None,
-    bot_instance=None
+    bot_instance=None,
+    on_delta: Optional[StreamCallback] = None
 ) -> dict:
     """Process message with Anthropic Claude models."""
     from app.services.ai.anthropic_service import AnthropicService
@@ -729,16 +800,23 @@ async def process_anthropic_message(
         service = AnthropicService()
 
         if message_type == "text":
-            result = await service.generate_text(
+            prompt = content
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=model_id,
-                prompt=content,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         elif message_type == "voice":
-            transcribed_text = await transcribe_voice(content, bot_instance)
-            result = await service.generate_text(
+            prompt = await transcribe_voice(content, bot_instance)
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=model_id,
-                prompt=transcribed_text,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         else:
@@ -748,6 +826,7 @@ async def process_anthropic_message(
             "success": result.success,
             "content": result.content if result.success else result.error,
             "error": result.error if not result.success else None,
+            "prompt": prompt,
             "prompt_tokens": result.prompt_tokens,
             "completion_tokens": result.completion_tokens,
             "mock": result.metadata.get("mock", False)
@@ -765,8 +844,10 @@ async def process_deepseek_message(
     model_id: str,
     caption: str = None,
     history_enabled: bool = False,
+    history: Optional[List[Dict]] = None,
     system_prompt: str = None,
-    bot_instance=None
+    bot_instance=None,
+    on_delta: Optional[StreamCallback] = None
 ) -> dict:
     """Process message with DeepSeek models."""
     from app.services.ai.deepseek_service import DeepSeekService
@@ -783,16 +864,23 @@ async def process_deepseek_message(
         api_model = model_map.get(model_id, "deepseek-chat")
 
         if message_type == "text":
-            result = await service.generate_text(
+            prompt = content
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=api_model,
-                prompt=content,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         elif message_type == "voice":
-            transcribed_text = await transcribe_voice(content, bot_instance)
-            result = await service.generate_text(
+            prompt = await transcribe_voice(content, bot_instance)
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=api_model,
-                prompt=transcribed_text,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         else:
@@ -802,7 +890,10 @@ async def process_deepseek_message(
             "success": result.success,
             "content": result.content if result.success else result.error,
             "error": result.error if not result.success else None,
+            "prompt": prompt,
             "tokens_used": result.tokens_used if result.success else 0,
+            "prompt_tokens": result.prompt_tokens,
+            "completion_tokens": result.completion_tokens,
             "model": api_model
         }
     except Exception as e:
@@ -818,8 +909,10 @@ async def process_perplexity_message(
     model_id: str,
     caption: str = None,
     history_enabled: bool = False,
+    history: Optional[List[Dict]] = None,
     system_prompt: str = None,
-    bot_instance=None
+    bot_instance=None,
+    on_delta: Optional[StreamCallback] = None
 ) -> dict:
     """Process message with Perplexity models."""
     from app.services.ai.perplexity_service import PerplexityService
@@ -828,16 +921,23 @@ async def process_perplexity_message(
         service = PerplexityService()
 
         if message_type == "text":
-            result = await service.generate_text(
+            prompt = content
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=model_id,
-                prompt=content,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         elif message_type == "voice":
-            transcribed_text = await transcribe_voice(content, bot_instance)
-            result = await service.generate_text(
+            prompt = await transcribe_voice(content, bot_instance)
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=model_id,
-                prompt=transcribed_text,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         else:
@@ -847,6 +947,7 @@ async def process_perplexity_message(
             "success": result.success,
             "content": result.content if result.success else result.error,
             "error": result.error if not result.success else None,
+            "prompt": prompt,
             "prompt_tokens": result.prompt_tokens,
             "completion_tokens": result.completion_tokens,
             "mock": result.metadata.get("mock", False)
@@ -864,8 +965,10 @@ async def process_xai_message(
     model_id: str,
     caption: str = None,
     history_enabled: bool = False,
+    history: Optional[List[Dict]] = None,
     system_prompt: str = None,
-    bot_instance=None
+    bot_instance=None,
+    on_delta: Optional[StreamCallback] = None
 ) -> dict:
     """Process message with xAI Grok models."""
     from app.services.ai.xai_service import XAIService
@@ -874,16 +977,23 @@ async def process_xai_message(
         service = XAIService()
 
         if message_type == "text":
-            result = await service.generate_text(
+            prompt = content
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=model_id,
-                prompt=content,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         elif message_type == "voice":
-            transcribed_text = await transcribe_voice(content, bot_instance)
-            result = await service.generate_text(
+            prompt = await transcribe_voice(content, bot_instance)
+            result = await _generate_reply(
+                service,
+                on_delta,
+                history,
                 model=model_id,
-                prompt=transcribed_text,
+                prompt=prompt,
                 system_prompt=system_prompt
             )
         elif message_type == "document":
@@ -895,6 +1005,7 @@ async def process_xai_message(
             "success": result.success,
             "content": result.content if result.success else result.error,
             "error": result.error if not result.success else None,
+            "prompt": prompt,
             "prompt_tokens": result.prompt_tokens,
             "completion_tokens": result.completion_tokens,
             "mock": result.metadata.get("mock", False)
@@ -74,11 +74,14 @@ from app.bot.utils.notifications import (
     CONTENT_TYPES,
     MODEL_ACTIONS,
 )
+from app.bot.utils.duplicate_guard import dedupe_generation
+from app.bot.utils.generation_cache import CachedGeneration
 from app.database.models.user import User
 from app.database.database import async_session_maker
 from app.core.logger import get_logger
 from app.core.exceptions import InsufficientTokensError
 from app.core.cost_guard import cost_guard
+from app.core.circuit_breaker import circuit_breakers
 from app.core.billing_config import (
     get_image_model_billing,
     get_video_model_billing,
@@ -2352,6 +2355,7 @@ async def process_kling_prompt(message: Message, state: FSMContext, user: User):
     await process_kling_video(message, user, state)
 
 
+@dedupe_generation("veo", inputs=("image_path",), params=("duration",))
 async def process_veo_video(message: Message, user: User, state: FSMContext):
     """Process Veo video generation with cost-guard protection."""
     # Get state data (check if image was provided)
@@ -2737,6 +2741,11 @@ async def process_hailuo_video(message: Message, user: User, state: FSMContext):
     await clear_state_preserve_settings(state)
 
 
+@dedupe_generation(
+    "kling",
+    inputs=("kling_images", "image_path"),
+    params=("kling_version", "kling_duration", "kling_aspect_ratio")
+)
 async def process_kling_video(message: Message, user: User, state: FSMContext, is_effects: bool = False):
     """Process Kling AI video generation with configurable settings."""
     # Get state data (check if image was provided)
@@ -2882,6 +2891,11 @@ async def process_kling_video(message: Message, user: User, state: FSMContext, i
     await clear_state_preserve_settings(state)
 
 
+@dedupe_generation(
+    "kling_effects",
+    inputs=("kling_effect_images", "image_path"),
+    params=("kling_effect_id",)
+)
 async def process_kling_effects(message: Message, user: User, state: FSMContext):
     """Process Kling Effects video generation from photo(s)."""
     data = await state.get_data()
@@ -3307,7 +3321,10 @@ async def process_dalle_image(message: Message, user: User, state: FSMContext):
                 pass
 
         # Create variation
-        result = await dalle_service.create_variation(
+        cached = await CachedGeneration.lookup(
+            user.id, "openai", "dall-e-2", "", inputs=[reference_image_path], size="1024x1024"
+        )
+        result = cached.image_response() or await dalle_service.create_variation(
             image_path=reference_image_path,
             progress_callback=update_progress,
             model="dall-e-2",
@@ -3325,7 +3342,10 @@ async def process_dalle_image(message: Message, user: User, state: FSMContext):
                 pass
 
         # Generate image
-        result = await dalle_service.generate_image(
+        cached = await CachedGeneration.lookup(
+            user.id, "openai", "dall-e-3", prompt, size="1024x1024", quality="standard", style="vivid"
+        )
+        result = cached.image_response() or await dalle_service.generate_image(
             prompt=prompt,
             progress_callback=update_progress,
             model="dall-e-3",
@@ -3364,12 +3384,12 @@ async def process_dalle_image(message: Message, user: User, state: FSMContext):
         )
 
         # Send image
-        image_file = FSInputFile(result.image_path)
-        await message.answer_photo(
-            photo=image_file,
+        sent = await message.answer_photo(
+            photo=cached.media(result.image_path),
             caption=caption_text,
             reply_markup=builder.as_markup()
         )
+        await cached.remember(result.image_path, sent)
 
         # Clean up
         try:
@@ -3452,7 +3472,12 @@ async def process_gpt_image_2(message: Message, user: User, state: FSMContext):
             except Exception:
                 pass
 
-        result = await dalle_service.edit_image_gpt_image_2(
+        cached = await CachedGeneration.lookup(
+            user.id, "openai", model_name_api, prompt,
+            inputs=[main_image, *extra_images],
+            size=gi2_size, quality=gi2_quality, output_format=gi2_format
+        )
+        result = cached.image_response() or await dalle_service.edit_image_gpt_image_2(
             prompt=prompt,
             image_path=main_image,
             progress_callback=update_progress,
@@ -3471,7 +3496,11 @@ async def process_gpt_image_2(message: Message, user: User, state: FSMContext):
             except Exception:
                 pass
 
-        result = await dalle_service.generate_image(
+        cached = await CachedGeneration.lookup(
+            user.id, "openai", model_name_api, prompt,
+            size=gi2_size, quality=gi2_quality, output_format=gi2_format
+        )
+        result = cached.image_response() or await dalle_service.generate_image(
             prompt=prompt,
             progress_callback=update_progress,
             model=model_name_api,
@@ -3504,12 +3533,12 @@ async def process_gpt_image_2(message: Message, user: User, state: FSMContext):
             user_id=user.telegram_id
         )
 
-        image_file = FSInputFile(result.image_path)
-        await message.answer_photo(
-            photo=image_file,
+        sent = await message.answer_photo(
+            photo=cached.media(result.image_path),
             caption=caption_text,
             reply_markup=builder.as_markup()
         )
+        await cached.remember(result.image_path, sent)
 
         if reference_image_path:
             cleanup_temp_file(reference_image_path)
@@ -3537,6 +3566,13 @@ async def process_gpt_image_2(message: Message, user: User, state: FSMContext):
     await clear_state_preserve_settings(state)
 
 
+# Services that can stand in for Gemini image generation while its circuit
+# breaker is open (settings.fallback_models), with their default model
+IMAGE_FALLBACK_SERVICES = {
+    "nanobanana": (NanoBananaService, "gemini-2.5-flash-image"),
+}
+
+
 async def process_gemini_image(message: Message, user: User, state: FSMContext):
     """Process Gemini/Imagen image generation."""
     # Get state data
@@ -3566,8 +3602,17 @@ async def process_gemini_image(message: Message, user: User, state: FSMContext):
     # Send progress message
     progress_msg = await message.answer("🎨 Генерирую изображение...")
 
-    # Create service
-    gemini_service = GeminiImageService()
+    # Create service (the fallback while Gemini is failing)
+    image_service = GeminiImageService()
+    cache_provider, cache_model = "google", "gemini-image"
+    service_kwargs = {}
+    fallback = circuit_breakers.fallback_for("geminiimage")
+    if fallback and fallback[0] in IMAGE_FALLBACK_SERVICES:
+        service_class, default_model = IMAGE_FALLBACK_SERVICES[fallback[0]]
+        image_service = service_class()
+        cache_provider, cache_model = fallback[0], fallback[1] or default_model
+        service_kwargs["model"] = cache_model
+        logger.info("gemini_image_fallback", user_id=user.id, fallback=fallback[0], model=cache_model)
 
     # Progress callback
     async def update_progress(text: str):
@@ -3577,23 +3622,25 @@ async def process_gemini_image(message: Message, user: User, state: FSMContext):
             pass
 
     # Generate image
-    result = await gemini_service.generate_image(
+    cached = await CachedGeneration.lookup(user.id, cache_provider, cache_model, prompt, aspect_ratio="1:1")
+    result = cached.image_response() or await image_service.generate_image(
         prompt=prompt,
         progress_callback=update_progress,
-        aspect_ratio="1:1"
+        aspect_ratio="1:1",
+        **service_kwargs
     )
 
     if result.success:
         tokens_used = result.metadata.get("tokens_used", estimated_tokens)
 
         # Send image
-        image_file = FSInputFile(result.image_path)
-        await message.answer_photo(
-            photo=image_file,
+        sent = await message.answer_photo(
+            photo=cached.media(result.image_path),
             caption=f"✅ Изображение готово!\n\n"
                     f"Промпт: {prompt[:200]}\n"
                     f"Использовано токенов: {tokens_used:,}"
         )
+        await cached.remember(result.image_path, sent)
 
         # Clean up
         try:
@@ -3618,6 +3665,11 @@ async def process_gemini_image(message: Message, user: User, state: FSMContext):
     await clear_state_preserve_settings(state)
 
 
+@dedupe_generation(
+    "nano_banana",
+    inputs=("reference_image_path", "reference_image_paths", "nb_image_urls"),
+    params=("multi_images_count", "nano_is_pro", "nano_aspect_ratio")
+)
 async def process_nano_image(message: Message, user: User, state: FSMContext):
     """Process Nano Banana image generation via Kie.ai API.
 
@@ -4185,7 +4237,13 @@ async def process_kling_image(message: Message, user: User, state: FSMContext):
             pass
 
     # Generate image with user settings
-    result = await kling_service.generate_image(
+    cached = await CachedGeneration.lookup(
+        user.id, "kling", kling_image_settings.model, prompt,
+        inputs=[reference_image_path],
+        aspect_ratio=kling_image_settings.aspect_ratio,
+        resolution=kling_image_settings.resolution
+    )
+    result = cached.image_response() or await kling_service.generate_image(
         prompt=prompt,
         model=kling_image_settings.model,
         progress_callback=update_progress,
@@ -4221,12 +4279,12 @@ async def process_kling_image(message: Message, user: User, state: FSMContext):
         )
 
         try:
-            photo = FSInputFile(result.image_path)
-            await message.answer_photo(
-                photo=photo,
+            sent = await message.answer_photo(
+                photo=cached.media(result.image_path),
                 caption=info_text,
                 reply_markup=builder.as_markup()
             )
+            await cached.remember(result.image_path, sent)
 
         except Exception as send_error:
             logger.error("kling_image_send_failed", error=str(send_error))
@@ -4312,7 +4370,10 @@ async def process_recraft_image(message: Message, user: User, state: FSMContext)
             pass
 
     # Generate image
-    result = await recraft_service.generate_image(
+    cached = await CachedGeneration.lookup(
+        user.id, "recraft", "recraftv2", prompt, style="realistic_image", size="1024x1024"
+    )
+    result = cached.image_response() or await recraft_service.generate_image(
         prompt=prompt,
         progress_callback=update_progress,
         model="recraftv2",  # Use V2 for better price
@@ -4346,12 +4407,12 @@ async def process_recraft_image(message: Message, user: User, state: FSMContext)
         )
 
         try:
-            photo = FSInputFile(result.image_path)
-            await message.answer_photo(
-                photo=photo,
+            sent = await message.answer_photo(
+                photo=cached.media(result.image_path),
                 caption=info_text,
                 reply_markup=builder.as_markup()
             )
+            await cached.remember(result.image_path, sent)
 
         except Exception as send_error:
             logger.error("recraft_image_send_failed", error=str(send_error))
@@ -1,13 +1,19 @@
 """
 Authentication middleware for user registration and ban check.
+
+Known users are served from ``user_cache`` (in-process LRU + Redis), so most
+updates never touch Postgres here. Misses, new users and users flagged as
+having blocked the bot go through the full DB path, which refreshes the cache.
 """
-from typing import Callable, Dict, Any, Awaitable
+from typing import Callable, Dict, Any, Awaitable, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery, TelegramObject
 
 from app.database.database import async_session_maker
 from app.services.user.user_service import UserService
+from app.services.cache.user_cache import user_cache
+from app.services.user.activity_tracker import activity_tracker
 from app.core.logger import get_logger
 from app.core.exceptions import UserBannedError
 
@@ -37,7 +43,22 @@ class AuthMiddleware(BaseMiddleware):
         if not telegram_user:
             return await handler(event, data)
 
-        # Create database session
+        snapshot = await user_cache.get(telegram_user.id)
+        if snapshot is not None and not snapshot.is_bot_blocked:
+            if snapshot.is_banned:
+                logger.warning(
+                    "banned_user_blocked",
+                    telegram_id=telegram_user.id,
+                    reason=snapshot.ban_reason
+                )
+                await self._answer_banned(event, snapshot.ban_reason)
+                return  # Don't call handler
+
+            activity_tracker.touch(snapshot.id)
+            data["user"] = snapshot.to_user()
+            return await handler(event, data)
+
+        # Cache miss: create database session
         async with async_session_maker() as session:
             user_service = UserService(session)
 
@@ -80,9 +101,10 @@ class AuthMiddleware(BaseMiddleware):
                         telegram_id=telegram_user.id
                     )
 
+                await user_cache.set_user(user)
+
                 # Add user to handler data
                 data["user"] = user
-                data["user_service"] = user_service
 
             except UserBannedError as e:
                 # User is banned
@@ -92,18 +114,23 @@ class AuthMiddleware(BaseMiddleware):
                     reason=e.details.get("reason")
                 )
 
-                # Send ban message
-                if isinstance(event, Message):
-                    await event.answer(
-                        f"❌ Вы заблокированы.\n\nПричина: {e.details.get('reason', 'Не указана')}"
-                    )
-                elif isinstance(event, CallbackQuery):
-                    await event.answer(
-                        f"❌ Вы заблокированы: {e.details.get('reason', 'Не указана')}",
-                        show_alert=True
-                    )
+                # Cache the ban too, so a banned user spamming the bot
+                # doesn't hit the database on every update.
+                banned = await user_service.repository.get_by_telegram_id(telegram_user.id)
+                if banned:
+                    await user_cache.set_user(banned)
 
+                await self._answer_banned(event, e.details.get("reason"))
                 return  # Don't call handler
 
         # Call handler
         return await handler(event, data)
+
+    @staticmethod
+    async def _answer_banned(event: TelegramObject, reason: Optional[str]) -> None:
+        """Send ban message."""
+        reason = reason or "Не указана"
+        if isinstance(event, Message):
+            await event.answer(f"❌ Вы заблокированы.\n\nПричина: {reason}")
+        elif isinstance(event, CallbackQuery):
+            await event.answer(f"❌ Вы заблокированы: {reason}", show_alert=True)
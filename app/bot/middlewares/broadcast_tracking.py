@@ -8,8 +8,8 @@ from aiogram import BaseMiddleware
 from aiogram.types import CallbackQuery
 
 from app.core.logger import get_logger
-from app.database.database import async_session_maker
-from app.admin.services import get_broadcast_by_callback, record_broadcast_click
+from app.services.cache.broadcast_index import broadcast_callback_index
+from app.services.user.broadcast_click_tracker import broadcast_click_tracker
 
 logger = get_logger(__name__)
 
@@ -20,7 +20,9 @@ class BroadcastTrackingMiddleware(BaseMiddleware):
 
     This middleware is transparent - it doesn't interfere with normal
     callback handling, but logs clicks if the callback_data matches
-    a broadcast button.
+    a broadcast button. Matching uses the in-memory broadcast_callback_index
+    and clicks are written in bulk by broadcast_click_tracker, so no
+    database query runs here.
     """
 
     async def __call__(
@@ -31,57 +33,22 @@ class BroadcastTrackingMiddleware(BaseMiddleware):
     ) -> Any:
         """Process callback query and track if it's from broadcast."""
 
-        # Get callback data
-        callback_data = event.data
-
-        # Try to find broadcast with this callback_data
         try:
-            async with async_session_maker() as session:
-                broadcast = await get_broadcast_by_callback(session, callback_data)
-
-                if broadcast and broadcast.buttons:
-                    # Find button index
-                    button_index = -1
-                    button_text = ""
-
-                    for idx, button in enumerate(broadcast.buttons):
-                        if button.get("callback_data") == callback_data:
-                            button_index = idx
-                            button_text = button.get("text", "")
-                            break
+            button = broadcast_callback_index.lookup(event.data)
 
-                    if button_index >= 0:
-                        # Get user from data (set by auth middleware)
-                        user = data.get("user")
+            # Get user from data (set by auth middleware)
+            user = data.get("user")
 
-                        if user:
-                            # Record click (async, don't wait)
-                            try:
-                                async with async_session_maker() as click_session:
-                                    await record_broadcast_click(
-                                        session=click_session,
-                                        broadcast_id=broadcast.id,
-                                        user_id=user.id,
-                                        button_index=button_index,
-                                        button_text=button_text,
-                                        button_callback_data=callback_data
-                                    )
+            if button and user:
+                broadcast_click_tracker.record(user.id, button, event.data)
 
-                                logger.info(
-                                    "broadcast_click_tracked",
-                                    broadcast_id=broadcast.id,
-                                    user_id=user.id,
-                                    button_index=button_index,
-                                    button_text=button_text
-                                )
-                            except Exception as e:
-                                # Don't fail the request if tracking fails
-                                logger.error(
-                                    "broadcast_click_tracking_error",
-                                    error=str(e),
-                                    broadcast_id=broadcast.id,
-                                    user_id=user.id
-                                )
+                logger.info(
+                    "broadcast_click_tracked",
+                    broadcast_id=button.broadcast_id,
+                    user_id=user.id,
+                    button_index=button.index,
+                    button_text=button.text
+                )
 
         except Exception as e:
             # Don't fail the request if tracking fails
@@ -0,0 +1,141 @@
+"""
+Context loader middleware: user-scoped Redis reads of an update in one round trip.
+
+Handling a message used to take a separate Redis round trip for each of the
+user snapshot (AuthMiddleware), the active dialog (GET, then EXPIRE to slide
+its TTL), the FSM state and the FSM data. This middleware issues all of them
+at once, before the update reaches those readers:
+
+- main Redis, one pipeline: GETEX of the active dialog (slides its TTL in the
+  same command) and GET of the user snapshot unless it is cached in-process
+- FSM Redis (a separate database, hence a separate connection), one
+  pipeline: FSM state and data
+
+Both pipelines are sent concurrently. The values are bound for the update
+(app.bot.utils.update_context) and exposed as ``data["update_context"]``;
+the user snapshot primes ``user_cache``. FSM reads are served by
+:class:`PrefetchingRedisStorage`.
+
+Writes are not deferred: FSM and dialog writes go to Redis at once and update
+the prefetched copy. Holding them until the update ends would let the user's
+next message, arriving while a long generation runs, see the old state.
+"""
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Mapping
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.types import TelegramObject
+
+from app.bot.handlers.dialog_context import DIALOG_KEY_PREFIX, DIALOG_TTL_SECONDS
+from app.bot.utils.update_context import (
+    UpdateContext,
+    bind_update_context,
+    get_fsm_context,
+    release_update_context,
+)
+from app.core.logger import get_logger
+from app.core.redis_client import redis_client
+from app.services.cache.user_cache import user_cache
+
+logger = get_logger(__name__)
+
+
+class PrefetchingRedisStorage(RedisStorage):
+    """RedisStorage that serves reads prefetched by :class:`ContextLoaderMiddleware`."""
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        context = get_fsm_context(key)
+        if context is not None:
+            return context.fsm_state
+        return await super().get_state(key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        context = get_fsm_context(key)
+        if context is not None:
+            return self.json_loads(context.fsm_data) if context.fsm_data else {}
+        return await super().get_data(key)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await super().set_state(key, state)
+        context = get_fsm_context(key)
+        if context is not None:
+            context.fsm_state = state.state if isinstance(state, State) else state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await super().set_data(key, data)
+        context = get_fsm_context(key)
+        if context is not None:
+            context.fsm_data = self.json_dumps(data) if data else None
+
+
+class ContextLoaderMiddleware(BaseMiddleware):
+    """Prefetch the user-scoped Redis keys of an update (see module docstring)."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        telegram_user = getattr(event, "from_user", None)
+        if telegram_user is None:
+            return await handler(event, data)
+
+        context = UpdateContext(user_id=telegram_user.id)
+        await self._load(context, data.get("state"))
+        data["update_context"] = context
+
+        token = bind_update_context(context)
+        try:
+            return await handler(event, data)
+        finally:
+            release_update_context(token)
+
+    @staticmethod
+    async def _load(context: UpdateContext, state) -> None:
+        user_id = context.user_id
+        fetch_user = not user_cache.is_cached_locally(user_id)
+
+        async def load_main():
+            async with redis_client.client.pipeline(transaction=False) as pipe:
+                pipe.getex(f"{DIALOG_KEY_PREFIX}{user_id}", ex=DIALOG_TTL_SECONDS)
+                if fetch_user:
+                    pipe.get(user_cache.key(user_id))
+                return await pipe.execute()
+
+        async def load_fsm():
+            storage = state.storage
+            async with storage.redis.pipeline(transaction=False) as pipe:
+                pipe.get(storage.key_builder.build(state.key, "state"))
+                pipe.get(storage.key_builder.build(state.key, "data"))
+                return await pipe.execute()
+
+        with_fsm = state is not None and isinstance(state.storage, PrefetchingRedisStorage)
+        jobs = [load_main(), load_fsm()] if with_fsm else [load_main()]
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+
+        main = results[0]
+        if isinstance(main, BaseException):
+            logger.warning("update_context_prefetch_failed", user_id=user_id, error=str(main))
+        else:
+            try:
+                context.dialog = json.loads(main[0]) if main[0] else None
+            except ValueError:
+                # Left unloaded: the regular read path logs and handles it
+                pass
+            if fetch_user:
+                user_cache.prime(user_id, main[1])
+
+        if with_fsm:
+            fsm = results[1]
+            if isinstance(fsm, BaseException):
+                logger.warning("update_context_fsm_prefetch_failed", user_id=user_id, error=str(fsm))
+            else:
+                context.fsm_key = state.key
+                context.fsm_state, context.fsm_data = (
+                    value.decode("utf-8") if isinstance(value, bytes) else value for value in fsm
+                )
@@ -2,28 +2,26 @@
 Throttling middleware to protect from message spam and Telegram flood control.
 
 Limits how often a single user can trigger bot handlers.
-Uses Redis for distributed rate limiting.
+Uses the shared rate limiter (app.core.rate_limiter): Redis when available,
+bounded in-memory buckets otherwise.
 """
-import time
 from typing import Callable, Dict, Any, Awaitable, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery, TelegramObject
 
 from app.core.logger import get_logger
+from app.core.rate_limiter import RateLimit, rate_limiter
 
 logger = get_logger(__name__)
 
-# In-memory fallback when Redis is unavailable
-_user_timestamps: Dict[int, list[float]] = {}
-
 
 class ThrottlingMiddleware(BaseMiddleware):
     """
     Middleware that rate-limits messages per user.
 
     Drops excessive messages silently to prevent Telegram flood control errors.
-    Uses Redis when available, falls back to in-memory storage.
+    Messages and callback queries are limited separately.
     """
 
     def __init__(
@@ -42,6 +40,7 @@ class ThrottlingMiddleware(BaseMiddleware):
         self.rate_limit = rate_limit
         self.max_burst = max_burst
         self.cooldown_message = cooldown_message
+        self.limit = RateLimit(limit=1, period=rate_limit, burst=max_burst)
 
     async def __call__(
         self,
@@ -53,9 +52,11 @@ class ThrottlingMiddleware(BaseMiddleware):
         if user_id is None:
             return await handler(event, data)
 
-        throttled = await self._check_throttle_redis(user_id)
+        decision = await rate_limiter.check(
+            (f"throttle:{type(event).__name__.lower()}:{user_id}", self.limit)
+        )
 
-        if throttled:
+        if not decision.allowed:
             logger.warning(
                 "throttled_message",
                 user_id=user_id,
@@ -78,41 +79,3 @@ class ThrottlingMiddleware(BaseMiddleware):
         if isinstance(event, CallbackQuery) and event.from_user:
             return event.from_user.id
         return None
-
-    async def _check_throttle_redis(self, user_id: int) -> bool:
-        """Check throttle using Redis. Falls back to in-memory on error."""
-        try:
-            from app.core.redis_client import redis_client
-            redis = redis_client.client
-
-            now = time.time()
-            key = f"throttle:user:{user_id}"
-            window = self.rate_limit * self.max_burst
-
-            pipe = redis.pipeline()
-            pipe.zremrangebyscore(key, 0, now - window)
-            pipe.zadd(key, {str(now): now})
-            pipe.zcard(key)
-            pipe.expire(key, int(window) + 1)
-            results = await pipe.execute()
-
-            count = results[2]
-            return count > self.max_burst
-
-        except Exception:
-            return self._check_throttle_memory(user_id)
-
-    def _check_throttle_memory(self, user_id: int) -> bool:
-        """In-memory fallback throttle check."""
-        now = time.time()
-        window = self.rate_limit * self.max_burst
-
-        if user_id not in _user_timestamps:
-            _user_timestamps[user_id] = []
-
-        timestamps = _user_timestamps[user_id]
-        # Remove old timestamps
-        _user_timestamps[user_id] = [t for t in timestamps if now - t < window]
-        _user_timestamps[user_id].append(now)
-
-        return len(_user_timestamps[user_id]) > self.max_burst
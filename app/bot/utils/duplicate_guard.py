@@ -0,0 +1,84 @@
+"""
+Duplicate protection for paid generation flows.
+
+A double tap on a confirm button, a photo re-sent with the same caption or a
+prompt sent twice reaches the bot as separate updates, possibly on different
+workers. Wrapped in :func:`dedupe_generation`, a ``process_*`` flow runs once
+per request; an identical request attaches to the running one (see
+``app.core.single_flight``) and only gets a short notice, without a second
+charge:
+
+    @dedupe_generation("veo", inputs=("image_path",), params=("duration",))
+    async def process_veo_video(message, user, state): ...
+
+Requests are identical when user, flow, prompt, the listed state parameters,
+the call arguments and the contents of the listed input files match (two
+uploads of the same photo are the same input).
+"""
+import inspect
+from typing import Optional, Sequence
+
+from aiogram.types import Message
+
+from app.core.cost_guard import cost_guard
+from app.core.logger import get_logger
+from app.core.single_flight import Flight, single_flight
+
+logger = get_logger(__name__)
+
+DUPLICATE_RUNNING_TEXT = (
+    "⏳ Такой же запрос уже выполняется — дождитесь результата.\n"
+    "Повторно токены не списываются."
+)
+DUPLICATE_DONE_TEXT = (
+    "ℹ️ Такой же запрос только что был принят — повторно он не запускается.\n"
+    "Повторно токены не списываются."
+)
+
+
+async def _notify_duplicate(flight: Flight, message: Message, *args, **kwargs) -> None:
+    try:
+        await message.answer(DUPLICATE_DONE_TEXT if flight.done else DUPLICATE_RUNNING_TEXT)
+    except Exception as e:
+        logger.warning("duplicate_notice_failed", error=str(e))
+
+
+def dedupe_generation(flow: str, inputs: Sequence[str] = (), params: Sequence[str] = ()):
+    """
+    Decorator for ``process_*(message, user, state, ...)`` generation flows.
+
+    Args:
+        flow: Flow name (part of the request identity)
+        inputs: State fields with input files (a path, URL or list of them)
+        params: State fields with generation settings
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        async def request_key(*args, **kwargs) -> Optional[str]:
+            call = signature.bind(*args, **kwargs)
+            call.apply_defaults()
+            arguments = dict(call.arguments)
+            message = arguments.pop("message")
+            user = arguments.pop("user")
+            data = await arguments.pop("state").get_data()
+
+            files = []
+            for field in inputs:
+                value = data.get(field)
+                files.extend(value if isinstance(value, list) else [value])
+            try:
+                input_hashes = await cost_guard.hash_input_files(files)
+            except OSError as e:
+                logger.warning("duplicate_guard_input_hash_failed", flow=flow, error=str(e))
+                return None
+
+            prompt = data.get("photo_caption_prompt") or message.text or message.caption or ""
+            options = {field: data.get(field) for field in params}
+            request_hash = cost_guard.generate_request_hash(
+                user.id, flow, prompt, input_hashes=input_hashes, **options, **arguments
+            )
+            return f"generation:{flow}:{user.id}:{request_hash}"
+
+        return single_flight.guard(request_key, on_duplicate=_notify_duplicate)(func)
+    return decorator
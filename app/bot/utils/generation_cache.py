@@ -0,0 +1,117 @@
+"""
+Reuse of identical image/video generations.
+
+Double submits, "create more" with the same prompt and re-sends after a
+Telegram failure used to run the provider job again. With
+``settings.enable_generation_cache`` on, a flow looks its request up first:
+
+    cached = await CachedGeneration.lookup(user.id, "openai", "dall-e-3", prompt, size=size)
+    result = cached.image_response() or await service.generate_image(...)
+    sent = await message.answer_photo(photo=cached.media(result.image_path), ...)
+    await cached.remember(result.image_path, sent)
+
+Entries live in ``CostGuard``'s result cache (Redis, TTL + LRU eviction),
+keyed by a canonical hash of user, provider, model, prompt, parameters and
+input file contents. An entry stores the result file path and the Telegram
+``file_id`` of the sent message, so a hit neither calls the provider nor
+uploads the file again. Entries whose file is gone count as misses.
+"""
+import os
+from typing import Iterable, Optional, Union
+
+from aiogram.types import FSInputFile, Message
+
+from app.core.config import settings
+from app.core.cost_guard import cost_guard
+from app.core.logger import get_logger
+from app.services.image.base import ImageResponse
+from app.services.video.base import VideoResponse
+
+logger = get_logger(__name__)
+
+
+def _sent_file_id(message: Optional[Message]) -> Optional[str]:
+    """``file_id`` of the photo, video or document in a sent message."""
+    if message is None:
+        return None
+    if message.photo:
+        return message.photo[-1].file_id
+    if message.video:
+        return message.video.file_id
+    if message.document:
+        return message.document.file_id
+    return None
+
+
+class CachedGeneration:
+    """Cache lookup for one generation request (see module docstring)."""
+
+    def __init__(self, key: Optional[str] = None, entry: Optional[dict] = None):
+        self.key = key
+        self.entry = entry
+
+    @classmethod
+    async def lookup(
+        cls,
+        user_id: int,
+        provider: str,
+        model: str,
+        prompt: str,
+        inputs: Iterable[Optional[str]] = (),
+        **params
+    ) -> "CachedGeneration":
+        """
+        Look a request up; never raises.
+
+        Args:
+            user_id: User ID (results are not shared between users)
+            provider: Provider name
+            model: Model ID
+            prompt: Prompt
+            inputs: Input files (local paths are hashed by content) or URLs
+            **params: Generation parameters that change the result
+        """
+        key = await cost_guard.generation_cache_key(user_id, provider, model, prompt, inputs, **params)
+        if key is None:
+            return cls()
+
+        max_age = settings.generation_cache_ttl_minutes * 60
+        entry = await cost_guard.check_cached_result(key, max_age=max_age)
+        if entry and not os.path.exists(entry.get("file_path") or ""):
+            entry = None
+
+        if entry:
+            logger.info("generation_cache_hit", user_id=user_id, provider=provider, model=model)
+        return cls(key, entry)
+
+    @property
+    def hit(self) -> bool:
+        return self.entry is not None
+
+    def image_response(self) -> Optional[ImageResponse]:
+        """The cached result as a provider response, or None on a miss."""
+        if not self.hit:
+            return None
+        return ImageResponse(success=True, image_path=self.entry["file_path"], metadata={"cached": True})
+
+    def video_response(self) -> Optional[VideoResponse]:
+        """The cached result as a provider response, or None on a miss."""
+        if not self.hit:
+            return None
+        return VideoResponse(success=True, video_path=self.entry["file_path"], metadata={"cached": True})
+
+    def media(self, file_path: str) -> Union[str, FSInputFile]:
+        """What to send: the cached ``file_id`` on a hit, otherwise the file."""
+        if self.hit and self.entry.get("file_id") and self.entry["file_path"] == file_path:
+            return self.entry["file_id"]
+        return FSInputFile(file_path)
+
+    async def remember(self, file_path: str, sent: Optional[Message] = None) -> None:
+        """Store a fresh result (no-op on hits and with the cache off)."""
+        if self.key is None or self.hit:
+            return
+        await cost_guard.cache_result(
+            self.key,
+            {"file_path": file_path, "file_id": _sent_file_id(sent)},
+            ttl=settings.generation_cache_ttl_minutes * 60
+        )
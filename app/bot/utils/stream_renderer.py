@@ -0,0 +1,152 @@
+"""
+Live rendering of streamed AI replies into Telegram messages.
+
+Tokens arrive far faster than Telegram allows message edits (about one per
+second per chat), so :class:`StreamingReply` buffers them and edits the
+message only when the chat's edit slot is free; whatever arrived in between
+goes out with the next edit. Text is escaped as a whole on every render, so a
+partial reply is always valid HTML. When a reply outgrows one message the
+current message is finalized at a paragraph/sentence boundary and the rest
+continues in a new one, like split_long_message does for complete replies.
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+
+from app.bot.utils.text_utils import escape_html_text, split_long_message
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Minimum seconds between edits/sends in one chat while streaming
+STREAM_EDIT_INTERVAL = 1.0
+# Raw characters per message (Telegram limit is 4096 after entity parsing)
+STREAM_MAX_LENGTH = 4000
+# Shown after the text while the reply is still being generated
+STREAM_CURSOR = " ▌"
+
+# chat_id -> monotonic time the chat may be edited again (shared by all
+# replies in the chat)
+_next_edit_at: Dict[int, float] = {}
+_PRUNE_THRESHOLD = 10000
+
+
+def _cut_point(text: str, max_length: int) -> int:
+    """Where to end a full message: the last paragraph, line, sentence or word break."""
+    for separator in ("\n\n", "\n", ". ", " "):
+        index = text.rfind(separator, max_length // 2, max_length)
+        if index != -1:
+            return index + len(separator)
+    return max_length
+
+
+class StreamingReply:
+    """Renders a streamed reply into a placeholder message (and follow-ups)."""
+
+    def __init__(
+        self,
+        placeholder: Message,
+        reply_to: Message,
+        interval: float = STREAM_EDIT_INTERVAL,
+        max_length: int = STREAM_MAX_LENGTH
+    ):
+        """
+        Args:
+            placeholder: Message to fill first ("⏳ Обрабатываю запрос...")
+            reply_to: User message that follow-up messages answer
+            interval: Minimum seconds between edits in the chat
+            max_length: Raw characters per message
+        """
+        self._message: Optional[Message] = placeholder
+        self._reply_to = reply_to
+        self._chat_id = placeholder.chat.id
+        self._interval = interval
+        self._max_length = max_length
+        # Raw text of the message being filled and what it currently shows
+        self._segment = ""
+        self._shown: Optional[str] = None
+        self._streamed = False
+
+    async def push(self, delta: str) -> None:
+        """Add streamed text; the message is updated when the chat's edit slot is free."""
+        self._streamed = True
+        self._segment += delta
+
+        while len(self._segment) > self._max_length:
+            cut = _cut_point(self._segment, self._max_length)
+            head, self._segment = self._segment[:cut].rstrip(), self._segment[cut:].lstrip()
+            # Finalize the full message; the rest goes to a new one
+            await self._render(escape_html_text(head), wait=True)
+            self._message = None
+            self._shown = None
+
+        if self._segment.strip():
+            await self._render(escape_html_text(self._segment) + STREAM_CURSOR, wait=False)
+
+    async def finish(self, content: str, footer: str = "") -> None:
+        """
+        Show the final reply.
+
+        Args:
+            content: Full reply text (used when nothing was streamed)
+            footer: HTML appended to the last message (costs, warnings)
+        """
+        text = self._segment if self._streamed else content
+        chunks = split_long_message(escape_html_text(text) + footer)
+        await self._render(chunks[0], wait=True)
+        for chunk in chunks[1:]:
+            self._message = None
+            await self._render(chunk, wait=True)
+
+    async def fail(self, text: str) -> None:
+        """Replace the message being filled with an error text."""
+        await self._render(text, wait=True, html_mode=False)
+
+    async def _render(self, html: str, wait: bool, html_mode: bool = True) -> None:
+        """
+        Show ``html`` in the current message (or a new one).
+
+        With ``wait`` the call sleeps for the chat's edit slot, otherwise it
+        skips the update when the slot is taken.
+        """
+        if not html or html == self._shown:
+            return
+        # Plain texts keep the bot's default parse mode, as before streaming
+        send_kwargs = {"parse_mode": ParseMode.HTML} if html_mode else {}
+
+        for _ in range(2):
+            delay = _next_edit_at.get(self._chat_id, 0.0) - time.monotonic()
+            if delay > 0:
+                if not wait:
+                    return
+                await asyncio.sleep(delay)
+            self._reserve_slot(self._interval)
+
+            try:
+                if self._message is None:
+                    self._message = await self._reply_to.answer(html, **send_kwargs)
+                else:
+                    await self._message.edit_text(html, **send_kwargs)
+                self._shown = html
+                return
+            except TelegramRetryAfter as e:
+                self._reserve_slot(e.retry_after)
+                if not wait:
+                    return
+            except TelegramBadRequest as e:
+                if "message is not modified" in str(e):
+                    self._shown = html
+                else:
+                    logger.warning("stream_render_failed", chat_id=self._chat_id, error=str(e))
+                return
+
+    def _reserve_slot(self, seconds: float) -> None:
+        if len(_next_edit_at) > _PRUNE_THRESHOLD:
+            now = time.monotonic()
+            for chat_id in [c for c, at in _next_edit_at.items() if at < now]:
+                del _next_edit_at[chat_id]
+        _next_edit_at[self._chat_id] = time.monotonic() + seconds
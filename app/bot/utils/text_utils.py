@@ -0,0 +1,66 @@
+"""
+Text helpers for Telegram messages.
+"""
+
+
+def escape_html_text(text: str) -> str:
+    """
+    Escape special HTML characters to prevent Telegram parse errors.
+
+    Args:
+        text: Raw text that may contain HTML special characters
+
+    Returns:
+        Text with HTML special characters escaped
+    """
+    if not text:
+        return ""
+
+    # Escape HTML special characters
+    text = text.replace("&", "&amp;")  # Must be first!
+    text = text.replace("<", "&lt;")
+    text = text.replace(">", "&gt;")
+
+    return text
+
+
+def split_long_message(text: str, max_length: int = 4000) -> list[str]:
+    """
+    Split long message into chunks that fit Telegram's message limit.
+    Telegram has a 4096 character limit, but we use 4000 to leave room for formatting.
+    """
+    if len(text) <= max_length:
+        return [text]
+
+    chunks = []
+    current_chunk = ""
+
+    # Split by paragraphs first
+    paragraphs = text.split('\n\n')
+
+    for paragraph in paragraphs:
+        # If adding this paragraph exceeds limit, save current chunk
+        if len(current_chunk) + len(paragraph) + 2 > max_length:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+                current_chunk = ""
+
+            # If single paragraph is too long, split by sentences
+            if len(paragraph) > max_length:
+                sentences = paragraph.split('. ')
+                for sentence in sentences:
+                    if len(current_chunk) + len(sentence) + 2 > max_length:
+                        if current_chunk:
+                            chunks.append(current_chunk.strip())
+                        current_chunk = sentence + '. '
+                    else:
+                        current_chunk += sentence + '. '
+            else:
+                current_chunk = paragraph + '\n\n'
+        else:
+            current_chunk += paragraph + '\n\n'
+
+    if current_chunk.strip():
+        chunks.append(current_chunk.strip())
+
+    return chunks
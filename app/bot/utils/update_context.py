@@ -0,0 +1,64 @@
+"""
+User-scoped Redis values prefetched for the update being handled.
+
+``ContextLoaderMiddleware`` reads the keys an update usually needs (active
+dialog, user snapshot, FSM state and data) in one round trip and binds them
+here for the rest of the update. Readers such as ``get_active_dialog_async``
+and the FSM storage serve from this copy instead of going to Redis again;
+writers update it, so later reads in the same update see their changes.
+
+The copy is only used while its update runs: background tasks started by a
+handler inherit the context variable but go back to Redis.
+"""
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Value of a field that was not prefetched
+NOT_LOADED = object()
+
+
+@dataclass
+class UpdateContext:
+    """Prefetched values of one update (``NOT_LOADED`` when not fetched)."""
+    user_id: int
+    # Active dialog (dict) or None
+    dialog: Any = NOT_LOADED
+    # FSM storage key the state and data belong to
+    fsm_key: Any = None
+    # FSM state name or None
+    fsm_state: Any = NOT_LOADED
+    # FSM data as stored (JSON text) or None
+    fsm_data: Any = NOT_LOADED
+    # Cleared when the update is done
+    active: bool = True
+
+
+_current: ContextVar[Optional[UpdateContext]] = ContextVar("update_context", default=None)
+
+
+def bind_update_context(context: UpdateContext) -> Token:
+    return _current.set(context)
+
+
+def release_update_context(token: Token) -> None:
+    context = _current.get()
+    if context is not None:
+        context.active = False
+    _current.reset(token)
+
+
+def get_update_context(user_id: int) -> Optional[UpdateContext]:
+    """The running update's prefetched values, if it belongs to ``user_id``."""
+    context = _current.get()
+    if context is None or not context.active or context.user_id != user_id:
+        return None
+    return context
+
+
+def get_fsm_context(key: Any) -> Optional[UpdateContext]:
+    """The running update's prefetched values, if it has the FSM record of ``key``."""
+    context = _current.get()
+    if context is None or not context.active or context.fsm_key != key or context.fsm_state is NOT_LOADED:
+        return None
+    return context
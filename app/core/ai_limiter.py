@@ -1,61 +1,294 @@
 """
 AI request limiter for controlling concurrent requests and preventing overload.
+
+Concurrency is limited per provider, so a slow provider (Veo, Midjourney) can
+only exhaust its own slots and text chat keeps its throughput. Each provider
+has an :class:`AdaptiveLimiter` whose limit follows AIMD: it grows by one slot
+per "window" of successful requests while the provider is saturated, and is
+cut by ``LIMIT_BACKOFF_RATIO`` on 429/5xx/timeouts or when requests get slower
+than the provider's latency target. Limits and queue depths are exposed via
+:func:`limiter_stats` (system metrics, "ai_limits").
+
+Requests made for a user queue fairly across users and replicas before they
+reach the limiter (see app.core.fair_queue).
 """
 import asyncio
+import math
+import re
 import time
-from typing import Optional
+from collections import deque
+from typing import Deque, Dict, Optional
 from functools import wraps
 
+from app.core.fair_queue import PositionCallback, fair_queue
 from app.core.logger import get_logger
 from app.core.config import settings
+from app.core.rate_limiter import RateLimit, rate_limiter
 
 logger = get_logger(__name__)
 
-# Global semaphore for limiting concurrent AI requests
-# This prevents overloading external AI services and our own resources
-MAX_CONCURRENT_AI_REQUESTS = 50
-_ai_semaphore: Optional[asyncio.Semaphore] = None
+# Concurrency per provider: initial, minimum and maximum limit, and latency
+# (seconds) above which a request counts as a sign of overload (None = off).
+# Limits are per process.
+PROVIDER_LIMITS = {
+    "openai": {"initial": 20, "minimum": 4, "maximum": 50, "latency_target": 90},
+    "anthropic": {"initial": 10, "minimum": 2, "maximum": 30, "latency_target": 90},
+    "google": {"initial": 10, "minimum": 2, "maximum": 30, "latency_target": 90},
+    "deepseek": {"initial": 10, "minimum": 2, "maximum": 30, "latency_target": 120},
+    "perplexity": {"initial": 5, "minimum": 1, "maximum": 15, "latency_target": 90},
+    "xai": {"initial": 10, "minimum": 2, "maximum": 30, "latency_target": 90},
+    # Gemini execution layer (app.services.gemini), by operation kind
+    "gemini": {"initial": 5, "minimum": 1, "maximum": 15, "latency_target": 90},
+    "gemini_image": {"initial": 3, "minimum": 1, "maximum": 8, "latency_target": 180},
+    "veo": {"initial": 2, "minimum": 1, "maximum": 5, "latency_target": None},
+    "default": {"initial": 10, "minimum": 2, "maximum": 30, "latency_target": None},
+}
+
+# Multiplicative decrease on overload, and at most one decrease per cooldown
+# (a burst of 429s from one overload must not drive the limit to the minimum)
+LIMIT_BACKOFF_RATIO = 0.7
+LIMIT_DECREASE_COOLDOWN = 5.0
+
+# Errors that mean the provider is overloaded (429, 5xx, timeouts)
+_OVERLOAD_ERROR = re.compile(
+    r"\b(429|5\d\d)\b|rate.?limit|too many requests|resource_exhausted|"
+    r"overloaded|timed? ?out|unavailable",
+    re.IGNORECASE,
+)
+
+# Slot wait for requests that show the user their queue position
+QUEUED_SLOT_TIMEOUT = 120.0
 
 # Per-user rate limiting
 USER_REQUESTS_PER_MINUTE = 10  # Max requests per user per minute
-_user_request_times: dict = {}  # In-memory fallback, Redis is preferred
-
-
-def get_ai_semaphore() -> asyncio.Semaphore:
-    """Get or create global AI semaphore."""
-    global _ai_semaphore
-    if _ai_semaphore is None:
-        _ai_semaphore = asyncio.Semaphore(MAX_CONCURRENT_AI_REQUESTS)
-    return _ai_semaphore
-
-
-async def acquire_ai_slot(timeout: float = 30.0) -> bool:
+USER_RATE_LIMIT = RateLimit(limit=USER_REQUESTS_PER_MINUTE, period=60)
+
+
+def is_overload_error(error: Optional[str]) -> bool:
+    """Whether an error text says the provider is overloaded."""
+    return bool(error) and bool(_OVERLOAD_ERROR.search(error))
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one provider with a FIFO wait queue."""
+
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        latency_target: Optional[float] = None
+    ):
+        self.name = name
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.completed = 0
+        self.throttled = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, timeout: Optional[float] = 30.0) -> bool:
+        """
+        Take a slot, waiting in line up to ``timeout`` seconds (None = no limit).
+
+        Returns:
+            True if slot acquired, False if timeout
+        """
+        if self.in_flight < int(self.limit) and not self.queued:
+            self.in_flight += 1
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            # The slot may have been handed over just as the wait timed out
+            if waiter.done() and not waiter.cancelled():
+                return True
+            self.rejected += 1
+            logger.warning(
+                "ai_slot_timeout",
+                provider=self.name,
+                timeout=timeout,
+                concurrent_limit=int(self.limit),
+                queued=self.queued
+            )
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot while being cancelled: pass it on unused
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters and waiter.done():
+                self._waiters.remove(waiter)
+
+    def release(self, latency: Optional[float] = None, error: Optional[str] = None) -> None:
+        """
+        Return a slot and feed the request's outcome into the limit.
+
+        Args:
+            latency: Request duration in seconds (successful requests)
+            error: Error text of a failed request
+        """
+        if self.in_flight <= 0:
+            return
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+        self.record(latency=latency, error=error, saturated=saturated)
+        self._wake()
+
+    def record(
+        self,
+        latency: Optional[float] = None,
+        error: Optional[str] = None,
+        saturated: bool = True
+    ) -> None:
+        """Adjust the limit: additive increase on success, multiplicative decrease on overload."""
+        if error is not None:
+            if is_overload_error(error):
+                self.throttled += 1
+                self._decrease("overload")
+            return
+
+        self.completed += 1
+        if self.latency_target is not None and latency is not None and latency > self.latency_target:
+            self._decrease("slow")
+        elif saturated and self.limit < self.maximum:
+            # +1 slot after about `limit` successes at full concurrency
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "completed": self.completed,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+        }
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < LIMIT_DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        previous = int(self.limit)
+        self.limit = max(float(self.minimum), self.limit * LIMIT_BACKOFF_RATIO)
+        logger.warning(
+            "ai_limit_decreased",
+            provider=self.name,
+            reason=reason,
+            previous=previous,
+            limit=int(self.limit)
+        )
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(True)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(provider: Optional[str] = None) -> AdaptiveLimiter:
+    """Get or create the limiter of a provider (unknown providers share "default")."""
+    name = provider if provider in PROVIDER_LIMITS else "default"
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limiter = AdaptiveLimiter(name, **PROVIDER_LIMITS[name])
+        _limiters[name] = limiter
+    return limiter
+
+
+def limiter_stats() -> Dict[str, Dict[str, int]]:
+    """Current limits, in-flight requests and queue depths by provider."""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
+
+
+async def acquire_ai_slot(
+    timeout: float = 30.0,
+    provider: Optional[str] = None,
+    user_id: Optional[int] = None,
+    priority: Optional[str] = None,
+    on_position: Optional[PositionCallback] = None
+) -> bool:
     """
     Acquire a slot for AI request with timeout.
 
+    Requests made for a user first wait their turn in the weighted fair queue
+    (app.core.fair_queue), then take a slot of the provider's limiter.
+
     Args:
         timeout: Maximum time to wait for a slot (seconds)
+        provider: Provider the request goes to (selects the limiter)
+        user_id: User the request is made for (enables fair queueing)
+        priority: User's priority class ("paid", "eternal", "bonus")
+        on_position: Awaited with the user's queue position while waiting
 
     Returns:
         True if slot acquired, False if timeout
     """
-    semaphore = get_ai_semaphore()
-    try:
-        await asyncio.wait_for(semaphore.acquire(), timeout=timeout)
-        return True
-    except asyncio.TimeoutError:
-        logger.warning("ai_slot_timeout", timeout=timeout, concurrent_limit=MAX_CONCURRENT_AI_REQUESTS)
+    limiter = get_limiter(provider)
+    if user_id is None:
+        return await limiter.acquire(timeout=timeout)
+
+    started = time.monotonic()
+    if not await fair_queue.acquire(
+        limiter.name,
+        user_id,
+        priority,
+        capacity=int(limiter.limit),
+        timeout=timeout,
+        on_position=on_position
+    ):
+        limiter.rejected += 1
         return False
 
+    remaining = max(timeout - (time.monotonic() - started), 1.0)
+    if await limiter.acquire(timeout=remaining):
+        return True
+    fair_queue.release(limiter.name, user_id)
+    return False
+
+
+def release_ai_slot(
+    provider: Optional[str] = None,
+    latency: Optional[float] = None,
+    error: Optional[str] = None,
+    user_id: Optional[int] = None
+):
+    """
+    Release AI request slot.
 
-def release_ai_slot():
-    """Release AI request slot."""
-    semaphore = get_ai_semaphore()
-    try:
-        semaphore.release()
-    except ValueError:
-        # Already released or not acquired
-        pass
+    Args:
+        provider: Provider passed to acquire_ai_slot
+        latency: Request duration in seconds (successful requests)
+        error: Error text if the request failed
+        user_id: User passed to acquire_ai_slot
+    """
+    limiter = get_limiter(provider)
+    limiter.release(latency=latency, error=error)
+    if user_id is not None:
+        fair_queue.release(limiter.name, user_id)
 
 
 async def check_user_rate_limit(user_id: int) -> tuple[bool, int]:
@@ -68,69 +301,50 @@ async def check_user_rate_limit(user_id: int) -> tuple[bool, int]:
     Returns:
         Tuple of (allowed: bool, wait_seconds: int)
     """
-    try:
-        from app.core.redis_client import redis_client
-
-        key = f"rate_limit:user:{user_id}"
-        current_time = int(time.time())
-        window_start = current_time - 60  # 1 minute window
-
-        # Get request count in current window
-        count_str = await redis_client.get(key)
-
-        if count_str is None:
-            # First request in window
-            await redis_client.set(key, "1", expire=60)
-            return True, 0
-
-        count = int(count_str)
-
-        if count >= USER_REQUESTS_PER_MINUTE:
-            # Rate limit exceeded
-            ttl = await redis_client.get_ttl(key)
-            wait_seconds = max(ttl, 1) if ttl > 0 else 60
-            logger.warning(
-                "user_rate_limit_exceeded",
-                user_id=user_id,
-                count=count,
-                limit=USER_REQUESTS_PER_MINUTE,
-                wait_seconds=wait_seconds
-            )
-            return False, wait_seconds
-
-        # Increment counter
-        await redis_client.increment(key)
+    decision = await rate_limiter.check((f"ai:user:{user_id}", USER_RATE_LIMIT))
+    if decision.allowed:
         return True, 0
 
-    except Exception as e:
-        logger.error("rate_limit_check_failed", user_id=user_id, error=str(e))
-        # On error, allow request but log
-        return True, 0
+    wait_seconds = max(1, math.ceil(decision.retry_after))
+    logger.warning(
+        "user_rate_limit_exceeded",
+        user_id=user_id,
+        limit=USER_REQUESTS_PER_MINUTE,
+        wait_seconds=wait_seconds
+    )
+    return False, wait_seconds
 
 
-def with_ai_limits(timeout: float = 60.0, check_rate_limit: bool = True):
+def with_ai_limits(timeout: float = 60.0, check_rate_limit: bool = True, provider: Optional[str] = None):
     """
     Decorator for AI service methods to apply concurrency and rate limits.
 
     Args:
         timeout: AI request timeout in seconds
         check_rate_limit: Whether to check per-user rate limit
+        provider: Provider the method calls (selects the limiter)
     """
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             # Try to acquire AI slot
-            if not await acquire_ai_slot(timeout=30.0):
+            if not await acquire_ai_slot(timeout=30.0, provider=provider):
                 raise Exception("Сервис временно перегружен. Пожалуйста, попробуйте через несколько секунд.")
 
+            started = time.monotonic()
+            error = None
             try:
                 # Execute with timeout
                 return await asyncio.wait_for(func(*args, **kwargs), timeout=timeout)
             except asyncio.TimeoutError:
+                error = "timeout"
                 logger.error("ai_request_timeout", function=func.__name__, timeout=timeout)
                 raise Exception(f"Запрос к AI занял слишком много времени (>{timeout}с). Попробуйте позже.")
+            except Exception as e:
+                error = str(e)
+                raise
             finally:
-                release_ai_slot()
+                release_ai_slot(provider, latency=time.monotonic() - started, error=error)
 
         return wrapper
     return decorator
@@ -141,15 +355,29 @@ class AIRequestContext:
     Context manager for AI requests with automatic slot management.
 
     Usage:
-        async with AIRequestContext(user_id=123, timeout=60) as ctx:
+        async with AIRequestContext(user_id=123, timeout=60, provider="openai") as ctx:
             if ctx.allowed:
                 result = await ai_service.generate(...)
+                if not result.success:
+                    ctx.error = result.error
     """
 
-    def __init__(self, user_id: Optional[int] = None, timeout: float = 60.0, check_rate_limit: bool = True):
+    def __init__(
+        self,
+        user_id: Optional[int] = None,
+        timeout: float = 60.0,
+        check_rate_limit: bool = True,
+        provider: Optional[str] = None,
+        priority: Optional[str] = None
+    ):
         self.user_id = user_id
         self.timeout = timeout
         self.check_rate_limit = check_rate_limit
+        self.provider = provider
+        self.priority = priority
+        # Error of a failed request that did not raise (feeds the limiter)
+        self.error: Optional[str] = None
+        self.started = 0.0
         self.allowed = False
         self.slot_acquired = False
         self.rate_limit_wait = 0
@@ -165,15 +393,27 @@ class AIRequestContext:
                 return self
 
         # Acquire AI slot
-        self.slot_acquired = await acquire_ai_slot(timeout=30.0)
+        self.slot_acquired = await acquire_ai_slot(
+            timeout=30.0,
+            provider=self.provider,
+            user_id=self.user_id,
+            priority=self.priority
+        )
         if not self.slot_acquired:
             self.error_message = "Сервис временно перегружен. Пожалуйста, попробуйте через несколько секунд."
             return self
 
+        self.started = time.monotonic()
         self.allowed = True
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.slot_acquired:
-            release_ai_slot()
+            error = str(exc_val) if exc_val is not None else self.error
+            release_ai_slot(
+                self.provider,
+                latency=time.monotonic() - self.started,
+                error=error,
+                user_id=self.user_id
+            )
         return False  # Don't suppress exceptions
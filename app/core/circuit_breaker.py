@@ -0,0 +1,338 @@
+"""
+Circuit breakers for AI providers, keyed by provider and model.
+
+When a provider is down, every request to it still waits for its full
+timeout, and the Gemini executor adds its retry backoff on top, so users get
+a failure only after minutes. A breaker watches recent outcomes of a
+(provider, model) pair and, once most of them fail, opens: calls fail at once
+with a "temporarily unavailable" error and callers can switch to a fallback
+model (``settings.fallback_models``) instead of waiting.
+
+States:
+    closed     calls pass; outcomes of the last ``BREAKER_WINDOW_SECONDS``
+               are counted and the breaker opens when at least
+               ``BREAKER_MIN_CALLS`` were made and ``BREAKER_FAILURE_RATIO``
+               of them failed
+    open       calls are rejected for the cool-down (``BREAKER_OPEN_SECONDS``,
+               doubled after every failed probe up to ``BREAKER_MAX_OPEN_SECONDS``)
+    half-open  one probe call passes; its success closes the breaker, its
+               failure opens it again
+
+Only provider failures count (rate limits, timeouts, 5xx, network errors;
+see :func:`is_provider_failure`); bad prompts, content filters and missing
+API keys say nothing about provider health. Breakers are per process: each
+replica learns about an outage from its own calls.
+
+Provider services are wired in by the base classes (``app.services.*.base``),
+which wrap their generation methods with :func:`guard_method`.
+"""
+import asyncio
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import aiohttp
+
+from app.core.error_handlers import classify_error
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Outcomes older than this are forgotten
+BREAKER_WINDOW_SECONDS = 60.0
+
+# Minimum calls in the window before the breaker may open
+BREAKER_MIN_CALLS = 5
+
+# Share of failed calls in the window that opens the breaker
+BREAKER_FAILURE_RATIO = 0.5
+
+# Cool-down before the first probe; doubles after each failed probe
+BREAKER_OPEN_SECONDS = 30.0
+BREAKER_MAX_OPEN_SECONDS = 300.0
+
+# A probe that has not reported back for this long no longer blocks new probes
+BREAKER_PROBE_TIMEOUT = 180.0
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Error categories (app.core.error_handlers) that mean the provider is unhealthy
+PROVIDER_FAILURE_CATEGORIES = ("rate_limit", "timeout", "model_unavailable", "network")
+
+# Error text of rejected calls; classifies as "model_unavailable"
+OPEN_ERROR = "{provider} {model} is temporarily unavailable (circuit open), try again later"
+
+# Any model of a provider
+ANY_MODEL = "*"
+
+
+class CircuitOpenError(Exception):
+    """Raised by guarded calls that cannot return a failed response."""
+
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+        super().__init__(OPEN_ERROR.format(provider=provider, model=model))
+
+
+def is_provider_failure(error: Any) -> bool:
+    """Whether an exception or error message means the provider is unhealthy."""
+    if error is None:
+        return False
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError, aiohttp.ClientError)):
+        return True
+    if isinstance(error, (NotImplementedError, CircuitOpenError)):
+        return False
+    return classify_error(str(error)) in PROVIDER_FAILURE_CATEGORIES
+
+
+class CircuitBreaker:
+    """Breaker of one (provider, model) pair (see module docstring)."""
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        window: float = BREAKER_WINDOW_SECONDS,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_ratio: float = BREAKER_FAILURE_RATIO,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        max_open_seconds: float = BREAKER_MAX_OPEN_SECONDS
+    ):
+        self.provider = provider
+        self.model = model
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+
+        self.state = STATE_CLOSED
+        # (time, failed) of recent calls while closed
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._cooldown = open_seconds
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self.opened = 0
+        self.rejected = 0
+
+    def _state(self, now: float) -> str:
+        if self.state == STATE_OPEN and now - self._opened_at >= self._cooldown:
+            self.state = STATE_HALF_OPEN
+            self._probe_started = None
+        return self.state
+
+    def is_open(self) -> bool:
+        """True while calls are rejected (open, or half-open with a probe running)."""
+        now = time.monotonic()
+        state = self._state(now)
+        if state == STATE_OPEN:
+            return True
+        return state == STATE_HALF_OPEN and self._probe_running(now)
+
+    def _probe_running(self, now: float) -> bool:
+        return self._probe_started is not None and now - self._probe_started < BREAKER_PROBE_TIMEOUT
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; a half-open breaker lets one probe through."""
+        now = time.monotonic()
+        state = self._state(now)
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_HALF_OPEN and not self._probe_running(now):
+            self._probe_started = now
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, failed: bool) -> None:
+        """Report the outcome of an allowed call."""
+        now = time.monotonic()
+        state = self._state(now)
+
+        if state == STATE_HALF_OPEN:
+            if failed:
+                self._open(now, min(self._cooldown * 2, self.max_open_seconds))
+            else:
+                self.state = STATE_CLOSED
+                self._cooldown = self.open_seconds
+                self._probe_started = None
+                self._outcomes.clear()
+                logger.info("circuit_closed", provider=self.provider, model=self.model)
+            return
+        if state == STATE_OPEN:
+            # Calls started before the breaker opened
+            return
+
+        self._outcomes.append((now, failed))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+        if not failed or len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(1 for _, f in self._outcomes if f)
+        if failures / len(self._outcomes) >= self.failure_ratio:
+            self._open(now, self.open_seconds)
+
+    def cancel_probe(self) -> None:
+        """Forget an allowed call that ended without an outcome (e.g. cancelled)."""
+        if self.state == STATE_HALF_OPEN:
+            self._probe_started = None
+
+    def _open(self, now: float, cooldown: float) -> None:
+        self.state = STATE_OPEN
+        self._opened_at = now
+        self._cooldown = cooldown
+        self._probe_started = None
+        self._outcomes.clear()
+        self.opened += 1
+        logger.warning(
+            "circuit_opened",
+            provider=self.provider,
+            model=self.model,
+            cooldown=cooldown
+        )
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        state = self._state(now)
+        return {
+            "state": state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": sum(1 for _, f in self._outcomes if f),
+            "retry_in": round(max(0.0, self._cooldown - (now - self._opened_at)), 1)
+            if state == STATE_OPEN else 0.0,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakers:
+    """Registry of breakers plus the model fallback map."""
+
+    def __init__(self):
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, provider: str, model: Optional[str] = None) -> CircuitBreaker:
+        key = (provider, model or ANY_MODEL)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(*key)
+        return breaker
+
+    def is_open(self, provider: str, model: Optional[str] = None) -> bool:
+        """Whether calls to the model are currently being rejected."""
+        breaker = self._breakers.get((provider, model or ANY_MODEL))
+        return breaker is not None and breaker.is_open()
+
+    def fallback_for(self, provider: str, model: Optional[str] = None) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Where to send a request for an unavailable model.
+
+        Returns:
+            (provider, model or None) from ``settings.fallback_models`` when the
+            model's breaker is open and the fallback's is not, otherwise None
+        """
+        if not self.is_open(provider, model):
+            return None
+
+        from app.core.config import settings
+
+        target = settings.fallback_models.get(f"{provider}/{model}") or settings.fallback_models.get(provider)
+        if not target:
+            return None
+        fallback_provider, _, fallback_model = target.partition("/")
+        if self.is_open(fallback_provider, fallback_model or None):
+            return None
+        return fallback_provider, fallback_model or None
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            f"{provider}/{model}": breaker.stats()
+            for (provider, model), breaker in self._breakers.items()
+        }
+
+
+# Global instance
+circuit_breakers = CircuitBreakers()
+
+# Provider whose guarded call is running in this task; nested calls of the
+# same provider (process_image -> generate_image) are counted once
+_active_provider: ContextVar[Optional[str]] = ContextVar("circuit_breaker_provider", default=None)
+
+
+def provider_name(cls: type) -> str:
+    """Breaker name of a service class: ``OpenAIService`` -> ``openai``."""
+    name = cls.__name__
+    if name.endswith("Service"):
+        name = name[:-len("Service")]
+    return name.lower()
+
+
+def guard_method(method: Callable, on_open: Callable[[CircuitOpenError], Any]):
+    """
+    Wrap a provider coroutine method with its (provider, model) breaker.
+
+    The provider is the service's ``breaker_provider`` (or its class name, see
+    :func:`provider_name`), the model the ``model`` argument.
+    Returned responses with ``success=False`` are judged by their error text.
+
+    Args:
+        method: Coroutine method to wrap
+        on_open: Builds the result of a rejected call from the error
+            (or raises it)
+    """
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        provider = getattr(self, "breaker_provider", None) or provider_name(type(self))
+        if _active_provider.get() == provider:
+            return await method(self, *args, **kwargs)
+
+        model = kwargs.get("model") or ANY_MODEL
+        if not isinstance(model, str):
+            model = ANY_MODEL
+        breaker = circuit_breakers.get(provider, model)
+        if not breaker.allow():
+            logger.info("circuit_rejected", provider=provider, model=model)
+            return on_open(CircuitOpenError(provider, model))
+
+        token = _active_provider.set(provider)
+        outcome = None
+        try:
+            result = await method(self, *args, **kwargs)
+            outcome = getattr(result, "success", True) is False and is_provider_failure(getattr(result, "error", None))
+            return result
+        except Exception as e:
+            outcome = is_provider_failure(e)
+            raise
+        finally:
+            _active_provider.reset(token)
+            if outcome is None:
+                breaker.cancel_probe()
+            else:
+                breaker.record(outcome)
+    wrapper.__circuit_guarded__ = True
+    return wrapper
+
+
+def guard_provider_class(cls: type, methods: Dict[str, Callable[[CircuitOpenError], Any]]) -> None:
+    """
+    Guard the methods ``cls`` itself defines (call from ``__init_subclass__``).
+
+    Args:
+        cls: Provider service class
+        methods: Method name -> ``on_open`` of :func:`guard_method`
+    """
+    for name, on_open in methods.items():
+        method = cls.__dict__.get(name)
+        if method is None or getattr(method, "__circuit_guarded__", False):
+            continue
+        setattr(cls, name, guard_method(method, on_open))
+
+
+def raise_open(error: CircuitOpenError):
+    """``on_open`` for methods without a failed-response form."""
+    raise error
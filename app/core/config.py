@@ -2,7 +2,7 @@
 Application configuration using Pydantic Settings.
 Loads all configuration from environment variables (.env file).
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -135,6 +135,11 @@ class Settings(BaseSettings):
     basic_rate_limit: int = Field(100, description="Basic subscription rate limit")
     premium_rate_limit: int = Field(500, description="Premium subscription rate limit")
     global_ip_rate_limit: int = Field(1000, description="Global IP rate limit")
+    broadcast_rate_per_second: int = Field(
+        25,
+        description="Broadcast messages per second across all replicas (Telegram allows about 30)"
+    )
+    broadcast_concurrency: int = Field(20, description="Broadcast sends in flight per replica")
 
     # =====================================
     # REFERRAL PROGRAM
@@ -148,6 +153,38 @@ class Settings(BaseSettings):
     # =====================================
     enable_ai_cache: bool = Field(True, description="Enable AI response caching")
     ai_cache_ttl_hours: int = Field(24, description="AI cache TTL in hours")
+    enable_generation_cache: bool = Field(
+        False,
+        description="Reuse results of identical image/video generations"
+    )
+    generation_cache_ttl_minutes: int = Field(
+        60,
+        description="Generation cache TTL in minutes (result files are kept about as long)"
+    )
+    generation_cache_max_entries: int = Field(
+        10000,
+        description="Generation cache size; least recently used entries are evicted"
+    )
+
+    # =====================================
+    # AI FALLBACKS
+    # =====================================
+    fallback_models: str = Field(
+        "openai/gpt-4o=deepseek/deepseek-chat,"
+        "openai/gpt-4o-mini=deepseek/deepseek-chat,"
+        "geminiimage=nanobanana",
+        description=(
+            "Comma-separated provider[/model]=provider[/model] pairs: where requests go "
+            "while the circuit breaker of a model is open"
+        )
+    )
+
+    @field_validator("fallback_models")
+    @classmethod
+    def parse_fallback_models(cls, v: str) -> Dict[str, str]:
+        """Parse comma-separated fallback pairs."""
+        pairs = (item.split("=", 1) for item in v.split(",") if "=" in item)
+        return {source.strip(): target.strip() for source, target in pairs if source.strip() and target.strip()}
 
     # =====================================
     # SECURITY
@@ -4,18 +4,23 @@ Cost Guard System - защита от чрезмерных расходов на
 Функционал:
 - Подтверждение перед дорогими запросами
 - Rate limiting на пользователя и глобально
-- Защита от двойных кликов
+- Защита от двойных кликов (single-flight в Redis, см. app.core.single_flight)
 - Кэширование запросов
 - Логирование реальной стоимости
 """
+import asyncio
+import json
+import os
 import time
 import hashlib
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List, Sequence
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.rate_limiter import RateLimit, rate_limiter
 from app.core.redis_client import redis_client
 from app.core.billing_config import get_video_model_billing
 
@@ -68,6 +73,45 @@ RATE_LIMITS = {
 }
 
 
+# Кэш результатов генераций (включается settings.enable_generation_cache):
+# запись на каждый хеш запроса + sorted set "хеш -> время последнего
+# использования" для вытеснения давно не использованных записей (LRU).
+GENERATION_CACHE_PREFIX = "cost_guard:cache:"
+GENERATION_CACHE_INDEX = "cost_guard:cache_lru"
+# Меняется при изменении формата хеша, чтобы старые записи не находились
+GENERATION_CACHE_VERSION = 1
+
+# KEYS[1] = запись, KEYS[2] = индекс; ARGV[1] = хеш, ARGV[2] = now
+_CACHE_GET_LUA = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+else
+    redis.call('ZREM', KEYS[2], ARGV[1])
+end
+return value
+"""
+
+# KEYS[1] = запись, KEYS[2] = индекс
+# ARGV = хеш, значение, ttl, now, max_entries, префикс записей
+# Возвращает число вытесненных записей.
+_CACHE_SET_LUA = """
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+-- Записи, истёкшие по TTL, уходят из индекса первыми
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', tonumber(ARGV[4]) - tonumber(ARGV[3]))
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[5])
+if excess <= 0 then
+    return 0
+end
+local evicted = redis.call('ZPOPMIN', KEYS[2], excess)
+for i = 1, #evicted, 2 do
+    redis.call('DEL', ARGV[6] .. evicted[i])
+end
+return excess
+"""
+
+
 @dataclass
 class CostEstimate:
     """Оценка стоимости запроса."""
@@ -86,10 +130,10 @@ class CostGuard:
 
     def __init__(self):
         self.redis = redis_client
-        # Локальный кэш для защиты от двойных кликов (в памяти)
-        self._processing_requests: Dict[str, float] = {}
         # Кэш запросов по hash промпта
         self._request_cache: Dict[str, Dict[str, Any]] = {}
+        # Lua-скрипты кэша результатов (см. _cache_script)
+        self._cache_scripts = None
 
     def estimate_cost(
         self,
@@ -174,119 +218,128 @@ class CostGuard:
         """
         model_key = model.lower()
         limits = RATE_LIMITS.get(model_key, RATE_LIMITS["default"])
-
         window = limits["window"]
-        now = int(time.time())
 
-        # Проверяем per-user limit
-        user_key = f"cost_guard:rate:{model_key}:user:{user_id}"
+        # Пользовательский и глобальный лимиты проверяются одним вызовом:
+        # отказ по пользовательскому не расходует глобальный
+        user_key = f"cost_guard:{model_key}:user:{user_id}"
+        decision = await rate_limiter.check(
+            (user_key, RateLimit(limits["per_user"], window)),
+            (f"cost_guard:{model_key}:global", RateLimit(limits["global"], window)),
+        )
+        if decision.allowed:
+            return True, None
 
-        if self.redis:
-            try:
-                # Используем Redis для rate limiting
-                count = await self.redis.increment(user_key)
-                if count == 1:
-                    await self.redis.expire(user_key, window)
-
-                ttl = await self.redis.get_ttl(user_key)
-
-                if count > limits["per_user"]:
-                    hours = ttl // 3600
-                    minutes = (ttl % 3600) // 60
-                    time_str = f"{hours}ч {minutes}мин" if hours > 0 else f"{minutes}мин"
-
-                    return False, (
-                        f"⛔️ Превышен лимит запросов для {model}!\n\n"
-                        f"Лимит: {limits['per_user']} запросов в час\n"
-                        f"Попробуйте через: {time_str}"
-                    )
-
-                # Проверяем global limit
-                global_key = f"cost_guard:rate:{model_key}:global"
-                global_count = await self.redis.increment(global_key)
-                if global_count == 1:
-                    await self.redis.expire(global_key, window)
-
-                if global_count > limits["global"]:
-                    return False, (
-                        f"⛔️ Превышен глобальный лимит для {model}!\n\n"
-                        f"Сервис временно перегружен. Попробуйте позже."
-                    )
-
-                return True, None
+        if decision.denied_key == user_key:
+            wait = max(60, int(decision.retry_after))
+            hours = wait // 3600
+            minutes = (wait % 3600) // 60
+            time_str = f"{hours}ч {minutes}мин" if hours > 0 else f"{minutes}мин"
 
-            except Exception as e:
-                logger.error("rate_limit_check_failed", error=str(e))
-                # Если Redis недоступен, разрешаем запрос
-                return True, None
-        else:
-            # Без Redis используем простой in-memory счётчик (не персистентный)
-            return True, None
+            return False, (
+                f"⛔️ Превышен лимит запросов для {model}!\n\n"
+                f"Лимит: {limits['per_user']} запросов в час\n"
+                f"Попробуйте через: {time_str}"
+            )
 
-    def check_duplicate_request(
+        return False, (
+            f"⛔️ Превышен глобальный лимит для {model}!\n\n"
+            f"Сервис временно перегружен. Попробуйте позже."
+        )
+
+    def generate_request_hash(
         self,
         user_id: int,
-        request_id: str,
-        timeout: int = 30
-    ) -> bool:
+        model: str,
+        prompt: str,
+        provider: Optional[str] = None,
+        input_hashes: Sequence[str] = (),
+        **params
+    ) -> str:
         """
-        Проверить, не обрабатывается ли уже этот запрос (защита от двойного клика).
+        Сгенерировать хеш запроса для дедупликации.
+
+        Хеш канонический: порядок параметров не важен, входные файлы
+        учитываются по содержимому (см. hash_input_files).
 
         Args:
             user_id: ID пользователя
-            request_id: Уникальный ID запроса (обычно callback_query.id)
-            timeout: Таймаут защиты в секундах
+            model: Модель
+            prompt: Промпт
+            provider: Провайдер (kling, openai, ...)
+            input_hashes: Хеши входных файлов в порядке передачи провайдеру
+            **params: Дополнительные параметры (duration, aspect_ratio, etc.)
 
         Returns:
-            True если запрос уже обрабатывается
+            SHA256 хеш запроса
         """
-        key = f"{user_id}:{request_id}"
-        now = time.time()
-
-        # Очистка старых записей
-        expired_keys = [k for k, t in self._processing_requests.items() if now - t > timeout]
-        for k in expired_keys:
-            del self._processing_requests[k]
-
-        if key in self._processing_requests:
-            logger.warning(
-                "duplicate_request_detected",
-                user_id=user_id,
-                request_id=request_id
-            )
-            return True
-
-        # Помечаем как обрабатываемый
-        self._processing_requests[key] = now
-        return False
+        canonical = json.dumps(
+            {
+                "v": GENERATION_CACHE_VERSION,
+                "user_id": user_id,
+                "provider": provider,
+                "model": model,
+                "prompt": (prompt or "").strip(),
+                "inputs": list(input_hashes),
+                "params": {k: v for k, v in params.items() if v is not None},
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
 
-    def release_request(self, user_id: int, request_id: str):
-        """Освободить запрос после обработки."""
-        key = f"{user_id}:{request_id}"
-        if key in self._processing_requests:
-            del self._processing_requests[key]
+    async def hash_input_files(self, inputs: Iterable[Optional[str]]) -> List[str]:
+        """
+        Хеши входных файлов по содержимому.
 
-    def generate_request_hash(self, user_id: int, model: str, prompt: str, **params) -> str:
+        Локальные файлы хешируются в потоке (могут быть большими), URL и
+        прочие строки - как есть.
         """
-        Сгенерировать хеш запроса для дедупликации.
+        def _hash(item: str) -> str:
+            if os.path.isfile(item):
+                digest = hashlib.sha256()
+                with open(item, "rb") as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        digest.update(chunk)
+                return f"sha256:{digest.hexdigest()}"
+            return f"ref:{item}"
+
+        items = [item for item in inputs if item]
+        if not items:
+            return []
+        return await asyncio.to_thread(lambda: [_hash(item) for item in items])
+
+    async def generation_cache_key(
+        self,
+        user_id: int,
+        provider: str,
+        model: str,
+        prompt: str,
+        inputs: Iterable[Optional[str]] = (),
+        **params
+    ) -> Optional[str]:
+        """
+        Ключ кэша результатов генерации или None, если кэш выключен.
 
         Args:
             user_id: ID пользователя
+            provider: Провайдер
             model: Модель
             prompt: Промпт
-            **params: Дополнительные параметры (duration, aspect_ratio, etc.)
-
-        Returns:
-            SHA256 хеш запроса
+            inputs: Входные файлы (пути или URL)
+            **params: Параметры генерации
         """
-        # Создаём строку из параметров
-        params_str = "|".join([
-            str(user_id),
-            model,
-            prompt,
-            "|".join(f"{k}={v}" for k, v in sorted(params.items()))
-        ])
-        return hashlib.sha256(params_str.encode()).hexdigest()
+        if not settings.enable_generation_cache:
+            return None
+        try:
+            input_hashes = await self.hash_input_files(inputs)
+        except OSError as e:
+            logger.warning("generation_cache_input_hash_failed", error=str(e))
+            return None
+        return self.generate_request_hash(
+            user_id, model, prompt, provider=provider, input_hashes=input_hashes, **params
+        )
 
     async def check_cached_result(
         self,
@@ -296,6 +349,8 @@ class CostGuard:
         """
         Проверить, есть ли закэшированный результат для этого запроса.
 
+        Попадание обновляет позицию записи в LRU-индексе.
+
         Args:
             request_hash: Хеш запроса
             max_age: Максимальный возраст кэша в секундах
@@ -305,11 +360,14 @@ class CostGuard:
         """
         if self.redis:
             try:
-                key = f"cost_guard:cache:{request_hash}"
-                cached = await self.redis.get(key)
+                cached = await self._cache_script("get")(
+                    keys=[f"{GENERATION_CACHE_PREFIX}{request_hash}", GENERATION_CACHE_INDEX],
+                    args=[request_hash, time.time()],
+                )
                 if cached:
-                    import json
-                    return json.loads(cached)
+                    result = json.loads(cached)
+                    if time.time() - result.get("cached_at", 0) <= max_age:
+                        return result
             except Exception as e:
                 logger.error("cache_check_failed", error=str(e))
 
@@ -324,6 +382,9 @@ class CostGuard:
         """
         Закэшировать результат запроса.
 
+        Если записей больше settings.generation_cache_max_entries, удаляются
+        давно не использованные.
+
         Args:
             request_hash: Хеш запроса
             result: Результат для кэширования
@@ -331,12 +392,32 @@ class CostGuard:
         """
         if self.redis:
             try:
-                import json
-                key = f"cost_guard:cache:{request_hash}"
-                await self.redis.set(key, json.dumps(result), ex=ttl)
+                evicted = await self._cache_script("set")(
+                    keys=[f"{GENERATION_CACHE_PREFIX}{request_hash}", GENERATION_CACHE_INDEX],
+                    args=[
+                        request_hash,
+                        json.dumps({**result, "cached_at": time.time()}),
+                        ttl,
+                        time.time(),
+                        settings.generation_cache_max_entries,
+                        GENERATION_CACHE_PREFIX,
+                    ],
+                )
+                if evicted:
+                    logger.info("generation_cache_evicted", count=evicted)
             except Exception as e:
                 logger.error("cache_save_failed", error=str(e))
 
+    def _cache_script(self, name: str):
+        """Lua-скрипты кэша (регистрируются при первом использовании)."""
+        if self._cache_scripts is None:
+            client = self.redis.client
+            self._cache_scripts = {
+                "get": client.register_script(_CACHE_GET_LUA),
+                "set": client.register_script(_CACHE_SET_LUA),
+            }
+        return self._cache_scripts[name]
+
     async def log_generation(
         self,
         user_id: int,
@@ -68,6 +68,8 @@ ERROR_PATTERNS = {
         r"service.?unavailable",
         r"503",
         r"502",
+        r"\b500\b",
+        r"internal.?server.?error",
         r"temporarily.?unavailable",
         r"maintenance",
     ],
@@ -0,0 +1,291 @@
+"""
+Weighted fair queue for AI slots, shared by all bot replicas through Redis.
+
+Without it, requests that find their provider limiter full wait in arrival
+order, so whoever sends the most requests gets the most slots. Here each
+request takes a ticket in a per-provider Redis sorted set, ordered by
+start-time fair queuing:
+
+    finish = max(virtual clock, user's previous finish) + 1 / weight
+
+A user's backlog therefore queues behind other users' single requests
+(per-user fair share), and the weight of the user's priority class
+(``PRIORITY_WEIGHTS``: paid subscription > eternal tokens > welcome bonus)
+sets how fast their tickets advance. The virtual clock moves to the finish
+tag of each admitted ticket, so users returning from idle start at the
+current clock instead of with saved-up credit.
+
+A ticket is admitted while its rank is below the free global capacity: the
+sum of the provider limits reported by live replicas minus their admitted,
+unreleased tickets. A replica's capacity entry is refreshed by its polls; once
+it goes stale, the replica's running tickets stop counting too (they only
+occupy that replica's own limiter), so a replica busy with long requests
+cannot starve the others. One Lua script call enqueues, polls and admits; waiters
+poll every ``QUEUE_POLL_INTERVAL`` and are told their position. Tickets of
+waiters that stop polling and leases of requests that never released expire,
+so a crashed replica cannot wedge the queue.
+
+If Redis is unavailable the queue is skipped and only the local limiter
+applies.
+"""
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.logger import get_logger
+from app.core.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+QUEUE_KEY_PREFIX = "ai_queue:"
+
+# Relative service rates by priority class (see SubscriptionService.get_priority_class)
+PRIORITY_WEIGHTS = {
+    "paid": 4,
+    "eternal": 2,
+    "bonus": 1,
+}
+DEFAULT_PRIORITY = "bonus"
+
+# Seconds between admission polls of a waiting request
+QUEUE_POLL_INTERVAL = 0.25
+
+# Waiting tickets and replica capacities not refreshed for this long are dropped
+QUEUE_STALE_SECONDS = 10
+
+# Admitted tickets count against capacity until released or this old
+QUEUE_LEASE_SECONDS = 300
+
+# Queue keys of an idle provider expire after this long
+QUEUE_IDLE_TTL = 3600
+
+# Cached priority class of a user
+PRIORITY_CACHE_PREFIX = "ai_queue:class:"
+PRIORITY_CACHE_TTL = 300
+
+# KEYS: 1 waiting (zset, finish tag), 2 seen (zset, last poll), 3 running
+# (zset, lease expiry; members are "replica:ticket"), 4 capacity (hash,
+# replica -> "limit:expires"), 5 virtual clock, 6 finish tags (hash,
+# user -> finish)
+# ARGV: 1 ticket, 2 user, 3 cost (1 / weight), 4 replica, 5 replica limit,
+# 6 stale seconds, 7 lease seconds, 8 idle ttl
+# Times come from the Redis server clock, so replica clock skew doesn't move
+# expiries. Returns 0 when admitted, otherwise the 1-based queue position.
+_ADMIT_LUA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local stale = tonumber(ARGV[6])
+
+redis.call('HSET', KEYS[4], ARGV[4], ARGV[5] .. ':' .. tostring(now + stale))
+local capacity = 0
+local live = {}
+local caps = redis.call('HGETALL', KEYS[4])
+for i = 1, #caps, 2 do
+    local limit, expires = string.match(caps[i + 1], '([^:]+):([^:]+)')
+    if tonumber(expires) < now then
+        redis.call('HDEL', KEYS[4], caps[i])
+    else
+        capacity = capacity + tonumber(limit)
+        live[caps[i]] = true
+    end
+end
+
+local gone = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now - stale)
+for _, ticket in ipairs(gone) do
+    redis.call('ZREM', KEYS[1], ticket)
+    redis.call('ZREM', KEYS[2], ticket)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+
+-- Only tickets of replicas whose capacity is counted use it up
+local running = 0
+for _, member in ipairs(redis.call('ZRANGE', KEYS[3], 0, -1)) do
+    if live[string.match(member, '^([^:]+):')] then
+        running = running + 1
+    end
+end
+
+local clock = tonumber(redis.call('GET', KEYS[5]) or '0')
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score then
+    local last = tonumber(redis.call('HGET', KEYS[6], ARGV[2]) or '0')
+    score = math.max(clock, last) + tonumber(ARGV[3])
+    redis.call('HSET', KEYS[6], ARGV[2], tostring(score))
+    redis.call('ZADD', KEYS[1], score, ARGV[1])
+end
+score = tonumber(score)
+redis.call('ZADD', KEYS[2], now, ARGV[1])
+
+local rank = redis.call('ZRANK', KEYS[1], ARGV[1])
+if rank < capacity - running then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    redis.call('ZADD', KEYS[3], now + tonumber(ARGV[7]), ARGV[4] .. ':' .. ARGV[1])
+    if score > clock then
+        redis.call('SET', KEYS[5], tostring(score))
+    end
+    rank = -1
+end
+
+for i = 1, 6 do
+    redis.call('EXPIRE', KEYS[i], ARGV[8])
+end
+return rank + 1
+"""
+
+PositionCallback = Callable[[int], Awaitable[None]]
+
+
+class FairQueue:
+    """Redis weighted fair queue in front of the provider limiters."""
+
+    def __init__(
+        self,
+        prefix: str = QUEUE_KEY_PREFIX,
+        poll_interval: float = QUEUE_POLL_INTERVAL,
+        stale_seconds: int = QUEUE_STALE_SECONDS,
+        lease_seconds: int = QUEUE_LEASE_SECONDS
+    ):
+        self.prefix = prefix
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self.lease_seconds = lease_seconds
+        # Identifies this process's capacity entry
+        self.replica = uuid.uuid4().hex[:12]
+        self._script = None
+        # Admitted tickets by (provider, user); a user's tickets are interchangeable
+        self._admitted: Dict[Tuple[str, int], List[str]] = {}
+        self._background: Set[asyncio.Task] = set()
+
+    def _keys(self, provider: str) -> List[str]:
+        base = f"{self.prefix}{provider}:"
+        return [base + name for name in ("waiting", "seen", "running", "capacity", "clock", "finish")]
+
+    async def _admit(self, provider: str, ticket: str, user_id: int, priority: str, capacity: int) -> int:
+        if self._script is None:
+            self._script = redis_client.client.register_script(_ADMIT_LUA)
+        weight = PRIORITY_WEIGHTS.get(priority, PRIORITY_WEIGHTS[DEFAULT_PRIORITY])
+        return int(await self._script(
+            keys=self._keys(provider),
+            args=[
+                ticket, user_id, 1 / weight, self.replica, capacity,
+                self.stale_seconds, self.lease_seconds, QUEUE_IDLE_TTL,
+            ],
+        ))
+
+    async def acquire(
+        self,
+        provider: str,
+        user_id: int,
+        priority: Optional[str],
+        capacity: int,
+        timeout: float,
+        on_position: Optional[PositionCallback] = None
+    ) -> bool:
+        """
+        Wait for the request's turn.
+
+        Args:
+            provider: Limiter name
+            user_id: User the request is made for
+            priority: Priority class (key of PRIORITY_WEIGHTS)
+            capacity: This replica's current limit for the provider
+            timeout: Maximum time to wait (seconds)
+            on_position: Awaited with the 1-based queue position when it changes
+
+        Returns:
+            True when admitted (release with :meth:`release`), False on timeout
+        """
+        ticket = f"{time.time_ns()}:{uuid.uuid4().hex[:8]}"
+        deadline = time.monotonic() + timeout
+        position = 0
+        admitted = False
+        try:
+            while True:
+                try:
+                    current = await self._admit(provider, ticket, user_id, priority or DEFAULT_PRIORITY, capacity)
+                except Exception as e:
+                    logger.error("fair_queue_unavailable", provider=provider, error=str(e))
+                    return True
+
+                if current == 0:
+                    admitted = True
+                    self._admitted.setdefault((provider, user_id), []).append(ticket)
+                    return True
+
+                if current != position:
+                    position = current
+                    if on_position is not None:
+                        try:
+                            await on_position(position)
+                        except Exception as e:
+                            logger.warning("fair_queue_position_callback_failed", error=str(e))
+
+                if time.monotonic() >= deadline:
+                    logger.warning(
+                        "fair_queue_timeout",
+                        provider=provider,
+                        user_id=user_id,
+                        priority=priority,
+                        position=position
+                    )
+                    return False
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            if not admitted:
+                self._spawn(self._remove(provider, ticket, "waiting", "seen"))
+
+    def release(self, provider: str, user_id: int) -> None:
+        """Free one of the user's admitted tickets (in the background)."""
+        tickets = self._admitted.get((provider, user_id))
+        if not tickets:
+            return
+        ticket = tickets.pop(0)
+        if not tickets:
+            del self._admitted[(provider, user_id)]
+        self._spawn(self._remove(provider, f"{self.replica}:{ticket}", "running"))
+
+    async def _remove(self, provider: str, ticket: str, *sets: str) -> None:
+        keys = dict(zip(("waiting", "seen", "running"), self._keys(provider)))
+        try:
+            async with redis_client.client.pipeline(transaction=False) as pipe:
+                for name in sets:
+                    pipe.zrem(keys[name], ticket)
+                await pipe.execute()
+        except Exception as e:
+            logger.error("fair_queue_release_failed", provider=provider, error=str(e))
+
+    def _spawn(self, coro) -> None:
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+
+async def get_priority_class(user_id: int) -> str:
+    """Priority class of a user, cached in Redis for ``PRIORITY_CACHE_TTL``."""
+    key = f"{PRIORITY_CACHE_PREFIX}{user_id}"
+    cached = await redis_client.get(key)
+    if cached in PRIORITY_WEIGHTS:
+        return cached
+
+    from app.database.database import async_session_maker
+    from app.services.subscription.subscription_service import SubscriptionService
+
+    try:
+        async with async_session_maker() as session:
+            priority = await SubscriptionService(session).get_priority_class(user_id)
+    except Exception as e:
+        logger.error("priority_class_lookup_failed", user_id=user_id, error=str(e))
+        return DEFAULT_PRIORITY
+
+    await redis_client.set(key, priority, expire=PRIORITY_CACHE_TTL)
+    return priority
+
+
+# Global instance
+fair_queue = FairQueue()
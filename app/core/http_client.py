@@ -0,0 +1,123 @@
+"""
+Shared HTTP sessions for media providers.
+
+Opening an ``aiohttp.ClientSession`` per request (or per poll loop) pays a
+fresh DNS lookup, TCP and TLS handshake every time and never reuses a
+connection. Providers instead borrow a long-lived session from
+:data:`http_clients`, one per upstream host, each with its own connection
+pool and DNS cache::
+
+    async with http_clients.session(url) as session:
+        async with session.get(url) as response:
+            ...
+
+The borrowed session must not be closed by the caller; the registry closes
+everything on shutdown (``main.py``). Per-request timeouts go to the request
+call (``session.post(..., timeout=...)``) since the session is shared.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+from yarl import URL
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Connections kept per upstream host (in use + idle)
+HTTP_POOL_PER_HOST = 16
+# Hosts shared by many providers (Kie.ai fronts Nano Banana, Suno, Midjourney
+# and Kling Image; its file host serves their uploads)
+HTTP_POOL_PER_HOST_OVERRIDES: Dict[str, int] = {
+    "api.kie.ai": 48,
+    "kieai.redpandaai.co": 32,
+}
+# Sessions used for media downloads reach CDNs of other hosts as well
+HTTP_POOL_TOTAL = 100
+HTTP_DNS_CACHE_SECONDS = 300
+HTTP_KEEPALIVE_SECONDS = 30
+# aiohttp's own default, for requests that don't pass a timeout
+HTTP_DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=300, sock_connect=30)
+
+
+class ProviderHttpClients:
+    """Registry of pooled ``aiohttp`` sessions keyed by upstream host."""
+
+    def __init__(self):
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        host = URL(url).host
+        return host.lower() if host else "default"
+
+    def get(self, url: str) -> aiohttp.ClientSession:
+        """Pooled session for the host of ``url`` (created on first use)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Sessions are bound to the loop that created them (tests and
+            # scripts may run several loops); start a fresh registry.
+            self._sessions = {}
+            self._loop = loop
+
+        key = self._host_key(url)
+        session = self._sessions.get(key)
+        if session is None or session.closed:
+            per_host = HTTP_POOL_PER_HOST_OVERRIDES.get(key, HTTP_POOL_PER_HOST)
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_TOTAL,
+                limit_per_host=per_host,
+                ttl_dns_cache=HTTP_DNS_CACHE_SECONDS,
+                keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+            )
+            session = aiohttp.ClientSession(connector=connector, timeout=HTTP_DEFAULT_TIMEOUT)
+            self._sessions[key] = session
+            logger.debug("http_session_created", host=key, limit_per_host=per_host)
+        return session
+
+    @asynccontextmanager
+    async def session(self, url: str) -> AsyncIterator[aiohttp.ClientSession]:
+        """
+        Borrow the pooled session for ``url``'s host.
+
+        Drop-in for ``async with aiohttp.ClientSession() as session`` that
+        leaves the session open for the next caller.
+        """
+        yield self.get(url)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Connection pool usage per host."""
+        result: Dict[str, Dict[str, Any]] = {}
+        for host, session in self._sessions.items():
+            if session.closed:
+                continue
+            connector = session.connector
+            # aiohttp exposes no public pool counters; these are stable
+            # across 3.x
+            acquired = len(getattr(connector, "_acquired", ()))
+            idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+            result[host] = {
+                "in_use": acquired,
+                "idle": idle,
+                "limit_per_host": connector.limit_per_host,
+                "limit": connector.limit,
+            }
+        return result
+
+    async def close(self) -> None:
+        """Close all sessions (application shutdown)."""
+        sessions, self._sessions = self._sessions, {}
+        for host, session in sessions.items():
+            try:
+                await session.close()
+            except Exception as e:
+                logger.warning("http_session_close_failed", host=host, error=str(e))
+        if sessions:
+            logger.info("http_sessions_closed", count=len(sessions))
+
+
+# Global instance
+http_clients = ProviderHttpClients()
@@ -0,0 +1,175 @@
+"""
+Central scheduler for provider status polling.
+
+Generations that finish asynchronously (video, music, Midjourney, Nano Banana)
+are polled until done. Polling every few seconds from the first second wastes
+most requests: a Kling video is never ready after 5s, and a task that is still
+running after 10 minutes doesn't need a check every 5s either.
+
+Each provider gets a :class:`PollCurve` fitted to its typical completion
+times: the first check happens when the task could plausibly be done, checks
+are dense around the usual completion window and back off geometrically once
+a task runs long.
+
+Two consumers share the curves:
+
+- in-process poll loops call :meth:`PollScheduler.wait_turn` instead of
+  ``asyncio.sleep``; one scheduler task keeps every waiting poll in a single
+  heap keyed by next-check time and releases them in order, capping each
+  provider's check rate so bursts of generations don't burst the API;
+- the video job worker stores :func:`next_poll_delay` as ``next_poll_at`` (the
+  database index is the queue there, shared by all replicas).
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class PollCurve:
+    """Polling schedule for one provider (all values in seconds)."""
+
+    # No check before this age: tasks are practically never done earlier
+    first_check: float
+    # Interval while the task is within its usual completion window
+    interval: float
+    # Age after which a task counts as slow and checks back off
+    slowdown_after: float
+    # Backoff multiplier per slow check, and the interval ceiling
+    growth: float = 1.5
+    max_interval: float = 30.0
+    # Checks per second released for this provider across all waiters
+    max_checks_per_second: float = 10.0
+
+    def delay(self, elapsed: float) -> float:
+        """Seconds until the next check of a task that is ``elapsed`` old."""
+        if elapsed < self.first_check:
+            return self.first_check - elapsed
+        if elapsed < self.slowdown_after:
+            return self.interval
+        # One backoff step per max_interval of overrun, so callers need no
+        # per-task state
+        step = int((elapsed - self.slowdown_after) // self.max_interval) + 1
+        return min(self.max_interval, self.interval * self.growth ** step)
+
+
+# Fitted to observed completion times (p10 -> first check, ~p90 -> slowdown)
+POLL_CURVES: Dict[str, PollCurve] = {
+    "kling": PollCurve(first_check=30, interval=5, slowdown_after=300),
+    "kling3": PollCurve(first_check=30, interval=5, slowdown_after=300),
+    "kling_o1": PollCurve(first_check=30, interval=5, slowdown_after=300),
+    "hailuo": PollCurve(first_check=30, interval=5, slowdown_after=240),
+    "luma": PollCurve(first_check=20, interval=4, slowdown_after=180),
+    "grok_video": PollCurve(first_check=20, interval=5, slowdown_after=180),
+    "veo": PollCurve(first_check=30, interval=8, slowdown_after=240, max_checks_per_second=5),
+    "suno": PollCurve(first_check=20, interval=4, slowdown_after=180, max_interval=20),
+    "midjourney": PollCurve(first_check=15, interval=4, slowdown_after=120, max_interval=20),
+    "nano_banana": PollCurve(first_check=5, interval=2, slowdown_after=60, max_interval=10),
+    "kling_image": PollCurve(first_check=5, interval=2, slowdown_after=60, max_interval=10),
+}
+
+DEFAULT_POLL_CURVE = PollCurve(first_check=5, interval=5, slowdown_after=300)
+
+
+def get_poll_curve(provider: str) -> PollCurve:
+    """Polling curve for a provider (a conservative default for unknown ones)."""
+    return POLL_CURVES.get(provider, DEFAULT_POLL_CURVE)
+
+
+def next_poll_delay(provider: str, elapsed: float) -> float:
+    """Seconds until the next status check of a task that is ``elapsed`` old."""
+    return get_poll_curve(provider).delay(elapsed)
+
+
+class PollScheduler:
+    """
+    Single-heap scheduler for in-process poll loops.
+
+    Waiters are futures in a heap ordered by due time; one task sleeps until
+    the earliest is due and resolves it. The scheduler task exits when the
+    heap is empty and is restarted by the next waiter.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._runner: Optional[asyncio.Task] = None
+        self._changed: Optional[asyncio.Event] = None
+        # provider -> (current one-second window, checks released in it)
+        self._released: Dict[str, Tuple[int, int]] = {}
+
+    async def wait_turn(self, provider: str, started_at: float) -> None:
+        """
+        Sleep until the next check of a task is due.
+
+        Args:
+            provider: Provider key in POLL_CURVES
+            started_at: ``time.time()`` when the task was submitted
+        """
+        delay = next_poll_delay(provider, time.time() - started_at)
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        heapq.heappush(self._heap, (loop.time() + delay, next(self._seq), provider, waiter))
+        self._ensure_runner()
+        self._changed.set()
+        await waiter
+
+    def pending(self) -> Dict[str, int]:
+        """Number of waiting polls per provider."""
+        counts: Dict[str, int] = {}
+        for _, _, provider, waiter in self._heap:
+            if not waiter.done():
+                counts[provider] = counts.get(provider, 0) + 1
+        return counts
+
+    def _ensure_runner(self) -> None:
+        if self._runner is None or self._runner.done():
+            self._changed = asyncio.Event()
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+
+    def _admit(self, provider: str, now: float) -> bool:
+        """Count a released check against the provider's per-second cap."""
+        window = int(now)
+        current, count = self._released.get(provider, (window, 0))
+        if current != window:
+            count = 0
+        if count >= get_poll_curve(provider).max_checks_per_second:
+            return False
+        self._released[provider] = (window, count + 1)
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._heap:
+            due, _, provider, waiter = self._heap[0]
+            if waiter.done():
+                # Waiter was cancelled (generation aborted)
+                heapq.heappop(self._heap)
+                continue
+
+            now = loop.time()
+            if due > now:
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=due - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            if not self._admit(provider, now):
+                # Over the provider's rate: retry at the next window
+                heapq.heappush(self._heap, (float(int(now) + 1), next(self._seq), provider, waiter))
+                continue
+            waiter.set_result(None)
+
+
+# Global instance
+poll_scheduler = PollScheduler()
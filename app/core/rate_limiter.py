@@ -0,0 +1,155 @@
+"""
+Rate limiting engine shared by the bot, the cost guard and the HTTP API.
+
+Each decision is one Lua script call implementing GCRA (generic cell rate
+algorithm, a token bucket that stores a single timestamp per key):
+
+    interval  = period / limit          (time one request "costs")
+    tat       = theoretical arrival time of the next request
+    allowed  <=> max(tat, now) + interval - burst * interval <= now
+
+so ``burst`` requests may arrive at once and then one per ``interval``. The
+script checks several keys at once (e.g. per user and global) and updates
+them only if all of them allow the request, so a denied user never uses up
+the global budget. The reply carries the decision and the retry-after in the
+same round trip. Time comes from the Redis server, so replicas with skewed
+clocks share the buckets correctly.
+
+If Redis is unavailable the same algorithm runs in process memory, over at
+most ``LOCAL_MAX_KEYS`` keys (least recently used ones are dropped).
+
+    decision = await rate_limiter.check(
+        (f"cost:veo:user:{user_id}", RateLimit(2, 3600)),
+        ("cost:veo:global", RateLimit(10, 3600)),
+    )
+    if not decision.allowed:
+        ...  # decision.retry_after seconds, decision.denied_key
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.core.logger import get_logger
+from app.core.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+RATE_LIMIT_PREFIX = "gcra:"
+
+# Keys tracked by the in-memory fallback
+LOCAL_MAX_KEYS = 10000
+
+# KEYS: one bucket per rule; ARGV: interval ms and burst tolerance ms per rule
+# Returns {allowed (0/1), retry after ms, 1-based index of the denying key}.
+_GCRA_LUA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tats = {}
+local retry = 0
+local denied = 0
+for i = 1, #KEYS do
+    local interval = tonumber(ARGV[2 * i - 1])
+    local tolerance = tonumber(ARGV[2 * i])
+    local tat = math.max(tonumber(redis.call('GET', KEYS[i]) or now), now)
+    local wait = tat + interval - tolerance - now
+    if wait > retry then
+        retry = wait
+        denied = i
+    end
+    tats[i] = tat + interval
+end
+if denied > 0 then
+    return {0, math.ceil(retry), denied}
+end
+for i = 1, #KEYS do
+    redis.call('SET', KEYS[i], string.format('%.3f', tats[i]), 'PX', math.max(1, math.ceil(tats[i] - now)))
+end
+return {1, 0, 0}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """``limit`` requests per ``period`` seconds, ``burst`` (default ``limit``) at once."""
+    limit: int
+    period: float
+    burst: Optional[int] = None
+
+    @property
+    def interval_ms(self) -> float:
+        return self.period * 1000 / self.limit
+
+    @property
+    def tolerance_ms(self) -> float:
+        return self.interval_ms * (self.burst or self.limit)
+
+
+@dataclass
+class RateDecision:
+    """Outcome of a rate limit check."""
+    allowed: bool
+    retry_after: float = 0.0  # seconds until the request would be allowed
+    denied_key: Optional[str] = None  # key (without prefix) of the exhausted limit
+
+
+class RateLimiter:
+    """GCRA rate limiter on Redis with a bounded in-memory fallback."""
+
+    def __init__(self, prefix: str = RATE_LIMIT_PREFIX, local_max_keys: int = LOCAL_MAX_KEYS):
+        self.prefix = prefix
+        self.local_max_keys = local_max_keys
+        self._script = None
+        # Fallback buckets: key -> theoretical arrival time (ms), oldest use first
+        self._local: "OrderedDict[str, float]" = OrderedDict()
+
+    async def check(self, *rules: Tuple[str, RateLimit]) -> RateDecision:
+        """
+        Count a request against every ``(key, limit)`` rule, all or nothing.
+
+        Returns:
+            RateDecision; when denied, nothing was counted
+        """
+        try:
+            if self._script is None:
+                self._script = redis_client.client.register_script(_GCRA_LUA)
+            args: List[float] = []
+            for _, rule in rules:
+                args += [rule.interval_ms, rule.tolerance_ms]
+            allowed, retry_ms, denied = await self._script(
+                keys=[self.prefix + key for key, _ in rules],
+                args=args,
+            )
+        except Exception as e:
+            logger.warning("rate_limiter_redis_unavailable", error=str(e))
+            return self._check_local(rules)
+
+        if allowed:
+            return RateDecision(True)
+        return RateDecision(False, int(retry_ms) / 1000, rules[int(denied) - 1][0])
+
+    def _check_local(self, rules: Tuple[Tuple[str, RateLimit], ...]) -> RateDecision:
+        """The script's algorithm over the in-memory buckets."""
+        now = time.time() * 1000
+        tats = []
+        retry, denied = 0.0, None
+        for key, rule in rules:
+            tat = max(self._local.get(key, now), now)
+            wait = tat + rule.interval_ms - rule.tolerance_ms - now
+            if wait > retry:
+                retry, denied = wait, key
+            tats.append(tat + rule.interval_ms)
+
+        if denied is not None:
+            return RateDecision(False, retry / 1000, denied)
+
+        for (key, _), tat in zip(rules, tats):
+            self._local[key] = tat
+            self._local.move_to_end(key)
+        while len(self._local) > self.local_max_keys:
+            self._local.popitem(last=False)
+        return RateDecision(True)
+
+
+# Global instance
+rate_limiter = RateLimiter()
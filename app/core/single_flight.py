@@ -0,0 +1,291 @@
+"""
+Distributed single-flight for duplicate requests.
+
+A double tap on a confirm button, or the same prompt sent twice, reaches the
+bot as two updates that may be handled by different workers. Only one of them
+should start the (paid) operation; the other attaches to it:
+
+    async with single_flight.flight(f"veo:{user_id}:{request_hash}") as flight:
+        if not flight.leader:
+            return  # an identical request is running or has just finished
+        ...
+
+or, around a whole handler section:
+
+    @single_flight.guard(build_key, on_duplicate=notify_user)
+    async def process_video(message, user, state): ...
+
+The leader holds a Redis lease (``SET NX PX`` with an owner token) that is
+renewed while it runs and expires on its own if the worker dies. When the
+leader finishes, the lease is swapped for a short-lived "done" record with the
+leader's result, so followers arriving right after completion attach to it
+too. Followers can wait for the leader and read its result; after a failure
+(exception) no record is left and the request may be retried at once.
+
+If Redis is unavailable every caller becomes a leader, as before.
+"""
+import asyncio
+import json
+import uuid
+from contextlib import asynccontextmanager
+from functools import wraps
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+from app.core.logger import get_logger
+from app.core.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+SINGLE_FLIGHT_PREFIX = "single_flight:"
+
+# Lease of the running leader; renewed every third of it while it runs
+SINGLE_FLIGHT_LEASE_SECONDS = 60
+
+# How long a finished flight absorbs identical requests (and keeps its result)
+SINGLE_FLIGHT_RESULT_TTL = 10
+
+# Poll interval of followers waiting for the leader
+SINGLE_FLIGHT_POLL_INTERVAL = 0.5
+
+# KEYS[1] = lease, KEYS[2] = done record; ARGV[1] = owner token, ARGV[2] = lease ms
+# Returns 1 for the new leader, 0 if a flight is running, or the done record.
+_ACQUIRE_LUA = """
+local done = redis.call('GET', KEYS[2])
+if done then
+    return done
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+# KEYS[1] = lease; ARGV[1] = owner token, ARGV[2] = lease ms
+_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS[1] = lease, KEYS[2] = done record; ARGV[1] = owner token,
+# ARGV[2] = done record ('' after a failure), ARGV[3] = record ttl ms
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+if ARGV[2] ~= '' then
+    redis.call('SET', KEYS[2], ARGV[2], 'PX', ARGV[3])
+end
+return 1
+"""
+
+
+class Flight:
+    """One caller's view of a single-flight operation."""
+
+    def __init__(self, key: str, leader: bool, done: bool = False, result: Any = None):
+        self.key = key
+        # True for the caller that runs the operation
+        self.leader = leader
+        # Followers: the leader finished successfully (result is its result)
+        self.done = done
+        # Leader: set to share a JSON-serializable result with followers
+        self.result = result
+
+
+def _load_record(raw: str) -> Any:
+    try:
+        return json.loads(raw).get("result")
+    except (ValueError, AttributeError):
+        return None
+
+
+class SingleFlight:
+    """Redis-backed single-flight (see module docstring)."""
+
+    def __init__(
+        self,
+        prefix: str = SINGLE_FLIGHT_PREFIX,
+        lease: int = SINGLE_FLIGHT_LEASE_SECONDS,
+        result_ttl: int = SINGLE_FLIGHT_RESULT_TTL,
+        poll_interval: float = SINGLE_FLIGHT_POLL_INTERVAL
+    ):
+        self.prefix = prefix
+        self.lease = lease
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._scripts = None
+
+    def _keys(self, key: str) -> list:
+        return [f"{self.prefix}{key}", f"{self.prefix}{key}:done"]
+
+    def _script(self, name: str):
+        """Lua scripts (registered on first use)."""
+        if self._scripts is None:
+            client = redis_client.client
+            self._scripts = {
+                "acquire": client.register_script(_ACQUIRE_LUA),
+                "renew": client.register_script(_RENEW_LUA),
+                "release": client.register_script(_RELEASE_LUA),
+            }
+        return self._scripts[name]
+
+    async def acquire(self, key: str, lease: Optional[int] = None) -> Tuple[Optional[str], Flight]:
+        """
+        Try to become the leader for ``key``.
+
+        Returns:
+            (owner token or None, flight); the token is None for followers and
+            when Redis is unavailable (then the caller leads without a lease)
+        """
+        token = uuid.uuid4().hex
+        lease_ms = int((lease or self.lease) * 1000)
+        try:
+            reply = await self._script("acquire")(keys=self._keys(key), args=[token, lease_ms])
+        except Exception as e:
+            logger.error("single_flight_acquire_failed", key=key, error=str(e))
+            return None, Flight(key, leader=True)
+
+        if reply == 1:
+            return token, Flight(key, leader=True)
+        if reply == 0:
+            return None, Flight(key, leader=False)
+        return None, Flight(key, leader=False, done=True, result=_load_record(reply))
+
+    async def release(self, key: str, token: str, success: bool = True, result: Any = None) -> None:
+        """Drop the lease; after a success leave the done record for followers."""
+        record = ""
+        if success:
+            try:
+                record = json.dumps({"result": result})
+            except (TypeError, ValueError):
+                record = json.dumps({"result": None})
+        try:
+            released = await self._script("release")(
+                keys=self._keys(key),
+                args=[token, record, int(self.result_ttl * 1000)],
+            )
+            if not released:
+                logger.warning("single_flight_lease_lost", key=key)
+        except Exception as e:
+            logger.error("single_flight_release_failed", key=key, error=str(e))
+
+    async def wait(self, key: str, timeout: float) -> Tuple[bool, Any]:
+        """
+        Wait up to ``timeout`` seconds for the running flight to finish.
+
+        Returns:
+            (done, result); done is False if the leader failed or is still running
+        """
+        lease_key, done_key = self._keys(key)
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            try:
+                async with redis_client.client.pipeline(transaction=False) as pipe:
+                    pipe.get(done_key)
+                    pipe.exists(lease_key)
+                    record, running = await pipe.execute()
+            except Exception as e:
+                logger.error("single_flight_wait_failed", key=key, error=str(e))
+                return False, None
+
+            if record is not None:
+                return True, _load_record(record)
+            if not running:
+                return False, None
+            if asyncio.get_running_loop().time() >= deadline:
+                return False, None
+            await asyncio.sleep(self.poll_interval)
+
+    async def _keep_alive(self, key: str, token: str, lease: int) -> None:
+        lease_ms = int(lease * 1000)
+        while True:
+            await asyncio.sleep(lease / 3)
+            try:
+                if not await self._script("renew")(keys=self._keys(key)[:1], args=[token, lease_ms]):
+                    logger.warning("single_flight_lease_lost", key=key)
+                    return
+            except Exception as e:
+                logger.error("single_flight_renew_failed", key=key, error=str(e))
+
+    @asynccontextmanager
+    async def flight(
+        self,
+        key: str,
+        lease: Optional[int] = None,
+        wait: float = 0.0
+    ) -> AsyncIterator[Flight]:
+        """
+        Run a section at most once at a time per ``key``.
+
+        Args:
+            key: Request identity, e.g. ``f"{flow}:{user_id}:{request_hash}"``
+            lease: Lease in seconds (renewed while the leader runs)
+            wait: Followers wait up to this many seconds for the leader
+
+        Yields:
+            Flight; only ``flight.leader`` should run the operation
+        """
+        token, flight = await self.acquire(key, lease)
+        if token is None:
+            if not flight.leader and not flight.done and wait > 0:
+                flight.done, flight.result = await self.wait(key, wait)
+            yield flight
+            return
+
+        renewer = asyncio.create_task(self._keep_alive(key, token, lease or self.lease))
+        success = False
+        try:
+            yield flight
+            success = True
+        finally:
+            renewer.cancel()
+            await self.release(key, token, success=success, result=flight.result)
+
+    def guard(
+        self,
+        key_func: Callable[..., Any],
+        lease: Optional[int] = None,
+        wait: float = 0.0,
+        on_duplicate: Optional[Callable[..., Awaitable[Any]]] = None
+    ):
+        """
+        Decorator: run the coroutine function as a single flight.
+
+        Args:
+            key_func: Builds the key from the call's arguments (may be async);
+                None runs the call unguarded
+            lease: Lease in seconds
+            wait: Followers wait up to this many seconds for the leader
+            on_duplicate: Awaited as ``on_duplicate(flight, *args, **kwargs)``
+                instead of the function for followers
+
+        Followers get the leader's return value when they waited for it (or
+        whatever ``on_duplicate`` returns), otherwise None.
+        """
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = key_func(*args, **kwargs)
+                if asyncio.iscoroutine(key):
+                    key = await key
+                if key is None:
+                    return await func(*args, **kwargs)
+
+                async with self.flight(key, lease=lease, wait=wait) as flight:
+                    if flight.leader:
+                        flight.result = await func(*args, **kwargs)
+                        return flight.result
+
+                    logger.info("single_flight_duplicate", key=key, done=flight.done)
+                    if on_duplicate is not None:
+                        return await on_duplicate(flight, *args, **kwargs)
+                    return flight.result
+            return wrapper
+        return decorator
+
+
+# Global instance
+single_flight = SingleFlight()
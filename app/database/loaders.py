@@ -0,0 +1,48 @@
+"""
+Named loader profiles for ``User`` relationships.
+
+All ``User`` relationships are declared ``lazy="raise"``: a plain
+``select(User)`` loads only the ``users`` row, and touching a relationship
+that was not loaded explicitly raises instead of silently pulling a user's
+whole request and dialog history. Call sites opt into what they need by
+naming a profile.
+"""
+from typing import Dict, Tuple
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from app.database.models.user import User
+
+USER_LOADER_PROFILES: Dict[str, Tuple[LoaderOption, ...]] = {
+    # Update hot path (AuthMiddleware): scalar columns only.
+    "auth": (),
+    # User-facing profile/stats screens: balance and active plan.
+    "profile": (
+        selectinload(User.subscriptions),
+    ),
+    # Right-to-access export. Large tables (ai_requests, dialogs, video_jobs)
+    # are counted with aggregates instead of being loaded.
+    "gdpr_export": (
+        selectinload(User.subscriptions),
+        selectinload(User.payments),
+    ),
+    # Admin bot user cards, lists and broadcast segmentation.
+    "admin_view": (
+        selectinload(User.subscriptions),
+    ),
+}
+
+
+def user_load_options(profile: str) -> Tuple[LoaderOption, ...]:
+    """Get loader options for a named profile."""
+    try:
+        return USER_LOADER_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown user loader profile: {profile}") from None
+
+
+def select_user(profile: str = "auth") -> Select:
+    """``select(User)`` with the relationships of ``profile`` loaded."""
+    return select(User).options(*user_load_options(profile))
@@ -19,7 +19,7 @@ from app.database.models.system import (
 )
 from app.database.models.model_cost import ModelCost, OperationCategory
 from app.database.models.video_job import VideoGenerationJob
-from app.database.models.broadcast import BroadcastMessage, BroadcastClick
+from app.database.models.broadcast import BroadcastMessage, BroadcastClick, BroadcastDelivery
 from app.database.models.expiry_notification import ExpiryNotificationSettings, ExpiryNotificationLog
 from app.database.models.channel_bonus import ChannelSubscriptionBonus, ChannelBonusClaim
 from app.database.models.welcome_bonus import WelcomeBonus, WelcomeBonusUse
@@ -50,6 +50,7 @@ __all__ = [
     # Broadcast
     "BroadcastMessage",
     "BroadcastClick",
+    "BroadcastDelivery",
     # Expiry notifications
     "ExpiryNotificationSettings",
     "ExpiryNotificationLog",
@@ -74,9 +74,78 @@ class BroadcastMessage(Base, BaseModel, TimestampMixin):
         comment="Number of failed deliveries"
     )
 
+    blocked_count: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Failed deliveries because the user blocked the bot (part of error_count)"
+    )
+
+    total_count: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Number of recipients when the broadcast was queued"
+    )
+
+    # Delivery job (sent by the main bot's BroadcastWorker)
+    status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        default="queued",
+        index=True,
+        comment="queued, running, paused, completed, cancelled"
+    )
+
+    recipient_ids: Mapped[Optional[list]] = mapped_column(
+        JSON,
+        nullable=True,
+        comment="Explicit recipients (users.id) for test/specific filters"
+    )
+
+    cursor_user_id: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment="Recipients up to this users.id have been handled"
+    )
+
+    photo_file_id: Mapped[Optional[str]] = mapped_column(
+        String(255),
+        nullable=True,
+        comment="Main bot file_id of the photo after its first upload"
+    )
+
+    lease_owner: Mapped[Optional[str]] = mapped_column(
+        String(100),
+        nullable=True,
+        comment="Worker currently sending the broadcast"
+    )
+
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Lease expiry; another worker resumes the broadcast after it"
+    )
+
+    started_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+
     # Timestamps (from TimestampMixin)
     # created_at, updated_at
 
+    @property
+    def is_finished(self) -> bool:
+        """Whether the broadcast will send nothing more."""
+        return self.status in ("completed", "cancelled")
+
 
 class BroadcastClick(Base, BaseModel, TimestampMixin):
     """User clicks on broadcast buttons."""
@@ -130,3 +199,48 @@ class BroadcastClick(Base, BaseModel, TimestampMixin):
         Index('idx_broadcast_clicks_broadcast_user', 'broadcast_id', 'user_id'),
         Index('idx_broadcast_clicks_created', 'created_at'),
     )
+
+
+class BroadcastDelivery(Base, BaseModel, TimestampMixin):
+    """Delivery outcome of a broadcast for one recipient."""
+
+    __tablename__ = "broadcast_deliveries"
+
+    # Primary key
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+
+    # References
+    broadcast_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("broadcast_messages.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to broadcast message"
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="Recipient"
+    )
+
+    # Outcome
+    outcome: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        comment="sent, blocked, deactivated, error"
+    )
+
+    error: Mapped[Optional[str]] = mapped_column(
+        String(255),
+        nullable=True,
+        comment="Telegram error of a failed delivery"
+    )
+
+    # Timestamps (from TimestampMixin)
+    # created_at, updated_at
+
+    __table_args__ = (
+        Index('uq_broadcast_deliveries_broadcast_user', 'broadcast_id', 'user_id', unique=True),
+    )
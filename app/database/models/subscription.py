@@ -15,6 +15,10 @@ if TYPE_CHECKING:
     from app.database.models.payment import Payment
 
 
+# Subscription type of the unlimited plan (tokens are not deducted)
+UNLIMITED_SUBSCRIPTION_TYPE = "unlimited_1day"
+
+
 class Subscription(Base, BaseModel, TimestampMixin):
     """Subscription model for user token packages."""
 
@@ -78,7 +82,7 @@ class Subscription(Base, BaseModel, TimestampMixin):
     @property
     def is_unlimited(self) -> bool:
         """Check if subscription is unlimited (1 day unlimited)."""
-        return self.subscription_type == "unlimited_1day"
+        return self.subscription_type == UNLIMITED_SUBSCRIPTION_TYPE
 
     @property
     def is_eternal(self) -> bool:
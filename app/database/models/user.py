@@ -43,29 +43,30 @@ class User(Base, BaseModel, TimestampMixin):
     # Activity tracking
     last_activity: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
-    # Relationships
+    # Relationships. All are lazy="raise": nothing is loaded unless the query
+    # opts in via a loader profile (see app.database.loaders).
     subscriptions: Mapped[List["Subscription"]] = relationship(
         "Subscription",
         back_populates="user",
-        lazy="selectin"
+        lazy="raise"
     )
 
     payments: Mapped[List["Payment"]] = relationship(
         "Payment",
         back_populates="user",
-        lazy="selectin"
+        lazy="raise"
     )
 
     ai_requests: Mapped[List["AIRequest"]] = relationship(
         "AIRequest",
         back_populates="user",
-        lazy="selectin"
+        lazy="raise"
     )
 
     dialogs: Mapped[List["Dialog"]] = relationship(
         "Dialog",
         back_populates="user",
-        lazy="selectin"
+        lazy="raise"
     )
 
     # Referrals where this user is the referrer
@@ -73,7 +74,7 @@ class User(Base, BaseModel, TimestampMixin):
         "Referral",
         foreign_keys="Referral.referrer_id",
         back_populates="referrer",
-        lazy="selectin"
+        lazy="raise"
     )
 
     # Referral where this user was referred
@@ -82,19 +83,19 @@ class User(Base, BaseModel, TimestampMixin):
         foreign_keys="Referral.referred_id",
         back_populates="referred",
         uselist=False,
-        lazy="selectin"
+        lazy="raise"
     )
 
     files: Mapped[List["File"]] = relationship(
         "File",
         back_populates="user",
-        lazy="selectin"
+        lazy="raise"
     )
 
     video_jobs: Mapped[List["VideoGenerationJob"]] = relationship(
         "VideoGenerationJob",
         back_populates="user",
-        lazy="selectin"
+        lazy="raise"
     )
 
     def get_active_subscription(self) -> Optional["Subscription"]:
@@ -143,6 +143,27 @@ class VideoGenerationJob(Base, BaseModel, TimestampMixin):
         comment="When job was completed or failed"
     )
 
+    # Worker lease (atomic claiming across replicas)
+    lease_owner: Mapped[Optional[str]] = mapped_column(
+        String(100),
+        nullable=True,
+        comment="Worker that currently owns the job"
+    )
+
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        index=True,
+        comment="Lease expiry; other workers may claim the job afterwards"
+    )
+
+    next_poll_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        index=True,
+        comment="When to check the provider task next (NULL = not polled)"
+    )
+
     # For cleanup and timeout detection
     expires_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
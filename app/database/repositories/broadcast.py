@@ -0,0 +1,177 @@
+"""
+Broadcast delivery job repository.
+"""
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models.broadcast import BroadcastMessage
+from app.database.repositories.base import BaseRepository
+
+# Statuses a worker sends in; "running" ones are claimable once their lease lapses
+SENDABLE_STATUSES = ("queued", "running")
+
+
+class BroadcastRepository(BaseRepository[BroadcastMessage]):
+    """Repository for broadcast delivery jobs (claiming, progress, control)."""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(BroadcastMessage, session)
+
+    async def claim_next(self, owner: str, lease_seconds: int) -> Optional[int]:
+        """
+        Lease the oldest broadcast that is queued or whose worker is gone.
+
+        Same ``UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED)``
+        claim as video jobs, so each broadcast is sent by one worker at a time.
+
+        Returns:
+            ID of the claimed broadcast, or None
+        """
+        now = func.now()
+        claimable = (
+            select(BroadcastMessage.id)
+            .where(
+                BroadcastMessage.status.in_(SENDABLE_STATUSES),
+                or_(
+                    BroadcastMessage.lease_expires_at.is_(None),
+                    BroadcastMessage.lease_expires_at < now
+                )
+            )
+            .order_by(BroadcastMessage.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            update(BroadcastMessage)
+            .where(BroadcastMessage.id.in_(claimable))
+            .values(
+                status="running",
+                lease_owner=owner,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                started_at=func.coalesce(BroadcastMessage.started_at, now)
+            )
+            .returning(BroadcastMessage.id)
+            .execution_options(synchronize_session=False)
+        )
+        broadcast_id = result.scalar_one_or_none()
+        await self.session.commit()
+
+        return broadcast_id
+
+    async def renew_lease(self, owner: str, broadcast_id: int, lease_seconds: int) -> Optional[str]:
+        """
+        Extend ``owner``'s lease (heartbeat).
+
+        Returns:
+            Current status, or None if the lease now belongs to someone else
+        """
+        result = await self.session.execute(
+            update(BroadcastMessage)
+            .where(
+                BroadcastMessage.id == broadcast_id,
+                BroadcastMessage.lease_owner == owner
+            )
+            .values(lease_expires_at=func.now() + timedelta(seconds=lease_seconds))
+            .returning(BroadcastMessage.status)
+            .execution_options(synchronize_session=False)
+        )
+        status = result.scalar_one_or_none()
+        await self.session.commit()
+
+        return status
+
+    async def save_progress(
+        self,
+        owner: str,
+        broadcast_id: int,
+        cursor_user_id: int,
+        sent: int,
+        failed: int,
+        blocked: int,
+        lease_seconds: int,
+        photo_file_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Record a handled page of recipients.
+
+        Moves the cursor and adds the page's counts (``failed`` includes the
+        ``blocked`` recipients); the outcomes themselves are written by
+        DeliveryOutcomeSink. Also renews the lease.
+
+        Returns:
+            Current status, or None if the lease now belongs to someone else
+            (nothing is recorded then)
+        """
+        values = dict(
+            cursor_user_id=cursor_user_id,
+            sent_count=BroadcastMessage.sent_count + sent,
+            error_count=BroadcastMessage.error_count + failed,
+            blocked_count=BroadcastMessage.blocked_count + blocked,
+            lease_expires_at=func.now() + timedelta(seconds=lease_seconds)
+        )
+        if photo_file_id:
+            values["photo_file_id"] = photo_file_id
+
+        result = await self.session.execute(
+            update(BroadcastMessage)
+            .where(
+                BroadcastMessage.id == broadcast_id,
+                BroadcastMessage.lease_owner == owner
+            )
+            .values(**values)
+            .returning(BroadcastMessage.status)
+            .execution_options(synchronize_session=False)
+        )
+        status = result.scalar_one_or_none()
+        await self.session.commit()
+
+        return status
+
+    async def release(self, owner: str, broadcast_id: int, completed: bool = False) -> None:
+        """Give up ``owner``'s lease; ``completed`` also finishes a running broadcast."""
+        values = dict(lease_owner=None, lease_expires_at=None)
+        conditions = [BroadcastMessage.id == broadcast_id, BroadcastMessage.lease_owner == owner]
+        if completed:
+            await self.session.execute(
+                update(BroadcastMessage)
+                .where(*conditions, BroadcastMessage.status == "running")
+                .values(status="completed", finished_at=func.now(), **values)
+                .execution_options(synchronize_session=False)
+            )
+        await self.session.execute(
+            update(BroadcastMessage)
+            .where(*conditions)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+
+    async def transition(self, broadcast_id: int, from_statuses: tuple, to_status: str) -> bool:
+        """
+        Move a broadcast to ``to_status`` if it is in one of ``from_statuses``.
+
+        A worker sending the broadcast notices the change at its next
+        heartbeat or page and stops.
+
+        Returns:
+            True if the status changed
+        """
+        values = dict(status=to_status)
+        if to_status in ("completed", "cancelled"):
+            values["finished_at"] = func.now()
+        result = await self.session.execute(
+            update(BroadcastMessage)
+            .where(
+                BroadcastMessage.id == broadcast_id,
+                BroadcastMessage.status.in_(from_statuses)
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+
+        return result.rowcount > 0
@@ -1,16 +1,62 @@
 """
 Subscription repository for database operations.
 """
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timezone
 
-from sqlalchemy import select
+from sqlalchemy import Integer, column, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.models.subscription import Subscription
+from app.database.models.subscription import UNLIMITED_SUBSCRIPTION_TYPE, Subscription
 from app.database.repositories.base import BaseRepository
 
 
+# Set-based token spend. Locks the user's active subscriptions, plans the
+# deduction in expiry order (time-limited first, eternal last) with a running
+# sum, and applies it - all in one statement. The plan is empty (nothing is
+# updated) when the total balance is short. Unlimited subscriptions absorb
+# their share without being deducted, matching Subscription.use_tokens().
+# Each returned row carries its planned share (``take``); a row skipped by the
+# final balance guard is missing, so the shares can add up to less than the
+# amount.
+SPEND_TOKENS_SQL = text("""
+    WITH candidates AS (
+        SELECT id, subscription_type, expires_at,
+               GREATEST(tokens_amount - tokens_used, 0) AS available
+        FROM subscriptions
+        WHERE user_id = :user_id
+          AND is_active
+          AND (expires_at IS NULL OR expires_at > now())
+        FOR UPDATE
+    ),
+    ordered AS (
+        SELECT id, subscription_type, available,
+               SUM(available) OVER (ORDER BY expires_at IS NULL, expires_at, id)
+                   - available AS spent_before,
+               SUM(available) OVER () AS total_available
+        FROM candidates
+    ),
+    plan AS (
+        SELECT id, subscription_type,
+               LEAST(available, :amount - spent_before) AS take
+        FROM ordered
+        WHERE total_available >= :amount
+          AND spent_before < :amount
+          AND available > 0
+    )
+    UPDATE subscriptions AS s
+    SET tokens_used = s.tokens_used + CASE
+            WHEN plan.subscription_type = :unlimited_type THEN 0
+            ELSE plan.take
+        END,
+        updated_at = now()
+    FROM plan
+    WHERE s.id = plan.id
+      AND s.tokens_used + plan.take <= s.tokens_amount
+    RETURNING s.*, plan.take AS take
+""")
+
+
 class SubscriptionRepository(BaseRepository[Subscription]):
     """Repository for Subscription model operations."""
 
@@ -58,6 +104,25 @@ class SubscriptionRepository(BaseRepository[Subscription]):
         # Return first active subscription
         return subscriptions[0] if subscriptions else None
 
+    async def get_active_unlimited_subscription(
+        self,
+        user_id: int
+    ) -> Optional[Subscription]:
+        """Get user's active unlimited subscription, if any."""
+        result = await self.session.execute(
+            select(Subscription)
+            .where(
+                Subscription.user_id == user_id,
+                Subscription.subscription_type == UNLIMITED_SUBSCRIPTION_TYPE,
+                Subscription.is_active.is_(True),
+                (Subscription.expires_at.is_(None)) |
+                (Subscription.expires_at > datetime.now(timezone.utc))
+            )
+            .order_by(Subscription.id)
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
     async def create_subscription(
         self,
         user_id: int,
@@ -110,6 +175,50 @@ class SubscriptionRepository(BaseRepository[Subscription]):
         await self.session.commit()
         return True
 
+    async def spend_tokens(self, user_id: int, amount: int) -> Tuple[List[Subscription], int]:
+        """
+        Atomically spend tokens across a user's active subscriptions.
+
+        Runs a single UPDATE (see ``SPEND_TOKENS_SQL``); the caller commits.
+
+        Returns:
+            (subscriptions charged, in spend order; tokens charged). The list
+            is empty when the user's balance is short - nothing is deducted
+            in that case. Tokens charged below ``amount`` means a row was
+            skipped and the caller must roll the spend back. For
+            ``amount <= 0`` all active subscriptions (locked, nothing deducted).
+        """
+        if amount <= 0:
+            # The plan would be empty; a free operation only needs an active
+            # subscription.
+            subscriptions = await self.get_user_subscriptions(
+                user_id,
+                active_only=True,
+                for_update=True,
+            )
+            return subscriptions, 0
+
+        result = await self.session.execute(
+            select(Subscription, column("take", Integer))
+            .from_statement(SPEND_TOKENS_SQL)
+            .execution_options(populate_existing=True),
+            {
+                "user_id": user_id,
+                "amount": amount,
+                "unlimited_type": UNLIMITED_SUBSCRIPTION_TYPE,
+            },
+        )
+        rows = result.all()
+        subscriptions = [sub for sub, _ in rows]
+        charged = sum(take for _, take in rows)
+
+        # RETURNING order is unspecified; restore spend order.
+        max_dt = datetime.max.replace(tzinfo=timezone.utc)
+        subscriptions.sort(
+            key=lambda sub: (sub.expires_at is None, sub.expires_at or max_dt, sub.id)
+        )
+        return subscriptions, charged
+
     async def get_expired_active_subscriptions(self) -> List[Subscription]:
         """Get all active subscriptions that have expired."""
         result = await self.session.execute(
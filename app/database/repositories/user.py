@@ -4,12 +4,14 @@ User repository for database operations.
 from typing import Optional
 from datetime import datetime, timezone
 
-from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database.loaders import select_user
 from app.database.models.user import User
 from app.database.repositories.base import BaseRepository
+from app.services.cache.user_cache import user_cache
+from app.services.user.activity_tracker import activity_tracker
 
 
 class UserRepository(BaseRepository[User]):
@@ -18,10 +20,14 @@ class UserRepository(BaseRepository[User]):
     def __init__(self, session: AsyncSession):
         super().__init__(User, session)
 
-    async def get_by_telegram_id(self, telegram_id: int) -> Optional[User]:
-        """Get user by Telegram ID."""
+    async def get_by_telegram_id(
+        self,
+        telegram_id: int,
+        profile: str = "auth"
+    ) -> Optional[User]:
+        """Get user by Telegram ID, loading relationships of a loader profile."""
         result = await self.session.execute(
-            select(User).where(User.telegram_id == telegram_id)
+            select_user(profile).where(User.telegram_id == telegram_id)
         )
         return result.scalar_one_or_none()
 
@@ -53,11 +59,17 @@ class UserRepository(BaseRepository[User]):
 
     async def ban_user(self, user_id: int, reason: str) -> Optional[User]:
         """Ban a user."""
-        return await self.update(user_id, is_banned=True, ban_reason=reason)
+        user = await self.update(user_id, is_banned=True, ban_reason=reason)
+        if user:
+            await user_cache.invalidate(user.telegram_id)
+        return user
 
     async def unban_user(self, user_id: int) -> Optional[User]:
         """Unban a user."""
-        return await self.update(user_id, is_banned=False, ban_reason=None)
+        user = await self.update(user_id, is_banned=False, ban_reason=None)
+        if user:
+            await user_cache.invalidate(user.telegram_id)
+        return user
 
     async def get_or_create(
         self,
@@ -73,8 +85,8 @@ class UserRepository(BaseRepository[User]):
         user = await self.get_by_telegram_id(telegram_id)
 
         if user:
-            # Update last activity
-            await self.update_last_activity(user.id)
+            # Buffered: written in bulk by the activity tracker flush
+            activity_tracker.touch(user.id)
             return user, False
 
         # Create new user — handle race condition where another request
@@ -4,12 +4,18 @@ Video generation job repository.
 from typing import List, Optional
 from datetime import datetime, timezone, timedelta
 
-from sqlalchemy import select, or_
+from sqlalchemy import and_, func, or_, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.models.video_job import VideoGenerationJob
 from app.database.repositories.base import BaseRepository
 
+# Postgres NOTIFY channel used to wake video workers when a job is queued
+VIDEO_JOBS_CHANNEL = "video_jobs"
+
+# Statuses after which a job no longer belongs to a worker
+LEASE_RELEASE_STATUSES = ("completed", "failed", "timeout_waiting")
+
 
 class VideoJobRepository(BaseRepository[VideoGenerationJob]):
     """Repository for video generation job operations."""
@@ -43,6 +49,210 @@ class VideoJobRepository(BaseRepository[VideoGenerationJob]):
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
+    async def claim_jobs(
+        self,
+        owner: str,
+        status: str,
+        limit: int,
+        lease_seconds: int
+    ) -> List[int]:
+        """
+        Atomically claim unleased jobs in ``status`` for a worker.
+
+        Runs one ``UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED)
+        RETURNING id`` so concurrent workers never claim the same job and
+        never block on each other's rows. Jobs scheduled for status checks
+        are left to :meth:`claim_due_polls`.
+
+        Returns:
+            IDs of claimed jobs, oldest first
+        """
+        now = func.now()
+        return await self._claim(
+            owner,
+            limit,
+            lease_seconds,
+            VideoGenerationJob.status == status,
+            VideoGenerationJob.next_poll_at.is_(None),
+            or_(
+                VideoGenerationJob.lease_expires_at.is_(None),
+                VideoGenerationJob.lease_expires_at < now
+            )
+        )
+
+    async def claim_stale_processing_jobs(
+        self,
+        owner: str,
+        limit: int,
+        lease_seconds: int,
+        unleased_grace_seconds: int
+    ) -> List[int]:
+        """
+        Claim ``processing`` jobs whose worker is gone (lease not renewed).
+
+        Jobs started before leases existed have no lease at all; they count
+        as abandoned once ``unleased_grace_seconds`` have passed since they
+        started processing. Jobs scheduled for status checks are left to
+        :meth:`claim_due_polls`, which also picks them up after a crash.
+
+        Returns:
+            IDs of claimed jobs, oldest first
+        """
+        now = func.now()
+        return await self._claim(
+            owner,
+            limit,
+            lease_seconds,
+            VideoGenerationJob.status == "processing",
+            VideoGenerationJob.next_poll_at.is_(None),
+            or_(
+                VideoGenerationJob.lease_expires_at < now,
+                and_(
+                    VideoGenerationJob.lease_expires_at.is_(None),
+                    VideoGenerationJob.started_processing_at
+                    < now - timedelta(seconds=unleased_grace_seconds)
+                )
+            )
+        )
+
+    async def claim_due_polls(self, owner: str, limit: int, lease_seconds: int) -> List[int]:
+        """
+        Claim submitted jobs whose next status check is due.
+
+        A job between checks holds no lease; one whose check was interrupted
+        (worker crash) becomes claimable again when its lease expires.
+
+        Returns:
+            IDs of claimed jobs, oldest first
+        """
+        now = func.now()
+        return await self._claim(
+            owner,
+            limit,
+            lease_seconds,
+            VideoGenerationJob.status.in_(("processing", "timeout_waiting")),
+            VideoGenerationJob.task_id.isnot(None),
+            VideoGenerationJob.next_poll_at <= now,
+            or_(
+                VideoGenerationJob.lease_expires_at.is_(None),
+                VideoGenerationJob.lease_expires_at < now
+            ),
+            order_by=VideoGenerationJob.next_poll_at
+        )
+
+    async def seconds_until_next_poll(self) -> Optional[float]:
+        """Seconds until the earliest scheduled status check (None if none)."""
+        result = await self.session.execute(
+            select(
+                func.extract("epoch", func.min(VideoGenerationJob.next_poll_at) - func.now())
+            ).where(
+                VideoGenerationJob.status.in_(("processing", "timeout_waiting")),
+                VideoGenerationJob.task_id.isnot(None)
+            )
+        )
+        seconds = result.scalar_one_or_none()
+        return None if seconds is None else float(seconds)
+
+    async def _claim(
+        self,
+        owner: str,
+        limit: int,
+        lease_seconds: int,
+        *conditions,
+        order_by=VideoGenerationJob.created_at
+    ) -> List[int]:
+        """Lease up to ``limit`` jobs matching ``conditions`` with SKIP LOCKED."""
+        if limit <= 0:
+            return []
+
+        now = func.now()
+        claimable = (
+            select(VideoGenerationJob.id)
+            .where(VideoGenerationJob.expires_at > now, *conditions)
+            .order_by(order_by)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            update(VideoGenerationJob)
+            .where(VideoGenerationJob.id.in_(claimable))
+            .values(
+                lease_owner=owner,
+                lease_expires_at=now + timedelta(seconds=lease_seconds)
+            )
+            .returning(VideoGenerationJob.id, VideoGenerationJob.created_at)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = sorted(result.all(), key=lambda row: row.created_at)
+        await self.session.commit()
+
+        return [row.id for row in claimed]
+
+    async def renew_leases(self, owner: str, job_ids: List[int], lease_seconds: int) -> List[int]:
+        """
+        Extend the leases ``owner`` still holds on ``job_ids`` (heartbeat).
+
+        Released leases (finished jobs) are left alone.
+
+        Returns:
+            IDs of jobs that another worker has claimed meanwhile
+        """
+        if not job_ids:
+            return []
+
+        await self.session.execute(
+            update(VideoGenerationJob)
+            .where(
+                VideoGenerationJob.id.in_(job_ids),
+                VideoGenerationJob.lease_owner == owner,
+                VideoGenerationJob.lease_expires_at.isnot(None)
+            )
+            .values(lease_expires_at=func.now() + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(
+            select(VideoGenerationJob.id).where(
+                VideoGenerationJob.id.in_(job_ids),
+                VideoGenerationJob.lease_owner != owner
+            )
+        )
+        taken_over = list(result.scalars().all())
+        await self.session.commit()
+
+        return taken_over
+
+    async def save_task_id(self, job_id: int, task_id: str) -> None:
+        """Persist the provider task ID as soon as the task is submitted."""
+        await self.session.execute(
+            update(VideoGenerationJob)
+            .where(VideoGenerationJob.id == job_id)
+            .values(task_id=task_id)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+
+    async def schedule_poll(self, job_id: int, delay_seconds: float, **fields) -> None:
+        """
+        Release a submitted job until its next status check.
+
+        Args:
+            job_id: Job ID
+            delay_seconds: Seconds until the check is due
+            **fields: Columns to update along the way (task_id, status, ...)
+        """
+        await self.session.execute(
+            update(VideoGenerationJob)
+            .where(VideoGenerationJob.id == job_id)
+            .values(
+                next_poll_at=func.now() + timedelta(seconds=delay_seconds),
+                lease_expires_at=None,
+                **fields
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+
     async def get_timeout_waiting_jobs(self, limit: Optional[int] = 100) -> List[VideoGenerationJob]:
         """
         Get jobs waiting after timeout for re-polling.
@@ -137,6 +347,14 @@ class VideoJobRepository(BaseRepository[VideoGenerationJob]):
         )
 
         self.session.add(job)
+        await self.session.flush()
+        if self.session.bind.dialect.name == "postgresql":
+            # Delivered on commit: wakes idle workers right away instead of
+            # on their next poll.
+            await self.session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": VIDEO_JOBS_CHANNEL, "payload": str(job.id)}
+            )
         await self.session.commit()
         await self.session.refresh(job)
 
@@ -178,6 +396,11 @@ class VideoJobRepository(BaseRepository[VideoGenerationJob]):
         if status == "processing" and not job.started_processing_at:
             job.started_processing_at = datetime.now(timezone.utc)
 
+        # Hand the job back to the queue (or retire it). lease_owner keeps
+        # the last worker for debugging; a NULL expiry means "not leased".
+        if status in LEASE_RELEASE_STATUSES:
+            job.lease_expires_at = None
+
         await self.session.commit()
         await self.session.refresh(job)
 
@@ -134,6 +134,51 @@ class MetricsCollector:
             logger.error("uptime_metrics_collection_failed", error=str(e))
             return {}
 
+    @staticmethod
+    def get_http_pool_metrics() -> Dict[str, Any]:
+        """
+        Get provider HTTP connection pool usage.
+
+        Returns:
+            Dict of host -> in_use, idle, limit_per_host, limit
+        """
+        try:
+            from app.core.http_client import http_clients
+            return http_clients.stats()
+        except Exception as e:
+            logger.error("http_pool_metrics_collection_failed", error=str(e))
+            return {}
+
+    @staticmethod
+    def get_ai_limiter_metrics() -> Dict[str, Any]:
+        """
+        Get adaptive AI concurrency limits.
+
+        Returns:
+            Dict of provider -> limit, in_flight, queued, throttled, ...
+        """
+        try:
+            from app.core.ai_limiter import limiter_stats
+            return limiter_stats()
+        except Exception as e:
+            logger.error("ai_limiter_metrics_collection_failed", error=str(e))
+            return {}
+
+    @staticmethod
+    def get_circuit_breaker_metrics() -> Dict[str, Any]:
+        """
+        Get AI provider circuit breakers.
+
+        Returns:
+            Dict of provider/model -> state, recent failures, retry_in, ...
+        """
+        try:
+            from app.core.circuit_breaker import circuit_breakers
+            return circuit_breakers.stats()
+        except Exception as e:
+            logger.error("circuit_breaker_metrics_collection_failed", error=str(e))
+            return {}
+
     @classmethod
     def get_all_metrics(cls) -> Dict[str, Any]:
         """
@@ -148,5 +193,8 @@ class MetricsCollector:
             "swap": cls.get_swap_metrics(),
             "disk": cls.get_disk_metrics(),
             "uptime": cls.get_uptime(),
+            "http_pools": cls.get_http_pool_metrics(),
+            "ai_limits": cls.get_ai_limiter_metrics(),
+            "circuit_breakers": cls.get_circuit_breaker_metrics(),
             "collected_at": datetime.utcnow().isoformat()
         }
@@ -3,9 +3,11 @@ AI Service Factory - returns appropriate AI service based on model.
 """
 from typing import Optional
 
+from app.core.circuit_breaker import circuit_breakers
 from app.core.config import settings
 from app.core.logger import get_logger
 from app.services.ai.base import BaseAIProvider
+from app.services.ai.client_cache import ai_clients
 from app.services.ai.openai_service import OpenAIService
 from app.services.ai.anthropic_service import AnthropicService
 from app.services.ai.google_service import GoogleService
@@ -104,6 +106,40 @@ class AIServiceFactory:
 
         return model
 
+    @classmethod
+    def resolve_model(cls, model: str) -> str:
+        """
+        The model to use for ``model`` right now: its fallback from
+        ``settings.fallback_models`` while its circuit breaker is open.
+        """
+        fallback = circuit_breakers.fallback_for(cls.get_provider_name(model), cls.get_real_model_name(model))
+        if fallback is None:
+            return model
+
+        provider, fallback_model = fallback
+        if fallback_model is None:
+            fallback_model = next(
+                (alias for alias, owner in cls.MODEL_PROVIDERS.items() if owner == provider),
+                None
+            )
+        if fallback_model is None or cls.get_provider_name(fallback_model) != provider:
+            return model
+
+        logger.info("model_fallback", model=model, fallback=fallback_model)
+        return fallback_model
+
+    @staticmethod
+    def has_api_key(provider: str) -> bool:
+        """Whether an API key is configured for the provider."""
+        api_keys = {
+            "openai": settings.openai_api_key,
+            "anthropic": settings.anthropic_api_key,
+            "google": settings.google_ai_api_key,
+            "deepseek": settings.deepseek_api_key,
+            "xai": settings.grok_ai_api,
+        }
+        return bool(api_keys.get(provider))
+
     @classmethod
     def create_service(
         cls,
@@ -124,14 +160,7 @@ class AIServiceFactory:
 
         # Auto-detect mock mode if not specified
         if use_mock is None:
-            api_keys = {
-                "openai": settings.openai_api_key,
-                "anthropic": settings.anthropic_api_key,
-                "google": settings.google_ai_api_key,
-                "deepseek": settings.deepseek_api_key,
-                "xai": settings.grok_ai_api,
-            }
-            use_mock = not bool(api_keys.get(provider))
+            use_mock = not cls.has_api_key(provider)
 
         # Return mock service if requested or no API key
         if use_mock:
@@ -174,6 +203,23 @@ class AIServiceFactory:
             )
             return MockAIService()
 
+    @classmethod
+    async def warm_up(cls) -> None:
+        """
+        Create the SDK clients of all configured providers and open a
+        connection for each, so the first messages skip the TLS handshake.
+
+        Services share clients through ``ai_clients``, so creating a service
+        here is what later create_service() calls reuse.
+        """
+        models = {}
+        for model, provider in cls.MODEL_PROVIDERS.items():
+            models.setdefault(provider, model)
+        for provider, model in models.items():
+            if cls.has_api_key(provider):
+                cls.create_service(model, use_mock=False)
+        await ai_clients.warm_up()
+
     @classmethod
     async def generate_text(
         cls,
@@ -194,6 +240,7 @@ class AIServiceFactory:
         Returns:
             AIResponse
         """
+        model = cls.resolve_model(model)
         service = cls.create_service(model, use_mock=use_mock)
         real_model = cls.get_real_model_name(model)
 
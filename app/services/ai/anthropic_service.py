@@ -3,13 +3,14 @@ Anthropic Claude service.
 """
 import asyncio
 import time
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 
 import httpx
 
 from app.core.config import settings
 from app.core.logger import get_logger
-from app.services.ai.base import BaseAIProvider, AIResponse
+from app.services.ai.client_cache import ai_clients
+from app.services.ai.base import BaseAIProvider, AIResponse, StreamCallback
 
 logger = get_logger(__name__)
 
@@ -54,10 +55,16 @@ class AnthropicService(BaseAIProvider):
         if self.api_key:
             AsyncAnthropic = _get_anthropic()
             if AsyncAnthropic:
-                self.client = AsyncAnthropic(
-                    api_key=self.api_key,
-                    timeout=ANTHROPIC_TIMEOUT,
-                    max_retries=2
+                self.client = ai_clients.get(
+                    "anthropic",
+                    self.api_key,
+                    None,
+                    lambda http_client: AsyncAnthropic(
+                        api_key=self.api_key,
+                        timeout=ANTHROPIC_TIMEOUT,
+                        max_retries=2,
+                        http_client=http_client
+                    )
                 )
 
     async def generate_text(
@@ -80,17 +87,7 @@ class AnthropicService(BaseAIProvider):
             )
 
         try:
-            messages = []
-
-            if history:
-                messages.extend(history)
-
-            messages.append({"role": "user", "content": prompt})
-
-            # Claude requires system to be separate parameter
-            kwargs_clean = kwargs.copy()
-            if system_prompt:
-                kwargs_clean["system"] = system_prompt
+            messages, kwargs_clean = self._build_request(prompt, system_prompt, history, kwargs)
 
             response = await self.client.messages.create(
                 model=model,
@@ -127,6 +124,93 @@ class AnthropicService(BaseAIProvider):
                 processing_time=time.time() - start_time
             )
 
+    async def stream_text(
+        self,
+        prompt: str,
+        on_delta: StreamCallback,
+        model: str = "claude-sonnet-4-20250514",
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict]] = None,
+        max_tokens: int = 4096,
+        **kwargs
+    ) -> AIResponse:
+        """Generate text using Claude models, streaming pieces to ``on_delta``."""
+        start_time = time.time()
+
+        if not self.client:
+            return AIResponse(
+                success=False,
+                error="Anthropic API key not configured or library not installed",
+                processing_time=time.time() - start_time
+            )
+
+        try:
+            messages, kwargs_clean = self._build_request(prompt, system_prompt, history, kwargs)
+
+            parts = []
+            async with self.client.messages.stream(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                **kwargs_clean
+            ) as stream:
+                async for text in stream.text_stream:
+                    parts.append(text)
+                    await on_delta(text)
+                final = await stream.get_final_message()
+
+            prompt_tokens = final.usage.input_tokens
+            completion_tokens = final.usage.output_tokens
+            processing_time = time.time() - start_time
+
+            logger.info(
+                "anthropic_text_streamed",
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                time=processing_time
+            )
+
+            return AIResponse(
+                success=True,
+                content="".join(parts),
+                tokens_used=prompt_tokens + completion_tokens,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                processing_time=processing_time,
+                metadata={"model": model}
+            )
+
+        except Exception as e:
+            logger.error("anthropic_text_stream_failed", error=str(e))
+            return AIResponse(
+                success=False,
+                error=str(e),
+                processing_time=time.time() - start_time
+            )
+
+    @staticmethod
+    def _build_request(
+        prompt: str,
+        system_prompt: Optional[str],
+        history: Optional[List[Dict]],
+        kwargs: dict
+    ) -> Tuple[List[Dict], dict]:
+        """Messages and extra parameters for a request."""
+        messages = []
+
+        if history:
+            messages.extend(history)
+
+        messages.append({"role": "user", "content": prompt})
+
+        # Claude requires system to be separate parameter
+        kwargs_clean = kwargs.copy()
+        if system_prompt:
+            kwargs_clean["system"] = system_prompt
+
+        return messages, kwargs_clean
+
     async def generate_image(self, prompt: str, **kwargs) -> AIResponse:
         """Claude does not support image generation."""
         return AIResponse(
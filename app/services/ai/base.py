@@ -2,9 +2,14 @@
 Base AI provider interface.
 """
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 from dataclasses import dataclass
 
+from app.core.circuit_breaker import guard_provider_class
+
+# Receives each new piece of a streamed text response
+StreamCallback = Callable[[str], Awaitable[None]]
+
 
 @dataclass
 class AIResponse:
@@ -27,6 +32,18 @@ class AIResponse:
 class BaseAIProvider(ABC):
     """Base class for all AI providers."""
 
+    # Circuit breaker name; defaults to the class name ("OpenAIService" -> "openai")
+    breaker_provider: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        failed = lambda error: AIResponse(success=False, error=str(error))
+        guard_provider_class(cls, {
+            "generate_text": failed,
+            "stream_text": failed,
+            "generate_image": failed,
+        })
+
     def __init__(self, api_key: str):
         self.api_key = api_key
 
@@ -35,6 +52,18 @@ class BaseAIProvider(ABC):
         """Generate text response."""
         pass
 
+    async def stream_text(self, prompt: str, on_delta: StreamCallback, **kwargs) -> AIResponse:
+        """
+        Generate text, passing pieces to ``on_delta`` as they arrive.
+
+        Returns the same AIResponse as generate_text (full content and final
+        usage). Providers without streaming deliver the whole text at once.
+        """
+        response = await self.generate_text(prompt, **kwargs)
+        if response.success and response.content:
+            await on_delta(response.content)
+        return response
+
     @abstractmethod
     async def generate_image(self, prompt: str, **kwargs) -> AIResponse:
         """Generate image from prompt."""
@@ -0,0 +1,103 @@
+"""
+Process-wide cache of AI SDK clients.
+
+Every ``AsyncOpenAI``/``AsyncAnthropic`` owns an httpx connection pool, so
+building one per message pays a TLS handshake per message and leaks the
+pool's sockets until garbage collection. Services fetch their client from
+:data:`ai_clients` instead: one client per (provider, API key, base URL),
+all on httpx pools with the same limits, closed on shutdown (``main.py``).
+
+Services that need their own timeout or retry policy take
+``client.with_options(...)``, which shares the cached connection pool.
+"""
+import asyncio
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Per-client connection limits (each provider/key/base URL gets one pool)
+AI_HTTP_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=60.0,
+)
+
+ClientKey = Tuple[str, str, Optional[str]]
+
+
+class AIClientCache:
+    """SDK clients keyed by provider, API key and base URL."""
+
+    def __init__(self):
+        self._clients: Dict[ClientKey, Any] = {}
+        self._http: Dict[ClientKey, httpx.AsyncClient] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(
+        self,
+        provider: str,
+        api_key: str,
+        base_url: Optional[str],
+        factory: Callable[[httpx.AsyncClient], Any],
+    ) -> Any:
+        """
+        Cached client for ``provider``, created with ``factory`` on first use.
+
+        Args:
+            provider: Provider name ("openai", "anthropic", ...)
+            api_key: API key the client authenticates with
+            base_url: API base URL (None for the SDK default)
+            factory: Builds the SDK client around the given httpx client
+        """
+        self._reset_if_loop_changed()
+        key = (provider, api_key, base_url)
+        client = self._clients.get(key)
+        if client is None:
+            http_client = httpx.AsyncClient(limits=AI_HTTP_LIMITS)
+            client = factory(http_client)
+            self._clients[key] = client
+            self._http[key] = http_client
+            logger.debug("ai_client_created", provider=provider, base_url=base_url)
+        return client
+
+    def _reset_if_loop_changed(self) -> None:
+        # Pooled connections belong to the loop that opened them (tests and
+        # scripts may run several loops)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is not loop:
+            if self._loop is not None:
+                self._clients, self._http = {}, {}
+            self._loop = loop
+
+    async def warm_up(self) -> None:
+        """Open one connection per cached client so first messages skip the handshake."""
+        async def _touch(key: ClientKey, client: Any) -> None:
+            try:
+                # Any response will do: the point is the pooled TLS connection
+                await self._http[key].get(str(client.base_url), timeout=10.0)
+            except Exception as e:
+                logger.debug("ai_client_warm_up_failed", provider=key[0], error=str(e))
+
+        await asyncio.gather(*(_touch(key, client) for key, client in list(self._clients.items())))
+
+    async def close(self) -> None:
+        """Close all clients and their connection pools (application shutdown)."""
+        clients, self._clients, self._http = self._clients, {}, {}
+        for (provider, _, _), client in clients.items():
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning("ai_client_close_failed", provider=provider, error=str(e))
+        if clients:
+            logger.info("ai_clients_closed", count=len(clients))
+
+
+# Global instance
+ai_clients = AIClientCache()
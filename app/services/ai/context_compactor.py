@@ -0,0 +1,202 @@
+"""
+Rolling summarization of long dialog histories.
+
+Trimming alone (``trim_history``) keeps prompts within the model's budget by
+forgetting the oldest turns. The compactor keeps their gist instead: once a
+conversation's estimated size passes ``COMPACT_THRESHOLD_RATIO`` of the
+model's history budget, the oldest turns (together with any previous summary)
+are summarized by a cheap model and replaced in Redis by one summary entry.
+
+Compaction runs in the background after the reply has been sent, so it never
+delays a message. The summary is stored in the dialog's history list, so it is
+computed once per compaction and reused by every following request. If the
+history changes under a running compaction (cleared, trimmed by the ring
+buffer) the result is dropped.
+"""
+import asyncio
+from typing import Callable, Dict, List, Optional, Set
+
+from app.core.logger import get_logger
+from app.services.ai.base import BaseAIProvider
+from app.services.cache.dialog_history import (
+    HISTORY_MAX_MESSAGES,
+    SUMMARY_ROLE,
+    DialogHistory,
+    dialog_history,
+    history_budget,
+)
+
+logger = get_logger(__name__)
+
+# Summaries are written by the model behind the "GPT 4.1 Mini" dialog
+COMPACT_MODEL = "gpt-4o-mini"
+
+# Compact when the history exceeds this share of the model's budget
+COMPACT_THRESHOLD_RATIO = 0.75
+
+# Newest messages always kept verbatim
+COMPACT_KEEP_MESSAGES = 6
+
+# Upper bound for the summary length
+COMPACT_SUMMARY_MAX_TOKENS = 800
+
+COMPACT_SYSTEM_PROMPT = (
+    "You compress chat histories. Summarize the conversation below so the "
+    "assistant can continue it: keep facts about the user, decisions, names, "
+    "numbers, code and open questions; drop pleasantries. Write in the "
+    "language of the conversation, as a compact list of points, without "
+    "any introduction."
+)
+
+_ROLE_LABELS = {
+    SUMMARY_ROLE: "Earlier summary",
+    "user": "User",
+    "assistant": "Assistant",
+}
+
+
+def plan_compaction(
+    turns: List[Dict],
+    model: str,
+    keep: int = COMPACT_KEEP_MESSAGES,
+    max_messages: int = HISTORY_MAX_MESSAGES
+) -> int:
+    """
+    How many of the oldest turns to replace with a summary.
+
+    Compacts when the history is over ``COMPACT_THRESHOLD_RATIO`` of the
+    model's budget or about to overflow the ring buffer (which would drop
+    the summary). The kept tail starts with a user message.
+
+    Returns:
+        Number of oldest turns to summarize, 0 when no compaction is needed
+    """
+    if len(turns) <= keep:
+        return 0
+
+    tokens = sum(turn.get("tokens", 0) for turn in turns)
+    over_budget = tokens > history_budget(model) * COMPACT_THRESHOLD_RATIO
+    almost_full = len(turns) >= max_messages - 2
+    if not (over_budget or almost_full):
+        return 0
+
+    count = len(turns) - keep
+    while count > 0 and turns[count]["role"] != "user":
+        count -= 1
+
+    # A lone summary has nothing left to fold in
+    if count == 1 and turns[0]["role"] == SUMMARY_ROLE:
+        return 0
+    return count
+
+
+def format_transcript(turns: List[Dict]) -> str:
+    """Turns (and an earlier summary) as plain text for the summarizer."""
+    return "\n\n".join(
+        f"{_ROLE_LABELS.get(turn['role'], turn['role'])}: {turn['content']}"
+        for turn in turns
+    )
+
+
+async def summarize_turns(
+    turns: List[Dict],
+    service: BaseAIProvider,
+    model: str = COMPACT_MODEL
+) -> Optional[str]:
+    """
+    Summary of ``turns`` written by ``service``.
+
+    Returns:
+        Summary text, or None if the model failed
+    """
+    response = await service.generate_text(
+        prompt=format_transcript(turns),
+        model=model,
+        system_prompt=COMPACT_SYSTEM_PROMPT,
+        temperature=0,
+        max_tokens=COMPACT_SUMMARY_MAX_TOKENS
+    )
+    if not response.success or not response.content:
+        logger.warning("dialog_summary_failed", error=response.error)
+        return None
+    return response.content.strip()
+
+
+def _default_service() -> Optional[BaseAIProvider]:
+    """
+    The summarizer, or None without an API key for it.
+
+    The factory falls back to MockAIService without a key; its canned reply
+    would replace real turns, so no compaction happens then.
+    """
+    from app.services.ai.ai_factory import AIServiceFactory
+    if not AIServiceFactory.has_api_key(AIServiceFactory.get_provider_name(COMPACT_MODEL)):
+        return None
+    return AIServiceFactory.create_service(COMPACT_MODEL, use_mock=False)
+
+
+class ContextCompactor:
+    """Summarizes the oldest turns of long dialogs in the background."""
+
+    def __init__(
+        self,
+        history: DialogHistory = dialog_history,
+        service_factory: Callable[[], Optional[BaseAIProvider]] = _default_service
+    ):
+        self.history = history
+        self.service_factory = service_factory
+        self._running: Set[int] = set()
+        self._background: Set[asyncio.Task] = set()
+
+    def schedule(self, telegram_id: int, model: str) -> None:
+        """Compact the user's history in the background if it has grown too long."""
+        if telegram_id in self._running:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self.compact(telegram_id, model))
+        except RuntimeError:
+            return
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def compact(self, telegram_id: int, model: str) -> bool:
+        """
+        Replace the oldest turns of the user's history with a summary.
+
+        Returns:
+            True if the history was compacted
+        """
+        if telegram_id in self._running:
+            return False
+        self._running.add(telegram_id)
+        try:
+            service = self.service_factory()
+            if service is None:
+                return False  # No real summarizer configured
+
+            turns = await self.history.get(telegram_id)
+            count = plan_compaction(turns, model)
+            if not count:
+                return False
+
+            summary = await summarize_turns(turns[:count], service)
+            if not summary:
+                return False
+
+            compacted = await self.history.replace_oldest(telegram_id, turns[:count], summary)
+            logger.info(
+                "dialog_history_compacted" if compacted else "dialog_history_compaction_stale",
+                telegram_id=telegram_id,
+                model=model,
+                turns=count
+            )
+            return compacted
+        except Exception as e:
+            logger.error("dialog_history_compaction_failed", telegram_id=telegram_id, error=str(e))
+            return False
+        finally:
+            self._running.discard(telegram_id)
+
+
+# Global instance
+context_compactor = ContextCompactor()
@@ -7,7 +7,7 @@ from typing import Optional, List, Dict, TYPE_CHECKING
 
 from app.core.config import settings
 from app.core.logger import get_logger
-from app.services.ai.base import BaseAIProvider, AIResponse
+from app.services.ai.base import BaseAIProvider, AIResponse, StreamCallback
 from app.services.gemini import gemini_execution_layer
 
 logger = get_logger(__name__)
@@ -82,29 +82,12 @@ class GoogleService(BaseAIProvider):
                     processing_time=time.time() - start_time
                 )
 
-            # Configure generation settings
-            generation_config = {
-                "temperature": kwargs.get("temperature", 0.7),
-                "top_p": kwargs.get("top_p", 0.95),
-                "top_k": kwargs.get("top_k", 40),
-                "max_output_tokens": kwargs.get("max_tokens", 8192),
-            }
-
-            # Create model instance
-            model_instance = self._genai.GenerativeModel(
-                model_name=model,
-                generation_config=generation_config
-            )
-
-            # Combine system prompt with user prompt if provided
-            full_prompt = prompt
-            if system_prompt:
-                full_prompt = f"{system_prompt}\n\n{prompt}"
+            model_instance, contents = self._prepare_request(prompt, model, system_prompt, history, kwargs)
 
             async def _run_request():
                 # google.generativeai uses sync API, so run it in thread pool
                 return await asyncio.wait_for(
-                    asyncio.to_thread(model_instance.generate_content, full_prompt),
+                    asyncio.to_thread(model_instance.generate_content, contents),
                     timeout=GOOGLE_REQUEST_TIMEOUT,
                 )
 
@@ -157,6 +140,147 @@ class GoogleService(BaseAIProvider):
                 processing_time=time.time() - start_time
             )
 
+    async def stream_text(
+        self,
+        prompt: str,
+        on_delta: StreamCallback,
+        model: str = "gemini-2.0-flash-exp",
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict]] = None,
+        **kwargs
+    ) -> AIResponse:
+        """Generate text using Gemini models, streaming pieces to ``on_delta``."""
+        start_time = time.time()
+
+        if not self.client:
+            return AIResponse(
+                success=False,
+                error="Google AI API key not configured or library not installed",
+                processing_time=time.time() - start_time
+            )
+
+        try:
+            if not self._genai:
+                self._genai = _get_genai()
+
+            if not self._genai:
+                return AIResponse(
+                    success=False,
+                    error="Google Gemini library not available",
+                    processing_time=time.time() - start_time
+                )
+
+            model_instance, contents = self._prepare_request(prompt, model, system_prompt, history, kwargs)
+            parts: List[str] = []
+            usage = None
+
+            async def _stream():
+                nonlocal usage
+                response = await model_instance.generate_content_async(contents, stream=True)
+                try:
+                    async for chunk in response:
+                        try:
+                            text = chunk.text
+                        except ValueError:
+                            # Chunk without text parts (e.g. the final one)
+                            text = ""
+                        if text:
+                            parts.append(text)
+                            await on_delta(text)
+                        usage = getattr(chunk, "usage_metadata", None) or usage
+                except Exception as e:
+                    if parts:
+                        # The user already sees part of the answer: a retry
+                        # would repeat it, so fail instead
+                        raise RuntimeError(f"Gemini stream interrupted: {type(e).__name__}") from e
+                    raise
+
+            async def _run_request():
+                return await asyncio.wait_for(_stream(), timeout=GOOGLE_REQUEST_TIMEOUT)
+
+            try:
+                await gemini_execution_layer.execute(
+                    operation="text_stream",
+                    model=model,
+                    request_fn=_run_request,
+                )
+            except asyncio.TimeoutError:
+                return AIResponse(
+                    success=False,
+                    error=f"Google API request timed out after {GOOGLE_REQUEST_TIMEOUT}s",
+                    processing_time=time.time() - start_time
+                )
+
+            prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+            completion_tokens = getattr(usage, "candidates_token_count", 0) or 0
+            processing_time = time.time() - start_time
+
+            logger.info(
+                "google_text_streamed",
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                time=processing_time
+            )
+
+            return AIResponse(
+                success=True,
+                content="".join(parts),
+                tokens_used=prompt_tokens + completion_tokens,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                processing_time=processing_time,
+                metadata={"model": model}
+            )
+
+        except Exception as e:
+            error_msg = str(e)
+            logger.error("google_text_stream_failed", error=error_msg, model=model)
+            return AIResponse(
+                success=False,
+                error=error_msg,
+                processing_time=time.time() - start_time
+            )
+
+    def _prepare_request(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: Optional[str],
+        history: Optional[List[Dict]],
+        kwargs: dict
+    ):
+        """Model instance and contents (prompt, or conversation with history) for a text request."""
+        # Configure generation settings
+        generation_config = {
+            "temperature": kwargs.get("temperature", 0.7),
+            "top_p": kwargs.get("top_p", 0.95),
+            "top_k": kwargs.get("top_k", 40),
+            "max_output_tokens": kwargs.get("max_tokens", 8192),
+        }
+
+        # Create model instance
+        model_instance = self._genai.GenerativeModel(
+            model_name=model,
+            generation_config=generation_config
+        )
+
+        # Combine system prompt with user prompt if provided
+        full_prompt = prompt
+        if system_prompt:
+            full_prompt = f"{system_prompt}\n\n{prompt}"
+
+        if not history:
+            return model_instance, full_prompt
+
+        # Gemini names the assistant role "model"
+        contents = [
+            {"role": "model" if msg["role"] == "assistant" else "user", "parts": [msg["content"]]}
+            for msg in history
+        ]
+        contents.append({"role": "user", "parts": [full_prompt]})
+        return model_instance, contents
+
     async def generate_image(self, prompt: str, **kwargs) -> AIResponse:
         """Gemini Pro does not support image generation (Imagen does)."""
         return AIResponse(
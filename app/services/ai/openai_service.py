@@ -3,14 +3,15 @@ OpenAI service for GPT, DALL-E, Whisper, TTS.
 """
 import asyncio
 import time
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict, Tuple
 
 from openai import AsyncOpenAI
 import httpx
 
 from app.core.config import settings
 from app.core.logger import get_logger
-from app.services.ai.base import BaseAIProvider, AIResponse
+from app.services.ai.client_cache import ai_clients
+from app.services.ai.base import BaseAIProvider, AIResponse, StreamCallback
 
 logger = get_logger(__name__)
 
@@ -23,16 +24,65 @@ OPENAI_TIMEOUT = httpx.Timeout(
 )
 
 
+def get_openai_client(api_key: str) -> AsyncOpenAI:
+    """Shared OpenAI client for ``api_key`` (GPT, DALL-E and Vision)."""
+    return ai_clients.get(
+        "openai",
+        api_key,
+        None,
+        lambda http_client: AsyncOpenAI(
+            api_key=api_key,
+            timeout=OPENAI_TIMEOUT,
+            max_retries=2,  # Retry on transient errors
+            http_client=http_client
+        )
+    )
+
+
+async def stream_chat_completion(
+    client: AsyncOpenAI,
+    on_delta: StreamCallback,
+    include_usage: bool = True,
+    **kwargs
+) -> Tuple[str, Optional[Any]]:
+    """
+    Stream a chat completion from an OpenAI-compatible API.
+
+    Args:
+        client: OpenAI SDK client (OpenAI, DeepSeek, xAI, Perplexity)
+        on_delta: Receives each content piece as it arrives
+        include_usage: Ask for usage in the final chunk (``stream_options``);
+            APIs that always send it don't need the option
+        **kwargs: chat.completions.create() parameters (model, messages, ...)
+
+    Returns:
+        Full content and the usage object of the final chunk (None if the API
+        sent none)
+    """
+    if include_usage:
+        kwargs["stream_options"] = {"include_usage": True}
+
+    stream = await client.chat.completions.create(stream=True, **kwargs)
+    parts = []
+    usage = None
+    async for chunk in stream:
+        if chunk.usage:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            await on_delta(delta)
+    return "".join(parts), usage
+
+
 class OpenAIService(BaseAIProvider):
     """OpenAI API integration."""
 
     def __init__(self, api_key: Optional[str] = None):
         super().__init__(api_key or settings.openai_api_key)
-        self.client = AsyncOpenAI(
-            api_key=self.api_key,
-            timeout=OPENAI_TIMEOUT,
-            max_retries=2  # Retry on transient errors
-        )
+        self.client = get_openai_client(self.api_key)
 
     async def generate_text(
         self,
@@ -46,20 +96,7 @@ class OpenAIService(BaseAIProvider):
         start_time = time.time()
 
         try:
-            messages = []
-
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-
-            if history:
-                messages.extend(history)
-
-            messages.append({"role": "user", "content": prompt})
-
-            # O3/O1 models don't support max_tokens parameter - remove it
-            if 'o1-' in model or 'o3-' in model:
-                kwargs.pop('max_tokens', None)
-                kwargs.pop('max_completion_tokens', None)
+            messages = self._build_messages(prompt, model, system_prompt, history, kwargs)
 
             response = await self.client.chat.completions.create(
                 model=model,
@@ -101,6 +138,80 @@ class OpenAIService(BaseAIProvider):
                 processing_time=time.time() - start_time
             )
 
+    async def stream_text(
+        self,
+        prompt: str,
+        on_delta: StreamCallback,
+        model: str = "gpt-4",
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict]] = None,
+        **kwargs
+    ) -> AIResponse:
+        """Generate text using GPT models, streaming pieces to ``on_delta``."""
+        start_time = time.time()
+
+        try:
+            messages = self._build_messages(prompt, model, system_prompt, history, kwargs)
+            content, usage = await stream_chat_completion(
+                self.client, on_delta, model=model, messages=messages, **kwargs
+            )
+
+            prompt_tokens = usage.prompt_tokens if usage else 0
+            completion_tokens = usage.completion_tokens if usage else 0
+            processing_time = time.time() - start_time
+
+            logger.info(
+                "openai_text_streamed",
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                time=processing_time
+            )
+
+            return AIResponse(
+                success=True,
+                content=content,
+                tokens_used=prompt_tokens + completion_tokens,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                processing_time=processing_time,
+                metadata={"model": model}
+            )
+
+        except Exception as e:
+            logger.error("openai_text_stream_failed", error=str(e))
+            return AIResponse(
+                success=False,
+                error=str(e),
+                processing_time=time.time() - start_time
+            )
+
+    @staticmethod
+    def _build_messages(
+        prompt: str,
+        model: str,
+        system_prompt: Optional[str],
+        history: Optional[List[Dict]],
+        kwargs: dict
+    ) -> List[Dict]:
+        """Chat messages for a request; drops parameters the model rejects from ``kwargs``."""
+        messages = []
+
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        if history:
+            messages.extend(history)
+
+        messages.append({"role": "user", "content": prompt})
+
+        # O3/O1 models don't support max_tokens parameter - remove it
+        if 'o1-' in model or 'o3-' in model:
+            kwargs.pop('max_tokens', None)
+            kwargs.pop('max_completion_tokens', None)
+
+        return messages
+
     async def translate_to_english(self, text: str) -> Optional[str]:
         """
         Translate an arbitrary prompt to English for image/video models.
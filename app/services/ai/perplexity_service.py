@@ -10,10 +10,14 @@ import httpx
 
 from app.core.config import settings
 from app.core.logger import get_logger
-from app.services.ai.base import BaseAIProvider, AIResponse
+from app.services.ai.client_cache import ai_clients
+from app.services.ai.base import BaseAIProvider, AIResponse, StreamCallback
+from app.services.ai.openai_service import stream_chat_completion
 
 logger = get_logger(__name__)
 
+PERPLEXITY_BASE_URL = "https://api.perplexity.ai"
+
 # Timeout settings for Perplexity requests
 PERPLEXITY_TIMEOUT = httpx.Timeout(
     connect=10.0,
@@ -30,11 +34,17 @@ class PerplexityService(BaseAIProvider):
         super().__init__(api_key or settings.perplexity_api_key)
 
         # Perplexity uses OpenAI-compatible API
-        self.client = AsyncOpenAI(
-            api_key=self.api_key,
-            base_url="https://api.perplexity.ai",
-            timeout=PERPLEXITY_TIMEOUT,
-            max_retries=2
+        self.client = ai_clients.get(
+            "perplexity",
+            self.api_key,
+            PERPLEXITY_BASE_URL,
+            lambda http_client: AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=PERPLEXITY_BASE_URL,
+                timeout=PERPLEXITY_TIMEOUT,
+                max_retries=2,
+                http_client=http_client
+            )
         ) if self.api_key else None
 
     async def generate_text(
@@ -56,15 +66,7 @@ class PerplexityService(BaseAIProvider):
             )
 
         try:
-            messages = []
-
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-
-            if history:
-                messages.extend(history)
-
-            messages.append({"role": "user", "content": prompt})
+            messages = self._build_messages(prompt, system_prompt, history)
 
             response = await self.client.chat.completions.create(
                 model=model,
@@ -100,6 +102,83 @@ class PerplexityService(BaseAIProvider):
                 processing_time=time.time() - start_time
             )
 
+    async def stream_text(
+        self,
+        prompt: str,
+        on_delta: StreamCallback,
+        model: str = "sonar",
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict]] = None,
+        **kwargs
+    ) -> AIResponse:
+        """Generate text using Perplexity models, streaming pieces to ``on_delta``."""
+        start_time = time.time()
+
+        if not self.client:
+            return AIResponse(
+                success=False,
+                error="Perplexity API key not configured",
+                processing_time=time.time() - start_time
+            )
+
+        try:
+            content, usage = await stream_chat_completion(
+                self.client,
+                on_delta,
+                include_usage=False,  # usage comes with every chunk
+                model=model,
+                messages=self._build_messages(prompt, system_prompt, history),
+                **kwargs
+            )
+
+            prompt_tokens = usage.prompt_tokens if usage else 0
+            completion_tokens = usage.completion_tokens if usage else 0
+            processing_time = time.time() - start_time
+
+            logger.info(
+                "perplexity_text_streamed",
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                time=processing_time
+            )
+
+            return AIResponse(
+                success=True,
+                content=content,
+                tokens_used=prompt_tokens + completion_tokens,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                processing_time=processing_time,
+                metadata={"model": model}
+            )
+
+        except Exception as e:
+            logger.error("perplexity_text_stream_failed", error=str(e))
+            return AIResponse(
+                success=False,
+                error=str(e),
+                processing_time=time.time() - start_time
+            )
+
+    @staticmethod
+    def _build_messages(
+        prompt: str,
+        system_prompt: Optional[str],
+        history: Optional[List[Dict]]
+    ) -> List[Dict]:
+        """Chat messages for a request."""
+        messages = []
+
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        if history:
+            messages.extend(history)
+
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
     async def generate_image(self, prompt: str, **kwargs) -> AIResponse:
         """Perplexity does not support image generation."""
         return AIResponse(
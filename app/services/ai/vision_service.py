@@ -6,21 +6,23 @@ import base64
 from pathlib import Path
 from typing import Optional, List, Dict
 
-from openai import AsyncOpenAI
-
 from app.core.config import settings
 from app.core.logger import get_logger
 from app.services.ai.base import AIResponse
+from app.services.ai.openai_service import get_openai_client
 
 logger = get_logger(__name__)
 
+VISION_TIMEOUT = 600.0
+
 
 class VisionService:
     """OpenAI GPT-4 Vision for image analysis."""
 
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or settings.openai_api_key
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        # Vision requests keep the SDK's default 10-minute timeout
+        self.client = get_openai_client(self.api_key).with_options(timeout=VISION_TIMEOUT)
 
     async def analyze_image(
         self,
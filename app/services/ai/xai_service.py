@@ -10,7 +10,9 @@ from openai import AsyncOpenAI
 
 from app.core.config import settings
 from app.core.logger import get_logger
-from app.services.ai.base import BaseAIProvider, AIResponse
+from app.services.ai.client_cache import ai_clients
+from app.services.ai.base import BaseAIProvider, AIResponse, StreamCallback
+from app.services.ai.openai_service import stream_chat_completion
 
 logger = get_logger(__name__)
 
@@ -29,11 +31,17 @@ class XAIService(BaseAIProvider):
 
     def __init__(self, api_key: Optional[str] = None):
         super().__init__(api_key or settings.grok_ai_api)
-        self.client = AsyncOpenAI(
-            api_key=self.api_key,
-            base_url=XAI_BASE_URL,
-            timeout=XAI_TIMEOUT,
-            max_retries=2,
+        self.client = ai_clients.get(
+            "xai",
+            self.api_key,
+            XAI_BASE_URL,
+            lambda http_client: AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=XAI_BASE_URL,
+                timeout=XAI_TIMEOUT,
+                max_retries=2,
+                http_client=http_client,
+            )
         )
 
     async def generate_text(
@@ -48,20 +56,7 @@ class XAIService(BaseAIProvider):
         start_time = time.time()
 
         try:
-            messages = []
-
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            else:
-                messages.append({
-                    "role": "system",
-                    "content": "You are Grok, a maximally truth-seeking AI assistant. Be helpful, insightful, and direct."
-                })
-
-            if history:
-                messages.extend(history)
-
-            messages.append({"role": "user", "content": prompt})
+            messages = self._build_messages(prompt, system_prompt, history)
 
             response = await self.client.chat.completions.create(
                 model=model,
@@ -103,5 +98,79 @@ class XAIService(BaseAIProvider):
                 processing_time=processing_time,
             )
 
+    async def stream_text(
+        self,
+        prompt: str,
+        on_delta: StreamCallback,
+        model: str = "grok-4.3",
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict]] = None,
+        **kwargs
+    ) -> AIResponse:
+        """Generate text using Grok models, streaming pieces to ``on_delta``."""
+        start_time = time.time()
+
+        try:
+            content, usage = await stream_chat_completion(
+                self.client,
+                on_delta,
+                model=model,
+                messages=self._build_messages(prompt, system_prompt, history),
+                **kwargs
+            )
+
+            prompt_tokens = usage.prompt_tokens if usage else 0
+            completion_tokens = usage.completion_tokens if usage else 0
+            processing_time = time.time() - start_time
+
+            logger.info(
+                "xai_text_streamed",
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                time=processing_time
+            )
+
+            return AIResponse(
+                success=True,
+                content=content,
+                tokens_used=prompt_tokens + completion_tokens,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                processing_time=processing_time,
+                metadata={"model": model}
+            )
+
+        except Exception as e:
+            logger.error("xai_text_stream_failed", error=str(e))
+            return AIResponse(
+                success=False,
+                error=str(e),
+                processing_time=time.time() - start_time
+            )
+
+    @staticmethod
+    def _build_messages(
+        prompt: str,
+        system_prompt: Optional[str],
+        history: Optional[List[Dict]]
+    ) -> List[Dict]:
+        """Chat messages for a request."""
+        messages = []
+
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        else:
+            messages.append({
+                "role": "system",
+                "content": "You are Grok, a maximally truth-seeking AI assistant. Be helpful, insightful, and direct."
+            })
+
+        if history:
+            messages.extend(history)
+
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
     async def generate_image(self, prompt: str, **kwargs) -> AIResponse:
         raise NotImplementedError("Image generation not supported by xAI service")
@@ -5,10 +5,10 @@ from abc import ABC, abstractmethod
 from typing import Optional, Callable, Awaitable
 from dataclasses import dataclass
 from pathlib import Path
-import aiohttp
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.http_client import http_clients
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -56,12 +56,16 @@ class BaseAudioProvider(ABC):
         """Transcribe audio to text."""
         raise NotImplementedError("Transcription not supported by this provider")
 
+    def _http_session(self, url: str):
+        """Pooled HTTP session for the host of ``url`` (don't close it)."""
+        return http_clients.session(url)
+
     async def _download_file(self, url: str, filename: str) -> str:
         """Download file from URL to storage."""
         try:
             file_path = self.storage_path / filename
 
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session(url) as session:
                 async with session.get(url) as response:
                     if response.status == 200:
                         with open(file_path, 'wb') as f:
@@ -189,7 +189,7 @@ class OpenAIAudioService(BaseAudioProvider):
             "voice": voice
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status != 200:
                     error_text = await response.text()
@@ -234,7 +234,7 @@ class OpenAIAudioService(BaseAudioProvider):
             if language:
                 data.add_field('language', language)
 
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session(url) as session:
                 async with session.post(url, headers=headers, data=data) as response:
                     if response.status != 200:
                         error_text = await response.text()
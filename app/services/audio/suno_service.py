@@ -2,13 +2,11 @@
 Suno AI music generation service via sunoapi.org.
 """
 import time
-import asyncio
 from typing import Optional, Callable, Awaitable, List
 
-import aiohttp
-
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.poll_scheduler import poll_scheduler
 from app.services.audio.base import BaseAudioProvider, AudioResponse
 
 logger = get_logger(__name__)
@@ -149,7 +147,7 @@ class SunoService(BaseAudioProvider):
         if "audioWeight" in kwargs:
             payload["audioWeight"] = kwargs["audioWeight"]
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status not in [200, 201]:
                     error_text = await response.text()
@@ -172,8 +170,7 @@ class SunoService(BaseAudioProvider):
         task_ids: List[str],
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         max_wait_time: int = 600,  # 10 minutes
-        poll_interval: int = 5,  # 5 seconds
-        max_iterations: int = 120  # Maximum 120 iterations (10 minutes at 5s interval)
+        max_iterations: int = 120  # Safety cap; the poll curve needs far fewer
     ) -> List[str]:
         """
         Poll generation status until complete.
@@ -201,9 +198,11 @@ class SunoService(BaseAudioProvider):
         start_time = time.time()
         last_status = None
         same_status_count = 0
+        status_since = start_time
         iteration = 0
 
         while True:
+            await poll_scheduler.wait_turn("suno", start_time)
             iteration += 1
 
             # Check max iterations
@@ -230,7 +229,7 @@ class SunoService(BaseAudioProvider):
                         "taskId": task_id
                     }
 
-                    async with aiohttp.ClientSession() as session:
+                    async with self._http_session(url) as session:
                         async with session.get(url, headers=headers, params=params) as response:
                             if response.status != 200:
                                 error_text = await response.text()
@@ -287,6 +286,7 @@ class SunoService(BaseAudioProvider):
                                     same_status_count += 1
                                 else:
                                     same_status_count = 0
+                                    status_since = time.time()
                                     last_status = status
 
                                 # Check if this task reached terminal status
@@ -364,28 +364,27 @@ class SunoService(BaseAudioProvider):
                 # - Processing statuses: 360s (music generation takes time)
                 # - Unknown statuses: 120s (fail fast for unexpected states)
                 if last_status == "PENDING":
-                    max_stuck_iterations = 48  # 48 * 5s = 240 seconds
+                    max_stuck_seconds = 240
                 elif last_status in {"TEXT_SUCCESS", "FIRST_SUCCESS"}:
-                    max_stuck_iterations = 72  # 72 * 5s = 360 seconds
+                    max_stuck_seconds = 360
                 else:
-                    max_stuck_iterations = 24  # 24 * 5s = 120 seconds
+                    max_stuck_seconds = 120
 
-                if same_status_count > max_stuck_iterations:
+                stuck_seconds = int(time.time() - status_since)
+                if stuck_seconds > max_stuck_seconds:
                     logger.warning(
                         "suno_status_stuck",
                         status=last_status,
                         stuck_iterations=same_status_count,
-                        max_allowed=max_stuck_iterations
+                        stuck_seconds=stuck_seconds,
+                        max_allowed=max_stuck_seconds
                     )
                     raise Exception(
                         f"Generation stuck at status {last_status} "
-                        f"for {same_status_count * poll_interval} seconds "
-                        f"(max allowed: {max_stuck_iterations * poll_interval}s)"
+                        f"for {stuck_seconds} seconds "
+                        f"(max allowed: {max_stuck_seconds}s)"
                     )
 
-                # Wait before next poll
-                await asyncio.sleep(poll_interval)
-
             except Exception as e:
                 logger.error("suno_poll_error", error=str(e), iteration=iteration)
                 raise
@@ -0,0 +1,176 @@
+"""
+In-process index of broadcast buttons for click tracking.
+
+``BroadcastTrackingMiddleware`` runs for every callback query, yet only
+presses of broadcast buttons are tracked. It used to open a DB session, load
+the recent broadcasts and scan their ``buttons`` JSON to find out. This
+module keeps ``callback_data -> (broadcast_id, button_index, text)`` in
+memory instead, so an ordinary menu click costs a dict lookup.
+
+- loaded from the database when the bot starts (broadcasts of the last
+  ``BROADCAST_INDEX_WINDOW_DAYS``, the window clicks are tracked in);
+- ``create_broadcast_message`` (admin bot) publishes new broadcasts on the
+  Redis channel ``BROADCAST_INDEX_CHANNEL``; every replica listens and adds
+  them;
+- reloaded whenever the subscription is (re)established, since messages
+  published while it was down are lost, and every
+  ``BROADCAST_INDEX_RELOAD_SECONDS`` as a safety net.
+
+A callback_data used by several broadcasts (preset buttons) is attributed to
+the most recent one.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select
+
+from app.core.logger import get_logger
+from app.core.redis_client import redis_client
+from app.database.database import async_session_maker
+from app.database.models.broadcast import BroadcastMessage
+
+logger = get_logger(__name__)
+
+# Redis pub/sub channel announcing new broadcasts
+BROADCAST_INDEX_CHANNEL = "broadcast:buttons"
+
+# Clicks are tracked for broadcasts this recent
+BROADCAST_INDEX_WINDOW_DAYS = 30
+
+# Full reload interval (covers a missed publish)
+BROADCAST_INDEX_RELOAD_SECONDS = 600
+
+# Wait before resubscribing after the listener fails
+BROADCAST_INDEX_RETRY_SECONDS = 5
+
+
+@dataclass(frozen=True)
+class BroadcastButton:
+    """A tracked broadcast button."""
+    broadcast_id: int
+    index: int
+    text: str
+    # Broadcast creation time (epoch seconds); older than the window = untracked
+    created: float
+
+
+class BroadcastCallbackIndex:
+    """callback_data -> BroadcastButton, kept in sync across replicas."""
+
+    def __init__(self, window_days: int = BROADCAST_INDEX_WINDOW_DAYS):
+        self.window_seconds = window_days * 86400
+        self._buttons: Dict[str, BroadcastButton] = {}
+        self._listen_task: Optional[asyncio.Task] = None
+
+    def lookup(self, callback_data: Optional[str]) -> Optional[BroadcastButton]:
+        """The broadcast button ``callback_data`` belongs to, if it is tracked."""
+        if not callback_data:
+            return None
+        button = self._buttons.get(callback_data)
+        if button is None or button.created < time.time() - self.window_seconds:
+            return None
+        return button
+
+    def add(self, broadcast_id: int, buttons: Iterable[dict], created: float) -> None:
+        """Index the callback buttons of a broadcast."""
+        for index, button in enumerate(buttons or ()):
+            callback_data = button.get("callback_data")
+            if not callback_data:
+                continue  # URL and copy-text buttons produce no callbacks
+            current = self._buttons.get(callback_data)
+            if current is None or current.broadcast_id <= broadcast_id:
+                self._buttons[callback_data] = BroadcastButton(
+                    broadcast_id, index, button.get("text", ""), created
+                )
+
+    async def load(self) -> int:
+        """
+        Rebuild the index from the database.
+
+        Returns:
+            Number of indexed buttons
+        """
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.window_seconds)
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(BroadcastMessage.id, BroadcastMessage.buttons, BroadcastMessage.created_at)
+                .where(BroadcastMessage.created_at > since)
+                .order_by(BroadcastMessage.id)
+            )
+            rows = result.all()
+
+        previous, self._buttons = self._buttons, {}
+        try:
+            for row in rows:
+                self.add(row.id, row.buttons, row.created_at.timestamp())
+        except Exception:
+            self._buttons = previous
+            raise
+
+        logger.info("broadcast_index_loaded", broadcasts=len(rows), buttons=len(self._buttons))
+        return len(self._buttons)
+
+    async def publish(self, broadcast: BroadcastMessage) -> None:
+        """Announce a new broadcast to every replica (called by the admin bot)."""
+        created = broadcast.created_at.timestamp() if broadcast.created_at else time.time()
+        payload = json.dumps({"id": broadcast.id, "buttons": broadcast.buttons or [], "created": created})
+        try:
+            await redis_client.client.publish(BROADCAST_INDEX_CHANNEL, payload)
+        except Exception as e:
+            # Replicas pick it up at their next reload
+            logger.warning("broadcast_index_publish_failed", broadcast_id=broadcast.id, error=str(e))
+
+    def _on_message(self, data) -> None:
+        try:
+            message = json.loads(data)
+            self.add(int(message["id"]), message["buttons"], float(message["created"]))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning("broadcast_index_bad_message", error=str(e))
+
+    async def _listen_loop(self) -> None:
+        """Apply published broadcasts; reload on (re)subscribe and periodically."""
+        while True:
+            pubsub = None
+            try:
+                pubsub = redis_client.client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(BROADCAST_INDEX_CHANNEL)
+                await self.load()
+                reloaded = time.monotonic()
+
+                while True:
+                    message = await pubsub.get_message(timeout=BROADCAST_INDEX_RELOAD_SECONDS)
+                    if message is not None and message.get("type") == "message":
+                        self._on_message(message["data"])
+                    if time.monotonic() - reloaded >= BROADCAST_INDEX_RELOAD_SECONDS:
+                        await self.load()
+                        reloaded = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("broadcast_index_listen_failed", error=str(e))
+                await asyncio.sleep(BROADCAST_INDEX_RETRY_SECONDS)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    def start(self) -> None:
+        """Load the index and keep it up to date (bot startup)."""
+        if self._listen_task is None:
+            self._listen_task = asyncio.create_task(self._listen_loop())
+
+    async def stop(self) -> None:
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            await asyncio.gather(self._listen_task, return_exceptions=True)
+            self._listen_task = None
+
+
+# Global instance
+broadcast_callback_index = BroadcastCallbackIndex()
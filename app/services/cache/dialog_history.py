@@ -0,0 +1,299 @@
+"""
+Per-user conversation history for text dialogs.
+
+The history of the active dialog lives in a capped Redis list, so building a
+multi-turn prompt costs one LRANGE instead of a database read:
+
+    dialog:history:{telegram_id} = [turn, ...]   (oldest first)
+
+Each turn is ``{"role", "content", "tokens"}`` where ``tokens`` is a local
+estimate made once on write. The list is a ring buffer of
+``HISTORY_MAX_MESSAGES`` entries and expires together with the active dialog
+(``DIALOG_TTL_SECONDS``).
+
+Before a request, :func:`trim_history` keeps the newest turns that fit the
+model's history budget (``HISTORY_TOKEN_BUDGETS``) next to the new prompt, so
+prompts stop growing with the conversation. Long conversations are also
+compacted: the oldest turns are replaced by one ``summary`` entry (see
+``app.services.ai.context_compactor``), which is sent as part of the system
+prompt.
+
+Completed exchanges are also written to ``dialogs``/``dialog_messages`` in the
+background; that copy is an archive and is never read on the message path.
+"""
+import asyncio
+import json
+from typing import Dict, List, Optional, Set
+
+from app.bot.handlers.dialog_context import DIALOG_TTL_SECONDS
+from app.core.logger import get_logger
+from app.core.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+# Redis key prefixes: history list and id of the ``dialogs`` row it is archived to
+HISTORY_KEY_PREFIX = "dialog:history:"
+HISTORY_DB_KEY_PREFIX = "dialog:history_db:"
+
+# Ring buffer size in messages (user + assistant per exchange, keep it even)
+HISTORY_MAX_MESSAGES = 40
+
+# Estimated tokens a message costs beyond its text (role, separators)
+HISTORY_MESSAGE_OVERHEAD = 4
+
+# History budget in estimated tokens, by model id prefix. Well below the
+# context windows: history is billed as prompt tokens on every request.
+HISTORY_TOKEN_BUDGETS = {
+    "gpt-5": 24000,
+    "gpt-4o": 16000,
+    "o3": 16000,
+    "o1": 16000,
+    "claude": 24000,
+    "gemini": 24000,
+    "grok": 24000,
+    "deepseek": 16000,
+    "sonar": 4000,  # search results already take most of the context
+}
+HISTORY_DEFAULT_TOKEN_BUDGET = 8000
+
+# Role of the entry that replaces compacted turns (always the oldest entry)
+SUMMARY_ROLE = "summary"
+
+# KEYS[1] = history list, ARGV[1..n] = expected oldest entries, ARGV[n+1] = summary
+# Replaces the entries only if they are still the oldest ones; returns 1 or 0.
+_REPLACE_OLDEST_LUA = """
+local n = #ARGV - 1
+for i = 1, n do
+    if redis.call('LINDEX', KEYS[1], i - 1) ~= ARGV[i] then
+        return 0
+    end
+end
+redis.call('LTRIM', KEYS[1], n, -1)
+redis.call('LPUSH', KEYS[1], ARGV[n + 1])
+return 1
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count of ``text`` without a tokenizer.
+
+    About 4 bytes of UTF-8 per token: ~4 characters of English, ~2 of
+    Cyrillic. Errs on the high side for non-Latin text, which only makes
+    trimming a little more eager.
+    """
+    return len(text.encode("utf-8")) // 4 + HISTORY_MESSAGE_OVERHEAD
+
+
+def history_budget(model: str) -> int:
+    """History budget in estimated tokens for ``model``."""
+    for prefix, budget in HISTORY_TOKEN_BUDGETS.items():
+        if model.startswith(prefix):
+            return budget
+    return HISTORY_DEFAULT_TOKEN_BUDGET
+
+
+def _dump_turn(role: str, text: str) -> str:
+    return json.dumps({"role": role, "content": text, "tokens": estimate_tokens(text)})
+
+
+def with_summary(system_prompt: Optional[str], turns: List[Dict]) -> Optional[str]:
+    """System prompt extended with the summary of compacted turns, if any."""
+    if not turns or turns[0]["role"] != SUMMARY_ROLE:
+        return system_prompt
+    summary = f"Summary of the earlier conversation:\n{turns[0]['content']}"
+    return f"{system_prompt}\n\n{summary}" if system_prompt else summary
+
+
+def trim_history(
+    turns: List[Dict],
+    model: str,
+    prompt: str = "",
+    system_prompt: Optional[str] = None
+) -> List[Dict]:
+    """
+    Newest turns that fit the model's budget next to the prompt.
+
+    Args:
+        turns: Stored turns, oldest first
+        model: Model id the request goes to
+        prompt: New user message
+        system_prompt: System prompt sent with the request
+
+    Returns:
+        Chat messages (``role``/``content``), oldest first, starting with a
+        user message
+    """
+    used = estimate_tokens(prompt) + (estimate_tokens(system_prompt) if system_prompt else 0)
+    budget = history_budget(model)
+
+    kept = []
+    for turn in reversed(turns):
+        if turn["role"] == SUMMARY_ROLE:
+            # Goes with the system prompt (see with_summary)
+            continue
+        used += turn.get("tokens") or estimate_tokens(turn["content"])
+        if used > budget:
+            break
+        kept.append(turn)
+    kept.reverse()
+
+    # Providers expect the conversation to open with the user
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+
+    return [{"role": turn["role"], "content": turn["content"]} for turn in kept]
+
+
+class DialogHistory:
+    """Redis ring buffer of dialog turns with write-behind archiving."""
+
+    def __init__(self, max_messages: int = HISTORY_MAX_MESSAGES, ttl: int = DIALOG_TTL_SECONDS):
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self._background: Set[asyncio.Task] = set()
+        self._replace_script = None
+
+    @staticmethod
+    def _key(telegram_id: int) -> str:
+        return f"{HISTORY_KEY_PREFIX}{telegram_id}"
+
+    @staticmethod
+    def _db_key(telegram_id: int) -> str:
+        return f"{HISTORY_DB_KEY_PREFIX}{telegram_id}"
+
+    async def get(self, telegram_id: int) -> List[Dict]:
+        """Stored turns of the user's dialog, oldest first."""
+        try:
+            raw = await redis_client.client.lrange(self._key(telegram_id), 0, -1)
+        except Exception as e:
+            logger.error("dialog_history_get_failed", telegram_id=telegram_id, error=str(e))
+            return []
+
+        turns = []
+        for item in raw:
+            try:
+                turns.append(json.loads(item))
+            except json.JSONDecodeError:
+                continue
+        return turns
+
+    async def append(self, telegram_id: int, prompt: str, reply: str) -> None:
+        """Add one exchange, dropping the oldest beyond the ring size."""
+        key = self._key(telegram_id)
+        entries = [_dump_turn("user", prompt), _dump_turn("assistant", reply)]
+        try:
+            async with redis_client.client.pipeline(transaction=True) as pipe:
+                pipe.rpush(key, *entries)
+                pipe.ltrim(key, -self.max_messages, -1)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error("dialog_history_append_failed", telegram_id=telegram_id, error=str(e))
+
+    async def replace_oldest(self, telegram_id: int, turns: List[Dict], summary: str) -> bool:
+        """
+        Replace the oldest ``turns`` with one summary entry.
+
+        Returns False (and changes nothing) if the list no longer starts with
+        ``turns``, e.g. because the dialog was cleared meanwhile.
+        """
+        expected = [json.dumps(turn) for turn in turns]
+        try:
+            if self._replace_script is None:
+                self._replace_script = redis_client.client.register_script(_REPLACE_OLDEST_LUA)
+            replaced = await self._replace_script(
+                keys=[self._key(telegram_id)],
+                args=[*expected, _dump_turn(SUMMARY_ROLE, summary)],
+            )
+            return bool(replaced)
+        except Exception as e:
+            logger.error("dialog_history_replace_failed", telegram_id=telegram_id, error=str(e))
+            return False
+
+    async def clear(self, telegram_id: int) -> None:
+        """Forget the history; the next exchange starts a new archived dialog."""
+        try:
+            await redis_client.client.delete(self._key(telegram_id), self._db_key(telegram_id))
+        except Exception as e:
+            logger.error("dialog_history_clear_failed", telegram_id=telegram_id, error=str(e))
+
+    def archive(
+        self,
+        user_id: int,
+        telegram_id: int,
+        dialog: dict,
+        prompt: str,
+        reply: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0
+    ) -> None:
+        """Write an exchange to ``dialog_messages`` in the background (fire-and-forget)."""
+        self._spawn(self._archive(
+            user_id, telegram_id, dialog, prompt, reply, prompt_tokens, completion_tokens
+        ))
+
+    async def _archive(
+        self,
+        user_id: int,
+        telegram_id: int,
+        dialog: dict,
+        prompt: str,
+        reply: str,
+        prompt_tokens: int,
+        completion_tokens: int
+    ) -> None:
+        from app.database.database import async_session_maker
+        from app.database.models.dialog import Dialog, DialogMessage
+
+        try:
+            db_key = self._db_key(telegram_id)
+            dialog_row_id = await redis_client.get(db_key)
+
+            async with async_session_maker() as session:
+                if dialog_row_id is None:
+                    row = Dialog(
+                        user_id=user_id,
+                        title=dialog["model_name"],
+                        ai_model=dialog.get("billing_id", dialog["model_id"]),
+                        system_prompt=dialog.get("system_prompt"),
+                        is_history_enabled=True,
+                    )
+                    session.add(row)
+                    await session.flush()
+                    dialog_row_id = row.id
+                else:
+                    dialog_row_id = int(dialog_row_id)
+
+                session.add_all([
+                    DialogMessage(
+                        dialog_id=dialog_row_id,
+                        role="user",
+                        content=prompt,
+                        tokens_used=prompt_tokens,
+                    ),
+                    DialogMessage(
+                        dialog_id=dialog_row_id,
+                        role="assistant",
+                        content=reply,
+                        tokens_used=completion_tokens,
+                    ),
+                ])
+                await session.commit()
+
+            await redis_client.set(db_key, str(dialog_row_id), expire=self.ttl)
+        except Exception as e:
+            logger.error("dialog_history_archive_failed", user_id=user_id, error=str(e))
+
+    def _spawn(self, coro) -> None:
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+
+# Global instance
+dialog_history = DialogHistory()
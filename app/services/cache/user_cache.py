@@ -0,0 +1,193 @@
+"""
+Two-tier cache of user snapshots for the update hot path.
+
+``AuthMiddleware`` needs only a handful of user columns (ids, ban status,
+``is_bot_blocked``) to authorize an update, yet it used to SELECT and UPDATE
+the ``users`` row for every message and callback. This module keeps a compact
+snapshot of those columns keyed by ``telegram_id``:
+
+- a small in-process LRU with a short TTL (absorbs bursts of button presses);
+- a Redis tier shared by all replicas.
+
+Any code that changes the cached columns (ban/unban, GDPR delete, marking a
+user as having blocked the bot) must call :meth:`UserCache.invalidate`. The
+local tier TTL bounds how long another process can keep serving a stale copy.
+"""
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from app.core.logger import get_logger
+from app.core.redis_client import redis_client
+from app.database.models.user import User
+
+logger = get_logger(__name__)
+
+# Redis key prefix for user snapshots
+USER_CACHE_KEY_PREFIX = "user:snapshot:"
+
+# Redis tier TTL. Snapshots are invalidated explicitly on change, so this only
+# bounds how long a forgotten invalidation can linger.
+USER_CACHE_REDIS_TTL = 300
+
+# In-process tier: bounded size and a short TTL so invalidations made by other
+# processes (admin bot) become visible quickly.
+USER_CACHE_LOCAL_TTL = 5.0
+USER_CACHE_LOCAL_MAXSIZE = 10_000
+
+
+@dataclass
+class UserSnapshot:
+    """Columns of ``User`` needed to authorize an update and run handlers."""
+    id: int
+    telegram_id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    language_code: Optional[str] = None
+    is_banned: bool = False
+    ban_reason: Optional[str] = None
+    is_bot_blocked: bool = False
+    created_at: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        """Build a snapshot from a loaded ``User`` row."""
+        return cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            language_code=user.language_code,
+            is_banned=user.is_banned,
+            ban_reason=user.ban_reason,
+            is_bot_blocked=user.is_bot_blocked,
+            created_at=user.created_at.isoformat() if user.created_at else None,
+        )
+
+    def to_user(self) -> User:
+        """
+        Build a detached ``User`` carrying the snapshot columns.
+
+        The instance is not attached to any session: relationships are empty
+        and it must not be added to a session. Handlers only read scalar
+        columns from the ``user`` injected by ``AuthMiddleware``.
+        """
+        return User(
+            id=self.id,
+            telegram_id=self.telegram_id,
+            username=self.username,
+            first_name=self.first_name,
+            last_name=self.last_name,
+            language_code=self.language_code,
+            is_banned=self.is_banned,
+            ban_reason=self.ban_reason,
+            is_bot_blocked=self.is_bot_blocked,
+            created_at=datetime.fromisoformat(self.created_at) if self.created_at else None,
+        )
+
+
+class UserCache:
+    """In-process LRU in front of a Redis tier of :class:`UserSnapshot`."""
+
+    def __init__(
+        self,
+        local_ttl: float = USER_CACHE_LOCAL_TTL,
+        local_maxsize: int = USER_CACHE_LOCAL_MAXSIZE,
+        redis_ttl: int = USER_CACHE_REDIS_TTL,
+    ):
+        self.local_ttl = local_ttl
+        self.local_maxsize = local_maxsize
+        self.redis_ttl = redis_ttl
+        self._local: "OrderedDict[int, Tuple[float, UserSnapshot]]" = OrderedDict()
+
+    @staticmethod
+    def key(telegram_id: int) -> str:
+        """Redis key of a user's snapshot."""
+        return f"{USER_CACHE_KEY_PREFIX}{telegram_id}"
+
+    def _get_local(self, telegram_id: int) -> Optional[UserSnapshot]:
+        entry = self._local.get(telegram_id)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at < time.monotonic():
+            self._local.pop(telegram_id, None)
+            return None
+        self._local.move_to_end(telegram_id)
+        return snapshot
+
+    def _set_local(self, snapshot: UserSnapshot) -> None:
+        self._local[snapshot.telegram_id] = (time.monotonic() + self.local_ttl, snapshot)
+        self._local.move_to_end(snapshot.telegram_id)
+        while len(self._local) > self.local_maxsize:
+            self._local.popitem(last=False)
+
+    async def get(self, telegram_id: int) -> Optional[UserSnapshot]:
+        """Return the cached snapshot, or None on a miss in both tiers."""
+        snapshot = self._get_local(telegram_id)
+        if snapshot is not None:
+            return snapshot
+
+        return self._load(telegram_id, await redis_client.get_json(self.key(telegram_id)))
+
+    def _load(self, telegram_id: int, data: Optional[dict]) -> Optional[UserSnapshot]:
+        if not data:
+            return None
+        try:
+            snapshot = UserSnapshot(**data)
+        except TypeError as e:
+            # Snapshot layout changed between deploys - treat as a miss.
+            logger.warning("user_cache_bad_snapshot", telegram_id=telegram_id, error=str(e))
+            return None
+
+        self._set_local(snapshot)
+        return snapshot
+
+    def is_cached_locally(self, telegram_id: int) -> bool:
+        """Whether get() would be served without Redis."""
+        return self._get_local(telegram_id) is not None
+
+    def prime(self, telegram_id: int, raw: Optional[str]) -> None:
+        """Put a snapshot read from Redis elsewhere (e.g. a pipeline) into the local tier."""
+        try:
+            self._load(telegram_id, json.loads(raw) if raw else None)
+        except ValueError as e:
+            logger.warning("user_cache_bad_snapshot", telegram_id=telegram_id, error=str(e))
+
+    async def set(self, snapshot: UserSnapshot) -> None:
+        """Store a snapshot in both tiers."""
+        self._set_local(snapshot)
+        await redis_client.set_json(self.key(snapshot.telegram_id), asdict(snapshot), expire=self.redis_ttl)
+
+    async def set_user(self, user: User) -> UserSnapshot:
+        """Snapshot a loaded ``User`` and store it."""
+        snapshot = UserSnapshot.from_user(user)
+        await self.set(snapshot)
+        return snapshot
+
+    async def invalidate(self, telegram_id: int) -> None:
+        """Drop a user's snapshot from both tiers."""
+        self._local.pop(telegram_id, None)
+        await redis_client.delete(self.key(telegram_id))
+
+    async def invalidate_many(self, telegram_ids: Iterable[int]) -> None:
+        """Drop several snapshots at once (e.g. after a broadcast)."""
+        keys = []
+        for telegram_id in telegram_ids:
+            self._local.pop(telegram_id, None)
+            keys.append(self.key(telegram_id))
+        if not keys:
+            return
+        try:
+            await redis_client.client.delete(*keys)
+        except Exception as e:
+            logger.error("user_cache_invalidate_failed", count=len(keys), error=str(e))
+
+
+# Global instance
+user_cache = UserCache()
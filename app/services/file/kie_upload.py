@@ -15,6 +15,7 @@ import json
 import aiohttp
 
 from app.core.config import settings
+from app.core.http_client import http_clients
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -53,13 +54,14 @@ async def upload_bytes_to_kie(
     url = f"{UPLOAD_BASE_URL}/api/file-stream-upload"
     timeout = aiohttp.ClientTimeout(total=timeout_seconds)
 
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    async with http_clients.session(url) as session:
         data = aiohttp.FormData()
         data.add_field("file", file_bytes, filename=filename, content_type=content_type)
         data.add_field("uploadPath", upload_path)
 
         async with session.post(
             url,
+            timeout=timeout,
             headers={"Authorization": f"Bearer {api_key}"},
             data=data,
         ) as response:
@@ -4,28 +4,43 @@ Centralized Gemini execution layer.
 Controls concurrency and retries for all Gemini API calls.
 
 ARCHITECTURE NOTE:
-  Uses a per-event-loop semaphore instead of a background worker + asyncio.Queue.
-  asyncio.Queue binds to the event loop on first use; if the bot restarts and a new
-  loop is created the old Queue raises "bound to a different event loop", crashing
-  every worker task and flooding the system with errors.
-
-  A Semaphore recreated whenever the running loop changes avoids that entirely.
+  Concurrency goes through the adaptive per-provider limiters of
+  app.core.ai_limiter ("gemini" for text/vision, "gemini_image", "veo"), so a
+  slow Veo submission no longer blocks text calls, and 429s shrink the limit
+  of the operation kind that hit them. The limiters keep a plain queue of
+  futures created per call instead of a background worker + asyncio.Queue:
+  asyncio.Queue binds to the event loop on first use; if the bot restarts and
+  a new loop is created the old Queue raises "bound to a different event
+  loop", crashing every worker task and flooding the system with errors.
+
+  Every attempt also goes through the circuit breaker of (limiter, model)
+  (app.core.circuit_breaker): once Gemini keeps failing, retries stop and
+  new calls fail at once instead of sleeping through the whole backoff.
 """
 
 from __future__ import annotations
 
 import asyncio
+import time
 import uuid
 from typing import Any, Awaitable, Callable, TypeVar
 
+from app.core.ai_limiter import AdaptiveLimiter, get_limiter
+from app.core.circuit_breaker import CircuitOpenError, circuit_breakers, is_provider_failure
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
 T = TypeVar("T")
 
-# Max simultaneous Gemini API calls across all services
-_MAX_CONCURRENT = 3
+# Limiter (app.core.ai_limiter.PROVIDER_LIMITS) by operation kind
+_OPERATION_LIMITERS = {
+    "text_generate": "gemini",
+    "text_stream": "gemini",
+    "vision_analyze": "gemini",
+    "image_generate": "gemini_image",
+    "video_generate": "veo",
+}
 
 # Retry delays (seconds) for 429 / RESOURCE_EXHAUSTED, index = attempt number
 _RETRY_DELAYS = [5, 15, 45, 90]
@@ -37,41 +52,19 @@ class GeminiExecutionLayer:
     Thin execution wrapper for Gemini API calls.
 
     Provides:
-      - Global concurrency cap (semaphore, not a background worker)
+      - Adaptive concurrency limits per operation kind (see module docstring)
       - Automatic retry with backoff on 429 / RESOURCE_EXHAUSTED
+      - Circuit breaking per limiter and model
       - Structured log events compatible with existing monitoring
-
-    Thread-safety: the semaphore is recreated automatically if the asyncio event
-    loop changes (e.g. after a bot restart without process exit).
     """
 
-    def __init__(self, max_concurrent: int = _MAX_CONCURRENT) -> None:
-        self._max_concurrent = max_concurrent
-        # These are reset whenever the running loop changes.
-        self._semaphore: asyncio.Semaphore | None = None
-        self._bound_loop: asyncio.AbstractEventLoop | None = None
-
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
-    def _get_semaphore(self) -> asyncio.Semaphore:
-        """Return the semaphore for the *current* event loop.
-
-        Creates (or recreates) the semaphore if the running loop has changed.
-        This prevents "bound to a different event loop" RuntimeErrors that occur
-        when asyncio primitives are created in one loop and used in another.
-        """
-        try:
-            loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = None
-
-        if self._semaphore is None or self._bound_loop is not loop:
-            self._semaphore = asyncio.Semaphore(self._max_concurrent)
-            self._bound_loop = loop
-
-        return self._semaphore
+    @staticmethod
+    def _get_limiter(operation: str) -> AdaptiveLimiter:
+        return get_limiter(_OPERATION_LIMITERS.get(operation, "gemini"))
 
     @staticmethod
     def _is_rate_limit_error(exc: Exception) -> bool:
@@ -106,7 +99,8 @@ class GeminiExecutionLayer:
             The last exception raised by request_fn if all retries are exhausted.
         """
         request_id = uuid.uuid4().hex[:8]
-        semaphore = self._get_semaphore()
+        limiter = self._get_limiter(operation)
+        breaker = circuit_breakers.get(limiter.name, model)
 
         logger.info(
             "gemini_request_queued",
@@ -115,7 +109,10 @@ class GeminiExecutionLayer:
             model=model,
         )
 
-        async with semaphore:
+        await limiter.acquire(timeout=None)
+        started = time.monotonic()
+        outcome_error: str | None = "cancelled"
+        try:
             logger.info(
                 "gemini_request_started",
                 request_id=request_id,
@@ -126,8 +123,12 @@ class GeminiExecutionLayer:
             last_exc: BaseException | None = None
 
             for attempt in range(_MAX_RETRIES + 1):
+                if not breaker.allow():
+                    last_exc = CircuitOpenError(breaker.provider, breaker.model)
+                    break
                 try:
                     result = await request_fn()
+                    breaker.record(failed=False)
 
                     logger.info(
                         "gemini_request_completed",
@@ -136,11 +137,20 @@ class GeminiExecutionLayer:
                         model=model,
                         attempt=attempt,
                     )
+                    outcome_error = None
                     return result
 
+                except asyncio.CancelledError:
+                    breaker.cancel_probe()
+                    raise
                 except Exception as exc:
+                    breaker.record(failed=is_provider_failure(exc))
                     is_quota = self._is_rate_limit_error(exc)
 
+                    if is_quota:
+                        # Shrink the limit right away, not after all retries
+                        limiter.record(error=str(exc))
+
                     if is_quota and attempt < _MAX_RETRIES:
                         delay = _RETRY_DELAYS[attempt]
                         logger.warning(
@@ -169,7 +179,14 @@ class GeminiExecutionLayer:
                 attempts=attempt + 1,  # type: ignore[possibly-undefined]
                 error=str(last_exc)[:200],
             )
+            # A rejection by the breaker says nothing new about the load
+            outcome_error = "circuit open" if isinstance(last_exc, CircuitOpenError) else str(last_exc)
             raise last_exc  # type: ignore[misc]
+        finally:
+            limiter.release(
+                latency=time.monotonic() - started if outcome_error is None else None,
+                error=outcome_error,
+            )
 
 
 # ---------------------------------------------------------------------------
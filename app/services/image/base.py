@@ -5,11 +5,12 @@ from abc import ABC, abstractmethod
 from typing import Optional, Callable, Awaitable
 from dataclasses import dataclass
 from pathlib import Path
-import aiohttp
 import uuid
 from datetime import datetime
 
+from app.core.circuit_breaker import guard_provider_class
 from app.core.config import settings
+from app.core.http_client import http_clients
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -32,6 +33,17 @@ class ImageResponse:
 class BaseImageProvider(ABC):
     """Base class for image providers."""
 
+    # Circuit breaker name; defaults to the class name ("GeminiImageService" -> "geminiimage")
+    breaker_provider: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        failed = lambda error: ImageResponse(success=False, error=str(error))
+        guard_provider_class(cls, {
+            "generate_image": failed,
+            "process_image": failed,
+        })
+
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.storage_path = Path(settings.storage_path) / "images"
@@ -47,12 +59,16 @@ class BaseImageProvider(ABC):
         """Process image."""
         pass
 
+    def _http_session(self, url: str):
+        """Pooled HTTP session for the host of ``url`` (don't close it)."""
+        return http_clients.session(url)
+
     async def _download_file(self, url: str, filename: str) -> str:
         """Download file from URL to storage."""
         try:
             file_path = self.storage_path / filename
 
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session(url) as session:
                 async with session.get(url) as response:
                     if response.status == 200:
                         with open(file_path, 'wb') as f:
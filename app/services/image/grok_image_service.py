@@ -75,7 +75,7 @@ class GrokImageService(BaseImageProvider):
                 "Content-Type": "application/json",
             }
 
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session(XAI_BASE_URL) as session:
                 async with session.post(
                     f"{XAI_BASE_URL}/images/generations",
                     headers=headers,
@@ -212,7 +212,7 @@ class GrokImageService(BaseImageProvider):
             if resolution:
                 payload["resolution"] = resolution
 
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session(XAI_BASE_URL) as session:
                 async with session.post(
                     f"{XAI_BASE_URL}/images/edits",
                     headers=headers,
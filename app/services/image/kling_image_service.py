@@ -2,15 +2,13 @@
 Kling AI image generation service.
 """
 import time
-import asyncio
 import base64
 from pathlib import Path
 from typing import Optional, Callable, Awaitable
 
-import aiohttp
-
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.poll_scheduler import poll_scheduler
 from app.core.billing_config import get_image_model_billing
 from app.services.image.base import BaseImageProvider, ImageResponse
 
@@ -197,7 +195,7 @@ class KlingImageService(BaseImageProvider):
         if "n" in kwargs:
             payload["n"] = min(kwargs["n"], 9)  # Max 9 images
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status not in [200, 201]:
                     error_text = await response.text()
@@ -218,7 +216,6 @@ class KlingImageService(BaseImageProvider):
         task_id: str,
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         max_wait_time: int = 300,  # 5 minutes
-        poll_interval: int = 3  # 3 seconds
     ) -> str:
         """
         Poll generation status until complete.
@@ -238,8 +235,10 @@ class KlingImageService(BaseImageProvider):
         start_time = time.time()
         last_status = None
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             while True:
+                await poll_scheduler.wait_turn("kling_image", start_time)
+
                 # Check timeout
                 if time.time() - start_time > max_wait_time:
                     raise Exception("Image generation timeout")
@@ -284,9 +283,6 @@ class KlingImageService(BaseImageProvider):
                         error = status_msg or "Generation failed"
                         raise Exception(f"Generation failed: {error}")
 
-                    # Wait before next poll
-                    await asyncio.sleep(poll_interval)
-
     # Implement abstract method from base class
     async def process_image(
         self,
@@ -13,7 +13,9 @@ from datetime import datetime
 import aiohttp
 
 from app.core.config import settings
+from app.core.http_client import http_clients
 from app.core.logger import get_logger
+from app.core.poll_scheduler import poll_scheduler
 
 logger = get_logger(__name__)
 
@@ -210,7 +212,7 @@ class MidjourneyService:
 
         for attempt in range(max_retries + 1):
             try:
-                async with aiohttp.ClientSession() as session:
+                async with http_clients.session(url) as session:
                     async with session.post(url, headers=headers, json=payload) as response:
                         content_type = response.content_type or ""
 
@@ -261,7 +263,6 @@ class MidjourneyService:
         task_id: str,
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         max_wait_time: int = 1200,
-        poll_interval: int = 10
     ) -> list:
         """Poll task status until complete. Returns list of result URLs."""
         url = f"{self.BASE_URL}/api/v1/mj/queryTask"
@@ -273,11 +274,11 @@ class MidjourneyService:
 
         start_time = time.time()
         last_status = None
-        # Wait before first poll to let the task initialize
-        await asyncio.sleep(5)
 
-        async with aiohttp.ClientSession() as session:
+        async with http_clients.session(url) as session:
             while True:
+                await poll_scheduler.wait_turn("midjourney", start_time)
+
                 if time.time() - start_time > max_wait_time:
                     raise Exception("Таймаут генерации изображения (20 минут)")
 
@@ -294,7 +295,6 @@ class MidjourneyService:
                             raise Exception(f"Генерация не удалась: {fail_msg}")
                         # Non-200 codes are expected while task is initializing/processing - continue polling
                         logger.info("midjourney_poll_non200", task_id=task_id, code=data.get("code"), msg=data.get("msg", ""), elapsed=elapsed)
-                        await asyncio.sleep(poll_interval)
                         continue
 
                     task_data = data.get("data", {})
@@ -321,13 +321,11 @@ class MidjourneyService:
                         fail_msg = task_data.get("failMsg", "Unknown error")
                         raise Exception(f"Генерация не удалась: {fail_msg}")
 
-                await asyncio.sleep(poll_interval)
-
     async def _download_file(self, url: str, filename: str) -> str:
         """Download file from URL to storage."""
         file_path = self.storage_path / filename
 
-        async with aiohttp.ClientSession() as session:
+        async with http_clients.session(url) as session:
             async with session.get(url) as response:
                 if response.status == 200:
                     with open(file_path, 'wb') as f:
@@ -20,6 +20,7 @@ import aiohttp
 
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.poll_scheduler import poll_scheduler
 from app.services.image.base import BaseImageProvider, ImageResponse
 
 logger = get_logger(__name__)
@@ -77,7 +78,7 @@ class NanoBanana2Service(BaseImageProvider):
 
         file_bytes = path.read_bytes()
 
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with self._http_session(url) as session:
             data = aiohttp.FormData()
             data.add_field(
                 'file',
@@ -89,6 +90,7 @@ class NanoBanana2Service(BaseImageProvider):
 
             async with session.post(
                 url,
+                timeout=timeout,
                 headers={"Authorization": f"Bearer {self.api_key}"},
                 data=data,
             ) as response:
@@ -454,9 +456,10 @@ class NanoBanana2Service(BaseImageProvider):
             "uploadPath": "nano-banana-2",
         }
 
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with self._http_session(url) as session:
             async with session.post(
                 url,
+                timeout=timeout,
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "Content-Type": "application/json",
@@ -497,9 +500,10 @@ class NanoBanana2Service(BaseImageProvider):
 
         for attempt in range(max_retries + 1):
             try:
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with self._http_session(url) as session:
                     async with session.post(
                         url,
+                        timeout=timeout,
                         headers=self._get_auth_headers(),
                         json=payload,
                     ) as response:
@@ -585,7 +589,6 @@ class NanoBanana2Service(BaseImageProvider):
         task_id: str,
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         max_wait_time: int = 1500,
-        poll_interval: int = 5,
     ) -> str:
         """
         Poll task status until completion.
@@ -594,7 +597,6 @@ class NanoBanana2Service(BaseImageProvider):
             task_id: Task ID from createTask response
             progress_callback: Optional progress callback
             max_wait_time: Maximum wait time in seconds (default 25 minutes)
-            poll_interval: Polling interval in seconds
 
         Returns:
             Image URL from resultJson
@@ -606,8 +608,10 @@ class NanoBanana2Service(BaseImageProvider):
         retry_count = 0
         max_retries = 4
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             while True:
+                await poll_scheduler.wait_turn("nano_banana", start_time)
+
                 elapsed = time.time() - start_time
                 if elapsed > max_wait_time:
                     raise Exception(f"generation_timeout:{int(max_wait_time // 60)}")
@@ -678,5 +682,3 @@ class NanoBanana2Service(BaseImageProvider):
                     )
                     await asyncio.sleep(backoff_time)
                     continue
-
-                await asyncio.sleep(poll_interval)
@@ -12,6 +12,7 @@ import aiohttp
 
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.poll_scheduler import poll_scheduler
 from app.core.billing_config import get_image_model_billing
 from app.services.image.base import BaseImageProvider, ImageResponse
 
@@ -342,7 +343,7 @@ class NanoBananaService(BaseImageProvider):
 
         file_bytes = path.read_bytes()
 
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with self._http_session(url) as session:
             data = aiohttp.FormData()
             data.add_field(
                 'file',
@@ -354,6 +355,7 @@ class NanoBananaService(BaseImageProvider):
 
             async with session.post(
                 url,
+                timeout=timeout,
                 headers={"Authorization": f"Bearer {self.api_key}"},
                 data=data,
             ) as response:
@@ -399,9 +401,10 @@ class NanoBananaService(BaseImageProvider):
             "uploadPath": "nano-banana",
         }
 
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with self._http_session(url) as session:
             async with session.post(
                 url,
+                timeout=timeout,
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "Content-Type": "application/json",
@@ -441,9 +444,10 @@ class NanoBananaService(BaseImageProvider):
 
         for attempt in range(max_retries + 1):
             try:
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with self._http_session(url) as session:
                     async with session.post(
                         url,
+                        timeout=timeout,
                         headers=self._get_auth_headers(),
                         json=payload,
                     ) as response:
@@ -528,7 +532,6 @@ class NanoBananaService(BaseImageProvider):
         task_id: str,
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         max_wait_time: int = 1500,
-        poll_interval: int = 5,
     ) -> str:
         """
         Poll task status until completion.
@@ -537,7 +540,6 @@ class NanoBananaService(BaseImageProvider):
             task_id: Task ID from createTask response
             progress_callback: Optional progress callback
             max_wait_time: Maximum wait time in seconds (default 25 minutes)
-            poll_interval: Polling interval in seconds
 
         Returns:
             Image URL from resultJson
@@ -549,8 +551,10 @@ class NanoBananaService(BaseImageProvider):
         retry_count = 0
         max_retries = 4
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             while True:
+                await poll_scheduler.wait_turn("nano_banana", start_time)
+
                 elapsed = time.time() - start_time
                 if elapsed > max_wait_time:
                     raise Exception(f"generation_timeout:{int(max_wait_time // 60)}")
@@ -621,5 +625,3 @@ class NanoBananaService(BaseImageProvider):
                     )
                     await asyncio.sleep(backoff_time)
                     continue
-
-                await asyncio.sleep(poll_interval)
@@ -5,8 +5,6 @@ Documentation: https://www.recraft.ai/docs
 import time
 from typing import Optional, Callable, Awaitable
 
-import aiohttp
-
 from app.core.config import settings
 from app.core.logger import get_logger
 from app.core.billing_config import get_image_model_billing
@@ -182,7 +180,7 @@ class RecraftService(BaseImageProvider):
         if substyle:
             payload["substyle"] = substyle
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status not in [200, 201]:
                     error_text = await response.text()
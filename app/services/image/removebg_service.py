@@ -122,7 +122,7 @@ class RemoveBgService(BaseImageProvider):
         if "roi" in kwargs:
             data.add_field('roi', kwargs["roi"])  # Region of interest
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, data=data) as response:
                 if response.status != 200:
                     error_text = await response.text()
@@ -365,7 +365,7 @@ class Seedream5Service(BaseImageProvider):
                 "mode": optimize_prompt
             }
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=300)) as response:
                 if response.status not in [200, 201]:
                     error_text = await response.text()
@@ -173,7 +173,7 @@ class StabilityService(BaseImageProvider):
             # For 4x, we might need to use a different endpoint or call 2x twice
             data.add_field('prompt', kwargs.get('prompt', 'ultra high quality, highly detailed'))
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, data=data) as response:
                 if response.status != 200:
                     error_text = await response.text()
@@ -0,0 +1,306 @@
+"""
+Redis-backed per-user token balance ledger.
+
+Balance reads (dialog pre-checks, profile screens, menus) used to recompute
+the balance from subscription rows every time. The ledger keeps one Redis hash
+per user so a read is a single HMGET:
+
+    balance:ledger:{user_id} = {balance, held, gen}
+
+- ``balance`` - available tokens as last confirmed by Postgres;
+- ``held``    - tokens reserved by spends that are still in flight;
+- ``gen``     - generation token set on every rebuild, so reserve/commit/
+  rollback calls from before a rebuild never touch the rebuilt entry.
+
+Spends go through atomic Lua scripts that mirror
+``SubscriptionService.reserve_tokens/commit_tokens/rollback_tokens``: a hold is
+taken before the Postgres spend, then settled (commit) or released (rollback).
+Concurrent spends for one user are admitted or refused by Redis, so floods of
+double taps no longer queue on Postgres row locks.
+
+Postgres stays the source of truth. The spend itself still runs there, and any
+disagreement (Redis admits but Postgres refuses, or the other way round)
+schedules :meth:`BalanceLedger.reconcile`, which rebuilds the entry from the
+subscription rows. Any ORM write to ``subscriptions`` (purchases, bonuses,
+refunds, deactivation) drops the entry after commit.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.core.logger import get_logger
+from app.core.redis_client import redis_client
+from app.database.models.subscription import Subscription
+
+logger = get_logger(__name__)
+
+# Redis key prefix for ledger entries
+LEDGER_KEY_PREFIX = "balance:ledger:"
+
+# Entries expire so write paths the ledger doesn't see can't leave them stale
+# forever. An entry never outlives the earliest expiry among the subscriptions
+# it was built from, so expired tokens drop out on time.
+LEDGER_TTL_SECONDS = 600
+
+# KEYS[1] = entry, ARGV[1] = amount
+# Returns {1, gen, held} when held, {0, gen, held} when short and
+# {-1, '', 0} when not cached; ``held`` is what other spends have in flight.
+_RESERVE_LUA = """
+local balance = redis.call('HGET', KEYS[1], 'balance')
+if not balance then
+    return {-1, '', 0}
+end
+local gen = redis.call('HGET', KEYS[1], 'gen') or ''
+local held = tonumber(redis.call('HGET', KEYS[1], 'held') or '0')
+local amount = tonumber(ARGV[1])
+if tonumber(balance) - held < amount then
+    return {0, gen, held}
+end
+redis.call('HINCRBY', KEYS[1], 'held', amount)
+return {1, gen, held}
+"""
+
+# KEYS[1] = entry, ARGV[1] = amount, ARGV[2] = gen. Settles a hold: tokens spent.
+_COMMIT_LUA = """
+if redis.call('HGET', KEYS[1], 'gen') ~= ARGV[2] then
+    return 0
+end
+redis.call('HINCRBY', KEYS[1], 'held', -tonumber(ARGV[1]))
+redis.call('HINCRBY', KEYS[1], 'balance', -tonumber(ARGV[1]))
+return 1
+"""
+
+# KEYS[1] = entry, ARGV[1] = amount, ARGV[2] = gen. Releases a hold: nothing spent.
+_ROLLBACK_LUA = """
+if redis.call('HGET', KEYS[1], 'gen') ~= ARGV[2] then
+    return 0
+end
+redis.call('HINCRBY', KEYS[1], 'held', -tonumber(ARGV[1]))
+return 1
+"""
+
+# KEYS[1] = entry, ARGV[1] = balance, ARGV[2] = new gen, ARGV[3] = ttl,
+# ARGV[4] = '1' to only create a missing entry.
+# With holds in flight the Postgres value may already include them, so the
+# entry is dropped instead (the next read rebuilds it).
+_REBUILD_LUA = """
+if ARGV[4] == '1' and redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+local held = tonumber(redis.call('HGET', KEYS[1], 'held') or '0')
+if held > 0 then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('HSET', KEYS[1], 'balance', ARGV[1], 'held', 0, 'gen', ARGV[2])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 1
+"""
+
+
+class LedgerHold:
+    """Result of :meth:`BalanceLedger.reserve`."""
+
+    __slots__ = ("status", "gen", "in_flight")
+
+    HELD = 1
+    SHORT = 0
+    UNKNOWN = -1
+
+    def __init__(self, status: int, gen: str = "", in_flight: int = 0):
+        self.status = status
+        self.gen = gen
+        # Tokens held by other spends when this one was admitted or refused
+        self.in_flight = in_flight
+
+    @property
+    def held(self) -> bool:
+        return self.status == self.HELD
+
+    @property
+    def short(self) -> bool:
+        return self.status == self.SHORT
+
+
+class BalanceLedger:
+    """Cached per-user balance with atomic reservation holds."""
+
+    def __init__(self, ttl: int = LEDGER_TTL_SECONDS):
+        self.ttl = ttl
+        self._scripts = None
+        self._background: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"{LEDGER_KEY_PREFIX}{user_id}"
+
+    def _script(self, name: str):
+        # Registered lazily: the Redis client connects after import time.
+        if self._scripts is None:
+            client = redis_client.client
+            self._scripts = {
+                "reserve": client.register_script(_RESERVE_LUA),
+                "commit": client.register_script(_COMMIT_LUA),
+                "rollback": client.register_script(_ROLLBACK_LUA),
+                "rebuild": client.register_script(_REBUILD_LUA),
+            }
+        return self._scripts[name]
+
+    async def get_cached(self, user_id: int) -> Optional[int]:
+        """Available tokens (balance minus holds), or None when not cached."""
+        try:
+            balance, held = await redis_client.client.hmget(self._key(user_id), "balance", "held")
+        except Exception as e:
+            logger.error("ledger_read_failed", user_id=user_id, error=str(e))
+            return None
+        if balance is None:
+            return None
+        return max(0, int(balance) - int(held or 0))
+
+    async def get_balance(self, user_id: int, session: AsyncSession) -> int:
+        """Available tokens: one Redis call, rebuilt from Postgres on a miss."""
+        cached = await self.get_cached(user_id)
+        if cached is not None:
+            return cached
+
+        balance, ttl = await self._load_from_db(user_id, session)
+        await self._rebuild(user_id, balance, ttl, only_if_missing=True)
+        return balance
+
+    async def reserve(self, user_id: int, amount: int) -> LedgerHold:
+        """Atomically hold ``amount`` tokens if the cached balance covers them."""
+        try:
+            status, gen, in_flight = await self._script("reserve")(keys=[self._key(user_id)], args=[amount])
+            return LedgerHold(int(status), gen or "", int(in_flight))
+        except Exception as e:
+            logger.error("ledger_reserve_failed", user_id=user_id, error=str(e))
+            return LedgerHold(LedgerHold.UNKNOWN)
+
+    async def commit(self, user_id: int, amount: int, hold: LedgerHold) -> None:
+        """Settle a hold after the Postgres spend committed."""
+        if not hold.held:
+            return
+        try:
+            await self._script("commit")(keys=[self._key(user_id)], args=[amount, hold.gen])
+        except Exception as e:
+            logger.error("ledger_commit_failed", user_id=user_id, error=str(e))
+
+    async def rollback(self, user_id: int, amount: int, hold: LedgerHold) -> None:
+        """Release a hold when the Postgres spend did not happen."""
+        if not hold.held:
+            return
+        try:
+            await self._script("rollback")(keys=[self._key(user_id)], args=[amount, hold.gen])
+        except Exception as e:
+            logger.error("ledger_rollback_failed", user_id=user_id, error=str(e))
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop a user's entry; the next read rebuilds it."""
+        await redis_client.delete(self._key(user_id))
+
+    async def invalidate_many(self, user_ids: Iterable[int]) -> None:
+        """Drop several entries at once."""
+        keys = [self._key(user_id) for user_id in user_ids]
+        if not keys:
+            return
+        try:
+            await redis_client.client.delete(*keys)
+        except Exception as e:
+            logger.error("ledger_invalidate_failed", count=len(keys), error=str(e))
+
+    async def reconcile(self, user_id: int) -> None:
+        """Rebuild a user's entry from Postgres (source of truth)."""
+        from app.database.database import async_session_maker
+
+        try:
+            async with async_session_maker() as session:
+                balance, ttl = await self._load_from_db(user_id, session)
+            result = await self._rebuild(user_id, balance, ttl)
+            logger.info("ledger_reconciled", user_id=user_id, balance=balance, result=result)
+        except Exception as e:
+            logger.error("ledger_reconcile_failed", user_id=user_id, error=str(e))
+
+    def schedule_reconcile(self, user_id: int) -> None:
+        """Reconcile in the background (fire-and-forget)."""
+        self._spawn(self.reconcile(user_id))
+
+    def _spawn(self, coro) -> None:
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _rebuild(self, user_id: int, balance: int, ttl: int, only_if_missing: bool = False) -> int:
+        try:
+            return int(await self._script("rebuild")(
+                keys=[self._key(user_id)],
+                args=[balance, uuid.uuid4().hex, ttl, "1" if only_if_missing else "0"],
+            ))
+        except Exception as e:
+            logger.error("ledger_rebuild_failed", user_id=user_id, error=str(e))
+            return 0
+
+    async def _load_from_db(self, user_id: int, session: AsyncSession) -> Tuple[int, int]:
+        """Return (available tokens, entry TTL) computed from subscription rows."""
+        from app.database.repositories.subscription import SubscriptionRepository
+
+        subscriptions = [
+            sub for sub in await SubscriptionRepository(session).get_user_subscriptions(
+                user_id,
+                active_only=True
+            )
+            if not sub.is_expired
+        ]
+        balance = sum(sub.tokens_remaining for sub in subscriptions)
+
+        ttl = self.ttl
+        now = datetime.now(timezone.utc)
+        for sub in subscriptions:
+            if sub.expires_at is not None:
+                ttl = min(ttl, int((sub.expires_at - now).total_seconds()))
+        return balance, max(1, ttl)
+
+
+# Global instance
+balance_ledger = BalanceLedger()
+
+
+# ===================================
+# Invalidation on ORM writes
+# ===================================
+# Purchases, bonuses, refunds and admin gifts create or modify Subscription
+# rows through the ORM in many services. Rather than touching each of them,
+# collect the affected users during flush and drop their entries once the
+# transaction commits. (The set-based spend is a Core UPDATE and is settled
+# through commit() instead.)
+
+_DIRTY_USERS_KEY = "balance_ledger_dirty_users"
+
+
+@event.listens_for(Subscription, "after_insert")
+@event.listens_for(Subscription, "after_update")
+@event.listens_for(Subscription, "after_delete")
+def _mark_ledger_dirty(mapper, connection, target: Subscription) -> None:
+    session = object_session(target)
+    if session is not None and target.user_id is not None:
+        session.info.setdefault(_DIRTY_USERS_KEY, set()).add(target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_dirty_users(session: Session) -> None:
+    user_ids = session.info.pop(_DIRTY_USERS_KEY, None)
+    if user_ids:
+        balance_ledger._spawn(balance_ledger.invalidate_many(user_ids))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_dirty_users(session: Session) -> None:
+    session.info.pop(_DIRTY_USERS_KEY, None)
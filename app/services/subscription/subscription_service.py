@@ -1,7 +1,8 @@
 """
 Subscription service for managing user subscriptions.
 """
-from typing import Optional
+from datetime import datetime
+from typing import List, NoReturn, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -10,6 +11,7 @@ from app.database.repositories.subscription import SubscriptionRepository
 from app.core.logger import get_logger
 from app.core.exceptions import InsufficientTokensError
 from app.core.subscription_plans import get_subscription_tariff, get_all_tariffs
+from app.services.subscription.balance_ledger import balance_ledger
 from app.services.subscription.unlimited_limits_service import UnlimitedLimitsService
 
 logger = get_logger(__name__)
@@ -17,6 +19,9 @@ logger = get_logger(__name__)
 
 TARIFFS = get_all_tariffs()
 
+# Free token grants; users holding only these get the lowest queue priority
+BONUS_SUBSCRIPTION_TYPES = ("welcome_bonus", "channel_bonus")
+
 
 class SubscriptionService:
     """Service for subscription management."""
@@ -97,86 +102,105 @@ class SubscriptionService:
         Raises:
             InsufficientTokensError: If user doesn't have enough tokens or limits exceeded
         """
-        # Take row-level locks on the user's active subscriptions for the
-        # rest of this transaction so concurrent spend attempts cannot both
-        # observe the same available balance and overspend it.
-        subscriptions = await self.repository.get_user_subscriptions(
-            user_id,
-            active_only=True,
-            for_update=True,
-        )
-        subscriptions = [sub for sub in subscriptions if not sub.is_expired]
-
-        if not subscriptions:
-            raise InsufficientTokensError(
-                "No active subscription found",
-                {"required": tokens_required, "available": 0}
+        # Admission control on the cached balance first: a hold is taken in
+        # Redis before Postgres is touched, so bursts of spends for one user
+        # are refused without queuing on subscription row locks.
+        hold = await balance_ledger.reserve(user_id, tokens_required)
+        if hold.short:
+            # The ledger may be stale (e.g. a purchase in another process) -
+            # confirm with a plain, non-locking read before refusing. Spends
+            # still in flight aren't visible there yet, so count them too.
+            active = await self._get_usable_subscriptions(user_id)
+            available_tokens = sum(sub.tokens_remaining for sub in active)
+            if available_tokens - hold.in_flight < tokens_required:
+                self._raise_insufficient(user_id, tokens_required, active)
+            balance_ledger.schedule_reconcile(user_id)
+
+        # One statement locks the active subscriptions, spends across them in
+        # expiry order and returns the charged rows - or charges nothing when
+        # the balance is short. Concurrent spends for the same user queue on
+        # the row locks only for the duration of this statement + commit.
+        # When unlimited limits may apply, spend inside a savepoint so a limit
+        # denial can undo the spend without discarding the caller's pending
+        # changes in this session.
+        try:
+            savepoint = await self.session.begin_nested() if model_id else None
+            subscriptions, charged = await self.repository.spend_tokens(user_id, tokens_required)
+        except Exception:
+            await balance_ledger.rollback(user_id, tokens_required, hold)
+            raise
+
+        if not subscriptions or charged < tokens_required:
+            # Undo a partial spend (a row's balance changed under the plan)
+            if savepoint is not None:
+                await savepoint.rollback()
+            elif subscriptions:
+                await self.session.rollback()
+            if subscriptions:
+                logger.warning(
+                    "tokens_spend_incomplete",
+                    user_id=user_id,
+                    required=tokens_required,
+                    charged=charged
+                )
+            if hold.held:
+                # Redis admitted a spend Postgres refused: the entry is stale.
+                await balance_ledger.rollback(user_id, tokens_required, hold)
+                balance_ledger.schedule_reconcile(user_id)
+            # Nothing was deducted; build the same errors as before.
+            self._raise_insufficient(
+                user_id,
+                tokens_required,
+                await self._get_usable_subscriptions(user_id)
             )
 
-        # Check unlimited subscription limits (if applicable and model_id provided)
-        for sub in subscriptions:
-            if sub.is_unlimited and model_id:
-                limits_service = UnlimitedLimitsService(self.session)
-                allowed, error_message = await limits_service.check_unlimited_limits(
+        # Check unlimited subscription limits (if applicable and model_id provided).
+        # They apply whenever the user has an active unlimited plan, even if
+        # the spend order charged another subscription. An allowed spend is
+        # counted against the daily limits right away.
+        limits_service = None
+        unlimited_sub = next((sub for sub in subscriptions if sub.is_unlimited), None)
+        if unlimited_sub is None and model_id:
+            unlimited_sub = await self.repository.get_active_unlimited_subscription(user_id)
+        if unlimited_sub is not None and model_id:
+            limits_service = UnlimitedLimitsService(self.session)
+            allowed, error_message = await limits_service.check_unlimited_limits(
+                user_id=user_id,
+                subscription=unlimited_sub,
+                model_id=model_id,
+                tokens_cost=tokens_required
+            )
+            if not allowed:
+                await savepoint.rollback()
+                await balance_ledger.rollback(user_id, tokens_required, hold)
+                logger.warning(
+                    "unlimited_limits_exceeded",
                     user_id=user_id,
-                    subscription=sub,
                     model_id=model_id,
-                    tokens_cost=tokens_required
+                    error=error_message
+                )
+                raise InsufficientTokensError(
+                    error_message,
+                    {"required": tokens_required, "available": 0, "unlimited_limit_reached": True}
                 )
-                if not allowed:
-                    logger.warning(
-                        "unlimited_limits_exceeded",
-                        user_id=user_id,
-                        model_id=model_id,
-                        error=error_message
-                    )
-                    raise InsufficientTokensError(
-                        error_message,
-                        {"required": tokens_required, "available": 0, "unlimited_limit_reached": True}
-                    )
-
-        available_tokens = sum(sub.tokens_remaining for sub in subscriptions)
-        if available_tokens < tokens_required:
-            logger.warning(
-                "insufficient_tokens",
-                user_id=user_id,
-                available_tokens=available_tokens,
-                required_tokens=tokens_required,
-                billing_id=None,
-                dialog_id=None,
-                model_name=None,
-            )
-            raise InsufficientTokensError(
-                f"Insufficient tokens: need {tokens_required}, have {available_tokens}",
-                {
-                    "required": tokens_required,
-                    "available": available_tokens
-                }
-            )
-
-        # Sort: time-limited first (by expiry date), eternal last
-        # Use datetime.max as sentinel for None to avoid TypeError when comparing None values
-        from datetime import datetime as _dt, timezone as _tz
-        _max_dt = _dt.max.replace(tzinfo=_tz.utc)
-        subscriptions.sort(
-            key=lambda sub: (sub.expires_at is None, sub.expires_at or _max_dt)
-        )
-
-        remaining = tokens_required
-        for sub in subscriptions:
-            if remaining <= 0:
-                break
-            available = sub.tokens_remaining
-            if available <= 0:
-                continue
-            to_deduct = min(available, remaining)
-            sub.use_tokens(to_deduct)
-            remaining -= to_deduct
-
-        if remaining > 0:
-            raise InsufficientTokensError("Failed to use tokens")
 
-        await self.session.commit()
+        try:
+            if savepoint is not None:
+                await savepoint.commit()
+            await self.session.commit()
+        except Exception:
+            await balance_ledger.rollback(user_id, tokens_required, hold)
+            balance_ledger.schedule_reconcile(user_id)
+            if limits_service is not None:
+                await limits_service.release_usage(user_id, model_id, tokens_required)
+            raise
+
+        if hold.held and not any(sub.is_unlimited for sub in subscriptions):
+            await balance_ledger.commit(user_id, tokens_required, hold)
+        else:
+            # Unlimited plans aren't charged by amount, and a missing entry may
+            # have been rebuilt from a pre-spend read meanwhile: drop it.
+            await balance_ledger.invalidate(user_id)
 
         # Register this deduction with the per-update auto-refund safety net so
         # tokens are returned automatically if the handler later raises before
@@ -192,24 +216,76 @@ class SubscriptionService:
             user_id=user_id,
             subscription_id=subscriptions[0].id,
             amount=tokens_required,
-            remaining=available_tokens - tokens_required
+            subscriptions_charged=len(subscriptions)
         )
 
         return subscriptions[0]
 
-    async def get_available_tokens(self, user_id: int) -> int:
-        """Get total available tokens across all active subscriptions."""
+    async def _get_usable_subscriptions(self, user_id: int) -> List[Subscription]:
+        """Active, non-expired subscriptions (plain read, no row locks)."""
         subscriptions = await self.repository.get_user_subscriptions(
             user_id,
             active_only=True
         )
+        return [sub for sub in subscriptions if not sub.is_expired]
+
+    async def get_priority_class(self, user_id: int) -> str:
+        """
+        Queue priority class of the user (see app.core.fair_queue).
 
-        return sum(
-            sub.tokens_remaining
-            for sub in subscriptions
-            if not sub.is_expired
+        Returns:
+            "paid" with a time-limited plan, "eternal" with purchased or
+            granted eternal tokens, "bonus" with only free bonuses (or nothing)
+        """
+        usable = [
+            sub for sub in await self._get_usable_subscriptions(user_id)
+            if sub.is_unlimited or sub.tokens_remaining > 0
+        ]
+        if any(sub.expires_at is not None for sub in usable):
+            return "paid"
+        if any(sub.subscription_type not in BONUS_SUBSCRIPTION_TYPES for sub in usable):
+            return "eternal"
+        return "bonus"
+
+    @staticmethod
+    def _raise_insufficient(
+        user_id: int,
+        tokens_required: int,
+        active: List[Subscription]
+    ) -> NoReturn:
+        """Raise the insufficient-balance error for ``check_and_use_tokens``."""
+        if not active:
+            raise InsufficientTokensError(
+                "No active subscription found",
+                {"required": tokens_required, "available": 0}
+            )
+
+        available_tokens = sum(sub.tokens_remaining for sub in active)
+        logger.warning(
+            "insufficient_tokens",
+            user_id=user_id,
+            available_tokens=available_tokens,
+            required_tokens=tokens_required,
+            billing_id=None,
+            dialog_id=None,
+            model_name=None,
+        )
+        raise InsufficientTokensError(
+            f"Insufficient tokens: need {tokens_required}, have {available_tokens}",
+            {
+                "required": tokens_required,
+                "available": available_tokens
+            }
         )
 
+    async def get_available_tokens(self, user_id: int) -> int:
+        """
+        Get total available tokens across all active subscriptions.
+
+        Served from the Redis balance ledger; rebuilt from Postgres on a miss.
+        """
+        return await balance_ledger.get_balance(user_id, self.session)
+
     async def get_user_total_tokens(self, user_id: int) -> int:
         """Get total available tokens for user (backward compatibility)."""
         return await self.get_available_tokens(user_id)
@@ -337,6 +413,8 @@ class SubscriptionService:
         user_id: int,
         tokens: int,
         subscription_id: Optional[int] = None,
+        model_id: Optional[str] = None,
+        charged_at: Optional[datetime] = None,
     ) -> "Subscription":
         """
         Rollback previously reserved tokens (refund on failure).
@@ -348,12 +426,17 @@ class SubscriptionService:
             user_id: User ID
             tokens: Number of tokens to return
             subscription_id: Optional ID of the subscription to return tokens to
+            model_id: Model ID the spend was checked for (returns unlimited-limit usage)
+            charged_at: When the refunded spend happened (defaults to now)
 
         Returns:
             Subscription that received the refund
         """
         logger.info("tokens_rollback", user_id=user_id, amount=tokens, subscription_id=subscription_id)
 
+        if model_id:
+            await UnlimitedLimitsService(self.session).release_usage(user_id, model_id, tokens, charged_at)
+
         # Try to return tokens to the original subscription
         if subscription_id:
             sub = await self.repository.get(subscription_id)
@@ -4,11 +4,13 @@ Unlimited subscription limits service.
 Enforces daily limits for unlimited_1day subscriptions based on:
 - Time window: 21:00 MSK to 21:00 MSK next day
 - Limits defined in model_costs table
-- Tracks spending via ai_requests table
+- Tracks spending with Redis counters (see unlimited_usage), rebuilt from
+  the ai_requests table when missing
 """
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Dict, Tuple
-from decimal import Decimal
 
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -18,13 +20,75 @@ from app.database.models.model_cost import ModelCost
 from app.database.models.ai_request import AIRequest
 from app.database.models.system import SystemSetting
 from app.core.logger import get_logger
-from app.core.exceptions import InsufficientTokensError
+from app.services.subscription.unlimited_usage import (
+    USAGE_ALLOWED,
+    USAGE_BUDGET_LIMIT,
+    USAGE_MISSING,
+    USAGE_REQUEST_LIMIT,
+    unlimited_usage,
+)
 
 logger = get_logger(__name__)
 
 # Moscow timezone offset
 MSK_OFFSET_HOURS = 3
 
+# Model limits and the feature flag change only through admin edits; they are
+# cached per process instead of being read on every spend.
+LIMITS_CONFIG_TTL_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    """Limit columns of an active ``ModelCost`` row."""
+    model_id: str
+    display_name: str
+    unlimited_daily_limit: Optional[int]
+    unlimited_budget_tokens: Optional[int]
+
+
+# (loaded_at, feature_enabled, limits by model_id)
+_limits_config: Optional[Tuple[float, bool, Dict[str, ModelLimits]]] = None
+
+
+async def _get_limits_config(session: AsyncSession) -> Tuple[bool, Dict[str, ModelLimits]]:
+    """Return (feature_enabled, limits by model_id), reloading when stale."""
+    global _limits_config
+
+    if _limits_config is not None and time.monotonic() - _limits_config[0] < LIMITS_CONFIG_TTL_SECONDS:
+        return _limits_config[1], _limits_config[2]
+
+    enabled = True  # Enabled by default
+    try:
+        result = await session.execute(
+            select(SystemSetting.value).where(SystemSetting.key == "unlimited_limits_enabled")
+        )
+        value = result.scalar_one_or_none()
+        if value is not None:
+            enabled = value.lower() in ("true", "1", "yes")
+    except Exception as e:
+        logger.warning("failed_to_check_feature_flag", error=str(e))
+        # Default to enabled for safety; retry on the next call
+        return True, _limits_config[2] if _limits_config else {}
+
+    try:
+        result = await session.execute(
+            select(
+                ModelCost.model_id,
+                ModelCost.display_name,
+                ModelCost.unlimited_daily_limit,
+                ModelCost.unlimited_budget_tokens,
+            ).where(ModelCost.is_active == True)
+        )
+        limits = {row.model_id: ModelLimits(*row) for row in result.all()}
+        logger.debug("model_costs_loaded_for_limits", count=len(limits))
+    except Exception as e:
+        logger.error("model_costs_load_failed", error=str(e))
+        return enabled, _limits_config[2] if _limits_config else {}
+
+    _limits_config = (time.monotonic(), enabled, limits)
+    return enabled, limits
+
 
 class UnlimitedLimitsService:
     """
@@ -38,51 +102,32 @@ class UnlimitedLimitsService:
 
     def __init__(self, session: AsyncSession):
         self.session = session
-        self._model_costs_cache: Dict[str, ModelCost] = {}
-        self._cache_loaded = False
+        self._model_costs_cache: Dict[str, ModelLimits] = {}
 
     async def is_feature_enabled(self) -> bool:
         """Check if unlimited limits enforcement is enabled via feature flag."""
-        try:
-            result = await self.session.execute(
-                select(SystemSetting).where(SystemSetting.key == "unlimited_limits_enabled")
-            )
-            setting = result.scalar_one_or_none()
-            if not setting:
-                return True  # Enabled by default
-            return setting.value.lower() in ("true", "1", "yes")
-        except Exception as e:
-            logger.warning("failed_to_check_feature_flag", error=str(e))
-            return True  # Default to enabled for safety
+        enabled, _ = await _get_limits_config(self.session)
+        return enabled
 
     async def _load_model_costs(self) -> None:
-        """Load model costs from database into cache."""
-        if self._cache_loaded:
-            return
-
-        try:
-            result = await self.session.execute(
-                select(ModelCost).where(ModelCost.is_active == True)
-            )
-            models = result.scalars().all()
-            self._model_costs_cache = {m.model_id: m for m in models}
-            self._cache_loaded = True
-            logger.debug("model_costs_loaded_for_limits", count=len(self._model_costs_cache))
-        except Exception as e:
-            logger.error("model_costs_load_failed", error=str(e))
+        """Load model limits (process-wide cache) for this service."""
+        _, self._model_costs_cache = await _get_limits_config(self.session)
 
-    def _get_model_cost(self, model_id: str) -> Optional[ModelCost]:
-        """Get model cost config from cache."""
+    def _get_model_cost(self, model_id: str) -> Optional[ModelLimits]:
+        """Get model limits config from cache."""
         return self._model_costs_cache.get(model_id)
 
-    def _get_daily_window(self) -> Tuple[datetime, datetime]:
+    def _get_daily_window(self, at: Optional[datetime] = None) -> Tuple[datetime, datetime]:
         """
-        Get current daily window boundaries (21:00 MSK to 21:00 MSK).
+        Get daily window boundaries (21:00 MSK to 21:00 MSK).
+
+        Args:
+            at: Moment inside the window (defaults to now)
 
         Returns:
             Tuple of (window_start, window_end) in UTC
         """
-        now_utc = datetime.now(timezone.utc)
+        now_utc = at or datetime.now(timezone.utc)
 
         # Convert to MSK
         now_msk = now_utc + timedelta(hours=MSK_OFFSET_HOURS)
@@ -126,116 +171,169 @@ class UnlimitedLimitsService:
         if not subscription.is_unlimited:
             return (True, None)
 
-        # Check if feature is enabled
-        if not await self.is_feature_enabled():
+        enabled, limits = await _get_limits_config(self.session)
+        if not enabled:
             logger.debug("unlimited_limits_disabled", user_id=user_id)
             return (True, None)
 
-        # Load model costs
-        await self._load_model_costs()
-
-        model_cost = self._get_model_cost(model_id)
+        model_cost = limits.get(model_id)
         if not model_cost:
             logger.warning("model_cost_not_found", model_id=model_id, user_id=user_id)
             # No config = allow operation (backward compatibility)
             return (True, None)
 
-        # Get daily window
+        if not model_cost.unlimited_daily_limit and not model_cost.unlimited_budget_tokens:
+            return (True, None)
+
         window_start, window_end = self._get_daily_window()
 
-        # Check request count limit
-        if model_cost.unlimited_daily_limit:
-            request_count = await self._get_request_count_in_window(
+        try:
+            outcome, request_count, tokens_spent = await self._consume_usage(
                 user_id=user_id,
                 subscription_id=subscription.id,
-                model_id=model_id,
+                model_cost=model_cost,
+                tokens_cost=tokens_cost,
                 window_start=window_start,
-                window_end=window_end
+                window_end=window_end,
             )
-
-            if request_count >= model_cost.unlimited_daily_limit:
-                logger.warning(
-                    "unlimited_daily_limit_reached",
-                    user_id=user_id,
-                    model_id=model_id,
-                    request_count=request_count,
-                    limit=model_cost.unlimited_daily_limit
-                )
-                return (
-                    False,
-                    f"Достигнут дневной лимит для {model_cost.display_name}: "
-                    f"{request_count}/{model_cost.unlimited_daily_limit} запросов. "
-                    f"Лимит обновится сегодня в 21:00 по МСК."
-                )
-
-        # Check token budget limit
-        if model_cost.unlimited_budget_tokens:
-            tokens_spent = await self._get_tokens_spent_in_window(
+        except Exception as e:
+            # Redis unavailable or counters not rebuilt: check against the database (not atomic)
+            logger.error("unlimited_usage_counter_failed", user_id=user_id, model_id=model_id, error=str(e))
+            request_count, tokens_spent = await self._get_usage_in_window(
                 user_id=user_id,
                 subscription_id=subscription.id,
                 model_id=model_id,
                 window_start=window_start,
                 window_end=window_end
             )
+            outcome = self._evaluate(model_cost, request_count, tokens_spent, tokens_cost)
 
-            if tokens_spent + tokens_cost > model_cost.unlimited_budget_tokens:
-                logger.warning(
-                    "unlimited_budget_reached",
-                    user_id=user_id,
-                    model_id=model_id,
-                    tokens_spent=tokens_spent,
-                    tokens_cost=tokens_cost,
-                    budget=model_cost.unlimited_budget_tokens
-                )
-                return (
-                    False,
-                    f"Достигнут дневной бюджет для {model_cost.display_name}: "
-                    f"{tokens_spent}/{model_cost.unlimited_budget_tokens} токенов. "
-                    f"Бюджет обновится сегодня в 21:00 по МСК."
-                )
+        if outcome == USAGE_REQUEST_LIMIT:
+            logger.warning(
+                "unlimited_daily_limit_reached",
+                user_id=user_id,
+                model_id=model_id,
+                request_count=request_count,
+                limit=model_cost.unlimited_daily_limit
+            )
+            return (
+                False,
+                f"Достигнут дневной лимит для {model_cost.display_name}: "
+                f"{request_count}/{model_cost.unlimited_daily_limit} запросов. "
+                f"Лимит обновится сегодня в 21:00 по МСК."
+            )
+
+        if outcome != USAGE_ALLOWED:
+            logger.warning(
+                "unlimited_budget_reached",
+                user_id=user_id,
+                model_id=model_id,
+                tokens_spent=tokens_spent,
+                tokens_cost=tokens_cost,
+                budget=model_cost.unlimited_budget_tokens
+            )
+            return (
+                False,
+                f"Достигнут дневной бюджет для {model_cost.display_name}: "
+                f"{tokens_spent}/{model_cost.unlimited_budget_tokens} токенов. "
+                f"Бюджет обновится сегодня в 21:00 по МСК."
+            )
 
         # All checks passed
         return (True, None)
 
-    async def _get_request_count_in_window(
+    async def release_usage(
         self,
         user_id: int,
-        subscription_id: int,
         model_id: str,
+        tokens_cost: int,
+        charged_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Undo a spend counted by check_unlimited_limits (refund or failed commit).
+
+        Args:
+            user_id: User ID
+            model_id: Model identifier the spend was counted for
+            tokens_cost: Token cost of the operation
+            charged_at: When the spend was admitted (defaults to now)
+        """
+        window_start, _ = self._get_daily_window(charged_at)
+        await unlimited_usage.release(user_id, model_id, window_start, tokens_cost)
+
+    async def _consume_usage(
+        self,
+        user_id: int,
+        subscription_id: int,
+        model_cost: ModelLimits,
+        tokens_cost: int,
         window_start: datetime,
         window_end: datetime
-    ) -> int:
-        """Get number of completed requests in time window."""
-        try:
-            result = await self.session.execute(
-                select(func.count(AIRequest.id))
-                .where(
-                    AIRequest.user_id == user_id,
-                    AIRequest.subscription_id == subscription_id,
-                    AIRequest.ai_model == model_id,
-                    AIRequest.status == "completed",
-                    AIRequest.created_at >= window_start,
-                    AIRequest.created_at < window_end
-                )
-            )
-            count = result.scalar_one_or_none()
-            return count if count is not None else 0
-        except Exception as e:
-            logger.error("get_request_count_failed", error=str(e), user_id=user_id)
-            return 0
-
-    async def _get_tokens_spent_in_window(
+    ) -> Tuple[int, int, int]:
+        """Atomically check and count a spend, rebuilding the counters if missing."""
+        args = dict(
+            user_id=user_id,
+            subscription_id=subscription_id,
+            model_id=model_cost.model_id,
+            window_start=window_start,
+            cost=tokens_cost,
+            request_limit=model_cost.unlimited_daily_limit,
+            token_budget=model_cost.unlimited_budget_tokens,
+        )
+        result = await unlimited_usage.consume(**args)
+        if result[0] != USAGE_MISSING:
+            return result
+
+        # A failed read must not seed zeros for the rest of the window
+        request_count, tokens_spent = await self._get_usage_in_window(
+            user_id=user_id,
+            subscription_id=subscription_id,
+            model_id=model_cost.model_id,
+            window_start=window_start,
+            window_end=window_end,
+            raise_errors=True
+        )
+        await unlimited_usage.seed(
+            user_id=user_id,
+            subscription_id=subscription_id,
+            model_id=model_cost.model_id,
+            window_start=window_start,
+            window_end=window_end,
+            requests=request_count,
+            tokens=tokens_spent,
+        )
+        logger.debug("unlimited_usage_rebuilt", user_id=user_id, model_id=model_cost.model_id)
+        return await unlimited_usage.consume(**args)
+
+    @staticmethod
+    def _evaluate(model_cost: ModelLimits, request_count: int, tokens_spent: int, tokens_cost: int) -> int:
+        """Apply the limits to usage read from the database."""
+        if model_cost.unlimited_daily_limit and request_count >= model_cost.unlimited_daily_limit:
+            return USAGE_REQUEST_LIMIT
+        if model_cost.unlimited_budget_tokens and tokens_spent + tokens_cost > model_cost.unlimited_budget_tokens:
+            return USAGE_BUDGET_LIMIT
+        return USAGE_ALLOWED
+
+    async def _get_usage_in_window(
         self,
         user_id: int,
         subscription_id: int,
         model_id: str,
         window_start: datetime,
-        window_end: datetime
-    ) -> int:
-        """Get total tokens spent in time window."""
+        window_end: datetime,
+        raise_errors: bool = False
+    ) -> Tuple[int, int]:
+        """
+        Get (completed requests, tokens spent) in time window from ai_requests.
+
+        A failed query counts as no usage unless ``raise_errors`` is set.
+        """
         try:
             result = await self.session.execute(
-                select(func.sum(AIRequest.tokens_cost))
+                select(
+                    func.count(AIRequest.id),
+                    func.coalesce(func.sum(AIRequest.tokens_cost), 0)
+                )
                 .where(
                     AIRequest.user_id == user_id,
                     AIRequest.subscription_id == subscription_id,
@@ -245,11 +343,13 @@ class UnlimitedLimitsService:
                     AIRequest.created_at < window_end
                 )
             )
-            total = result.scalar_one_or_none()
-            return total if total is not None else 0
+            count, total = result.one()
+            return int(count), int(total)
         except Exception as e:
-            logger.error("get_tokens_spent_failed", error=str(e), user_id=user_id)
-            return 0
+            logger.error("get_usage_in_window_failed", error=str(e), user_id=user_id)
+            if raise_errors:
+                raise
+            return 0, 0
 
     async def get_unlimited_usage_stats(
         self,
@@ -268,15 +368,7 @@ class UnlimitedLimitsService:
         stats = {}
 
         for model_id, model_cost in self._model_costs_cache.items():
-            request_count = await self._get_request_count_in_window(
-                user_id=user_id,
-                subscription_id=subscription_id,
-                model_id=model_id,
-                window_start=window_start,
-                window_end=window_end
-            )
-
-            tokens_spent = await self._get_tokens_spent_in_window(
+            request_count, tokens_spent = await self._get_usage_in_window(
                 user_id=user_id,
                 subscription_id=subscription_id,
                 model_id=model_id,
@@ -0,0 +1,167 @@
+"""
+Per-user, per-model usage counters for unlimited subscriptions.
+
+Daily limits used to be enforced with COUNT/SUM aggregates over ``ai_requests``
+on every spend by an unlimited subscriber - the heaviest users, on the
+fastest-growing table. Usage is now kept in one Redis hash per daily window:
+
+    unlimited:usage:{user_id}:{model_id}:{window_start} = {sub, requests, tokens}
+
+The counters are checked and incremented atomically when a spend is admitted
+and decremented when it is refunded. A missing entry (first spend of the
+window, Redis flush, different subscription) is rebuilt from ``ai_requests``.
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+
+from app.core.logger import get_logger
+from app.core.redis_client import redis_client
+
+logger = get_logger(__name__)
+
+# Redis key prefix for usage counters
+UNLIMITED_USAGE_KEY_PREFIX = "unlimited:usage:"
+
+# Counters outlive their window a little so late refunds still find them
+UNLIMITED_USAGE_GRACE_SECONDS = 3600
+
+# Consume outcomes
+USAGE_ALLOWED = 1
+USAGE_REQUEST_LIMIT = 0
+USAGE_BUDGET_LIMIT = 2
+USAGE_MISSING = -1
+
+# KEYS[1] = counter, ARGV = subscription_id, cost, request_limit, token_budget
+# (0 = no limit). Returns {outcome, requests, tokens} - the usage before this
+# spend when refused, after it when allowed.
+_CONSUME_LUA = """
+if redis.call('HGET', KEYS[1], 'sub') ~= ARGV[1] then
+    return {-1, 0, 0}
+end
+local requests = tonumber(redis.call('HGET', KEYS[1], 'requests') or '0')
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or '0')
+local cost = tonumber(ARGV[2])
+local request_limit = tonumber(ARGV[3])
+local token_budget = tonumber(ARGV[4])
+if request_limit > 0 and requests >= request_limit then
+    return {0, requests, tokens}
+end
+if token_budget > 0 and tokens + cost > token_budget then
+    return {2, requests, tokens}
+end
+redis.call('HINCRBY', KEYS[1], 'requests', 1)
+redis.call('HINCRBY', KEYS[1], 'tokens', cost)
+return {1, requests + 1, tokens + cost}
+"""
+
+# KEYS[1] = counter, ARGV = subscription_id, requests, tokens, expire_at.
+# Another process may have seeded the same subscription first - keep its
+# counters, they may already include spends.
+_SEED_LUA = """
+if redis.call('HGET', KEYS[1], 'sub') == ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'sub', ARGV[1], 'requests', ARGV[2], 'tokens', ARGV[3])
+redis.call('EXPIREAT', KEYS[1], tonumber(ARGV[4]))
+return 1
+"""
+
+# KEYS[1] = counter, ARGV[1] = cost. Undoes one admitted spend.
+_RELEASE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local requests = tonumber(redis.call('HGET', KEYS[1], 'requests') or '0')
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or '0')
+redis.call('HSET', KEYS[1],
+    'requests', math.max(0, requests - 1),
+    'tokens', math.max(0, tokens - tonumber(ARGV[1])))
+return 1
+"""
+
+
+class UnlimitedUsageCounters:
+    """Atomic windowed usage counters in Redis."""
+
+    def __init__(self):
+        self._scripts = None
+
+    @staticmethod
+    def _key(user_id: int, model_id: str, window_start: datetime) -> str:
+        return f"{UNLIMITED_USAGE_KEY_PREFIX}{user_id}:{model_id}:{int(window_start.timestamp())}"
+
+    def _script(self, name: str):
+        # Registered lazily: the Redis client connects after import time.
+        if self._scripts is None:
+            client = redis_client.client
+            self._scripts = {
+                "consume": client.register_script(_CONSUME_LUA),
+                "seed": client.register_script(_SEED_LUA),
+                "release": client.register_script(_RELEASE_LUA),
+            }
+        return self._scripts[name]
+
+    async def consume(
+        self,
+        user_id: int,
+        subscription_id: int,
+        model_id: str,
+        window_start: datetime,
+        cost: int,
+        request_limit: Optional[int],
+        token_budget: Optional[int],
+    ) -> Tuple[int, int, int]:
+        """
+        Count one spend if it fits the limits.
+
+        Returns:
+            Tuple of (outcome, requests, tokens); outcome is one of the
+            ``USAGE_*`` constants. Raises on Redis errors.
+        """
+        outcome, requests, tokens = await self._script("consume")(
+            keys=[self._key(user_id, model_id, window_start)],
+            args=[subscription_id, cost, request_limit or 0, token_budget or 0],
+        )
+        return int(outcome), int(requests), int(tokens)
+
+    async def seed(
+        self,
+        user_id: int,
+        subscription_id: int,
+        model_id: str,
+        window_start: datetime,
+        window_end: datetime,
+        requests: int,
+        tokens: int,
+    ) -> None:
+        """Store counters rebuilt from the database. Raises on Redis errors."""
+        await self._script("seed")(
+            keys=[self._key(user_id, model_id, window_start)],
+            args=[
+                subscription_id,
+                requests,
+                tokens,
+                int(window_end.timestamp()) + UNLIMITED_USAGE_GRACE_SECONDS,
+            ],
+        )
+
+    async def release(
+        self,
+        user_id: int,
+        model_id: str,
+        window_start: datetime,
+        cost: int,
+    ) -> None:
+        """Undo one counted spend (refund or failed commit)."""
+        try:
+            await self._script("release")(
+                keys=[self._key(user_id, model_id, window_start)],
+                args=[cost],
+            )
+        except Exception as e:
+            logger.error("unlimited_usage_release_failed", user_id=user_id, model_id=model_id, error=str(e))
+
+
+# Global instance
+unlimited_usage = UnlimitedUsageCounters()
@@ -0,0 +1,94 @@
+"""
+Write-behind buffer for ``users.last_activity``.
+
+Every update used to run an UPDATE + COMMIT + re-SELECT of the user row just
+to bump ``last_activity``. Touches are now recorded in memory and written by a
+periodic flush as one bulk ``UPDATE users ... FROM (VALUES ...)``. Readers of
+``last_activity`` (admin "active users" stats) see values a few seconds late.
+
+The flush runs from the scheduler (see main.py) and once more on shutdown.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import BigInteger, DateTime, column, func, update, values
+
+from app.core.logger import get_logger
+from app.database.database import async_session_maker
+from app.database.models.user import User
+
+logger = get_logger(__name__)
+
+# How often the buffer is written to the database
+ACTIVITY_FLUSH_INTERVAL_SECONDS = 5
+
+# Rows per UPDATE statement (keeps bind parameter count well below limits)
+ACTIVITY_FLUSH_BATCH_SIZE = 1000
+
+
+class ActivityTracker:
+    """Buffers last-activity touches and flushes them in bulk."""
+
+    def __init__(self, batch_size: int = ACTIVITY_FLUSH_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._pending: Dict[int, datetime] = {}
+        self._flush_lock = asyncio.Lock()
+
+    def touch(self, user_id: int, at: Optional[datetime] = None) -> None:
+        """Record user activity; the latest touch per user wins."""
+        self._pending[user_id] = at or datetime.now(timezone.utc)
+
+    @property
+    def pending_count(self) -> int:
+        """Number of users waiting to be flushed."""
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """
+        Write buffered touches to the database.
+
+        Returns:
+            Number of users flushed
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            pending, self._pending = self._pending, {}
+            items = list(pending.items())
+
+            try:
+                async with async_session_maker() as session:
+                    for start in range(0, len(items), self.batch_size):
+                        batch = items[start:start + self.batch_size]
+                        touched = values(
+                            column("id", BigInteger),
+                            column("ts", DateTime(timezone=True)),
+                            name="touched",
+                        ).data(batch)
+                        await session.execute(
+                            update(User)
+                            .where(User.id == touched.c.id)
+                            .values(
+                                last_activity=func.greatest(
+                                    func.coalesce(User.last_activity, touched.c.ts),
+                                    touched.c.ts,
+                                )
+                            )
+                            .execution_options(synchronize_session=False)
+                        )
+                    await session.commit()
+            except Exception as e:
+                # Put touches back (newer ones recorded meanwhile take priority)
+                for user_id, ts in items:
+                    self._pending.setdefault(user_id, ts)
+                logger.error("activity_flush_failed", users=len(items), error=str(e))
+                return 0
+
+            logger.debug("activity_flushed", users=len(items))
+            return len(items)
+
+
+# Global instance
+activity_tracker = ActivityTracker()
@@ -0,0 +1,86 @@
+"""
+Write-behind buffer for broadcast button clicks.
+
+``BroadcastTrackingMiddleware`` used to open a session and commit one
+``broadcast_clicks`` row per press before the handler ran. Clicks are now
+recorded in memory and written by a periodic flush as one multi-row INSERT;
+admin click statistics see them a few seconds late.
+
+The flush runs from the scheduler (see main.py) and once more on shutdown.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import insert
+
+from app.core.logger import get_logger
+from app.database.database import async_session_maker
+from app.database.models.broadcast import BroadcastClick
+from app.services.cache.broadcast_index import BroadcastButton
+
+logger = get_logger(__name__)
+
+# How often the buffer is written to the database
+BROADCAST_CLICK_FLUSH_INTERVAL_SECONDS = 5
+
+# Rows per INSERT statement
+BROADCAST_CLICK_FLUSH_BATCH_SIZE = 1000
+
+
+class BroadcastClickTracker:
+    """Buffers broadcast button clicks and flushes them in bulk."""
+
+    def __init__(self, batch_size: int = BROADCAST_CLICK_FLUSH_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._pending: List[dict] = []
+        self._flush_lock = asyncio.Lock()
+
+    def record(self, user_id: int, button: BroadcastButton, callback_data: str) -> None:
+        """Record a click on a broadcast button."""
+        self._pending.append(dict(
+            broadcast_id=button.broadcast_id,
+            user_id=user_id,
+            button_index=button.index,
+            button_text=button.text[:255],
+            button_callback_data=callback_data[:255],
+            created_at=datetime.now(timezone.utc),
+        ))
+
+    @property
+    def pending_count(self) -> int:
+        """Number of clicks waiting to be flushed."""
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """
+        Write buffered clicks to the database.
+
+        Returns:
+            Number of clicks flushed
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            pending, self._pending = self._pending, []
+
+            try:
+                async with async_session_maker() as session:
+                    for start in range(0, len(pending), self.batch_size):
+                        await session.execute(
+                            insert(BroadcastClick).values(pending[start:start + self.batch_size])
+                        )
+                    await session.commit()
+            except Exception as e:
+                # Put clicks back ahead of ones recorded meanwhile
+                self._pending[:0] = pending
+                logger.error("broadcast_clicks_flush_failed", clicks=len(pending), error=str(e))
+                return 0
+
+            logger.debug("broadcast_clicks_flushed", clicks=len(pending))
+            return len(pending)
+
+
+# Global instance
+broadcast_click_tracker = BroadcastClickTracker()
@@ -0,0 +1,175 @@
+"""
+Bulk writes of message delivery outcomes.
+
+Senders (broadcast worker, expiry notifications, admin messages) used to mark
+every user who blocked the bot with its own SELECT and UPDATE. They now
+record outcomes here and flush them in chunks: per chunk one
+``UPDATE users SET is_bot_blocked = true WHERE id = ANY(:ids)`` (by
+telegram_id for senders that only know it) and, for a broadcast, one INSERT
+of all rows into its delivery log (``broadcast_deliveries``).
+
+    outcomes = DeliveryOutcomeSink(broadcast_id=broadcast.id)
+    try:
+        await bot.send_message(telegram_id, text)
+        outcomes.add(telegram_id, SENT, user_id=user_id)
+    except Exception as e:
+        outcomes.add(telegram_id, classify_delivery_error(e), user_id=user_id, error=str(e))
+    ...
+    await outcomes.flush()
+"""
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import BigInteger, any_, bindparam, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from app.core.logger import get_logger
+from app.database.database import async_session_maker
+from app.database.models.broadcast import BroadcastDelivery
+from app.database.models.user import User
+from app.services.cache.user_cache import user_cache
+
+logger = get_logger(__name__)
+
+# Delivery outcomes
+SENT = "sent"
+BLOCKED = "blocked"
+DEACTIVATED = "deactivated"
+ERROR = "error"
+
+# Outcomes after which the user is marked is_bot_blocked
+UNREACHABLE_OUTCOMES = (BLOCKED, DEACTIVATED)
+
+# Outcomes per chunk (one UPDATE and one INSERT each)
+DELIVERY_FLUSH_CHUNK_SIZE = 1000
+
+
+def classify_delivery_error(error: Exception) -> str:
+    """Outcome of a failed send."""
+    message = str(error)
+    if "bot was blocked by the user" in message:
+        return BLOCKED
+    if "user is deactivated" in message:
+        return DEACTIVATED
+    return ERROR
+
+
+@dataclass
+class DeliveryOutcome:
+    """Result of one send."""
+    telegram_id: int
+    outcome: str
+    user_id: Optional[int] = None  # users.id, if the sender knows it
+    error: Optional[str] = None
+
+
+class DeliveryOutcomeSink:
+    """Buffers delivery outcomes and writes them in bulk."""
+
+    def __init__(self, broadcast_id: Optional[int] = None, chunk_size: int = DELIVERY_FLUSH_CHUNK_SIZE):
+        """
+        Args:
+            broadcast_id: Broadcast whose delivery log gets the outcomes (None:
+                only users who blocked the bot are recorded)
+            chunk_size: Outcomes per write
+        """
+        self.broadcast_id = broadcast_id
+        self.chunk_size = chunk_size
+        # Outcomes added so far, by kind
+        self.counts: Counter = Counter()
+        self._pending: List[DeliveryOutcome] = []
+        self._flush_lock = asyncio.Lock()
+
+    def add(
+        self,
+        telegram_id: int,
+        outcome: str,
+        user_id: Optional[int] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """Record the outcome of a send."""
+        self._pending.append(DeliveryOutcome(telegram_id, outcome, user_id, error))
+        self.counts[outcome] += 1
+
+    @property
+    def pending_count(self) -> int:
+        """Number of outcomes waiting to be flushed."""
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """
+        Write buffered outcomes to the database, in one transaction.
+
+        Returns:
+            Number of outcomes written (0 on failure; they stay buffered)
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            pending, self._pending = self._pending, []
+            unreachable = [item.telegram_id for item in pending if item.outcome in UNREACHABLE_OUTCOMES]
+            if self.broadcast_id is None and not unreachable:
+                return len(pending)  # Nothing to record
+
+            try:
+                async with async_session_maker() as session:
+                    for start in range(0, len(pending), self.chunk_size):
+                        await self._write(session, pending[start:start + self.chunk_size])
+                    await session.commit()
+            except Exception as e:
+                self._pending[:0] = pending
+                logger.error(
+                    "delivery_outcomes_flush_failed",
+                    broadcast_id=self.broadcast_id,
+                    outcomes=len(pending),
+                    error=str(e)
+                )
+                return 0
+
+            if unreachable:
+                await user_cache.invalidate_many(unreachable)
+
+            logger.debug(
+                "delivery_outcomes_flushed",
+                broadcast_id=self.broadcast_id,
+                outcomes=len(pending),
+                unreachable=len(unreachable)
+            )
+            return len(pending)
+
+    async def _write(self, session, chunk: List[DeliveryOutcome]) -> None:
+        """Mark unreachable users and log a broadcast's deliveries."""
+        unreachable = [item for item in chunk if item.outcome in UNREACHABLE_OUTCOMES]
+        user_ids = [item.user_id for item in unreachable if item.user_id is not None]
+        telegram_ids = [item.telegram_id for item in unreachable if item.user_id is None]
+
+        for column, ids in ((User.id, user_ids), (User.telegram_id, telegram_ids)):
+            if ids:
+                await session.execute(
+                    update(User)
+                    .where(column == any_(bindparam("ids", ids, type_=ARRAY(BigInteger))))
+                    .values(is_bot_blocked=True)
+                    .execution_options(synchronize_session=False)
+                )
+
+        if self.broadcast_id is not None:
+            rows = [
+                dict(
+                    broadcast_id=self.broadcast_id,
+                    user_id=item.user_id,
+                    outcome=item.outcome,
+                    error=item.error[:255] if item.error else None
+                )
+                for item in chunk
+                if item.user_id is not None
+            ]
+            if rows:
+                # A page sent again after a crash keeps its first outcomes
+                await session.execute(
+                    insert(BroadcastDelivery)
+                    .values(rows)
+                    .on_conflict_do_nothing(index_elements=["broadcast_id", "user_id"])
+                )
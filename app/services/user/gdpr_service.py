@@ -14,6 +14,7 @@ from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.logger import get_logger
+from app.database.loaders import select_user
 from app.database.models.user import User
 from app.database.models.subscription import Subscription
 from app.database.models.payment import Payment
@@ -22,6 +23,7 @@ from app.database.models.dialog import Dialog
 from app.database.models.referral import Referral
 from app.database.models.video_job import VideoGenerationJob
 from app.database.models.file import File as FileModel
+from app.services.cache.user_cache import user_cache
 
 logger = get_logger(__name__)
 
@@ -39,7 +41,7 @@ class GDPRService:
         Returns None when no user is found.
         """
         result = await self.session.execute(
-            select(User).where(User.telegram_id == telegram_id)
+            select_user("gdpr_export").where(User.telegram_id == telegram_id)
         )
         user: Optional[User] = result.scalar_one_or_none()
         if not user:
@@ -71,6 +73,12 @@ class GDPRService:
         ai_requests_count = await self.session.scalar(
             select(func.count(AIRequest.id)).where(AIRequest.user_id == user.id)
         ) or 0
+        dialogs_count = await self.session.scalar(
+            select(func.count(Dialog.id)).where(Dialog.user_id == user.id)
+        ) or 0
+        video_jobs_count = await self.session.scalar(
+            select(func.count(VideoGenerationJob.id)).where(VideoGenerationJob.user_id == user.id)
+        ) or 0
 
         return {
             "exported_at": datetime.now(timezone.utc).isoformat(),
@@ -87,8 +95,8 @@ class GDPRService:
             "subscriptions": subscriptions,
             "payments": payments,
             "ai_requests_total": ai_requests_count,
-            "dialogs_total": len(user.dialogs),
-            "video_jobs_total": len(user.video_jobs),
+            "dialogs_total": dialogs_count,
+            "video_jobs_total": video_jobs_count,
         }
 
     async def export_user_data_json(self, telegram_id: int) -> Optional[str]:
@@ -105,15 +113,12 @@ class GDPRService:
         Returns False when the user can't be found. Cleans up rows whose FKs
         were declared with ondelete='SET NULL' and would otherwise dangle.
         """
-        result = await self.session.execute(
-            select(User).where(User.telegram_id == telegram_id)
+        user_id = await self.session.scalar(
+            select(User.id).where(User.telegram_id == telegram_id)
         )
-        user: Optional[User] = result.scalar_one_or_none()
-        if not user:
+        if user_id is None:
             return False
 
-        user_id = user.id
-
         try:
             # Drop rows the FK cascade misses (some tables use SET NULL).
             await self.session.execute(
@@ -140,13 +145,17 @@ class GDPRService:
                 )
             )
 
-            await self.session.delete(user)
+            # Core DELETE: the ORM delete would try to load (and null out)
+            # the lazy="raise" relationship collections first.
+            await self.session.execute(delete(User).where(User.id == user_id))
             await self.session.commit()
         except Exception:
             await self.session.rollback()
             logger.exception("gdpr_delete_user_failed", user_id=user_id)
             raise
 
+        await user_cache.invalidate(telegram_id)
+
         logger.info(
             "gdpr_user_deleted",
             user_id=user_id,
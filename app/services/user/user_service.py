@@ -57,14 +57,23 @@ class UserService:
 
         return user, created
 
-    async def get_user_by_telegram_id(self, telegram_id: int) -> User:
+    async def get_user_by_telegram_id(
+        self,
+        telegram_id: int,
+        profile: str = "auth"
+    ) -> User:
         """
         Get user by Telegram ID.
 
+        Args:
+            telegram_id: Telegram user ID
+            profile: Loader profile naming the relationships to load
+                (see app.database.loaders)
+
         Raises:
             UserNotFoundError: If user doesn't exist
         """
-        user = await self.repository.get_by_telegram_id(telegram_id)
+        user = await self.repository.get_by_telegram_id(telegram_id, profile=profile)
 
         if not user:
             raise UserNotFoundError(f"User with telegram_id {telegram_id} not found")
@@ -114,7 +123,7 @@ class UserService:
 
     async def get_user_stats(self, telegram_id: int) -> dict:
         """Get user statistics."""
-        user = await self.get_user_by_telegram_id(telegram_id)
+        user = await self.get_user_by_telegram_id(telegram_id, profile="profile")
         from app.services.subscription.subscription_service import SubscriptionService
 
         sub_service = SubscriptionService(self.session)
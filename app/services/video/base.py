@@ -2,15 +2,16 @@
 Base video service interface.
 """
 from abc import ABC, abstractmethod
-from typing import Optional, Callable, Awaitable
+from typing import Any, Dict, Optional, Callable, Awaitable
 from dataclasses import dataclass
 from pathlib import Path
-import aiohttp
 import asyncio
 import uuid
 from datetime import datetime
 
+from app.core.circuit_breaker import guard_provider_class, raise_open
 from app.core.config import settings
+from app.core.http_client import http_clients
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -31,9 +32,48 @@ class VideoResponse:
             self.metadata = {}
 
 
+# Normalized task states returned by BaseVideoProvider.check()
+TASK_PENDING = "pending"
+TASK_SUCCEEDED = "succeeded"
+TASK_FAILED = "failed"
+
+
+@dataclass
+class VideoTaskStatus:
+    """Result of a single status check of a submitted generation."""
+    state: str
+    provider_status: Optional[str] = None
+    video_url: Optional[str] = None
+    error: Optional[str] = None
+    metadata: dict = None
+
+    def __post_init__(self):
+        if self.metadata is None:
+            self.metadata = {}
+
+    @property
+    def is_done(self) -> bool:
+        return self.state in (TASK_SUCCEEDED, TASK_FAILED)
+
+
 class BaseVideoProvider(ABC):
     """Base class for video generation providers."""
 
+    # Whether the provider implements submit()/check()/fetch_result(), so a
+    # generation can be driven as separate short steps (and generate_video()
+    # honours ``resume_task_id``)
+    supports_resume: bool = False
+
+    # Circuit breaker name; defaults to the class name ("VeoService" -> "veo")
+    breaker_provider: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        guard_provider_class(cls, {
+            "generate_video": lambda error: VideoResponse(success=False, error=str(error)),
+            "submit": raise_open,
+        })
+
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.storage_path = Path(settings.storage_path) / "videos"
@@ -46,15 +86,83 @@ class BaseVideoProvider(ABC):
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         **kwargs
     ) -> VideoResponse:
-        """Generate video from prompt with optional progress callback."""
+        """
+        Generate video from prompt with optional progress callback.
+
+        Besides provider parameters, ``kwargs`` may carry:
+            on_task_created: async callback receiving the provider task ID
+                as soon as the task is submitted (so it can be persisted)
+            resume_task_id: continue an already submitted task
+                (providers with ``supports_resume`` only)
+        """
         pass
 
+    async def submit(self, prompt: str, **kwargs) -> str:
+        """
+        Submit a generation without waiting for it.
+
+        Takes the same parameters as generate_video().
+
+        Returns:
+            Provider task ID to pass to check()
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support submit()")
+
+    async def check(self, task_id: str, **kwargs) -> VideoTaskStatus:
+        """
+        Check a submitted task once (a single status request, no waiting).
+
+        ``kwargs`` are the parameters the task was submitted with. Network
+        errors propagate; transient API hiccups are reported as pending.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support check()")
+
+    async def check_many(self, tasks: Dict[str, Dict[str, Any]]) -> Dict[str, VideoTaskStatus]:
+        """
+        Check several tasks with as few requests as the API allows.
+
+        ``tasks`` maps task IDs to their submit parameters. Tasks missing from
+        the result are checked one by one; the default batches nothing.
+        """
+        return {}
+
+    async def fetch_result(
+        self,
+        task_id: str,
+        status: VideoTaskStatus,
+        progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
+        **kwargs
+    ) -> VideoResponse:
+        """Download the video of a task that check() reported as succeeded."""
+        video_path = await self._download_file(status.video_url, self._generate_filename("mp4"))
+        return VideoResponse(
+            success=True,
+            video_path=video_path,
+            metadata={"task_id": task_id, **status.metadata}
+        )
+
+    @staticmethod
+    async def _report_task_id(kwargs: dict, task_id: Optional[str]) -> None:
+        """Pass a freshly submitted task ID to the ``on_task_created`` callback."""
+        callback = kwargs.get("on_task_created")
+        if not callback or not task_id:
+            return
+        try:
+            await callback(task_id)
+        except Exception as e:
+            # Never fail a paid generation because bookkeeping failed
+            logger.warning("video_task_id_report_failed", task_id=task_id, error=str(e))
+
+    def _http_session(self, url: str):
+        """Pooled HTTP session for the host of ``url`` (don't close it)."""
+        return http_clients.session(url)
+
     async def _download_file(self, url: str, filename: str) -> str:
         """Download file from URL to storage."""
         try:
             file_path = self.storage_path / filename
 
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session(url) as session:
                 async with session.get(url) as response:
                     if response.status == 200:
                         with open(file_path, 'wb') as f:
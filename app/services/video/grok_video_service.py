@@ -4,15 +4,22 @@ API docs: https://api.x.ai/v1/videos/generations
 Model: grok-imagine-video
 """
 import time
-import asyncio
 from typing import Optional, Callable, Awaitable
 
 import aiohttp
 
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.poll_scheduler import poll_scheduler
 from app.core.billing_config import get_grok_video_tokens_cost
-from app.services.video.base import BaseVideoProvider, VideoResponse
+from app.services.video.base import (
+    BaseVideoProvider,
+    VideoResponse,
+    VideoTaskStatus,
+    TASK_PENDING,
+    TASK_SUCCEEDED,
+    TASK_FAILED,
+)
 
 logger = get_logger(__name__)
 
@@ -30,6 +37,8 @@ class GrokVideoService(BaseVideoProvider):
     3. Download video from returned URL
     """
 
+    supports_resume = True
+
     def __init__(self, api_key: Optional[str] = None):
         super().__init__(api_key or getattr(settings, "grok_ai_api", None))
         if not self.api_key:
@@ -59,18 +68,7 @@ class GrokVideoService(BaseVideoProvider):
                 processing_time=time.time() - start_time,
             )
 
-        resolution = kwargs.get("resolution", "480p")
-        duration = int(kwargs.get("duration", 5))
-        aspect_ratio = kwargs.get("aspect_ratio", "16:9")
-        # Support both "image_path" (direct call) and "images" list (job service)
-        image_path = kwargs.get("image_path", None)
-        if not image_path:
-            images = kwargs.get("images", [])
-            if images:
-                image_path = images[0]
-
-        # Clamp duration to valid range
-        duration = max(1, min(duration, 15))
+        resolution, duration, aspect_ratio, image_path = self._generation_params(kwargs)
 
         tokens_used = get_grok_video_tokens_cost(resolution, duration)
 
@@ -81,13 +79,16 @@ class GrokVideoService(BaseVideoProvider):
             )
 
         try:
-            request_id = await self._submit_generation(
-                prompt=prompt,
-                resolution=resolution,
-                duration=duration,
-                aspect_ratio=aspect_ratio,
-                image_path=image_path,
-            )
+            request_id = kwargs.get("resume_task_id")
+            if not request_id:
+                request_id = await self._submit_generation(
+                    prompt=prompt,
+                    resolution=resolution,
+                    duration=duration,
+                    aspect_ratio=aspect_ratio,
+                    image_path=image_path,
+                )
+                await self._report_task_id(kwargs, request_id)
 
             logger.info(
                 "grok_video_request_created",
@@ -149,6 +150,76 @@ class GrokVideoService(BaseVideoProvider):
                 tokens_used=tokens_used,
             )
 
+    @staticmethod
+    def _generation_params(kwargs: dict) -> tuple:
+        """Return (resolution, duration, aspect_ratio, image_path) from kwargs."""
+        resolution = kwargs.get("resolution", "480p")
+        duration = int(kwargs.get("duration", 5))
+        aspect_ratio = kwargs.get("aspect_ratio", "16:9")
+        # Support both "image_path" (direct call) and "images" list (job service)
+        image_path = kwargs.get("image_path", None)
+        if not image_path:
+            images = kwargs.get("images", [])
+            if images:
+                image_path = images[0]
+
+        # Clamp duration to valid range
+        duration = max(1, min(duration, 15))
+        return resolution, duration, aspect_ratio, image_path
+
+    async def submit(self, prompt: str, **kwargs) -> str:
+        """Submit a generation and return its request_id without waiting."""
+        if not self.api_key:
+            raise Exception("Grok API ключ не настроен (GROK_AI_API).")
+        resolution, duration, aspect_ratio, image_path = self._generation_params(kwargs)
+        return await self._submit_generation(
+            prompt=prompt,
+            resolution=resolution,
+            duration=duration,
+            aspect_ratio=aspect_ratio,
+            image_path=image_path,
+        )
+
+    async def check(self, task_id: str, **kwargs) -> VideoTaskStatus:
+        """Fetch the request status once."""
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        async with self._http_session(XAI_BASE_URL) as session:
+            async with session.get(
+                f"{XAI_BASE_URL}/videos/{task_id}",
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=30),
+            ) as response:
+                if response.status not in (200, 202):
+                    error_text = await response.text()
+                    raise Exception(
+                        f"Grok Video poll error {response.status}: {error_text}"
+                    )
+                data = await response.json()
+
+        status = data.get("status", "pending")
+
+        if status == "done":
+            video_url = data.get("video", {}).get("url")
+            if not video_url:
+                return VideoTaskStatus(TASK_FAILED, status, error="Grok Video: нет URL в ответе")
+            return VideoTaskStatus(
+                TASK_SUCCEEDED,
+                status,
+                video_url=video_url,
+                metadata={"provider": "grok_video", "model": GROK_VIDEO_MODEL, "request_id": task_id},
+            )
+
+        if status in ("expired", "failed"):
+            error = data.get("error", {})
+            return VideoTaskStatus(
+                TASK_FAILED,
+                status,
+                error=f"Grok Video {status}: {error.get('message', 'неизвестная ошибка')}",
+            )
+
+        return VideoTaskStatus(TASK_PENDING, status)
+
     async def _submit_generation(
         self,
         prompt: str,
@@ -193,7 +264,7 @@ class GrokVideoService(BaseVideoProvider):
             except Exception as e:
                 logger.warning("grok_video_image_encode_failed", error=str(e))
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(XAI_BASE_URL) as session:
             async with session.post(
                 f"{XAI_BASE_URL}/videos/generations",
                 headers=headers,
@@ -217,54 +288,32 @@ class GrokVideoService(BaseVideoProvider):
         request_id: str,
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         max_wait: int = 1200,  # 20 minutes
-        poll_interval: int = 8,
     ) -> str:
         """Poll until video is done, return video URL."""
-        headers = {"Authorization": f"Bearer {self.api_key}"}
-        url = f"{XAI_BASE_URL}/videos/{request_id}"
-
         start = time.time()
         last_status = None
 
-        async with aiohttp.ClientSession() as session:
-            while True:
-                if time.time() - start > max_wait:
-                    raise Exception("Grok Video: timeout ожидания генерации")
-
-                async with session.get(
-                    url,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=30),
-                ) as response:
-                    if response.status not in (200, 202):
-                        error_text = await response.text()
-                        raise Exception(
-                            f"Grok Video poll error {response.status}: {error_text}"
-                        )
-                    data = await response.json()
-
-                status = data.get("status", "pending")
-
-                if status != last_status and progress_callback:
-                    messages = {
-                        "pending": "⏳ Видео в очереди генерации...",
-                        "processing": "⚙️ Генерирую видео...",
-                    }
-                    msg = messages.get(status)
-                    if msg:
-                        await progress_callback(msg)
-                last_status = status
-
-                if status == "done":
-                    video_url = data.get("video", {}).get("url")
-                    if not video_url:
-                        raise Exception("Grok Video: нет URL в ответе")
-                    return video_url
-
-                if status in ("expired", "failed"):
-                    error = data.get("error", {})
-                    raise Exception(
-                        f"Grok Video {status}: {error.get('message', 'неизвестная ошибка')}"
-                    )
+        while True:
+            await poll_scheduler.wait_turn("grok_video", start)
+
+            if time.time() - start > max_wait:
+                raise Exception("Grok Video: timeout ожидания генерации")
+
+            result = await self.check(request_id)
+            status = result.provider_status
+
+            if status != last_status and progress_callback:
+                messages = {
+                    "pending": "⏳ Видео в очереди генерации...",
+                    "processing": "⚙️ Генерирую видео...",
+                }
+                msg = messages.get(status)
+                if msg:
+                    await progress_callback(msg)
+            last_status = status
+
+            if result.state == TASK_SUCCEEDED:
+                return result.video_url
 
-                await asyncio.sleep(poll_interval)
+            if result.state == TASK_FAILED:
+                raise Exception(result.error)
@@ -3,17 +3,22 @@ Hailuo (MiniMax) AI video generation service using official MiniMax API.
 Documentation: https://platform.minimax.io/docs
 """
 import time
-import asyncio
 from typing import Optional, Callable, Awaitable
 import os
 import base64
 
-import aiohttp
-
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.poll_scheduler import poll_scheduler
 from app.core.billing_config import get_video_model_billing
-from app.services.video.base import BaseVideoProvider, VideoResponse
+from app.services.video.base import (
+    BaseVideoProvider,
+    VideoResponse,
+    VideoTaskStatus,
+    TASK_PENDING,
+    TASK_SUCCEEDED,
+    TASK_FAILED,
+)
 
 logger = get_logger(__name__)
 
@@ -33,6 +38,8 @@ class HailuoService(BaseVideoProvider):
     - MiniMax-Hailuo-02 (higher resolution support)
     """
 
+    supports_resume = True
+
     BASE_URL = "https://api.minimax.io"
 
     def __init__(self, api_key: Optional[str] = None):
@@ -85,15 +92,18 @@ class HailuoService(BaseVideoProvider):
                 mode = "изображения в видео" if image_path else "текста в видео"
                 await progress_callback(f"🎬 Начинаю генерацию видео из {mode} с Hailuo AI ({model})...")
 
-            # Step 1: Create generation task
-            task_id = await self._create_generation_task(
-                prompt=prompt,
-                image_path=image_path,
-                model=model,
-                duration=duration,
-                resolution=resolution,
-                prompt_optimizer=prompt_optimizer
-            )
+            task_id = kwargs.get("resume_task_id")
+            if not task_id:
+                # Step 1: Create generation task
+                task_id = await self._create_generation_task(
+                    prompt=prompt,
+                    image_path=image_path,
+                    model=model,
+                    duration=duration,
+                    resolution=resolution,
+                    prompt_optimizer=prompt_optimizer
+                )
+                await self._report_task_id(kwargs, task_id)
 
             logger.info(
                 "hailuo_task_created",
@@ -216,7 +226,7 @@ class HailuoService(BaseVideoProvider):
                 logger.error("hailuo_image_encode_failed", error=str(e))
                 raise Exception(f"Failed to encode image: {e}")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status not in [200, 201]:
                     error_text = await response.text()
@@ -236,82 +246,122 @@ class HailuoService(BaseVideoProvider):
 
                 return task_id
 
+    async def submit(self, prompt: str, **kwargs) -> str:
+        """Create a generation task and return its ID without waiting."""
+        if not self.api_key:
+            raise Exception("Hailuo API ключ не настроен. Добавьте HAILUO_API_KEY в .env файл.")
+        return await self._create_generation_task(
+            prompt=prompt,
+            image_path=kwargs.get("image_path", None),
+            model=kwargs.get("model", "MiniMax-Hailuo-2.3"),
+            duration=kwargs.get("duration", 6),
+            resolution=kwargs.get("resolution", "768P"),
+            prompt_optimizer=kwargs.get("prompt_optimizer", True)
+        )
+
+    async def check(self, task_id: str, **kwargs) -> VideoTaskStatus:
+        """
+        Fetch the task status once.
+
+        API Endpoint: GET /v1/query/video_generation?task_id={task_id}
+        """
+        url = f"{self.BASE_URL}/v1/query/video_generation"
+        headers = {
+            "Authorization": f"Bearer {self.api_key}"
+        }
+
+        async with self._http_session(url) as session:
+            async with session.get(url, headers=headers, params={"task_id": task_id}) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Status check failed: {response.status} - {error_text}")
+                data = await response.json()
+
+        # Check base_resp
+        if data.get("base_resp", {}).get("status_code") != 0:
+            error_msg = data.get("base_resp", {}).get("status_msg", "Unknown error")
+            raise Exception(f"Status check error: {error_msg}")
+
+        # Possible values: "Preparing", "Queueing", "Processing", "Success", "Fail"
+        status = data.get("status", "unknown")
+
+        if status == "Success":
+            file_id = data.get("file_id")
+            if not file_id:
+                return VideoTaskStatus(TASK_FAILED, status, error="file_id not found in success response")
+
+            logger.info("hailuo_generation_complete", file_id=file_id, task_id=task_id)
+            return VideoTaskStatus(
+                TASK_SUCCEEDED,
+                status,
+                metadata={"provider": "hailuo", "file_id": file_id}
+            )
+
+        if status == "Fail":
+            error_code = data.get("base_resp", {}).get("status_code", "unknown")
+            error_msg = data.get("base_resp", {}).get("status_msg", "Unknown error")
+            return VideoTaskStatus(TASK_FAILED, status, error=f"Generation failed (code {error_code}): {error_msg}")
+
+        return VideoTaskStatus(TASK_PENDING, status)
+
+    async def fetch_result(
+        self,
+        task_id: str,
+        status: VideoTaskStatus,
+        progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
+        **kwargs
+    ) -> VideoResponse:
+        """Download the video of a finished task (MiniMax serves files by file_id)."""
+        video_path = await self._download_video(status.metadata["file_id"], self._generate_filename("mp4"))
+        return VideoResponse(
+            success=True,
+            video_path=video_path,
+            metadata={"task_id": task_id, **status.metadata}
+        )
+
     async def _poll_generation_status(
         self,
         task_id: str,
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         max_wait_time: int = 600,  # 10 minutes
-        poll_interval: int = 5  # 5 seconds
     ) -> str:
         """
         Poll generation status until complete.
 
-        API Endpoint: GET /v1/query/video_generation?task_id={task_id}
-
         Returns:
             file_id of the generated video
         """
-        url = f"{self.BASE_URL}/v1/query/video_generation"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
         start_time = time.time()
         last_status = None
 
-        async with aiohttp.ClientSession() as session:
-            while True:
-                # Check timeout
-                if time.time() - start_time > max_wait_time:
-                    raise Exception("Video generation timeout (10 minutes)")
-
-                # Poll status
-                async with session.get(url, headers=headers, params={"task_id": task_id}) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(f"Status check failed: {response.status} - {error_text}")
-
-                    data = await response.json()
-
-                    # Check base_resp
-                    if data.get("base_resp", {}).get("status_code") != 0:
-                        error_msg = data.get("base_resp", {}).get("status_msg", "Unknown error")
-                        raise Exception(f"Status check error: {error_msg}")
-
-                    # Get status
-                    # Possible values: "Preparing", "Queueing", "Processing", "Success", "Fail"
-                    status = data.get("status", "unknown")
-
-                    # Update user if status changed
-                    if status != last_status and progress_callback:
-                        status_messages = {
-                            "Preparing": "🔄 Подготовка к генерации...",
-                            "Queueing": "⏳ Задача в очереди...",
-                            "Processing": "⚙️ Генерирую видео..."
-                        }
-                        message = status_messages.get(status)
-                        if message:
-                            await progress_callback(message)
-
-                    last_status = status
-
-                    # Check if complete
-                    if status == "Success":
-                        file_id = data.get("file_id")
-                        if not file_id:
-                            raise Exception("file_id not found in success response")
-
-                        logger.info("hailuo_generation_complete", file_id=file_id, task_id=task_id)
-                        return file_id
-
-                    # Check if failed
-                    if status == "Fail":
-                        error_code = data.get("base_resp", {}).get("status_code", "unknown")
-                        error_msg = data.get("base_resp", {}).get("status_msg", "Unknown error")
-                        raise Exception(f"Generation failed (code {error_code}): {error_msg}")
-
-                    # Wait before next poll
-                    await asyncio.sleep(poll_interval)
+        while True:
+            await poll_scheduler.wait_turn("hailuo", start_time)
+
+            # Check timeout
+            if time.time() - start_time > max_wait_time:
+                raise Exception("Video generation timeout (10 minutes)")
+
+            result = await self.check(task_id)
+            status = result.provider_status
+
+            # Update user if status changed
+            if status != last_status and progress_callback:
+                status_messages = {
+                    "Preparing": "🔄 Подготовка к генерации...",
+                    "Queueing": "⏳ Задача в очереди...",
+                    "Processing": "⚙️ Генерирую видео..."
+                }
+                message = status_messages.get(status)
+                if message:
+                    await progress_callback(message)
+
+            last_status = status
+
+            if result.state == TASK_SUCCEEDED:
+                return result.metadata["file_id"]
+
+            if result.state == TASK_FAILED:
+                raise Exception(result.error)
 
     async def _download_video(self, file_id: str, filename: str) -> str:
         """
@@ -327,7 +377,7 @@ class HailuoService(BaseVideoProvider):
             "Authorization": f"Bearer {self.api_key}"
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             # First, get file info with download URL
             async with session.get(url, headers=headers, params={"file_id": file_id}) as response:
                 if response.status != 200:
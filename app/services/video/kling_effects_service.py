@@ -10,8 +10,6 @@ import jwt
 from typing import Optional, Callable, Awaitable, List, Dict
 from pathlib import Path
 
-import aiohttp
-
 from app.core.config import settings
 from app.core.logger import get_logger
 from app.services.video.base import BaseVideoProvider, VideoResponse
@@ -415,7 +413,7 @@ class KlingEffectsService(BaseVideoProvider):
                 }
             }
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status not in [200, 201]:
                     error_text = await response.text()
@@ -442,7 +440,7 @@ class KlingEffectsService(BaseVideoProvider):
         start_time = time.time()
         last_status = None
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             while True:
                 if time.time() - start_time > max_wait_time:
                     raise Exception("Превышено время ожидания генерации")
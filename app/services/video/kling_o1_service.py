@@ -22,7 +22,15 @@ import aiohttp
 
 from app.core.config import settings
 from app.core.logger import get_logger
-from app.services.video.base import BaseVideoProvider, VideoResponse
+from app.core.poll_scheduler import poll_scheduler
+from app.services.video.base import (
+    BaseVideoProvider,
+    VideoResponse,
+    VideoTaskStatus,
+    TASK_PENDING,
+    TASK_SUCCEEDED,
+    TASK_FAILED,
+)
 
 logger = get_logger(__name__)
 
@@ -84,6 +92,8 @@ class KlingO1Service(BaseVideoProvider):
     Aspect ratios: 1:1, 16:9, 9:16
     """
 
+    supports_resume = True
+
     def __init__(
         self,
         access_key: Optional[str] = None,
@@ -189,23 +199,26 @@ class KlingO1Service(BaseVideoProvider):
             if progress_callback:
                 await progress_callback("🎬 Начинаю генерацию с Kling O1...")
 
-            # Translate @mentions to API <<<>>> format
-            api_prompt = translate_mentions_to_api_format(prompt)
-
-            # Build payload
-            payload = await self._build_payload(
-                prompt=api_prompt,
-                images=images,
-                video_url=video_url,
-                video_is_base=video_is_base,
-                keep_original_sound=keep_original_sound,
-                duration=duration,
-                aspect_ratio=aspect_ratio,
-                mode=mode,
-            )
-
-            # Create task
-            task_id = await self._create_task(payload)
+            task_id = kwargs.get("resume_task_id")
+            if not task_id:
+                # Translate @mentions to API <<<>>> format
+                api_prompt = translate_mentions_to_api_format(prompt)
+
+                # Build payload
+                payload = await self._build_payload(
+                    prompt=api_prompt,
+                    images=images,
+                    video_url=video_url,
+                    video_is_base=video_is_base,
+                    keep_original_sound=keep_original_sound,
+                    duration=duration,
+                    aspect_ratio=aspect_ratio,
+                    mode=mode,
+                )
+
+                # Create task
+                task_id = await self._create_task(payload)
+                await self._report_task_id(kwargs, task_id)
 
             logger.info(
                 "kling_o1_task_created",
@@ -346,9 +359,10 @@ class KlingO1Service(BaseVideoProvider):
 
         for attempt in range(max_retries + 1):
             try:
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with self._http_session(url) as session:
                     async with session.post(
                         url,
+                        timeout=timeout,
                         headers=self._get_auth_headers(),
                         json=payload
                     ) as response:
@@ -404,12 +418,69 @@ class KlingO1Service(BaseVideoProvider):
 
         raise Exception("Kling API: max retries exceeded")
 
+    async def submit(self, prompt: str, **kwargs) -> str:
+        """Create a task and return its ID without waiting."""
+        return await self.create_task_only(
+            prompt=prompt,
+            images=kwargs.get("images", []),
+            video_url=kwargs.get("video_url", None),
+            video_is_base=kwargs.get("video_is_base", True),
+            keep_original_sound=kwargs.get("keep_original_sound", "yes"),
+            duration=kwargs.get("duration", 5),
+            aspect_ratio=kwargs.get("aspect_ratio", "1:1"),
+            mode=kwargs.get("mode", "std"),
+        )
+
+    async def check(self, task_id: str, **kwargs) -> VideoTaskStatus:
+        """Fetch the task status once."""
+        url = f"{self.base_url}/v1/videos/omni-video/{task_id}"
+
+        async with self._http_session(url) as session:
+            async with session.get(url, headers=self._get_auth_headers()) as response:
+                if response.status == 401:
+                    # Token expired: regenerate on the next check
+                    self._jwt_token = None
+                    self._jwt_expires_at = 0
+                    return VideoTaskStatus(TASK_PENDING)
+
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(
+                        f"Status check failed: {response.status} - {error_text}"
+                    )
+
+                data = await response.json()
+
+        task_data = data.get("data", {})
+        status = task_data.get("task_status", "unknown")
+        status_msg = task_data.get("task_status_msg", "")
+
+        if status in ["succeed", "completed"]:
+            videos = task_data.get("task_result", {}).get("videos", [])
+            if not videos:
+                return VideoTaskStatus(TASK_FAILED, status, error="URL видео не найден в ответе")
+            return VideoTaskStatus(
+                TASK_SUCCEEDED,
+                status,
+                video_url=videos[0].get("url"),
+                metadata={"provider": "kling_o1", "model": KLING_O1_MODEL, "video_id": videos[0].get("id")}
+            )
+
+        if status in ["failed", "error"]:
+            fail_msg = status_msg or "Неизвестная ошибка"
+            return VideoTaskStatus(
+                TASK_FAILED,
+                status,
+                error=f"Генерация не удалась: {fail_msg}"
+            )
+
+        return VideoTaskStatus(TASK_PENDING, status)
+
     async def _poll_task_status(
         self,
         task_id: str,
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         max_wait_time: int = 1200,
-        poll_interval: int = 5,
     ) -> tuple:
         """
         Poll task status until completion.
@@ -417,82 +488,57 @@ class KlingO1Service(BaseVideoProvider):
         Returns:
             Tuple of (video_url, video_id)
         """
-        url = f"{self.base_url}/v1/videos/omni-video/{task_id}"
         start_time = time.time()
         last_status = None
         retry_count = 0
         max_retries = 4
 
-        async with aiohttp.ClientSession() as session:
-            while True:
-                if time.time() - start_time > max_wait_time:
-                    raise Exception("Таймаут генерации видео (20 минут)")
+        while True:
+            await poll_scheduler.wait_turn("kling_o1", start_time)
 
-                try:
-                    async with session.get(
-                        url,
-                        headers=self._get_auth_headers()
-                    ) as response:
-                        if response.status == 401:
-                            self._jwt_token = None
-                            self._jwt_expires_at = 0
-                            await asyncio.sleep(poll_interval)
-                            continue
+            if time.time() - start_time > max_wait_time:
+                raise Exception("Таймаут генерации видео (20 минут)")
 
-                        if response.status != 200:
-                            error_text = await response.text()
-                            raise Exception(
-                                f"Status check failed: {response.status} - {error_text}"
-                            )
+            try:
+                result = await self.check(task_id)
+            except aiohttp.ClientError as e:
+                retry_count += 1
+                if retry_count >= max_retries:
+                    raise Exception(
+                        f"Сетевая ошибка после {max_retries} попыток: {e}"
+                    )
+                backoff_time = 2 ** retry_count
+                logger.warning(
+                    "kling_o1_poll_retry",
+                    retry=retry_count,
+                    backoff=backoff_time,
+                    error=str(e)
+                )
+                await asyncio.sleep(backoff_time)
+                continue
+
+            status = result.provider_status
+            if status is None:
+                # Auth token refreshed, try again
+                continue
+
+            if status != last_status and progress_callback:
+                if status in ["submitted", "pending", "queued"]:
+                    await progress_callback("⏳ Видео в очереди...")
+                elif status in ["processing", "running"]:
+                    elapsed = int(time.time() - start_time)
+                    await progress_callback(
+                        f"⚙️ Обрабатываю видео Kling O1... ({elapsed}с)"
+                    )
 
-                        data = await response.json()
-                        task_data = data.get("data", {})
-                        status = task_data.get("task_status", "unknown")
-                        status_msg = task_data.get("task_status_msg", "")
-
-                        if status != last_status and progress_callback:
-                            if status in ["submitted", "pending", "queued"]:
-                                await progress_callback("⏳ Видео в очереди...")
-                            elif status in ["processing", "running"]:
-                                elapsed = int(time.time() - start_time)
-                                await progress_callback(
-                                    f"⚙️ Обрабатываю видео Kling O1... ({elapsed}с)"
-                                )
-
-                        last_status = status
-                        retry_count = 0
-
-                        if status in ["succeed", "completed"]:
-                            videos = task_data.get("task_result", {}).get("videos", [])
-                            if videos:
-                                video_url = videos[0].get("url")
-                                video_id = videos[0].get("id")
-                                return (video_url, video_id)
-                            raise Exception("URL видео не найден в ответе")
-
-                        if status in ["failed", "error"]:
-                            fail_msg = status_msg or "Неизвестная ошибка"
-                            raise Exception(
-                                f"Генерация не удалась: {fail_msg}"
-                            )
+            last_status = status
+            retry_count = 0
 
-                except aiohttp.ClientError as e:
-                    retry_count += 1
-                    if retry_count >= max_retries:
-                        raise Exception(
-                            f"Сетевая ошибка после {max_retries} попыток: {e}"
-                        )
-                    backoff_time = 2 ** retry_count
-                    logger.warning(
-                        "kling_o1_poll_retry",
-                        retry=retry_count,
-                        backoff=backoff_time,
-                        error=str(e)
-                    )
-                    await asyncio.sleep(backoff_time)
-                    continue
+            if result.state == TASK_SUCCEEDED:
+                return (result.video_url, result.metadata["video_id"])
 
-                await asyncio.sleep(poll_interval)
+            if result.state == TASK_FAILED:
+                raise Exception(result.error)
 
     async def create_task_only(
         self,
@@ -7,22 +7,33 @@ import time
 import asyncio
 import base64
 import jwt
-from typing import Optional, Callable, Awaitable, List
+from typing import Any, Dict, Optional, Callable, Awaitable, List
 from pathlib import Path
 
 import aiohttp
 
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.poll_scheduler import poll_scheduler
 from app.core.billing_config import (
     get_kling_tokens_cost,
     get_kling_api_model,
     KLING_VERSION_TO_API,
 )
-from app.services.video.base import BaseVideoProvider, VideoResponse
+from app.services.video.base import (
+    BaseVideoProvider,
+    VideoResponse,
+    VideoTaskStatus,
+    TASK_PENDING,
+    TASK_SUCCEEDED,
+    TASK_FAILED,
+)
 
 logger = get_logger(__name__)
 
+# Page size limit of the official task-list endpoint
+KLING_TASK_LIST_MAX_PAGE = 500
+
 
 class KlingService(BaseVideoProvider):
     """
@@ -32,6 +43,8 @@ class KlingService(BaseVideoProvider):
     Uses official Kling API with JWT authentication.
     """
 
+    supports_resume = True
+
     # Official Kling API
     OFFICIAL_API_URL = "https://api-singapore.klingai.com"
     # AI/ML API (alternative provider)
@@ -177,44 +190,19 @@ class KlingService(BaseVideoProvider):
             if progress_callback:
                 await progress_callback("🎬 Начинаю генерацию видео с Kling AI...")
 
-            # Determine which endpoint to use based on number of images
-            if len(images) == 0:
-                # Text-to-video
-                task_id = await self._create_text2video(
-                    prompt=prompt,
-                    model=model,
-                    duration=duration,
-                    aspect_ratio=aspect_ratio
-                )
-                endpoint_type = "text2video"
-            elif len(images) == 1:
-                # Image-to-video (single image)
-                task_id = await self._create_image2video(
-                    prompt=prompt,
-                    model=model,
-                    image_path=images[0],
-                    duration=duration,
-                    aspect_ratio=aspect_ratio
-                )
-                endpoint_type = "image2video"
-            elif len(images) == 2:
-                # Multi-image-to-video (start + end frame)
-                # Uses image_tail on /v1/videos/image2video
-                # Per docs: image_tail requires kling-v2-6 + mode "pro"
-                task_id = await self._create_image2video_with_tail(
-                    prompt=prompt,
-                    image_paths=images,
-                    duration=duration,
-                    aspect_ratio=aspect_ratio
-                )
-                endpoint_type = "image2video"
-            else:
+            if len(images) > 2:
                 return VideoResponse(
                     success=False,
                     error="Максимум 2 изображения поддерживаются",
                     processing_time=time.time() - start_time
                 )
 
+            task_id = kwargs.get("resume_task_id")
+            endpoint_type = self._endpoint_type(images)
+            if not task_id:
+                task_id = await self.submit(prompt, model=model, **kwargs)
+                await self._report_task_id(kwargs, task_id)
+
             logger.info(
                 "kling_generation_created",
                 task_id=task_id,
@@ -231,28 +219,7 @@ class KlingService(BaseVideoProvider):
             )
 
             # Step 2: Add audio to video (video-to-audio)
-            if self.use_official and video_id:
-                if progress_callback:
-                    await progress_callback("🔊 Генерирую звук для видео...")
-
-                try:
-                    audio_video_url = await self._add_audio_to_video(
-                        video_id=video_id,
-                        prompt=prompt,
-                        progress_callback=progress_callback
-                    )
-                    # Use video with audio
-                    video_url = audio_video_url
-                    logger.info("kling_audio_added", video_id=video_id)
-                except Exception as audio_error:
-                    # If audio generation fails, continue with silent video
-                    logger.warning(
-                        "kling_audio_failed",
-                        error=str(audio_error),
-                        video_id=video_id
-                    )
-                    if progress_callback:
-                        await progress_callback("⚠️ Звук не добавлен, продолжаю без аудио...")
+            video_url = await self._with_audio(video_url, video_id, prompt, progress_callback)
 
             # Download video
             if progress_callback:
@@ -318,6 +285,205 @@ class KlingService(BaseVideoProvider):
                 processing_time=time.time() - start_time
             )
 
+    @staticmethod
+    def _endpoint_type(images: list) -> str:
+        """Kling endpoint a task was created on (its status lives there too)."""
+        return "text2video" if len(images) == 0 else "image2video"
+
+    async def _with_audio(
+        self,
+        video_url: str,
+        video_id: Optional[str],
+        prompt: str,
+        progress_callback: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> str:
+        """Return the URL of the video with generated audio, or the silent one."""
+        if not (self.use_official and video_id):
+            return video_url
+
+        if progress_callback:
+            await progress_callback("🔊 Генерирую звук для видео...")
+
+        try:
+            audio_video_url = await self._add_audio_to_video(
+                video_id=video_id,
+                prompt=prompt,
+                progress_callback=progress_callback
+            )
+            logger.info("kling_audio_added", video_id=video_id)
+            return audio_video_url
+        except Exception as audio_error:
+            # If audio generation fails, continue with silent video
+            logger.warning(
+                "kling_audio_failed",
+                error=str(audio_error),
+                video_id=video_id
+            )
+            if progress_callback:
+                await progress_callback("⚠️ Звук не добавлен, продолжаю без аудио...")
+            return video_url
+
+    async def submit(self, prompt: str, **kwargs) -> str:
+        """Create a task on the endpoint matching the image count; return its ID."""
+        if not self.access_key and not self.aiml_api_key:
+            raise Exception("Kling API credentials not configured")
+
+        model = kwargs.get("model", "kling-v2-5-turbo")
+        images = kwargs.get("images", [])
+        duration = kwargs.get("duration", 5)
+        aspect_ratio = kwargs.get("aspect_ratio", "1:1")
+
+        if len(images) == 0:
+            # Text-to-video
+            return await self._create_text2video(
+                prompt=prompt,
+                model=model,
+                duration=duration,
+                aspect_ratio=aspect_ratio
+            )
+        if len(images) == 1:
+            # Image-to-video (single image)
+            return await self._create_image2video(
+                prompt=prompt,
+                model=model,
+                image_path=images[0],
+                duration=duration,
+                aspect_ratio=aspect_ratio
+            )
+        if len(images) == 2:
+            # Multi-image-to-video (start + end frame)
+            # Uses image_tail on /v1/videos/image2video
+            # Per docs: image_tail requires kling-v2-6 + mode "pro"
+            return await self._create_image2video_with_tail(
+                prompt=prompt,
+                image_paths=images,
+                duration=duration,
+                aspect_ratio=aspect_ratio
+            )
+        raise Exception("Максимум 2 изображения поддерживаются")
+
+    async def check(self, task_id: str, **kwargs) -> VideoTaskStatus:
+        """Fetch the task status once (``endpoint_type`` or ``images`` selects the endpoint)."""
+        if self.use_official:
+            endpoint_type = kwargs.get("endpoint_type") or self._endpoint_type(kwargs.get("images", []))
+            url = f"{self.base_url}/v1/videos/{endpoint_type}/{task_id}"
+        else:
+            url = f"{self.base_url}/generate/video/kling-ai/v1/generations/{task_id}"
+
+        async with self._http_session(url) as session:
+            async with session.get(url, headers=self._get_auth_headers()) as response:
+                if response.status == 401:
+                    # Token expired: regenerate on the next check
+                    self._jwt_token = None
+                    self._jwt_expires_at = 0
+                    return VideoTaskStatus(TASK_PENDING)
+
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Status check failed: {response.status} - {error_text}")
+
+                data = await response.json()
+
+        return self._parse_task(data.get("data", {}) if self.use_official else data)
+
+    async def check_many(self, tasks: Dict[str, Dict[str, Any]]) -> Dict[str, VideoTaskStatus]:
+        """
+        Fetch several task states with one task-list request per endpoint.
+
+        Only the official API has a task list; tasks that aren't in the most
+        recent page are left out and get a single check.
+        """
+        if not self.use_official:
+            return {}
+
+        by_endpoint: Dict[str, List[str]] = {}
+        for task_id, params in tasks.items():
+            endpoint_type = params.get("endpoint_type") or self._endpoint_type(params.get("images", []))
+            by_endpoint.setdefault(endpoint_type, []).append(task_id)
+
+        statuses: Dict[str, VideoTaskStatus] = {}
+        async with self._http_session(self.base_url) as session:
+            for endpoint_type, task_ids in by_endpoint.items():
+                url = f"{self.base_url}/v1/videos/{endpoint_type}"
+                # Newer tasks of this account come first; leave headroom for them
+                params = {"pageNum": 1, "pageSize": min(KLING_TASK_LIST_MAX_PAGE, len(task_ids) * 2 + 30)}
+                async with session.get(url, headers=self._get_auth_headers(), params=params) as response:
+                    if response.status == 401:
+                        self._jwt_token = None
+                        self._jwt_expires_at = 0
+                        continue
+                    if response.status != 200:
+                        logger.warning("kling_task_list_failed", status=response.status)
+                        continue
+                    data = await response.json()
+
+                wanted = set(task_ids)
+                for task_data in data.get("data") or []:
+                    task_id = task_data.get("task_id")
+                    if task_id in wanted:
+                        statuses[task_id] = self._parse_task(task_data)
+
+        return statuses
+
+    def _parse_task(self, task_data: Dict[str, Any]) -> VideoTaskStatus:
+        """Map a task object (official ``data`` or legacy response) to a status."""
+        if self.use_official:
+            status = task_data.get("task_status", "unknown")
+            status_msg = task_data.get("task_status_msg", "")
+        else:
+            status = task_data.get("status", "unknown")
+            status_msg = task_data.get("error", {}).get("message", "")
+
+        if status in ["succeed", "completed", "success", "succeeded"]:
+            video_url = video_id = None
+            if self.use_official:
+                videos = task_data.get("task_result", {}).get("videos", [])
+                if videos:
+                    video_url = videos[0].get("url")
+                    video_id = videos[0].get("id")
+            else:
+                video_url = (
+                    task_data.get("video_url") or
+                    task_data.get("url") or
+                    task_data.get("output", {}).get("video_url") or
+                    task_data.get("result", {}).get("video_url")
+                )
+            if not video_url:
+                return VideoTaskStatus(TASK_FAILED, status, error="URL видео не найден в ответе")
+            return VideoTaskStatus(
+                TASK_SUCCEEDED,
+                status,
+                video_url=video_url,
+                metadata={"provider": "kling", "video_id": video_id}
+            )
+
+        if status in ["failed", "error"]:
+            error_msg = self._translate_kling_error(status_msg) if status_msg else "Неизвестная ошибка"
+            return VideoTaskStatus(TASK_FAILED, status, error=f"Генерация не удалась: {error_msg}")
+
+        return VideoTaskStatus(TASK_PENDING, status)
+
+    async def fetch_result(
+        self,
+        task_id: str,
+        status: VideoTaskStatus,
+        progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
+        **kwargs
+    ) -> VideoResponse:
+        """Add audio to a finished video (official API), then download it."""
+        video_url = await self._with_audio(
+            status.video_url,
+            status.metadata.get("video_id"),
+            kwargs.get("prompt", ""),
+            progress_callback
+        )
+        video_path = await self._download_file(video_url, self._generate_filename("mp4"))
+        return VideoResponse(
+            success=True,
+            video_path=video_path,
+            metadata={"task_id": task_id, **status.metadata}
+        )
+
     async def _create_text2video(
         self,
         prompt: str,
@@ -338,7 +504,7 @@ class KlingService(BaseVideoProvider):
             "aspect_ratio": aspect_ratio,
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(
                 url,
                 headers=self._get_auth_headers(),
@@ -377,7 +543,7 @@ class KlingService(BaseVideoProvider):
             "aspect_ratio": aspect_ratio,
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(
                 url,
                 headers=self._get_auth_headers(),
@@ -429,7 +595,7 @@ class KlingService(BaseVideoProvider):
             images_count=len(image_paths)
         )
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(
                 url,
                 headers=self._get_auth_headers(),
@@ -462,7 +628,6 @@ class KlingService(BaseVideoProvider):
         endpoint_type: str,
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         max_wait_time: int = 1200,  # 20 minutes
-        poll_interval: int = 5  # 5 seconds
     ) -> tuple:
         """
         Poll generation status until complete.
@@ -472,107 +637,59 @@ class KlingService(BaseVideoProvider):
             endpoint_type: Type of endpoint (text2video or image2video)
             progress_callback: Optional callback for status updates
             max_wait_time: Maximum wait time in seconds
-            poll_interval: Poll interval in seconds
 
         Returns:
             Tuple of (video_url, video_id)
         """
-        if self.use_official:
-            url = f"{self.base_url}/v1/videos/{endpoint_type}/{task_id}"
-        else:
-            url = f"{self.base_url}/generate/video/kling-ai/v1/generations/{task_id}"
-
         start_time = time.time()
         last_status = None
         retry_count = 0
         max_retries = 4
 
-        async with aiohttp.ClientSession() as session:
-            while True:
-                # Check timeout
-                if time.time() - start_time > max_wait_time:
-                    raise Exception("Таймаут генерации видео (20 минут)")
-
-                try:
-                    async with session.get(
-                        url,
-                        headers=self._get_auth_headers()
-                    ) as response:
-                        if response.status == 401:
-                            # Token expired, regenerate
-                            self._jwt_token = None
-                            self._jwt_expires_at = 0
-                            await asyncio.sleep(poll_interval)
-                            continue
-
-                        if response.status != 200:
-                            error_text = await response.text()
-                            raise Exception(f"Status check failed: {response.status} - {error_text}")
-
-                        data = await response.json()
-
-                        # Extract status based on API type
-                        if self.use_official:
-                            task_data = data.get("data", {})
-                            status = task_data.get("task_status", "unknown")
-                            status_msg = task_data.get("task_status_msg", "")
-                        else:
-                            status = data.get("status", "unknown")
-                            status_msg = data.get("error", {}).get("message", "")
-
-                        # Update user if status changed
-                        if status != last_status and progress_callback:
-                            if status in ["submitted", "pending", "queued"]:
-                                await progress_callback("⏳ Видео в очереди...")
-                            elif status in ["processing", "running"]:
-                                await progress_callback("⚙️ Генерирую видео...")
-
-                        last_status = status
-                        retry_count = 0  # Reset retry count on successful response
-
-                        # Check if complete
-                        if status in ["succeed", "completed", "success", "succeeded"]:
-                            # Get video URL and ID
-                            if self.use_official:
-                                videos = task_data.get("task_result", {}).get("videos", [])
-                                if videos:
-                                    video_url = videos[0].get("url")
-                                    video_id = videos[0].get("id")
-                                    return (video_url, video_id)
-                            else:
-                                video_url = (
-                                    data.get("video_url") or
-                                    data.get("url") or
-                                    data.get("output", {}).get("video_url") or
-                                    data.get("result", {}).get("video_url")
-                                )
-                                if video_url:
-                                    return (video_url, None)
-
-                            raise Exception("URL видео не найден в ответе")
-
-                        # Check if failed
-                        if status in ["failed", "error"]:
-                            error_msg = self._translate_kling_error(status_msg) if status_msg else "Неизвестная ошибка"
-                            raise Exception(f"Генерация не удалась: {error_msg}")
-
-                except aiohttp.ClientError as e:
-                    retry_count += 1
-                    if retry_count >= max_retries:
-                        raise Exception(f"Сетевая ошибка после {max_retries} попыток: {e}")
-                    # Exponential backoff: 2s, 4s, 8s, 16s
-                    backoff_time = 2 ** retry_count
-                    logger.warning(
-                        "kling_poll_retry",
-                        retry=retry_count,
-                        backoff=backoff_time,
-                        error=str(e)
-                    )
-                    await asyncio.sleep(backoff_time)
-                    continue
-
-                # Wait before next poll
-                await asyncio.sleep(poll_interval)
+        while True:
+            await poll_scheduler.wait_turn("kling", start_time)
+
+            # Check timeout
+            if time.time() - start_time > max_wait_time:
+                raise Exception("Таймаут генерации видео (20 минут)")
+
+            try:
+                result = await self.check(task_id, endpoint_type=endpoint_type)
+            except aiohttp.ClientError as e:
+                retry_count += 1
+                if retry_count >= max_retries:
+                    raise Exception(f"Сетевая ошибка после {max_retries} попыток: {e}")
+                # Exponential backoff: 2s, 4s, 8s, 16s
+                backoff_time = 2 ** retry_count
+                logger.warning(
+                    "kling_poll_retry",
+                    retry=retry_count,
+                    backoff=backoff_time,
+                    error=str(e)
+                )
+                await asyncio.sleep(backoff_time)
+                continue
+
+            status = result.provider_status
+            if status is None:
+                # Token expired and was regenerated, try again
+                continue
+
+            # Update user if status changed
+            if status != last_status and progress_callback:
+                if status in ["submitted", "pending", "queued"]:
+                    await progress_callback("⏳ Видео в очереди...")
+                elif status in ["processing", "running"]:
+                    await progress_callback("⚙️ Генерирую видео...")
+
+            last_status = status
+            retry_count = 0  # Reset retry count on successful response
+
+            if result.state == TASK_SUCCEEDED:
+                return (result.video_url, result.metadata["video_id"])
+
+            if result.state == TASK_FAILED:
+                raise Exception(result.error)
 
     async def _add_audio_to_video(
         self,
@@ -607,7 +724,7 @@ class KlingService(BaseVideoProvider):
             # "sound_effect_prompt": prompt[:200] if prompt else None,
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(
                 url,
                 headers=self._get_auth_headers(),
@@ -626,7 +743,7 @@ class KlingService(BaseVideoProvider):
         poll_url = f"{self.base_url}/v1/audio/video-to-audio/{audio_task_id}"
         start_time = time.time()
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(poll_url) as session:
             while True:
                 if time.time() - start_time > max_wait_time:
                     raise Exception("Таймаут генерации аудио")
@@ -870,7 +987,7 @@ class KlingService(BaseVideoProvider):
         if prompt:
             payload["prompt"] = prompt[:2500]
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(
                 url,
                 headers=self._get_auth_headers(),
@@ -896,7 +1013,7 @@ class KlingService(BaseVideoProvider):
         start_time = time.time()
         last_status = None
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             while True:
                 if time.time() - start_time > max_wait_time:
                     raise Exception("Таймаут генерации Motion Control видео (20 минут)")
@@ -2,14 +2,19 @@
 Luma Labs (Dream Machine) video generation service.
 """
 import time
-import asyncio
 from typing import Optional, Callable, Awaitable
 
-import aiohttp
-
 from app.core.config import settings
 from app.core.logger import get_logger
-from app.services.video.base import BaseVideoProvider, VideoResponse
+from app.core.poll_scheduler import poll_scheduler
+from app.services.video.base import (
+    BaseVideoProvider,
+    VideoResponse,
+    VideoTaskStatus,
+    TASK_PENDING,
+    TASK_SUCCEEDED,
+    TASK_FAILED,
+)
 
 logger = get_logger(__name__)
 
@@ -17,6 +22,8 @@ logger = get_logger(__name__)
 class LumaService(BaseVideoProvider):
     """Luma Labs API integration for video generation."""
 
+    supports_resume = True
+
     BASE_URL = "https://api.lumalabs.ai/dream-machine/v1"
 
     def __init__(self, api_key: Optional[str] = None):
@@ -55,8 +62,11 @@ class LumaService(BaseVideoProvider):
             if progress_callback:
                 await progress_callback("🎬 Начинаю генерацию видео с Luma...")
 
-            # Step 1: Create generation request
-            generation_id = await self._create_generation(prompt, **kwargs)
+            # Step 1: Create generation request (unless resuming one)
+            generation_id = kwargs.get("resume_task_id")
+            if not generation_id:
+                generation_id = await self._create_generation(prompt, **kwargs)
+                await self._report_task_id(kwargs, generation_id)
             logger.info(
                 "luma_generation_created",
                 generation_id=generation_id
@@ -132,7 +142,7 @@ class LumaService(BaseVideoProvider):
             # keyframes for image-to-video
             payload["keyframes"] = kwargs["keyframes"]
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status not in [200, 201]:
                     error_text = await response.text()
@@ -141,12 +151,50 @@ class LumaService(BaseVideoProvider):
                 data = await response.json()
                 return data["id"]
 
+    async def submit(self, prompt: str, **kwargs) -> str:
+        """Create a generation and return its ID without waiting."""
+        if not self.api_key:
+            raise Exception("Luma API key not configured")
+        return await self._create_generation(prompt, **kwargs)
+
+    async def check(self, task_id: str, **kwargs) -> VideoTaskStatus:
+        """Fetch the generation state once."""
+        url = f"{self.BASE_URL}/generations/{task_id}"
+        headers = {
+            "Authorization": f"Bearer {self.api_key}"
+        }
+
+        async with self._http_session(url) as session:
+            async with session.get(url, headers=headers) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Status check failed: {response.status} - {error_text}")
+                data = await response.json()
+
+        status = data.get("state", "unknown")
+
+        if status == "completed":
+            video_url = data.get("assets", {}).get("video")
+            if not video_url:
+                return VideoTaskStatus(TASK_FAILED, status, error="Video URL not found in response")
+            return VideoTaskStatus(
+                TASK_SUCCEEDED,
+                status,
+                video_url=video_url,
+                metadata={"provider": "luma", "generation_id": task_id}
+            )
+
+        if status == "failed":
+            error = data.get("failure_reason", "Unknown error")
+            return VideoTaskStatus(TASK_FAILED, status, error=f"Generation failed: {error}")
+
+        return VideoTaskStatus(TASK_PENDING, status)
+
     async def _poll_generation_status(
         self,
         generation_id: str,
         progress_callback: Optional[Callable[[str], Awaitable[None]]] = None,
         max_wait_time: int = 600,  # 10 minutes
-        poll_interval: int = 5  # 5 seconds
     ) -> str:
         """
         Poll generation status until complete.
@@ -154,52 +202,32 @@ class LumaService(BaseVideoProvider):
         Returns:
             URL of the generated video
         """
-        url = f"{self.BASE_URL}/generations/{generation_id}"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
         start_time = time.time()
         last_status = None
 
-        async with aiohttp.ClientSession() as session:
-            while True:
-                # Check timeout
-                if time.time() - start_time > max_wait_time:
-                    raise Exception("Video generation timeout")
-
-                # Poll status
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(f"Status check failed: {response.status} - {error_text}")
-
-                    data = await response.json()
-                    status = data.get("state", "unknown")
-
-                    # Update user if status changed
-                    if status != last_status and progress_callback:
-                        if status == "queued":
-                            await progress_callback("⏳ В очереди на генерацию...")
-                        elif status == "processing":
-                            await progress_callback("⚙️ Обрабатываю видео...")
-                        elif status == "dreaming":
-                            await progress_callback("💭 Dream Machine создаёт видео...")
-
-                    last_status = status
-
-                    # Check if complete
-                    if status == "completed":
-                        # Get video URL from assets
-                        video_url = data.get("assets", {}).get("video")
-                        if not video_url:
-                            raise Exception("Video URL not found in response")
-                        return video_url
-
-                    # Check if failed
-                    if status == "failed":
-                        error = data.get("failure_reason", "Unknown error")
-                        raise Exception(f"Generation failed: {error}")
-
-                    # Wait before next poll
-                    await asyncio.sleep(poll_interval)
+        while True:
+            await poll_scheduler.wait_turn("luma", start_time)
+
+            # Check timeout
+            if time.time() - start_time > max_wait_time:
+                raise Exception("Video generation timeout")
+
+            result = await self.check(generation_id)
+            status = result.provider_status
+
+            # Update user if status changed
+            if status != last_status and progress_callback:
+                if status == "queued":
+                    await progress_callback("⏳ В очереди на генерацию...")
+                elif status == "processing":
+                    await progress_callback("⚙️ Обрабатываю видео...")
+                elif status == "dreaming":
+                    await progress_callback("💭 Dream Machine создаёт видео...")
+
+            last_status = status
+
+            if result.state == TASK_SUCCEEDED:
+                return result.video_url
+
+            if result.state == TASK_FAILED:
+                raise Exception(result.error)
@@ -5,8 +5,6 @@ import time
 import asyncio
 from typing import Optional, Callable, Awaitable, Dict, Any
 
-import aiohttp
-
 from app.core.config import settings
 from app.core.logger import get_logger
 from app.services.video.base import BaseVideoProvider, VideoResponse
@@ -154,7 +152,7 @@ class ReplicateService(BaseVideoProvider):
             "input": input_params
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             async with session.post(url, headers=headers, json=payload) as response:
                 if response.status not in [200, 201]:
                     error_text = await response.text()
@@ -210,7 +208,7 @@ class ReplicateService(BaseVideoProvider):
         start_time = time.time()
         last_status = None
 
-        async with aiohttp.ClientSession() as session:
+        async with self._http_session(url) as session:
             while True:
                 # Check timeout
                 if time.time() - start_time > max_wait_time:
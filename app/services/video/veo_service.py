@@ -10,6 +10,7 @@ import asyncio
 
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.poll_scheduler import poll_scheduler
 from app.core.billing_config import get_video_model_billing
 from app.services.video.base import BaseVideoProvider, VideoResponse
 from app.services.gemini import gemini_execution_layer
@@ -371,13 +372,12 @@ class VeoService(BaseVideoProvider):
             # Wait for the video to be generated (polling)
             max_wait_time = 360  # 6 minutes max
             start = time.time()
-            poll_interval = 10
 
             while not operation.done:
                 if time.time() - start > max_wait_time:
                     raise TimeoutError("Video generation timed out after 6 minutes")
 
-                await asyncio.sleep(poll_interval)
+                await poll_scheduler.wait_turn("veo", start)
                 # Refresh operation status (sync call, run in thread)
                 operation = await asyncio.to_thread(
                     self.client.operations.get, operation
@@ -5,6 +5,7 @@ import asyncio
 from typing import Optional
 from datetime import datetime, timezone, timedelta
 
+import aiohttp
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest
 
@@ -12,11 +13,28 @@ from app.database.database import async_session_maker
 from app.database.repositories.video_job import VideoJobRepository
 from app.database.models.video_job import VideoGenerationJob
 from app.services.video import KlingService, VeoService, LumaService, HailuoService, Kling3Service, KlingO1Service, GrokVideoService
+from app.services.video.base import VideoResponse, VideoTaskStatus, TASK_PENDING, TASK_SUCCEEDED, TASK_FAILED
 from app.services.logging import log_ai_operation_background, ai_logger
 from app.core.logger import get_logger
+from app.core.poll_scheduler import next_poll_delay
 
 logger = get_logger(__name__)
 
+# How long a claimed job belongs to its worker without a heartbeat. Workers
+# renew leases every VIDEO_JOB_HEARTBEAT_SECONDS, so a crashed worker's jobs
+# are picked up again within about two minutes.
+VIDEO_JOB_LEASE_SECONDS = 120
+VIDEO_JOB_HEARTBEAT_SECONDS = 30
+
+# Jobs left in "processing" by workers that predate leases are considered
+# abandoned after the old 20-minute generation timeout plus a margin.
+UNLEASED_PROCESSING_GRACE_SECONDS = 1500
+
+# Submitted generations are checked along the provider's poll curve (see
+# app.core.poll_scheduler); after VIDEO_JOB_ATTEMPT_SECONDS the user is told
+# it takes longer. A job fails after max_attempts such periods.
+VIDEO_JOB_ATTEMPT_SECONDS = 1200
+
 
 class VideoJobService:
     """Service for managing async video generation jobs."""
@@ -137,20 +155,41 @@ class VideoJobService:
 
         return service_class()
 
-    async def _refund_tokens(self, job: VideoGenerationJob) -> None:
-        """Refund tokens to user when a video job fails."""
+    async def refund_tokens(self, job: VideoGenerationJob) -> bool:
+        """
+        Refund tokens to user when a video job fails.
+
+        Also returns the unlimited-plan usage counted for the job at submit time.
+
+        Returns:
+            True if tokens were refunded
+        """
         if job.tokens_cost <= 0:
-            return
+            return False
         try:
             from app.services.subscription.subscription_service import SubscriptionService
             sub_service = SubscriptionService(self.session)
-            await sub_service.rollback_tokens(job.user_id, job.tokens_cost)
+            # The linked ai_request carries the model ID used for unlimited limits
+            limits_model_id = None
+            if job.ai_request_id:
+                from sqlalchemy import select
+                from app.database.models.ai_request import AIRequest
+                limits_model_id = await self.session.scalar(
+                    select(AIRequest.ai_model).where(AIRequest.id == job.ai_request_id)
+                )
+            await sub_service.rollback_tokens(
+                job.user_id,
+                job.tokens_cost,
+                model_id=limits_model_id,
+                charged_at=job.created_at,
+            )
             logger.info(
                 "video_job_tokens_refunded",
                 job_id=job.id,
                 user_id=job.user_id,
                 tokens=job.tokens_cost,
             )
+            return True
         except Exception as e:
             logger.error(
                 "video_job_token_refund_failed",
@@ -159,6 +198,7 @@ class VideoJobService:
                 tokens=job.tokens_cost,
                 error=str(e),
             )
+            return False
 
     async def _update_ai_request(
         self,
@@ -232,9 +272,41 @@ class VideoJobService:
                 error=str(e)
             )
 
-    async def process_job(self, job: VideoGenerationJob, bot: Bot) -> bool:
+    @staticmethod
+    def _generation_params(job: VideoGenerationJob) -> dict:
+        """Provider parameters of a job (same for submit, check and generate)."""
+        input_data = job.input_data
+        return dict(
+            prompt=job.prompt,
+            model=job.model_id,
+            images=input_data.get("images", []),
+            duration=input_data.get("duration", 5),
+            aspect_ratio=input_data.get("aspect_ratio", "1:1"),
+            version=input_data.get("version", "2.5"),
+            mode=input_data.get("mode", "std"),
+            video_url=input_data.get("video_url", None),
+            video_is_base=input_data.get("video_is_base", True),
+            keep_original_sound=input_data.get("keep_original_sound", "yes"),
+        )
+
+    async def process_job(
+        self,
+        job: VideoGenerationJob,
+        bot: Bot,
+        status: Optional[VideoTaskStatus] = None
+    ) -> bool:
         """
-        Process a single video generation job.
+        Run one step of a video generation job.
+
+        For providers with submit()/check() a step is short: a pending job is
+        submitted and scheduled for its first status check; a submitted job
+        gets one status check and is either rescheduled, delivered or failed.
+        Other providers are awaited in-process for up to 20 minutes.
+
+        Args:
+            job: Job to process
+            bot: Bot used for delivery and progress messages
+            status: Task status already fetched by a batched check, if any
 
         Returns:
             True if job completed successfully, False otherwise
@@ -242,6 +314,21 @@ class VideoJobService:
         logger.info("processing_video_job", job_id=job.id, provider=job.provider, user_id=job.user_id)
 
         try:
+            service = self._get_video_service(job.provider)
+            generation_params = self._generation_params(job)
+
+            if not job.task_id:
+                # Identical generation delivered recently: send it again
+                cached = await self._cached_generation(job, generation_params)
+                if cached.hit:
+                    return await self._complete_job(job, bot, cached.video_response(), cached)
+
+            if service.supports_resume:
+                if job.task_id:
+                    return await self._check_job(job, bot, service, generation_params, status)
+                await self._submit_job(job, service, generation_params)
+                return False
+
             # Update status to processing
             await self.repository.update_job_status(
                 job.id,
@@ -249,36 +336,11 @@ class VideoJobService:
                 started_processing_at=datetime.now(timezone.utc)
             )
 
-            # Get video service
-            service = self._get_video_service(job.provider)
-
-            # Extract generation parameters
-            input_data = job.input_data
-            images = input_data.get("images", [])
-            duration = input_data.get("duration", 5)
-            aspect_ratio = input_data.get("aspect_ratio", "1:1")
-            version = input_data.get("version", "2.5")
-            mode = input_data.get("mode", "std")
-            video_url = input_data.get("video_url", None)
-            video_is_base = input_data.get("video_is_base", True)
-            keep_original_sound = input_data.get("keep_original_sound", "yes")
-
             # Attempt generation with 20-minute timeout
             try:
                 result = await asyncio.wait_for(
-                    service.generate_video(
-                        prompt=job.prompt,
-                        model=job.model_id,
-                        images=images,
-                        duration=duration,
-                        aspect_ratio=aspect_ratio,
-                        version=version,
-                        mode=mode,
-                        video_url=video_url,
-                        video_is_base=video_is_base,
-                        keep_original_sound=keep_original_sound,
-                    ),
-                    timeout=1200  # 20 minutes
+                    service.generate_video(**generation_params),
+                    timeout=VIDEO_JOB_ATTEMPT_SECONDS
                 )
             except asyncio.TimeoutError:
                 # Timeout - mark as timeout_waiting for later re-check
@@ -290,173 +352,14 @@ class VideoJobService:
                     error_message="Initial generation timed out, will retry"
                 )
                 await self.repository.increment_attempt(job.id)
-
-                # Send user message about waiting
-                if job.progress_message_id:
-                    try:
-                        await bot.edit_message_text(
-                            chat_id=job.chat_id,
-                            message_id=job.progress_message_id,
-                            text="⏳ Видео всё ещё генерируется... Мы отправим его вам, когда оно будет готово!"
-                        )
-                    except Exception as e:
-                        logger.warning("failed_to_update_progress_message", error=str(e))
-
+                await self._notify_still_generating(job, bot)
                 return False
 
-            # Check result
             if result.success:
-                # Update job as completed
-                updated_job = await self.repository.update_job_status(
-                    job.id,
-                    "completed",
-                    video_path=result.video_path,
-                    task_id=result.metadata.get("task_id") if result.metadata else None
-                )
+                return await self._complete_job(job, bot, result)
 
-                # Update linked ai_request (critical for cost tracking)
-                await self._update_ai_request(
-                    job=updated_job or job,
-                    status="completed",
-                    video_path=result.video_path
-                )
-
-                # Send video to user with "Create more" button
-                from aiogram.types import FSInputFile
-                from app.bot.utils.notifications import create_action_keyboard, MODEL_ACTIONS
-                import os
-
-                # Build caption with prompt
-                prompt_display = (job.prompt[:100] + "...") if job.prompt and len(job.prompt) > 100 else (job.prompt or "без промпта")
-                caption = f"✅ Ваше видео готово!\n\n📝 Промпт: {prompt_display}"
-
-                # Get action keyboard for this provider
-                provider_key = job.provider or "kling"
-                action_config = MODEL_ACTIONS.get(provider_key, MODEL_ACTIONS.get("kling"))
-                action_keyboard = create_action_keyboard(
-                    action_text=action_config["text"],
-                    action_callback=action_config["callback"],
-                    file_path=result.video_path,
-                    file_type="video"
-                )
-                reply_markup = action_keyboard.as_markup()
-
-                # Send with retry and large-file fallback
-                file_size = os.path.getsize(result.video_path)
-                max_telegram_size = 49 * 1024 * 1024  # 49MB safety margin
-                sent = False
-
-                if file_size > max_telegram_size:
-                    # Too large for video, send as document
-                    logger.warning("video_job_file_too_large", size=file_size, job_id=job.id)
-                    try:
-                        video_file = FSInputFile(result.video_path)
-                        await bot.send_document(
-                            chat_id=job.chat_id, document=video_file,
-                            caption=caption, reply_markup=reply_markup,
-                        )
-                        sent = True
-                    except Exception as e:
-                        logger.error("video_job_send_document_failed", error=str(e), job_id=job.id)
-                else:
-                    for attempt in range(3):
-                        try:
-                            video_file = FSInputFile(result.video_path)
-                            await bot.send_video(
-                                chat_id=job.chat_id, video=video_file,
-                                caption=caption, reply_markup=reply_markup,
-                            )
-                            sent = True
-                            break
-                        except Exception as e:
-                            logger.warning("video_job_send_retry", attempt=attempt+1, error=str(e), job_id=job.id)
-                            if attempt < 2:
-                                await asyncio.sleep(2 * (attempt + 1))
-
-                    if not sent:
-                        # Fallback: try as document
-                        try:
-                            video_file = FSInputFile(result.video_path)
-                            await bot.send_document(
-                                chat_id=job.chat_id, document=video_file,
-                                caption=caption, reply_markup=reply_markup,
-                            )
-                            sent = True
-                        except Exception as e:
-                            logger.error("video_job_send_all_failed", error=str(e), job_id=job.id)
-
-                if not sent:
-                    # Last resort: send download link
-                    size_mb = file_size // (1024 * 1024)
-                    try:
-                        from app.api.file_download import create_download_token, get_download_url
-                        token = create_download_token(result.video_path)
-                        download_url = get_download_url(token)
-                        await bot.send_message(
-                            chat_id=job.chat_id,
-                            text=(
-                                f"{caption}\n\n"
-                                f"📥 Видео ({size_mb} МБ) превышает лимит Telegram.\n"
-                                f"Скачайте по ссылке (действует 1 час):\n{download_url}"
-                            ),
-                            reply_markup=reply_markup,
-                            parse_mode=None,
-                        )
-                    except Exception as link_e:
-                        logger.error("video_job_download_link_failed", error=str(link_e), job_id=job.id)
-                        await bot.send_message(
-                            chat_id=job.chat_id,
-                            text=f"{caption}\n\n⚠️ Не удалось отправить видео ({size_mb} МБ). Файл превышает лимит Telegram.",
-                            reply_markup=reply_markup,
-                            parse_mode=None,
-                        )
-
-                # Delete progress message
-                if job.progress_message_id:
-                    try:
-                        await bot.delete_message(chat_id=job.chat_id, message_id=job.progress_message_id)
-                    except TelegramBadRequest as e:
-                        # Ignore expected errors when message can't be deleted
-                        if "message can't be deleted" not in str(e) and "message to delete not found" not in str(e):
-                            logger.warning("video_job_delete_message_failed", error=str(e), job_id=job.id)
-                    except Exception as e:
-                        logger.warning("video_job_delete_message_error", error=str(e), job_id=job.id)
-
-                logger.info("video_job_completed", job_id=job.id, provider=job.provider)
-                return True
-
-            else:
-                # Failed
-                error_msg = result.error or "Unknown error"
-                updated_job = await self.repository.update_job_status(
-                    job.id,
-                    "failed",
-                    error_message=error_msg
-                )
-
-                # Update linked ai_request (mark as failed)
-                await self._update_ai_request(
-                    job=updated_job or job,
-                    status="failed",
-                    error_message=error_msg
-                )
-
-                # Refund tokens
-                await self._refund_tokens(updated_job or job)
-
-                # Notify user
-                if job.progress_message_id:
-                    try:
-                        await bot.edit_message_text(
-                            chat_id=job.chat_id,
-                            message_id=job.progress_message_id,
-                            text=f"❌ Ошибка генерации видео:\n{error_msg}\n\nТокены возвращены на ваш счёт."
-                        )
-                    except Exception:
-                        pass
-
-                logger.error("video_job_failed", job_id=job.id, provider=job.provider, error=error_msg)
-                return False
+            await self._fail_job(job, bot, result.error or "Unknown error")
+            return False
 
         except Exception as e:
             logger.error("video_job_processing_exception", job_id=job.id, error=str(e))
@@ -475,7 +378,7 @@ class VideoJobService:
             )
 
             # Refund tokens
-            await self._refund_tokens(updated_job or job)
+            await self.refund_tokens(updated_job or job)
 
             # Notify user
             if job.progress_message_id:
@@ -490,10 +393,308 @@ class VideoJobService:
 
             return False
 
+    @staticmethod
+    async def _cached_generation(job: VideoGenerationJob, generation_params: Optional[dict] = None):
+        """Generation cache lookup for a job's request (see app.bot.utils.generation_cache)."""
+        from app.bot.utils.generation_cache import CachedGeneration
+
+        params = dict(generation_params or VideoJobService._generation_params(job))
+        prompt = params.pop("prompt")
+        model = params.pop("model")
+        inputs = [*params.pop("images"), params.pop("video_url")]
+        return await CachedGeneration.lookup(job.user_id, job.provider, model, prompt, inputs, **params)
+
+    async def _submit_job(self, job: VideoGenerationJob, service, generation_params: dict) -> None:
+        """Submit a pending job to its provider and schedule the first check."""
+        await self.repository.update_job_status(
+            job.id,
+            "processing",
+            started_processing_at=datetime.now(timezone.utc)
+        )
+
+        task_id = await service.submit(**generation_params)
+
+        # The task ID is persisted before the job is released, so any worker
+        # can check (and deliver) it from here on.
+        await self.repository.schedule_poll(job.id, next_poll_delay(job.provider, 0), task_id=task_id)
+        logger.info("video_job_submitted", job_id=job.id, provider=job.provider, task_id=task_id)
+
+    async def _check_job(
+        self,
+        job: VideoGenerationJob,
+        bot: Bot,
+        service,
+        generation_params: dict,
+        status: Optional[VideoTaskStatus] = None
+    ) -> bool:
+        """Check a submitted job once; reschedule, deliver or fail it."""
+        if status is None:
+            try:
+                status = await service.check(job.task_id, **generation_params)
+            except aiohttp.ClientError as e:
+                # Network hiccup: try again on the next check
+                logger.warning("video_job_check_network_error", job_id=job.id, task_id=job.task_id, error=str(e))
+                status = VideoTaskStatus(TASK_PENDING)
+
+        if status.state == TASK_SUCCEEDED:
+            result = await service.fetch_result(job.task_id, status, **generation_params)
+            return await self._complete_job(job, bot, result)
+
+        if status.state == TASK_FAILED:
+            await self._fail_job(job, bot, status.error or "Unknown error")
+            return False
+
+        started_at = job.started_processing_at or job.created_at
+        elapsed = (datetime.now(timezone.utc) - started_at).total_seconds()
+
+        if elapsed > VIDEO_JOB_ATTEMPT_SECONDS * job.max_attempts:
+            logger.warning("video_job_poll_deadline_exceeded", job_id=job.id, task_id=job.task_id)
+            await self._fail_job(job, bot, "Таймаут генерации видео")
+            return False
+
+        if elapsed > VIDEO_JOB_ATTEMPT_SECONDS and not job.is_timeout_waiting:
+            # Slow generation: tell the user once
+            logger.info("video_job_timeout", job_id=job.id, provider=job.provider)
+            await self.repository.schedule_poll(
+                job.id,
+                next_poll_delay(job.provider, elapsed),
+                status="timeout_waiting",
+                error_message="Initial generation timed out, will retry"
+            )
+            await self._notify_still_generating(job, bot)
+            return False
+
+        await self.repository.schedule_poll(job.id, next_poll_delay(job.provider, elapsed))
+        return False
+
+    async def _notify_still_generating(self, job: VideoGenerationJob, bot: Bot) -> None:
+        """Tell the user a slow generation is still running."""
+        if not job.progress_message_id:
+            return
+        try:
+            await bot.edit_message_text(
+                chat_id=job.chat_id,
+                message_id=job.progress_message_id,
+                text="⏳ Видео всё ещё генерируется... Мы отправим его вам, когда оно будет готово!"
+            )
+        except Exception as e:
+            logger.warning("failed_to_update_progress_message", error=str(e))
+
+    async def _complete_job(self, job: VideoGenerationJob, bot: Bot, result: VideoResponse, cached=None) -> bool:
+        """
+        Mark a job completed and send the video to the user.
+
+        ``cached`` is the generation cache lookup the result came from, if
+        any; fresh results are added to the cache once sent.
+        """
+        completed_fields = {"video_path": result.video_path}
+        if (result.metadata or {}).get("task_id"):
+            completed_fields["task_id"] = result.metadata["task_id"]
+        updated_job = await self.repository.update_job_status(
+            job.id,
+            "completed",
+            **completed_fields
+        )
+
+        # Update linked ai_request (critical for cost tracking)
+        await self._update_ai_request(
+            job=updated_job or job,
+            status="completed",
+            video_path=result.video_path
+        )
+
+        # Send video to user with "Create more" button
+        from aiogram.types import FSInputFile
+        from app.bot.utils.notifications import create_action_keyboard, MODEL_ACTIONS
+        import os
+
+        # Build caption with prompt
+        prompt_display = (job.prompt[:100] + "...") if job.prompt and len(job.prompt) > 100 else (job.prompt or "без промпта")
+        caption = f"✅ Ваше видео готово!\n\n📝 Промпт: {prompt_display}"
+
+        # Get action keyboard for this provider
+        provider_key = job.provider or "kling"
+        action_config = MODEL_ACTIONS.get(provider_key, MODEL_ACTIONS.get("kling"))
+        action_keyboard = create_action_keyboard(
+            action_text=action_config["text"],
+            action_callback=action_config["callback"],
+            file_path=result.video_path,
+            file_type="video"
+        )
+        reply_markup = action_keyboard.as_markup()
+
+        if cached is None:
+            cached = await self._cached_generation(job)
+
+        # Send with retry and large-file fallback
+        file_size = os.path.getsize(result.video_path)
+        max_telegram_size = 49 * 1024 * 1024  # 49MB safety margin
+        sent = False
+        sent_message = None
+
+        if file_size > max_telegram_size:
+            # Too large for video, send as document
+            logger.warning("video_job_file_too_large", size=file_size, job_id=job.id)
+            try:
+                video_file = FSInputFile(result.video_path)
+                sent_message = await bot.send_document(
+                    chat_id=job.chat_id, document=video_file,
+                    caption=caption, reply_markup=reply_markup,
+                )
+                sent = True
+            except Exception as e:
+                logger.error("video_job_send_document_failed", error=str(e), job_id=job.id)
+        else:
+            for attempt in range(3):
+                try:
+                    sent_message = await bot.send_video(
+                        chat_id=job.chat_id, video=cached.media(result.video_path),
+                        caption=caption, reply_markup=reply_markup,
+                    )
+                    sent = True
+                    break
+                except Exception as e:
+                    logger.warning("video_job_send_retry", attempt=attempt+1, error=str(e), job_id=job.id)
+                    if attempt < 2:
+                        await asyncio.sleep(2 * (attempt + 1))
+
+            if not sent:
+                # Fallback: try as document
+                try:
+                    video_file = FSInputFile(result.video_path)
+                    sent_message = await bot.send_document(
+                        chat_id=job.chat_id, document=video_file,
+                        caption=caption, reply_markup=reply_markup,
+                    )
+                    sent = True
+                except Exception as e:
+                    logger.error("video_job_send_all_failed", error=str(e), job_id=job.id)
+
+        if sent:
+            await cached.remember(result.video_path, sent_message)
+        else:
+            # Last resort: send download link
+            size_mb = file_size // (1024 * 1024)
+            try:
+                from app.api.file_download import create_download_token, get_download_url
+                token = create_download_token(result.video_path)
+                download_url = get_download_url(token)
+                await bot.send_message(
+                    chat_id=job.chat_id,
+                    text=(
+                        f"{caption}\n\n"
+                        f"📥 Видео ({size_mb} МБ) превышает лимит Telegram.\n"
+                        f"Скачайте по ссылке (действует 1 час):\n{download_url}"
+                    ),
+                    reply_markup=reply_markup,
+                    parse_mode=None,
+                )
+            except Exception as link_e:
+                logger.error("video_job_download_link_failed", error=str(link_e), job_id=job.id)
+                await bot.send_message(
+                    chat_id=job.chat_id,
+                    text=f"{caption}\n\n⚠️ Не удалось отправить видео ({size_mb} МБ). Файл превышает лимит Telegram.",
+                    reply_markup=reply_markup,
+                    parse_mode=None,
+                )
+
+        # Delete progress message
+        if job.progress_message_id:
+            try:
+                await bot.delete_message(chat_id=job.chat_id, message_id=job.progress_message_id)
+            except TelegramBadRequest as e:
+                # Ignore expected errors when message can't be deleted
+                if "message can't be deleted" not in str(e) and "message to delete not found" not in str(e):
+                    logger.warning("video_job_delete_message_failed", error=str(e), job_id=job.id)
+            except Exception as e:
+                logger.warning("video_job_delete_message_error", error=str(e), job_id=job.id)
+
+        logger.info("video_job_completed", job_id=job.id, provider=job.provider)
+        return True
+
+    async def _fail_job(self, job: VideoGenerationJob, bot: Bot, error_msg: str) -> None:
+        """Mark a job failed, refund its tokens and notify the user."""
+        updated_job = await self.repository.update_job_status(
+            job.id,
+            "failed",
+            error_message=error_msg
+        )
+
+        # Update linked ai_request (mark as failed)
+        await self._update_ai_request(
+            job=updated_job or job,
+            status="failed",
+            error_message=error_msg
+        )
+
+        # Refund tokens
+        await self.refund_tokens(updated_job or job)
+
+        # Notify user
+        if job.progress_message_id:
+            try:
+                await bot.edit_message_text(
+                    chat_id=job.chat_id,
+                    message_id=job.progress_message_id,
+                    text=f"❌ Ошибка генерации видео:\n{error_msg}\n\nТокены возвращены на ваш счёт."
+                )
+            except Exception:
+                pass
+
+        logger.error("video_job_failed", job_id=job.id, provider=job.provider, error=error_msg)
+
     async def get_pending_jobs(self, limit: int = 10) -> list[VideoGenerationJob]:
         """Get pending jobs for processing."""
         return await self.repository.get_pending_jobs(limit=limit)
 
+    async def claim_pending_jobs(self, owner: str, limit: int = 10) -> list[int]:
+        """Claim pending jobs for a worker; returns job IDs."""
+        return await self.repository.claim_jobs(owner, "pending", limit, VIDEO_JOB_LEASE_SECONDS)
+
+    async def claim_timeout_waiting_jobs(self, owner: str, limit: int = 10) -> list[int]:
+        """Claim timeout_waiting jobs for re-polling; returns job IDs."""
+        return await self.repository.claim_jobs(owner, "timeout_waiting", limit, VIDEO_JOB_LEASE_SECONDS)
+
+    async def claim_due_polls(self, owner: str, limit: int = 10) -> list[int]:
+        """Claim submitted jobs whose next status check is due; returns job IDs."""
+        return await self.repository.claim_due_polls(owner, limit, VIDEO_JOB_LEASE_SECONDS)
+
+    async def seconds_until_next_poll(self) -> Optional[float]:
+        """Seconds until the earliest scheduled status check (None if none)."""
+        return await self.repository.seconds_until_next_poll()
+
+    async def check_many(self, jobs: list[VideoGenerationJob]) -> dict[int, VideoTaskStatus]:
+        """
+        Batch-check submitted jobs of one provider.
+
+        Returns:
+            Statuses by job ID for the jobs the provider could batch; the rest
+            are checked one by one in process_job()
+        """
+        if not jobs:
+            return {}
+        service = self._get_video_service(jobs[0].provider)
+        tasks = {job.task_id: self._generation_params(job) for job in jobs}
+        try:
+            statuses = await service.check_many(tasks)
+        except Exception as e:
+            logger.warning("video_job_batch_check_failed", provider=jobs[0].provider, error=str(e))
+            return {}
+        return {job.id: statuses[job.task_id] for job in jobs if job.task_id in statuses}
+
+    async def claim_abandoned_jobs(self, owner: str, limit: int = 10) -> list[int]:
+        """Claim processing jobs whose worker stopped heartbeating; returns job IDs."""
+        return await self.repository.claim_stale_processing_jobs(
+            owner,
+            limit,
+            VIDEO_JOB_LEASE_SECONDS,
+            UNLEASED_PROCESSING_GRACE_SECONDS
+        )
+
+    async def renew_leases(self, owner: str, job_ids: list[int]) -> list[int]:
+        """Heartbeat the worker's jobs; returns IDs taken over by other workers."""
+        return await self.repository.renew_leases(owner, job_ids, VIDEO_JOB_LEASE_SECONDS)
+
     async def get_timeout_waiting_jobs(self, limit: int = 10) -> list[VideoGenerationJob]:
         """Get timeout_waiting jobs for re-polling."""
         return await self.repository.get_timeout_waiting_jobs(limit=limit)
@@ -518,7 +719,7 @@ class VideoJobService:
             )
 
             # Refund tokens
-            await self._refund_tokens(updated_job or job)
+            await self.refund_tokens(updated_job or job)
 
             # Notify user if bot is available
             if bot and job.progress_message_id:
@@ -0,0 +1,361 @@
+"""
+Background worker that sends admin broadcasts.
+
+The admin bot only queues a broadcast (a ``broadcast_messages`` row) and
+watches its progress. This worker, running in every main bot replica:
+- Claims one queued broadcast at a time with a lease (safe with several
+  replicas) and takes over broadcasts whose worker stopped heartbeating
+- Loads recipient IDs in keyset pages, so memory use does not grow with the
+  user base
+- Sends each page concurrently under a token bucket shared by all replicas,
+  kept below Telegram's limit of about 30 messages per second; a RetryAfter
+  from Telegram holds every send for the requested time
+- Records each page: the recipients' outcomes in bulk (delivery log, users
+  who blocked the bot; see DeliveryOutcomeSink), then cursor and counters.
+  A paused or interrupted broadcast resumes after the last recorded page
+  (after a crash, at most one page is sent twice)
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import BufferedInputFile, InlineKeyboardMarkup, Message
+
+from app.admin.keyboards.inline import build_user_broadcast_keyboard
+from app.admin.services.broadcast_service import get_recipient_page, send_broadcast_message
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.rate_limiter import RateLimit, rate_limiter
+from app.database.database import async_session_maker
+from app.database.models.broadcast import BroadcastMessage
+from app.database.repositories.broadcast import BroadcastRepository
+from app.services.user.delivery_outcomes import (
+    SENT,
+    UNREACHABLE_OUTCOMES,
+    DeliveryOutcomeSink,
+    classify_delivery_error,
+)
+from app.workers.video_worker import make_worker_id
+
+logger = get_logger(__name__)
+
+# A broadcast's lease; renewed every BROADCAST_HEARTBEAT_SECONDS and with each page
+BROADCAST_LEASE_SECONDS = 120
+BROADCAST_HEARTBEAT_SECONDS = 20
+
+# Recipients per page: one progress record each
+PAGE_SIZE = 200
+
+# Sends to one recipient (RetryAfter included) before it counts as an error
+MAX_SEND_ATTEMPTS = 3
+
+# Token bucket shared by all replicas (app.core.rate_limiter)
+BROADCAST_RATE_KEY = "broadcast:send"
+
+
+class SendThrottle:
+    """Broadcast send rate across replicas, plus holds requested by Telegram."""
+
+    def __init__(self, per_second: int):
+        # Small burst: Telegram measures the rate over about a second
+        self.rule = RateLimit(per_second, 1, burst=max(1, per_second // 5))
+        self._hold_until = 0.0
+
+    def hold(self, seconds: float) -> None:
+        """Pause all sends for ``seconds`` (Telegram's RetryAfter)."""
+        self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        """Wait until the next message may be sent."""
+        while True:
+            held = self._hold_until - time.monotonic()
+            if held > 0:
+                await asyncio.sleep(held)
+                continue
+            decision = await rate_limiter.check((BROADCAST_RATE_KEY, self.rule))
+            if decision.allowed:
+                return
+            await asyncio.sleep(decision.retry_after)
+
+
+@dataclass
+class PageOutcome:
+    """Delivery counts of one page of recipients."""
+    cursor: int
+    sent: int = 0
+    errors: int = 0
+    # Recipients who blocked the bot or were deleted
+    blocked: int = 0
+    # Main bot file_id of the photo, once uploaded in this page
+    photo_file_id: Optional[str] = None
+
+
+class BroadcastWorker:
+    """Background worker for queued broadcasts."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        poll_interval: int = 5,
+        concurrency: Optional[int] = None,
+        per_second: Optional[int] = None
+    ):
+        """
+        Initialize broadcast worker.
+
+        Args:
+            bot: Main bot instance (messages are sent on its behalf)
+            poll_interval: Seconds between checks for queued broadcasts
+            concurrency: Sends in flight (default settings.broadcast_concurrency)
+            per_second: Send rate across replicas (default
+                settings.broadcast_rate_per_second)
+        """
+        self.bot = bot
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency or settings.broadcast_concurrency
+        self.throttle = SendThrottle(per_second or settings.broadcast_rate_per_second)
+        self.worker_id = make_worker_id()
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run_loop(self):
+        """Main worker loop: send claimed broadcasts one after another."""
+        logger.info("broadcast_worker_started", worker_id=self.worker_id)
+
+        while self._running:
+            try:
+                async with async_session_maker() as session:
+                    broadcast_id = await BroadcastRepository(session).claim_next(
+                        self.worker_id, BROADCAST_LEASE_SECONDS
+                    )
+                if broadcast_id is not None:
+                    await self.send_broadcast(broadcast_id)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("broadcast_worker_cycle_error", error=str(e))
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def send_broadcast(self, broadcast_id: int) -> None:
+        """Send a claimed broadcast from its cursor until done, paused or cancelled."""
+        async with async_session_maker() as session:
+            broadcast = await BroadcastRepository(session).get(broadcast_id)
+        if broadcast is None:
+            return
+
+        keyboard = build_user_broadcast_keyboard(broadcast.buttons) if broadcast.buttons else None
+        photo = broadcast.photo_file_id
+        if photo is None and broadcast.image_file_id:
+            photo = await self._download_photo(broadcast.image_file_id)
+        cursor = broadcast.cursor_user_id
+
+        logger.info(
+            "broadcast_sending",
+            broadcast_id=broadcast_id,
+            cursor=cursor,
+            total=broadcast.total_count,
+            worker_id=self.worker_id
+        )
+
+        outcomes = DeliveryOutcomeSink(broadcast_id=broadcast_id)
+        stopping = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(broadcast_id, stopping))
+        completed = False
+        try:
+            while not stopping.is_set():
+                async with async_session_maker() as session:
+                    page = await get_recipient_page(session, broadcast, cursor, PAGE_SIZE)
+                if not page:
+                    completed = True
+                    break
+
+                outcome = await self._send_page(broadcast, page, photo, keyboard, stopping, outcomes)
+                if outcome.photo_file_id:
+                    photo = outcome.photo_file_id
+
+                # Outcomes first: if the progress is lost, the page is sent
+                # again and its logged outcomes are kept
+                await outcomes.flush()
+                async with async_session_maker() as session:
+                    status = await BroadcastRepository(session).save_progress(
+                        self.worker_id,
+                        broadcast_id,
+                        cursor_user_id=outcome.cursor,
+                        sent=outcome.sent,
+                        failed=outcome.errors + outcome.blocked,
+                        blocked=outcome.blocked,
+                        lease_seconds=BROADCAST_LEASE_SECONDS,
+                        photo_file_id=outcome.photo_file_id
+                    )
+                cursor = outcome.cursor
+
+                if status != "running":
+                    logger.info("broadcast_stopped", broadcast_id=broadcast_id, status=status, cursor=cursor)
+                    break
+        finally:
+            heartbeat.cancel()
+            # Outcomes a failed flush left behind
+            await outcomes.flush()
+            async with async_session_maker() as session:
+                await BroadcastRepository(session).release(self.worker_id, broadcast_id, completed=completed)
+
+        if completed:
+            logger.info("broadcast_completed", broadcast_id=broadcast_id, worker_id=self.worker_id)
+
+    async def _send_page(
+        self,
+        broadcast: BroadcastMessage,
+        page: List[Tuple[int, int]],
+        photo: Optional[Union[str, BufferedInputFile]],
+        keyboard: Optional[InlineKeyboardMarkup],
+        stopping: asyncio.Event,
+        outcomes: DeliveryOutcomeSink
+    ) -> PageOutcome:
+        """
+        Send one page, ``concurrency`` messages at a time, in recipient order.
+
+        When ``stopping`` is set, no new sends start; the outcome's cursor is
+        the last recipient whose send was started, so everything up to it is
+        handled once the in-flight sends finish.
+        """
+        outcome = PageOutcome(cursor=page[0][0] - 1)
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = []
+
+        async def deliver(user_id: int, telegram_id: int, send_photo) -> Optional[Message]:
+            try:
+                message = await self._deliver(broadcast, telegram_id, send_photo, keyboard)
+                outcomes.add(telegram_id, SENT, user_id=user_id)
+                outcome.sent += 1
+                return message
+            except Exception as e:
+                kind = classify_delivery_error(e)
+                outcomes.add(telegram_id, kind, user_id=user_id, error=str(e))
+                if kind in UNREACHABLE_OUTCOMES:
+                    outcome.blocked += 1
+                else:
+                    outcome.errors += 1
+                    logger.error(
+                        "broadcast_send_error",
+                        broadcast_id=broadcast.id,
+                        user_id=telegram_id,
+                        error=str(e)
+                    )
+                return None
+            finally:
+                slots.release()
+
+        for user_id, telegram_id in page:
+            await slots.acquire()
+            if stopping.is_set():
+                slots.release()
+                break
+            await self.throttle.acquire()
+            outcome.cursor = user_id
+
+            if isinstance(photo, BufferedInputFile):
+                # Upload the photo once, then send its file_id (much faster)
+                message = await deliver(user_id, telegram_id, photo)
+                try:
+                    photo = outcome.photo_file_id = message.photo[-1].file_id
+                    logger.info("broadcast_photo_cached", broadcast_id=broadcast.id, file_id=photo)
+                except (AttributeError, IndexError, TypeError):
+                    pass
+            else:
+                tasks.append(asyncio.create_task(deliver(user_id, telegram_id, photo)))
+
+        await asyncio.gather(*tasks)
+        return outcome
+
+    async def _deliver(
+        self,
+        broadcast: BroadcastMessage,
+        chat_id: int,
+        photo: Optional[Union[str, BufferedInputFile]],
+        keyboard: Optional[InlineKeyboardMarkup]
+    ) -> Optional[Message]:
+        """Send to one recipient, waiting out Telegram's RetryAfter."""
+        attempt = 1
+        while True:
+            try:
+                return await send_broadcast_message(
+                    bot=self.bot,
+                    chat_id=chat_id,
+                    text=broadcast.text,
+                    photo=photo,
+                    keyboard=keyboard,
+                )
+            except TelegramRetryAfter as e:
+                logger.warning("broadcast_retry_after", broadcast_id=broadcast.id, retry_after=e.retry_after)
+                self.throttle.hold(e.retry_after)
+                if attempt >= MAX_SEND_ATTEMPTS:
+                    raise
+                attempt += 1
+                await self.throttle.acquire()
+
+    async def _heartbeat(self, broadcast_id: int, stopping: asyncio.Event) -> None:
+        """Renew the lease; stop when the broadcast is paused, cancelled or taken over."""
+        while not stopping.is_set():
+            await asyncio.sleep(BROADCAST_HEARTBEAT_SECONDS)
+            try:
+                async with async_session_maker() as session:
+                    status = await BroadcastRepository(session).renew_lease(
+                        self.worker_id, broadcast_id, BROADCAST_LEASE_SECONDS
+                    )
+            except Exception as e:
+                logger.warning("broadcast_heartbeat_failed", broadcast_id=broadcast_id, error=str(e))
+                continue
+            if status != "running":
+                logger.info("broadcast_stopping", broadcast_id=broadcast_id, status=status)
+                stopping.set()
+
+    async def _download_photo(self, image_file_id: str) -> Optional[BufferedInputFile]:
+        """
+        Fetch the photo from the admin bot.
+
+        file_id is bot-specific in Telegram and cannot be shared between bots,
+        so the first send uploads it on behalf of the main bot.
+        """
+        admin_bot = Bot(token=settings.telegram_admin_bot_token, default=DefaultBotProperties())
+        try:
+            file = await admin_bot.get_file(image_file_id)
+            photo_bytes = await admin_bot.download_file(file.file_path)
+            return BufferedInputFile(file=photo_bytes.read(), filename="broadcast_photo.jpg")
+        except Exception as e:
+            logger.error("broadcast_photo_download_error", file_id=image_file_id, error=str(e))
+            return None
+        finally:
+            await admin_bot.session.close()
+
+    def start(self):
+        """Start the worker."""
+        if self._running:
+            logger.warning("broadcast_worker_already_running")
+            return
+
+        self._running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info("broadcast_worker_task_created", worker_id=self.worker_id)
+
+    async def stop(self):
+        """
+        Stop the worker.
+
+        The broadcast being sent is released at its last recorded page;
+        another worker (or this one after restart) resumes it from there.
+        """
+        if not self._running:
+            return
+
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+        logger.info("broadcast_worker_stopped")
@@ -2,26 +2,45 @@
 Background worker for processing video generation jobs.
 
 This worker:
-- Polls pending jobs from database
-- Processes them asynchronously
+- Claims pending jobs atomically (safe with several bot replicas)
+- Wakes up on Postgres NOTIFY when a job is queued, polls as a fallback
+- Heartbeats the leases of its jobs and takes over jobs of crashed workers,
+  resuming them from the stored provider task ID
+- Submits generations and checks them in short, stateless steps (any
+  worker can run a job's next status check), batching the checks of
+  providers that can answer several at once and sleeping until the
+  earliest check is due
 - Retries timeout_waiting jobs
 - Sends results to users via bot
 - Cleans up expired jobs
 """
 import asyncio
-from typing import Optional
+import os
+import socket
+import time
+import uuid
+from typing import Dict, Optional, Tuple
 
 from aiogram import Bot
 
-from app.database.database import async_session_maker
-from app.services.video_job_service import VideoJobService
-from app.services.subscription.subscription_service import SubscriptionService
+from app.database.database import async_session_maker, engine
+from app.database.repositories.video_job import VIDEO_JOBS_CHANNEL
+from app.services.video_job_service import VIDEO_JOB_HEARTBEAT_SECONDS, VideoJobService
+from app.services.video.base import VideoTaskStatus
 from app.database.models.system import SystemSetting
 from app.core.logger import get_logger
 from sqlalchemy import select
 
 logger = get_logger(__name__)
 
+# Re-check interval for the LISTEN connection's health
+LISTEN_HEALTH_CHECK_SECONDS = 30
+
+
+def make_worker_id() -> str:
+    """Unique lease owner for this worker process."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
 
 class VideoWorker:
     """Background worker for async video generation."""
@@ -32,15 +51,23 @@ class VideoWorker:
 
         Args:
             bot: Telegram bot instance
-            poll_interval: Seconds between polling cycles
-            max_concurrent: Max jobs processed simultaneously per cycle. Safe to
-                raise now that each job uses its own DB session.
+            poll_interval: Seconds between polling cycles when no NOTIFY arrives
+            max_concurrent: Max jobs this worker processes simultaneously. Safe
+                to raise now that each job uses its own DB session.
         """
         self.bot = bot
         self.poll_interval = poll_interval
         self.max_concurrent = max_concurrent
+        self.worker_id = make_worker_id()
         self._running = False
         self._task: Optional[asyncio.Task] = None
+        self._listen_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        # Running job tasks -> job IDs (leases to heartbeat)
+        self._inflight: Dict[asyncio.Task, Tuple[int, ...]] = {}
+        self._last_retry = 0.0
+        self._last_cleanup = 0.0
 
     async def is_feature_enabled(self) -> bool:
         """Check if async video is enabled via feature flag."""
@@ -57,13 +84,13 @@ class VideoWorker:
             logger.warning("failed_to_check_async_video_flag", error=str(e))
             return True  # Default to enabled
 
-    async def _process_job_isolated(self, job_id: int) -> bool:
+    async def _process_job_isolated(self, job_id: int, status: Optional[VideoTaskStatus] = None) -> bool:
         """
         Process a single job inside its OWN database session.
 
         SQLAlchemy ``AsyncSession`` is not safe for concurrent use, so each
-        job processed via ``asyncio.gather`` must own its session. Sharing one
-        session across gathered tasks is what produced the recurring
+        job running as its own task must own its session. Sharing one
+        session across concurrent tasks is what produced the recurring
         "This transaction is closed" / "_prepare_impl is already in progress"
         failures in production.
         """
@@ -74,40 +101,96 @@ class VideoWorker:
                 if not job:
                     logger.warning("video_job_disappeared_before_processing", job_id=job_id)
                     return False
-                return await service.process_job(job, self.bot)
+                return await service.process_job(job, self.bot, status)
         except Exception as e:
             logger.error("video_job_isolated_processing_failed", job_id=job_id, error=str(e))
             return False
 
+    def _spawn(self, coro, *job_ids: int) -> None:
+        """Run a job task in the background; a finished task frees its slots."""
+        task = asyncio.create_task(coro)
+        self._inflight[task] = job_ids
+
+        def _done(t: asyncio.Task) -> None:
+            self._inflight.pop(t, None)
+            self._wakeup.set()
+
+        task.add_done_callback(_done)
+
+    @property
+    def free_slots(self) -> int:
+        """Number of jobs this worker can take on right now."""
+        return max(0, self.max_concurrent - sum(len(ids) for ids in self._inflight.values()))
+
     async def process_pending_jobs(self):
-        """Process pending video jobs."""
+        """Claim pending video jobs up to the free slots and start them."""
         try:
-            # Fetch the batch in a short-lived session, then release it before
-            # spawning per-job tasks so each task gets an isolated session.
+            if not self.free_slots:
+                return
+
+            # Claim in a short-lived session, then start per-job tasks that
+            # each own an isolated session.
             async with async_session_maker() as session:
                 service = VideoJobService(session)
-                pending_jobs = await service.get_pending_jobs(limit=max(10, self.max_concurrent))
-                job_ids = [job.id for job in pending_jobs[:self.max_concurrent]]
+                job_ids = await service.claim_pending_jobs(self.worker_id, limit=self.free_slots)
 
             if not job_ids:
                 logger.debug("no_pending_video_jobs")
                 return
 
-            logger.info("processing_pending_video_jobs", count=len(job_ids))
+            logger.info("processing_pending_video_jobs", count=len(job_ids), worker_id=self.worker_id)
 
-            # Each job runs in its own DB session (sessions are not concurrency-safe).
-            tasks = [
-                asyncio.create_task(self._process_job_isolated(job_id))
-                for job_id in job_ids
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            success_count = sum(1 for r in results if r is True)
-            logger.info("video_jobs_processed", total=len(tasks), success=success_count)
+            # Jobs run in the background so newly queued jobs don't wait for
+            # the slowest job of a batch.
+            for job_id in job_ids:
+                self._spawn(self._process_job_isolated(job_id), job_id)
 
         except Exception as e:
             logger.error("process_pending_jobs_failed", error=str(e))
 
+    async def process_due_polls(self):
+        """Run the status checks that are due for submitted jobs."""
+        try:
+            limit = self.free_slots
+            if not limit:
+                return
+
+            async with async_session_maker() as session:
+                service = VideoJobService(session)
+                job_ids = await service.claim_due_polls(self.worker_id, limit=limit)
+
+            if len(job_ids) == 1:
+                self._spawn(self._process_job_isolated(job_ids[0]), job_ids[0])
+            elif job_ids:
+                self._spawn(self._check_due_jobs_isolated(job_ids), *job_ids)
+
+        except Exception as e:
+            logger.error("process_due_polls_failed", error=str(e))
+
+    async def _check_due_jobs_isolated(self, job_ids: list[int]) -> None:
+        """Batch-check due jobs per provider, then process each in its own task."""
+        statuses: Dict[int, VideoTaskStatus] = {}
+        try:
+            async with async_session_maker() as session:
+                service = VideoJobService(session)
+                by_provider: Dict[str, list] = {}
+                for job_id in job_ids:
+                    job = await service.repository.get_by_id(job_id)
+                    if job:
+                        by_provider.setdefault(job.provider, []).append(job)
+                for jobs in by_provider.values():
+                    if len(jobs) > 1:
+                        statuses.update(await service.check_many(jobs))
+        except Exception as e:
+            # Jobs fall back to single checks
+            logger.warning("video_job_batch_check_failed", error=str(e))
+
+        if statuses:
+            logger.debug("video_jobs_batch_checked", checked=len(statuses), due=len(job_ids))
+
+        for job_id in job_ids:
+            self._spawn(self._process_job_isolated(job_id, statuses.get(job_id)), job_id)
+
     async def _fail_timeout_job_isolated(self, job_id: int) -> None:
         """Mark a retry-exhausted job as failed, refund and notify — own session."""
         try:
@@ -123,25 +206,10 @@ class VideoWorker:
                     error_message="Maximum retry attempts exceeded"
                 )
 
+                # Same refund as the other failure paths (incl. unlimited usage)
                 refund_note = ""
-                if job.tokens_cost > 0:
-                    try:
-                        sub_service = SubscriptionService(session)
-                        await sub_service.rollback_tokens(job.user_id, job.tokens_cost)
-                        logger.info(
-                            "timeout_job_tokens_refunded",
-                            job_id=job.id,
-                            user_id=job.user_id,
-                            tokens=job.tokens_cost,
-                        )
-                        refund_note = "\n\nТокены возвращены на ваш счёт."
-                    except Exception as refund_err:
-                        logger.error(
-                            "timeout_job_token_refund_failed",
-                            job_id=job.id,
-                            user_id=job.user_id,
-                            error=str(refund_err),
-                        )
+                if await service.refund_tokens(job):
+                    refund_note = "\n\nТокены возвращены на ваш счёт."
 
                 if job.progress_message_id:
                     try:
@@ -164,14 +232,22 @@ class VideoWorker:
     async def retry_timeout_waiting_jobs(self):
         """Retry jobs that timed out initially."""
         try:
-            # Snapshot the batch in a short-lived session, then release it so
+            limit = min(3, self.free_slots)
+            if not limit:
+                return
+
+            # Claim the batch in a short-lived session, then release it so
             # each job gets its own isolated session (see _process_job_isolated).
             async with async_session_maker() as session:
                 service = VideoJobService(session)
-                timeout_jobs = await service.get_timeout_waiting_jobs(limit=10)
-                # Capture only the plain attributes we need before the session closes.
-                retry_ids = [job.id for job in timeout_jobs[:3] if job.can_retry]
-                exhausted_ids = [job.id for job in timeout_jobs[:3] if not job.can_retry]
+                claimed_ids = await service.claim_timeout_waiting_jobs(self.worker_id, limit=limit)
+                retry_ids = []
+                exhausted_ids = []
+                for job_id in claimed_ids:
+                    job = await service.repository.get_by_id(job_id)
+                    if job is None:
+                        continue
+                    (retry_ids if job.can_retry else exhausted_ids).append(job_id)
 
             if not retry_ids and not exhausted_ids:
                 return
@@ -182,21 +258,78 @@ class VideoWorker:
                 exhausted=len(exhausted_ids),
             )
 
-            tasks = [
-                asyncio.create_task(self._process_job_isolated(job_id))
-                for job_id in retry_ids
-            ]
-            tasks += [
-                asyncio.create_task(self._fail_timeout_job_isolated(job_id))
-                for job_id in exhausted_ids
-            ]
-
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+            for job_id in retry_ids:
+                self._spawn(self._process_job_isolated(job_id), job_id)
+            for job_id in exhausted_ids:
+                self._spawn(self._fail_timeout_job_isolated(job_id), job_id)
 
         except Exception as e:
             logger.error("retry_timeout_jobs_failed", error=str(e))
 
+    async def recover_abandoned_jobs(self):
+        """
+        Take over jobs left in ``processing`` by a worker that stopped
+        heartbeating (crash, deploy). Jobs with a stored provider task ID are
+        resumed rather than resubmitted; each takeover counts as an attempt.
+        """
+        try:
+            limit = self.free_slots
+            if not limit:
+                return
+
+            async with async_session_maker() as session:
+                service = VideoJobService(session)
+                claimed_ids = await service.claim_abandoned_jobs(self.worker_id, limit=limit)
+                resume_ids = []
+                exhausted_ids = []
+                for job_id in claimed_ids:
+                    job = await service.repository.increment_attempt(job_id)
+                    if job is None:
+                        continue
+                    (resume_ids if job.can_retry else exhausted_ids).append(job_id)
+
+            if not resume_ids and not exhausted_ids:
+                return
+
+            logger.warning(
+                "recovering_abandoned_video_jobs",
+                resume=len(resume_ids),
+                exhausted=len(exhausted_ids),
+                worker_id=self.worker_id,
+            )
+
+            for job_id in resume_ids:
+                self._spawn(self._process_job_isolated(job_id), job_id)
+            for job_id in exhausted_ids:
+                self._spawn(self._fail_timeout_job_isolated(job_id), job_id)
+
+        except Exception as e:
+            logger.error("recover_abandoned_jobs_failed", error=str(e))
+
+    async def _heartbeat_loop(self):
+        """Renew the leases of running jobs; stop jobs another worker took over."""
+        while self._running:
+            await asyncio.sleep(VIDEO_JOB_HEARTBEAT_SECONDS)
+            running = dict(self._inflight)
+            if not running:
+                continue
+            try:
+                async with async_session_maker() as session:
+                    service = VideoJobService(session)
+                    job_ids = [job_id for ids in running.values() for job_id in ids]
+                    taken_over = set(await service.renew_leases(self.worker_id, job_ids))
+            except Exception as e:
+                logger.warning("video_job_heartbeat_failed", error=str(e))
+                continue
+
+            for task, ids in running.items():
+                lost = taken_over.intersection(ids)
+                if lost:
+                    # Our lease lapsed (e.g. DB outage) and the job now
+                    # belongs to another worker - don't deliver it twice.
+                    logger.warning("video_job_lease_lost", job_ids=sorted(lost), worker_id=self.worker_id)
+                    task.cancel()
+
     async def cleanup_expired_jobs(self):
         """Clean up expired jobs, refund tokens, and notify users."""
         try:
@@ -210,9 +343,58 @@ class VideoWorker:
         except Exception as e:
             logger.error("cleanup_expired_jobs_failed", error=str(e))
 
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        """asyncpg LISTEN callback: a job was queued."""
+        self._wakeup.set()
+
+    async def _listen_loop(self):
+        """Keep a LISTEN connection open and turn NOTIFYs into wake-ups."""
+        while self._running:
+            try:
+                async with engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    driver = raw.driver_connection
+                    await driver.add_listener(VIDEO_JOBS_CHANNEL, self._on_notify)
+                    logger.info("video_worker_listening", channel=VIDEO_JOBS_CHANNEL)
+                    try:
+                        while self._running and not driver.is_closed():
+                            await asyncio.sleep(LISTEN_HEALTH_CHECK_SECONDS)
+                    finally:
+                        if not driver.is_closed():
+                            await driver.remove_listener(VIDEO_JOBS_CHANNEL, self._on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Polling keeps the queue moving until LISTEN is back
+                logger.warning("video_worker_listen_failed", error=str(e))
+                await asyncio.sleep(self.poll_interval)
+
+    async def _seconds_until_next_poll(self) -> float:
+        """Sleep budget: the poll interval, or less if a status check is due sooner."""
+        try:
+            async with async_session_maker() as session:
+                due_in = await VideoJobService(session).seconds_until_next_poll()
+        except Exception as e:
+            logger.warning("video_worker_next_poll_lookup_failed", error=str(e))
+            return self.poll_interval
+        if due_in is None:
+            return self.poll_interval
+        return min(self.poll_interval, max(0.1, due_in))
+
+    async def _wait_for_wakeup(self):
+        """Sleep until a NOTIFY, a freed slot, the next due check or the poll interval."""
+        timeout = self.poll_interval
+        if self.free_slots:
+            timeout = await self._seconds_until_next_poll()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
     async def _run_loop(self):
         """Main worker loop."""
-        logger.info("video_worker_started", poll_interval=self.poll_interval)
+        logger.info("video_worker_started", poll_interval=self.poll_interval, worker_id=self.worker_id)
 
         while self._running:
             try:
@@ -222,27 +404,27 @@ class VideoWorker:
                     await asyncio.sleep(self.poll_interval)
                     continue
 
-                # Process pending jobs
+                # Process pending jobs, then due status checks
                 await self.process_pending_jobs()
-
-                # Retry timeout jobs (less frequently - every 3rd cycle)
-                if hasattr(self, '_cycle_count'):
-                    self._cycle_count += 1
-                else:
-                    self._cycle_count = 0
-
-                if self._cycle_count % 3 == 0:
+                await self.process_due_polls()
+
+                # Retry timeout jobs (every 3rd poll interval) and clean up
+                # expired jobs (every 10th); wake-ups don't speed these up.
+                now = time.monotonic()
+                if now - self._last_retry >= self.poll_interval * 3:
+                    self._last_retry = now
+                    await self.recover_abandoned_jobs()
                     await self.retry_timeout_waiting_jobs()
 
-                # Cleanup expired jobs (every 10th cycle)
-                if self._cycle_count % 10 == 0:
+                if now - self._last_cleanup >= self.poll_interval * 10:
+                    self._last_cleanup = now
                     await self.cleanup_expired_jobs()
 
             except Exception as e:
                 logger.error("video_worker_cycle_error", error=str(e))
 
-            # Wait before next cycle
-            await asyncio.sleep(self.poll_interval)
+            # Wait for the next job (NOTIFY) or the next poll
+            await self._wait_for_wakeup()
 
         logger.info("video_worker_stopped")
 
@@ -254,7 +436,10 @@ class VideoWorker:
 
         self._running = True
         self._task = asyncio.create_task(self._run_loop())
-        logger.info("video_worker_task_created")
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        if engine.dialect.name == "postgresql":
+            self._listen_task = asyncio.create_task(self._listen_loop())
+        logger.info("video_worker_task_created", worker_id=self.worker_id)
 
     async def stop(self):
         """Stop the worker gracefully."""
@@ -264,11 +449,11 @@ class VideoWorker:
         logger.info("stopping_video_worker")
         self._running = False
 
-        if self._task:
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                pass
+        # Interrupted jobs keep their lease until it expires; another worker
+        # (or this one after restart) then resumes them.
+        tasks = [t for t in (self._task, self._listen_task, self._heartbeat_task) if t] + list(self._inflight)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
         logger.info("video_worker_stopped")
@@ -13,6 +13,8 @@ from uvicorn import Config, Server
 from app.core.config import settings
 from app.core.logger import get_logger
 from app.core.log_safety import sanitise_body, sanitise_headers
+from app.core.http_client import http_clients
+from app.services.ai.client_cache import ai_clients
 from app.core.redis_client import redis_client
 from app.core.scheduler import scheduler
 from app.database.database import init_db, close_db
@@ -596,6 +598,7 @@ async def main() -> None:
     """Main bot loop with integrated FastAPI server."""
     dp = None
     fastapi_task = None
+    ai_warm_up_task = None
 
     try:
         logger.info("bot_starting", environment=settings.environment)
@@ -644,6 +647,20 @@ async def main() -> None:
         # Run every hour
         scheduler.add_interval_job(cleanup_expired_subscriptions, hours=1)
 
+        # Write buffered last_activity touches in bulk
+        from app.services.user.activity_tracker import (
+            activity_tracker,
+            ACTIVITY_FLUSH_INTERVAL_SECONDS,
+        )
+        scheduler.add_interval_job(activity_tracker.flush, seconds=ACTIVITY_FLUSH_INTERVAL_SECONDS)
+
+        # Write buffered broadcast button clicks in bulk
+        from app.services.user.broadcast_click_tracker import (
+            broadcast_click_tracker,
+            BROADCAST_CLICK_FLUSH_INTERVAL_SECONDS,
+        )
+        scheduler.add_interval_job(broadcast_click_tracker.flush, seconds=BROADCAST_CLICK_FLUSH_INTERVAL_SECONDS)
+
         # Background task: send post-expiry notifications
         async def send_expiry_notifications():
             """Check for expired subscriptions and send configured notifications."""
@@ -651,6 +668,7 @@ async def main() -> None:
             from app.database.models.user import User
             from app.database.models.subscription import Subscription
             from app.database.models.promocode import Promocode, PromocodeUse
+            from app.services.user.delivery_outcomes import DeliveryOutcomeSink, SENT, classify_delivery_error
             from sqlalchemy import select, and_, func
             from datetime import datetime, timezone, timedelta
             import uuid
@@ -692,6 +710,7 @@ async def main() -> None:
                             )
                         )
                         rows = expired_subs.all()
+                        outcomes = DeliveryOutcomeSink()
 
                         for sub, user in rows:
                             # Check if we already sent notification for this subscription + rule
@@ -754,11 +773,16 @@ async def main() -> None:
                             delivered = True
                             try:
                                 await bot.send_message(user.telegram_id, msg_text)
+                                outcomes.add(user.telegram_id, SENT, user_id=user.id)
                             except Exception as send_err:
                                 delivered = False
                                 error_msg = str(send_err)
-                                if "bot was blocked by the user" in error_msg or "user is deactivated" in error_msg:
-                                    user.is_bot_blocked = True
+                                outcomes.add(
+                                    user.telegram_id,
+                                    classify_delivery_error(send_err),
+                                    user_id=user.id,
+                                    error=error_msg
+                                )
                                 logger.error(
                                     "expiry_notification_send_failed",
                                     user_id=user.id,
@@ -776,6 +800,8 @@ async def main() -> None:
                             session.add(log_entry)
 
                         await session.commit()
+                        # Users who blocked the bot, in one UPDATE
+                        await outcomes.flush()
 
             except Exception as e:
                 logger.error("expiry_notifications_task_error", error=str(e))
@@ -803,6 +829,11 @@ async def main() -> None:
         else:
             logger.info("system_monitoring_skipped", reason="psutil not installed")
 
+        # Open AI API connections in the background so the first messages
+        # don't pay the TLS handshake
+        from app.services.ai.ai_factory import AIServiceFactory
+        ai_warm_up_task = asyncio.create_task(AIServiceFactory.warm_up())
+
         # Start FastAPI server in background
         fastapi_task = asyncio.create_task(run_fastapi_server())
         logger.info("fastapi_task_created")
@@ -832,6 +863,16 @@ async def main() -> None:
             except Exception as e:
                 logger.error("fastapi_shutdown_error", error=str(e))
 
+        # Stop AI connection warm-up if it is still running
+        if ai_warm_up_task and not ai_warm_up_task.done():
+            ai_warm_up_task.cancel()
+            try:
+                await ai_warm_up_task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error("ai_warm_up_shutdown_error", error=str(e))
+
         # Stop monitoring (if available)
         if MONITORING_AVAILABLE:
             try:
@@ -844,6 +885,25 @@ async def main() -> None:
         # Shutdown scheduler
         scheduler.shutdown()
 
+        # Flush buffered activity touches before the DB pool goes away
+        try:
+            from app.services.user.activity_tracker import activity_tracker
+            await activity_tracker.flush()
+        except Exception as e:
+            logger.error("activity_flush_on_shutdown_failed", error=str(e))
+
+        try:
+            from app.services.cache.broadcast_index import broadcast_callback_index
+            from app.services.user.broadcast_click_tracker import broadcast_click_tracker
+            await broadcast_callback_index.stop()
+            await broadcast_click_tracker.flush()
+        except Exception as e:
+            logger.error("broadcast_clicks_flush_on_shutdown_failed", error=str(e))
+
+        # Close pooled provider HTTP sessions
+        await http_clients.close()
+        await ai_clients.close()
+
         # Close Redis
         await redis_client.disconnect()
 
@@ -0,0 +1,123 @@
+"""
+Fairness benchmark for AI slot queueing.
+
+Simulates two bot replicas in front of one provider. A few heavy users flood
+the provider while light users send a couple of requests each. The light
+users mix priority classes. The same workload runs twice:
+
+- fifo: only the per-replica provider limiters (arrival order)
+- fair: the Redis weighted fair queue (app.core.fair_queue) in front of them
+
+For each group, the script prints the wait until a slot is granted.
+
+Runs against the Redis in REDIS_URL (use a local instance, not prod). Keys
+go under a throwaway prefix and are deleted afterwards.
+
+Usage:
+    python scripts/benchmark_fair_queue.py [heavy_users] [requests_per_heavy_user]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.ai_limiter import AdaptiveLimiter
+from app.core.fair_queue import FairQueue
+from app.core.redis_client import redis_client
+
+REPLICAS = 2
+SLOTS_PER_REPLICA = 4
+LIGHT_USERS = 12
+LIGHT_REQUESTS = 2
+LIGHT_ARRIVAL_WINDOW = 2.0
+SERVICE_TIME = (0.1, 0.3)
+POLL_INTERVAL = 0.05
+LIGHT_PRIORITIES = ("paid", "eternal", "bonus")
+
+
+def make_workload(heavy_users: int, heavy_requests: int) -> list:
+    """(arrival offset, user_id, priority, group) for every request."""
+    rng = random.Random(42)
+    requests = []
+    for user_id in range(1, heavy_users + 1):
+        requests += [(0.0, user_id, "bonus", "heavy")] * heavy_requests
+    for i in range(LIGHT_USERS):
+        user_id = 1000 + i
+        priority = LIGHT_PRIORITIES[i % len(LIGHT_PRIORITIES)]
+        for _ in range(LIGHT_REQUESTS):
+            requests.append((rng.uniform(0, LIGHT_ARRIVAL_WINDOW), user_id, priority, f"light/{priority}"))
+    return requests
+
+
+async def run(workload: list, fair: bool, prefix: str) -> tuple[dict, float]:
+    """Run the workload; return waits by group and the makespan."""
+    limiters = [
+        AdaptiveLimiter(f"bench{i}", SLOTS_PER_REPLICA, SLOTS_PER_REPLICA, SLOTS_PER_REPLICA)
+        for i in range(REPLICAS)
+    ]
+    queues = [FairQueue(prefix=prefix, poll_interval=POLL_INTERVAL) for _ in range(REPLICAS)]
+    rng = random.Random(7)
+    waits = defaultdict(list)
+    started = time.monotonic()
+
+    async def request(index: int, offset: float, user_id: int, priority: str, group: str):
+        replica = index % REPLICAS
+        limiter, queue = limiters[replica], queues[replica]
+        await asyncio.sleep(offset)
+        arrived = time.monotonic()
+        if fair:
+            assert await queue.acquire("bench", user_id, priority, capacity=SLOTS_PER_REPLICA, timeout=300)
+        assert await limiter.acquire(timeout=300)
+        waits[group].append(time.monotonic() - arrived)
+        await asyncio.sleep(rng.uniform(*SERVICE_TIME))
+        limiter.release(latency=0.2)
+        if fair:
+            queue.release("bench", user_id)
+
+    await asyncio.gather(*(request(i, *item) for i, item in enumerate(workload)))
+    return waits, time.monotonic() - started
+
+
+def report(name: str, waits: dict, makespan: float) -> None:
+    print(f"\n{name}: makespan {makespan:.1f}s")
+    for group in sorted(waits):
+        values = sorted(waits[group])
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(
+            f"  {group:14} n={len(values):4}  "
+            f"wait p50={statistics.median(values):6.2f}s  p95={p95:6.2f}s  max={values[-1]:6.2f}s"
+        )
+
+
+async def main() -> None:
+    heavy_users = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    heavy_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    workload = make_workload(heavy_users, heavy_requests)
+    prefix = f"ai_queue:bench:{uuid.uuid4().hex[:8]}:"
+
+    print(
+        f"{REPLICAS} replicas x {SLOTS_PER_REPLICA} slots, {heavy_users} heavy users x "
+        f"{heavy_requests} requests, {LIGHT_USERS} light users x {LIGHT_REQUESTS} requests"
+    )
+
+    await redis_client.connect()
+    try:
+        report("fifo (limiters only)", *await run(workload, fair=False, prefix=prefix))
+        report("fair (weighted fair queue)", *await run(workload, fair=True, prefix=prefix))
+    finally:
+        keys = [key async for key in redis_client.client.scan_iter(f"{prefix}*")]
+        if keys:
+            await redis_client.client.delete(*keys)
+        await redis_client.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""
+Microbenchmark of the rate limiting implementations.
+
+Compares the GCRA engine (app.core.rate_limiter) with the per-site limiters
+it replaced, reproduced here as they were:
+
+- throttle zset:    ThrottlingMiddleware (ZREMRANGEBYSCORE/ZADD/ZCARD/EXPIRE
+                    pipeline, 1 round trip)
+- user counter:     check_user_rate_limit (GET, then SET or INCR / TTL, one
+                    by one, 2 round trips)
+- cost guard:       CostGuard.check_rate_limit (INCR/EXPIRE/TTL per user, then
+                    INCR/EXPIRE global, 3-5 round trips)
+- gcra 1 key:       one script call
+- gcra user+global: one script call over both keys
+
+For each, N concurrent callers make decisions against a few hot keys, and
+the script prints throughput and decision latency. Limits are generous, so
+the allow path (the common one) is measured. Against a remote Redis the
+round trips dominate; a local one mostly shows the server-side cost.
+
+Runs against the Redis in REDIS_URL (use a local instance, not prod). Keys
+go under a throwaway prefix and are deleted afterwards.
+
+Usage:
+    python scripts/benchmark_rate_limit.py [decisions] [concurrency]
+"""
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.rate_limiter import RateLimit, RateLimiter
+from app.core.redis_client import redis_client
+
+USERS = 50
+LIMIT = 10 ** 9
+
+
+async def throttle_zset(redis, prefix: str, user_id: int) -> bool:
+    now = time.time()
+    key = f"{prefix}throttle:{user_id}"
+    pipe = redis.pipeline()
+    pipe.zremrangebyscore(key, 0, now - 60)
+    pipe.zadd(key, {f"{now}:{uuid.uuid4().hex[:6]}": now})
+    pipe.zcard(key)
+    pipe.expire(key, 61)
+    results = await pipe.execute()
+    return results[2] <= LIMIT
+
+
+async def user_counter(redis, prefix: str, user_id: int) -> bool:
+    key = f"{prefix}user:{user_id}"
+    count = await redis.get(key)
+    if count is None:
+        await redis.set(key, "1", ex=60)
+        return True
+    if int(count) >= LIMIT:
+        await redis.ttl(key)
+        return False
+    await redis.incr(key)
+    return True
+
+
+async def cost_guard_counters(redis, prefix: str, user_id: int) -> bool:
+    user_key = f"{prefix}cost:user:{user_id}"
+    count = await redis.incr(user_key)
+    if count == 1:
+        await redis.expire(user_key, 3600)
+    await redis.ttl(user_key)
+    if count > LIMIT:
+        return False
+    global_key = f"{prefix}cost:global"
+    global_count = await redis.incr(global_key)
+    if global_count == 1:
+        await redis.expire(global_key, 3600)
+    return global_count <= LIMIT
+
+
+def gcra(limiter: RateLimiter, with_global: bool):
+    rule = RateLimit(LIMIT, 60)
+
+    async def check(redis, prefix: str, user_id: int) -> bool:
+        rules = [(f"user:{user_id}", rule)]
+        if with_global:
+            rules.append(("global", rule))
+        return (await limiter.check(*rules)).allowed
+    return check
+
+
+async def run(name: str, round_trips: str, check, decisions: int, concurrency: int, prefix: str) -> None:
+    redis = redis_client.client
+    latencies = []
+    per_worker = decisions // concurrency
+
+    async def worker(index: int):
+        for i in range(per_worker):
+            started = time.perf_counter()
+            assert await check(redis, prefix, (index * per_worker + i) % USERS)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"  {name:18} {round_trips:>3} RTT {len(latencies) / elapsed:9.0f} decisions/s  "
+        f"p50={statistics.median(latencies) * 1000:6.2f}ms  p99={p99 * 1000:6.2f}ms"
+    )
+
+
+async def main() -> None:
+    decisions = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    prefix = f"ratelimit:bench:{uuid.uuid4().hex[:8]}:"
+    limiter = RateLimiter(prefix=prefix + "gcra:")
+
+    print(f"{decisions} decisions, {concurrency} concurrent callers, {USERS} users")
+
+    await redis_client.connect()
+    try:
+        await run("throttle zset", "1", throttle_zset, decisions, concurrency, prefix)
+        await run("user counter", "2", user_counter, decisions, concurrency, prefix)
+        await run("cost guard", "3-5", cost_guard_counters, decisions, concurrency, prefix)
+        await run("gcra 1 key", "1", gcra(limiter, with_global=False), decisions, concurrency, prefix)
+        await run("gcra user+global", "1", gcra(limiter, with_global=True), decisions, concurrency, prefix)
+    finally:
+        keys = [key async for key in redis_client.client.scan_iter(f"{prefix}*")]
+        if keys:
+            await redis_client.client.delete(*keys)
+        await redis_client.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
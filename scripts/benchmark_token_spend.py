@@ -0,0 +1,155 @@
+"""
+Contention benchmark for token spending.
+
+Compares the legacy spend (SELECT ... FOR UPDATE, sort and mutate rows in
+Python, commit) with the set-based SubscriptionRepository.spend_tokens
+statement, with many concurrent spends hitting the same user.
+
+Runs against the database in DATABASE_URL (use a local Postgres, not prod):
+creates a throwaway user with a few subscriptions, spends, verifies the final
+balance is exact (no overspend, no lost updates) and deletes the user.
+
+Usage:
+    python scripts/benchmark_token_spend.py [concurrency] [spends_per_worker]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import delete, func, select
+
+from app.database.database import async_session_maker, close_db, init_db
+from app.database.models.subscription import Subscription
+from app.database.models.user import User
+from app.database.repositories.subscription import SubscriptionRepository
+
+BENCH_TELEGRAM_ID = -987654321
+SPEND_AMOUNT = 7
+
+
+async def legacy_spend(session, user_id: int, amount: int) -> bool:
+    """The pre-existing check_and_use_tokens algorithm (without logging)."""
+    result = await session.execute(
+        select(Subscription)
+        .where(
+            Subscription.user_id == user_id,
+            Subscription.is_active.is_(True),
+        )
+        .with_for_update()
+    )
+    subscriptions = [s for s in result.scalars().all() if not s.is_expired]
+    if sum(s.tokens_remaining for s in subscriptions) < amount:
+        await session.rollback()
+        return False
+
+    max_dt = datetime.max.replace(tzinfo=timezone.utc)
+    subscriptions.sort(key=lambda s: (s.expires_at is None, s.expires_at or max_dt))
+    remaining = amount
+    for sub in subscriptions:
+        if remaining <= 0:
+            break
+        to_deduct = min(sub.tokens_remaining, remaining)
+        if to_deduct > 0:
+            sub.use_tokens(to_deduct)
+            remaining -= to_deduct
+    await session.commit()
+    return True
+
+
+async def set_based_spend(session, user_id: int, amount: int) -> bool:
+    """The single-statement spend."""
+    charged = await SubscriptionRepository(session).spend_tokens(user_id, amount)
+    await session.commit()
+    return bool(charged)
+
+
+async def setup_user() -> tuple[int, int]:
+    """Create the benchmark user; return (user_id, total_tokens)."""
+    now = datetime.now(timezone.utc)
+    async with async_session_maker() as session:
+        await session.execute(delete(User).where(User.telegram_id == BENCH_TELEGRAM_ID))
+        user = User(telegram_id=BENCH_TELEGRAM_ID, first_name="bench")
+        session.add(user)
+        await session.flush()
+
+        amounts = [(50_000, now + timedelta(days=3)), (50_000, now + timedelta(days=10)), (100_000, None)]
+        for tokens, expires_at in amounts:
+            session.add(Subscription(
+                user_id=user.id,
+                subscription_type="eternal" if expires_at is None else "7days",
+                tokens_amount=tokens,
+                tokens_used=0,
+                price=Decimal("0.00"),
+                is_active=True,
+                started_at=now,
+                expires_at=expires_at,
+            ))
+        await session.commit()
+        return user.id, sum(tokens for tokens, _ in amounts)
+
+
+async def remaining_tokens(user_id: int) -> int:
+    async with async_session_maker() as session:
+        return await session.scalar(
+            select(func.sum(Subscription.tokens_amount - Subscription.tokens_used))
+            .where(Subscription.user_id == user_id)
+        )
+
+
+async def run(name: str, spend, concurrency: int, per_worker: int) -> None:
+    user_id, total = await setup_user()
+    latencies: list[float] = []
+    succeeded = 0
+
+    async def worker() -> None:
+        nonlocal succeeded
+        for _ in range(per_worker):
+            async with async_session_maker() as session:
+                started = time.perf_counter()
+                if await spend(session, user_id, SPEND_AMOUNT):
+                    succeeded += 1
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    left = await remaining_tokens(user_id)
+    expected = total - succeeded * SPEND_AMOUNT
+    latencies.sort()
+    print(
+        f"{name:>10}: {len(latencies) / elapsed:8.1f} spends/s | "
+        f"p50 {statistics.median(latencies) * 1000:6.2f} ms | "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.2f} ms | "
+        f"balance {'OK' if left == expected else f'MISMATCH {left} != {expected}'}"
+    )
+
+    async with async_session_maker() as session:
+        await session.execute(delete(Subscription).where(Subscription.user_id == user_id))
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+
+async def main() -> None:
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    per_worker = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    await init_db()
+    print(f"concurrency={concurrency} spends_per_worker={per_worker} amount={SPEND_AMOUNT}")
+    try:
+        await run("legacy", legacy_spend, concurrency, per_worker)
+        await run("set-based", set_based_spend, concurrency, per_worker)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Tests for the adaptive per-provider concurrency limits.
+"""
+import asyncio
+
+from app.core import ai_limiter
+from app.core.ai_limiter import AdaptiveLimiter, get_limiter, is_overload_error
+
+
+def make_limiter(initial: int = 2, minimum: int = 1, maximum: int = 4) -> AdaptiveLimiter:
+    return AdaptiveLimiter("test", initial=initial, minimum=minimum, maximum=maximum, latency_target=10)
+
+
+def test_overload_errors_are_recognized():
+    assert is_overload_error("Error code: 429 - rate limit exceeded")
+    assert is_overload_error("503 Service Unavailable")
+    assert is_overload_error("Google API request timed out after 60s")
+    assert not is_overload_error("Invalid API key")
+    assert not is_overload_error(None)
+
+
+async def test_limit_grows_under_saturation():
+    limiter = make_limiter(initial=2)
+
+    for _ in range(10):
+        slots = limiter.stats()["limit"]
+        for _ in range(slots):
+            assert await limiter.acquire(timeout=0.1)
+        for _ in range(slots):
+            limiter.release(latency=0.5)
+
+    assert limiter.stats()["limit"] == 4  # capped at maximum
+
+
+async def test_idle_successes_do_not_grow_limit():
+    limiter = make_limiter(initial=2)
+
+    for _ in range(10):
+        assert await limiter.acquire(timeout=0.1)
+        limiter.release(latency=0.5)
+
+    assert limiter.stats()["limit"] == 2
+
+
+async def test_overload_cuts_limit_once_per_cooldown():
+    limiter = make_limiter(initial=4)
+
+    for _ in range(3):
+        assert await limiter.acquire(timeout=0.1)
+        limiter.release(error="429 Too Many Requests")
+
+    stats = limiter.stats()
+    assert stats["limit"] == 2  # 4 * 0.7, one decrease
+    assert stats["throttled"] == 3
+
+
+async def test_slow_requests_cut_limit():
+    limiter = make_limiter(initial=4)
+
+    assert await limiter.acquire(timeout=0.1)
+    limiter.release(latency=30)
+
+    assert limiter.stats()["limit"] == 2
+
+
+async def test_waiters_are_served_in_order_and_time_out():
+    limiter = make_limiter(initial=1, maximum=1)
+    assert await limiter.acquire(timeout=0.1)
+
+    first = asyncio.ensure_future(limiter.acquire(timeout=1))
+    second = asyncio.ensure_future(limiter.acquire(timeout=1))
+    await asyncio.sleep(0)
+    assert limiter.stats()["queued"] == 2
+
+    limiter.release(latency=0.1)
+    assert await first
+    assert not second.done()
+
+    assert not await limiter.acquire(timeout=0.01)
+    assert limiter.stats()["rejected"] == 1
+
+    limiter.release(latency=0.1)
+    assert await second
+    limiter.release(latency=0.1)
+    assert limiter.stats()["in_flight"] == 0
+
+
+async def test_slow_provider_does_not_block_others(monkeypatch):
+    monkeypatch.setattr(ai_limiter, "_limiters", {})
+    veo = get_limiter("veo")
+    for _ in range(veo.stats()["limit"]):
+        assert await ai_limiter.acquire_ai_slot(timeout=0.01, provider="veo")
+
+    assert not await ai_limiter.acquire_ai_slot(timeout=0.01, provider="veo")
+    assert await ai_limiter.acquire_ai_slot(timeout=0.01, provider="openai")
+    assert set(ai_limiter.limiter_stats()) == {"veo", "openai"}
@@ -0,0 +1,40 @@
+"""
+Tests for the in-memory broadcast button index (no DB or Redis).
+"""
+import json
+import time
+
+from app.services.cache.broadcast_index import BroadcastCallbackIndex
+
+BUTTONS = [
+    {"text": "Site", "url": "https://example.com"},
+    {"text": "Buy", "callback_data": "bonus:buy"},
+]
+
+
+def test_lookup_indexes_callback_buttons_only():
+    index = BroadcastCallbackIndex()
+    index.add(7, BUTTONS, time.time())
+
+    button = index.lookup("bonus:buy")
+    assert (button.broadcast_id, button.index, button.text) == (7, 1, "Buy")
+    assert index.lookup("menu:main") is None
+    assert index.lookup(None) is None
+
+
+def test_latest_broadcast_wins_and_old_ones_expire():
+    index = BroadcastCallbackIndex(window_days=30)
+    index.add(9, [{"text": "New", "callback_data": "bonus:buy"}], time.time())
+    index.add(7, BUTTONS, time.time())
+    assert index.lookup("bonus:buy").broadcast_id == 9
+
+    index.add(10, [{"text": "Old", "callback_data": "old:cb"}], time.time() - 31 * 86400)
+    assert index.lookup("old:cb") is None
+
+
+def test_published_message_is_applied():
+    index = BroadcastCallbackIndex()
+    index._on_message(json.dumps({"id": 3, "buttons": BUTTONS, "created": time.time()}))
+    index._on_message("not json")
+
+    assert index.lookup("bonus:buy").broadcast_id == 3
@@ -0,0 +1,86 @@
+"""
+Tests for sending one page of a broadcast (no DB; Redis is not connected, so
+the send rate is limited in memory).
+"""
+import asyncio
+from types import SimpleNamespace
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+from aiogram.types import BufferedInputFile
+
+from app.services.user.delivery_outcomes import DeliveryOutcomeSink
+from app.workers import broadcast_worker
+from app.workers.broadcast_worker import BroadcastWorker
+
+BROADCAST = SimpleNamespace(id=1, text="hello")
+
+
+def make_worker() -> BroadcastWorker:
+    return BroadcastWorker(bot=None, concurrency=5, per_second=10000)
+
+
+async def test_page_outcomes(monkeypatch):
+    calls = []
+    retried = set()
+
+    async def fake_send(bot, chat_id, text, photo=None, keyboard=None):
+        calls.append(chat_id)
+        if chat_id == 102:
+            raise TelegramForbiddenError(SendMessage(chat_id=chat_id, text=text), "Forbidden: bot was blocked by the user")
+        if chat_id == 103:
+            raise RuntimeError("chat not found")
+        if chat_id == 104 and chat_id not in retried:
+            retried.add(chat_id)
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), "Too Many Requests", retry_after=0)
+        return None
+
+    monkeypatch.setattr(broadcast_worker, "send_broadcast_message", fake_send)
+
+    page = [(1, 101), (2, 102), (3, 103), (4, 104), (5, 105)]
+    outcomes = DeliveryOutcomeSink(broadcast_id=1)
+    outcome = await make_worker()._send_page(BROADCAST, page, None, None, asyncio.Event(), outcomes)
+
+    assert outcome.cursor == 5
+    assert (outcome.sent, outcome.blocked, outcome.errors) == (3, 1, 1)
+    assert calls.count(104) == 2
+    assert outcomes.counts == {"sent": 3, "blocked": 1, "error": 1}
+    assert outcomes.pending_count == 5
+
+
+async def test_stopping_keeps_cursor_at_last_started_send(monkeypatch):
+    stopping = asyncio.Event()
+
+    async def fake_send(bot, chat_id, text, photo=None, keyboard=None):
+        if chat_id == 102:
+            stopping.set()
+        return None
+
+    monkeypatch.setattr(broadcast_worker, "send_broadcast_message", fake_send)
+
+    worker = make_worker()
+    worker.concurrency = 1
+    page = [(1, 101), (2, 102), (3, 103), (4, 104)]
+    outcome = await worker._send_page(BROADCAST, page, None, None, stopping, DeliveryOutcomeSink())
+
+    # Sends start in order; everything up to the cursor was handled
+    assert outcome.cursor == 2
+    assert outcome.sent == 2
+
+
+async def test_photo_uploaded_once_then_sent_by_file_id(monkeypatch):
+    photos = []
+
+    async def fake_send(bot, chat_id, text, photo=None, keyboard=None):
+        photos.append(photo)
+        return SimpleNamespace(photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id="main-bot-id")])
+
+    monkeypatch.setattr(broadcast_worker, "send_broadcast_message", fake_send)
+
+    upload = BufferedInputFile(b"jpeg", filename="broadcast_photo.jpg")
+    page = [(1, 101), (2, 102), (3, 103)]
+    outcome = await make_worker()._send_page(BROADCAST, page, upload, None, asyncio.Event(), DeliveryOutcomeSink())
+
+    assert photos[0] is upload
+    assert photos[1:] == ["main-bot-id", "main-bot-id"]
+    assert outcome.photo_file_id == "main-bot-id"
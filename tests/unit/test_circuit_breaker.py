@@ -0,0 +1,105 @@
+"""
+Tests for the AI provider circuit breakers.
+"""
+import asyncio
+
+from app.core import circuit_breaker
+from app.core.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitBreakers,
+    is_provider_failure,
+)
+from app.core.config import settings
+from app.services.ai.base import AIResponse, BaseAIProvider
+
+
+def make_breaker(open_seconds: float = 0.05) -> CircuitBreaker:
+    return CircuitBreaker("test", "model", min_calls=4, failure_ratio=0.5, open_seconds=open_seconds)
+
+
+def test_provider_failures_are_recognized():
+    assert is_provider_failure("Error code: 429 - rate limit exceeded")
+    assert is_provider_failure("500 Internal Server Error")
+    assert is_provider_failure(asyncio.TimeoutError())
+    assert not is_provider_failure("Invalid API key")
+    assert not is_provider_failure("Request blocked by safety filters")
+    assert not is_provider_failure(None)
+
+
+def test_opens_when_most_recent_calls_fail():
+    breaker = make_breaker()
+    for failed in (False, True, False):
+        breaker.record(failed)
+    assert breaker.state == STATE_CLOSED  # too few calls to judge
+
+    breaker.record(True)
+    assert breaker.state == STATE_OPEN
+    assert breaker.is_open()
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+
+async def test_half_open_probe_closes_or_reopens():
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record(True)
+
+    await asyncio.sleep(0.06)
+    assert breaker.stats()["state"] == STATE_HALF_OPEN
+    assert breaker.allow()  # the probe
+    assert not breaker.allow()  # everyone else waits for it
+    breaker.record(True)
+    assert breaker.state == STATE_OPEN
+    assert breaker.stats()["retry_in"] > 0.05  # cool-down doubled
+
+    await asyncio.sleep(0.11)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == STATE_CLOSED
+    assert not breaker.is_open()
+
+
+async def test_guarded_provider_fails_fast_when_open(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "circuit_breakers", CircuitBreakers())
+    calls = []
+
+    class FlakyService(BaseAIProvider):
+        async def generate_text(self, prompt: str, **kwargs) -> AIResponse:
+            calls.append(prompt)
+            return AIResponse(success=False, error="503 Service Unavailable")
+
+        async def generate_image(self, prompt: str, **kwargs) -> AIResponse:
+            return AIResponse(success=False, error="Invalid prompt")
+
+    service = FlakyService(api_key="test")
+    for _ in range(5):
+        await service.generate_text("hi", model="flaky-1")
+    assert len(calls) == 5
+
+    response = await service.generate_text("hi", model="flaky-1")
+    assert not response.success
+    assert "temporarily unavailable" in response.error
+    assert len(calls) == 5
+
+    # Other models of the provider are unaffected
+    await service.generate_text("hi", model="flaky-2")
+    assert len(calls) == 6
+
+
+def test_fallback_only_while_open(monkeypatch):
+    breakers = CircuitBreakers()
+    monkeypatch.setattr(settings, "fallback_models", {"openai/gpt-4o": "deepseek/deepseek-chat"})
+
+    assert breakers.fallback_for("openai", "gpt-4o") is None
+
+    for _ in range(5):
+        breakers.get("openai", "gpt-4o").record(True)
+    assert breakers.fallback_for("openai", "gpt-4o") == ("deepseek", "deepseek-chat")
+    assert breakers.fallback_for("openai", "o3-mini") is None
+
+    for _ in range(5):
+        breakers.get("deepseek", "deepseek-chat").record(True)
+    assert breakers.fallback_for("openai", "gpt-4o") is None
@@ -0,0 +1,134 @@
+"""
+Tests for rolling dialog summarization.
+
+Uses MockAIService as the summarizer, so summaries are deterministic, and an
+in-memory history in place of the Redis list.
+"""
+from typing import Dict, List
+
+from app.core.config import settings
+from app.services.ai.context_compactor import (
+    COMPACT_KEEP_MESSAGES,
+    ContextCompactor,
+    format_transcript,
+    plan_compaction,
+    summarize_turns,
+)
+from app.services.ai.mock_service import MockAIService
+from app.services.cache.dialog_history import (
+    HISTORY_MAX_MESSAGES,
+    SUMMARY_ROLE,
+    estimate_tokens,
+    history_budget,
+    trim_history,
+    with_summary,
+)
+
+
+def make_turns(exchanges: int, reply_size: int = 10) -> List[Dict]:
+    turns = []
+    for i in range(exchanges):
+        for role, text in (("user", f"question {i}"), ("assistant", f"answer {i} " * reply_size)):
+            turns.append({"role": role, "content": text, "tokens": estimate_tokens(text)})
+    return turns
+
+
+class MemoryHistory:
+    """The DialogHistory operations the compactor uses, kept in a list."""
+
+    def __init__(self, turns: List[Dict]):
+        self.turns = list(turns)
+
+    async def get(self, telegram_id: int) -> List[Dict]:
+        return list(self.turns)
+
+    async def replace_oldest(self, telegram_id: int, turns: List[Dict], summary: str) -> bool:
+        if self.turns[:len(turns)] != turns:
+            return False
+        summary_turn = {"role": SUMMARY_ROLE, "content": summary, "tokens": estimate_tokens(summary)}
+        self.turns = [summary_turn] + self.turns[len(turns):]
+        return True
+
+
+def test_short_history_is_not_compacted():
+    assert plan_compaction(make_turns(3), "gpt-4o-mini") == 0
+
+
+def test_long_history_keeps_newest_turns():
+    model = "sonar"
+    turns = make_turns(12, reply_size=200)
+    assert sum(t["tokens"] for t in turns) > history_budget(model)
+    assert len(turns) < HISTORY_MAX_MESSAGES - 2
+
+    count = plan_compaction(turns, model)
+
+    assert count == len(turns) - COMPACT_KEEP_MESSAGES
+    assert turns[count]["role"] == "user"
+
+
+def test_full_ring_buffer_is_compacted_even_under_budget():
+    turns = make_turns(19, reply_size=1)
+    assert plan_compaction(turns, "claude-sonnet-4-20250514") > 0
+
+
+async def test_summary_is_deterministic_with_mock_service():
+    turns = make_turns(4)
+
+    first = await summarize_turns(turns, MockAIService())
+    second = await summarize_turns(turns, MockAIService())
+
+    assert first == second
+    assert format_transcript(turns)[:100] in first
+
+
+async def test_compact_replaces_oldest_turns_with_summary():
+    turns = make_turns(12, reply_size=200)
+    history = MemoryHistory(turns)
+    compactor = ContextCompactor(history=history, service_factory=MockAIService)
+
+    assert await compactor.compact(1, "sonar")
+
+    assert history.turns[0]["role"] == SUMMARY_ROLE
+    assert history.turns[1:] == turns[-COMPACT_KEEP_MESSAGES:]
+    # Nothing left to fold in until the conversation grows again
+    assert not await compactor.compact(1, "sonar")
+
+
+async def test_compacted_history_feeds_summary_into_system_prompt():
+    history = MemoryHistory(make_turns(12, reply_size=200))
+    compactor = ContextCompactor(history=history, service_factory=MockAIService)
+    await compactor.compact(1, "sonar")
+
+    system_prompt = with_summary("Be brief.", history.turns)
+    messages = trim_history(history.turns, "sonar", "next question", system_prompt)
+
+    assert system_prompt.startswith("Be brief.\n\n")
+    assert history.turns[0]["content"] in system_prompt
+    assert messages[0]["role"] == "user"
+    assert all(m["role"] != SUMMARY_ROLE for m in messages)
+
+
+async def test_stale_compaction_is_dropped():
+    turns = make_turns(12, reply_size=200)
+    history = MemoryHistory(turns)
+
+    async def clear_meanwhile(*args, **kwargs):
+        history.turns = []
+        return await MockAIService().generate_text(*args, **kwargs)
+
+    service = MockAIService()
+    service.generate_text = clear_meanwhile
+    compactor = ContextCompactor(history=history, service_factory=lambda: service)
+
+    assert not await compactor.compact(1, "sonar")
+    assert history.turns == []
+
+
+async def test_missing_api_key_leaves_history_untouched(monkeypatch):
+    monkeypatch.setattr(settings, "openai_api_key", None)
+    turns = make_turns(12, reply_size=200)
+    history = MemoryHistory(turns)
+    compactor = ContextCompactor(history=history)
+
+    assert not await compactor.compact(1, "sonar")
+    assert history.turns == turns
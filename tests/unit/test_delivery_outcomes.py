@@ -0,0 +1,27 @@
+"""
+Tests for delivery outcome classification and buffering (no DB).
+"""
+from app.services.user.delivery_outcomes import (
+    BLOCKED,
+    DEACTIVATED,
+    ERROR,
+    SENT,
+    DeliveryOutcomeSink,
+    classify_delivery_error,
+)
+
+
+def test_classify_delivery_error():
+    assert classify_delivery_error(Exception("Forbidden: bot was blocked by the user")) == BLOCKED
+    assert classify_delivery_error(Exception("Forbidden: user is deactivated")) == DEACTIVATED
+    assert classify_delivery_error(Exception("Bad Request: chat not found")) == ERROR
+
+
+async def test_flush_skips_database_when_nothing_to_record():
+    outcomes = DeliveryOutcomeSink()
+    outcomes.add(101, SENT, user_id=1)
+    outcomes.add(102, ERROR, user_id=2, error="chat not found")
+
+    assert await outcomes.flush() == 2
+    assert outcomes.pending_count == 0
+    assert outcomes.counts == {SENT: 1, ERROR: 1}
@@ -0,0 +1,82 @@
+"""
+Tests for the weighted fair queue and priority class lookup, against fakeredis
+(the admission script runs in its Lua interpreter).
+"""
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.core.fair_queue import DEFAULT_PRIORITY, PRIORITY_CACHE_PREFIX, FairQueue, get_priority_class
+from app.core.redis_client import redis_client
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_client", client)
+    return client
+
+
+async def test_backlog_queues_behind_other_users_and_paid_goes_first(fake_redis):
+    queue = FairQueue()
+
+    assert await queue._admit("openai", "t1", 1, "bonus", capacity=1) == 0
+    # Capacity is taken: user 1's backlog waits
+    assert await queue._admit("openai", "t2", 1, "bonus", capacity=1) == 1
+    assert await queue._admit("openai", "t3", 1, "bonus", capacity=1) == 2
+
+    # A paid user's first request is served before that backlog
+    assert await queue._admit("openai", "p1", 2, "paid", capacity=1) == 1
+    assert await queue._admit("openai", "t2", 1, "bonus", capacity=1) == 2
+
+    # Releasing the running ticket admits the head of the queue
+    await queue._remove("openai", f"{queue.replica}:t1", "running")
+    assert await queue._admit("openai", "t2", 1, "bonus", capacity=1) == 2
+    assert await queue._admit("openai", "p1", 2, "paid", capacity=1) == 0
+    assert await queue._admit("openai", "t2", 1, "bonus", capacity=1) == 1
+
+
+async def test_acquire_and_release(fake_redis):
+    queue = FairQueue(poll_interval=0.01)
+
+    assert await queue.acquire("openai", 1, "paid", capacity=1, timeout=1)
+    assert not await queue.acquire("openai", 2, "paid", capacity=1, timeout=0.05)
+
+    queue.release("openai", 1)
+    await asyncio.gather(*queue._background)
+    assert await queue.acquire("openai", 2, "paid", capacity=1, timeout=1)
+
+
+async def test_running_tickets_of_a_stale_replica_stop_counting(fake_redis):
+    busy = FairQueue(stale_seconds=0.05)
+    idle = FairQueue()
+
+    assert await busy._admit("openai", "a1", 1, "paid", capacity=1) == 0
+    # While the busy replica polls, its request uses up shared capacity
+    assert await idle._admit("openai", "b1", 2, "paid", capacity=1) == 0
+    assert await idle._admit("openai", "b2", 3, "paid", capacity=1) == 1
+
+    # It stops polling (long requests, no new ones): its capacity expires and
+    # its running ticket no longer holds back the other replica
+    await asyncio.sleep(0.1)
+    await idle._remove("openai", f"{idle.replica}:b1", "running")
+    assert await idle._admit("openai", "b2", 3, "paid", capacity=1) == 0
+
+
+async def test_priority_class_is_read_from_cache(fake_redis):
+    await fake_redis.set(f"{PRIORITY_CACHE_PREFIX}5", "paid")
+    assert await get_priority_class(5) == "paid"
+
+
+async def test_priority_class_lookup_failure_falls_back_to_default(fake_redis, monkeypatch):
+    from app.database import database
+
+    def broken_session():
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(database, "async_session_maker", broken_session)
+
+    assert await get_priority_class(6) == DEFAULT_PRIORITY
+    # Failures are not cached
+    assert await fake_redis.get(f"{PRIORITY_CACHE_PREFIX}6") is None
@@ -0,0 +1,47 @@
+"""
+Tests for the GCRA rate limiter (in-memory fallback; Redis is not connected in tests).
+"""
+from app.core.rate_limiter import RateLimit, RateLimiter
+
+
+async def test_burst_then_denied_with_retry_after():
+    limiter = RateLimiter()
+    rule = RateLimit(limit=3, period=60)
+
+    for _ in range(3):
+        assert (await limiter.check(("user:1", rule))).allowed
+
+    decision = await limiter.check(("user:1", rule))
+    assert not decision.allowed
+    assert decision.denied_key == "user:1"
+    assert 19 < decision.retry_after <= 20  # one interval: 60s / 3
+
+    # Other keys have their own buckets
+    assert (await limiter.check(("user:2", rule))).allowed
+
+
+async def test_denied_request_counts_against_no_key():
+    limiter = RateLimiter()
+    user_rule = RateLimit(limit=1, period=60)
+    global_rule = RateLimit(limit=2, period=60)
+
+    assert (await limiter.check(("user:1", user_rule), ("global", global_rule))).allowed
+    for _ in range(3):
+        decision = await limiter.check(("user:1", user_rule), ("global", global_rule))
+        assert decision.denied_key == "user:1"
+
+    # The denials above did not use up the global budget
+    assert (await limiter.check(("user:2", user_rule), ("global", global_rule))).allowed
+    decision = await limiter.check(("user:3", user_rule), ("global", global_rule))
+    assert decision.denied_key == "global"
+
+
+async def test_fallback_keeps_a_bounded_number_of_keys():
+    limiter = RateLimiter(local_max_keys=10)
+    rule = RateLimit(limit=1, period=60)
+
+    for user_id in range(100):
+        assert (await limiter.check((f"user:{user_id}", rule))).allowed
+
+    assert len(limiter._local) == 10
+    assert not (await limiter.check(("user:99", rule))).allowed
@@ -0,0 +1,113 @@
+"""
+Tests for SubscriptionService.check_and_use_tokens around the set-based spend
+(fake session and repository; Redis is not connected, so the balance ledger
+admits nothing and holds nothing).
+"""
+from typing import List
+
+import pytest
+
+from app.core.exceptions import InsufficientTokensError
+from app.database.models.subscription import Subscription
+from app.services.subscription import subscription_service
+from app.services.subscription.subscription_service import SubscriptionService
+
+
+class FakeSavepoint:
+    def __init__(self, session):
+        self.session = session
+
+    async def rollback(self):
+        self.session.calls.append("savepoint_rollback")
+
+    async def commit(self):
+        self.session.calls.append("savepoint_commit")
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls: List[str] = []
+
+    async def begin_nested(self):
+        return FakeSavepoint(self)
+
+    async def commit(self):
+        self.calls.append("commit")
+
+    async def rollback(self):
+        self.calls.append("rollback")
+
+
+class FakeRepository:
+    """The SubscriptionRepository operations check_and_use_tokens uses."""
+
+    def __init__(self, active: List[Subscription], charged: List[Subscription], tokens_charged: int):
+        self.active = active
+        self.charged = charged
+        self.tokens_charged = tokens_charged
+
+    async def spend_tokens(self, user_id, amount):
+        return self.charged, self.tokens_charged
+
+    async def get_user_subscriptions(self, user_id, active_only=False, for_update=False):
+        return self.active
+
+    async def get_active_unlimited_subscription(self, user_id):
+        return next((sub for sub in self.active if sub.is_unlimited), None)
+
+
+def make_subscription(sub_id: int, subscription_type: str, tokens_amount: int) -> Subscription:
+    return Subscription(
+        id=sub_id,
+        user_id=1,
+        subscription_type=subscription_type,
+        tokens_amount=tokens_amount,
+        tokens_used=0,
+        is_active=True,
+        expires_at=None,
+    )
+
+
+def make_service(repository: FakeRepository) -> SubscriptionService:
+    service = SubscriptionService(FakeSession())
+    service.repository = repository
+    return service
+
+
+@pytest.mark.parametrize("model_id, undo", [(None, "rollback"), ("gpt-4o", "savepoint_rollback")])
+async def test_partial_spend_is_rolled_back_and_refused(model_id, undo):
+    regular = make_subscription(1, "eternal_purchase", 1000)
+    # A second row was skipped by the balance guard: only 50 of 100 charged
+    service = make_service(FakeRepository([regular], [regular], tokens_charged=50))
+
+    with pytest.raises(InsufficientTokensError):
+        await service.check_and_use_tokens(1, 100, model_id=model_id)
+
+    assert undo in service.session.calls
+    assert "commit" not in service.session.calls
+
+
+async def test_unlimited_limits_apply_when_another_plan_is_charged(monkeypatch):
+    checked = []
+
+    class DenyingLimits:
+        def __init__(self, session):
+            pass
+
+        async def check_unlimited_limits(self, user_id, subscription, model_id, tokens_cost):
+            checked.append(subscription.id)
+            return False, "limit reached"
+
+    monkeypatch.setattr(subscription_service, "UnlimitedLimitsService", DenyingLimits)
+
+    unlimited = make_subscription(1, "unlimited_1day", 999999999)
+    regular = make_subscription(2, "30days_1m", 1000)
+    # Spend order charged the regular plan only
+    service = make_service(FakeRepository([unlimited, regular], [regular], tokens_charged=100))
+
+    with pytest.raises(InsufficientTokensError) as error:
+        await service.check_and_use_tokens(1, 100, model_id="gpt-4o")
+
+    assert checked == [unlimited.id]
+    assert error.value.details["unlimited_limit_reached"]
+    assert "savepoint_rollback" in service.session.calls
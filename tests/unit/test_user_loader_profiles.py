@@ -0,0 +1,126 @@
+"""
+Tests for User loader profiles.
+
+Guards the update hot path against relationship loads: a user selected with
+the "auth" profile must cost exactly one query, and touching any relationship
+that wasn't loaded explicitly must raise instead of querying.
+"""
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+
+from app.database.database import Base
+from app.database import models  # noqa: F401  (register all tables)
+from app.database.loaders import USER_LOADER_PROFILES, select_user
+from app.database.models import AIRequest, Subscription, User
+
+USER_RELATIONSHIPS = [
+    "subscriptions",
+    "payments",
+    "ai_requests",
+    "dialogs",
+    "referrals_given",
+    "referral_received",
+    "files",
+    "video_jobs",
+]
+
+
+@pytest.fixture
+def session():
+    """In-memory SQLite session with one heavy user."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        now = datetime.now(timezone.utc)
+        session.add(User(id=1, telegram_id=100, first_name="Test"))
+        session.flush()
+        session.add(Subscription(
+            id=1,
+            user_id=1,
+            subscription_type="eternal",
+            tokens_amount=1000,
+            tokens_used=0,
+            price=0,
+            is_active=True,
+            started_at=now,
+        ))
+        for i in range(1, 21):
+            session.add(AIRequest(
+                id=i,
+                user_id=1,
+                request_type="text",
+                ai_model="gpt-4o",
+                status="completed",
+            ))
+        session.commit()
+        session.expunge_all()
+        yield session
+
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(session):
+    """Collect SQL statements emitted on the session's engine."""
+    emitted = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        emitted.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    yield emitted
+    event.remove(engine, "before_cursor_execute", _record)
+
+
+def test_auth_profile_is_single_query(session, statements):
+    """The hot-path profile loads the users row and nothing else."""
+    user = session.execute(
+        select_user("auth").where(User.telegram_id == 100)
+    ).scalar_one()
+
+    assert user.id == 1
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize("relationship_name", USER_RELATIONSHIPS)
+def test_unloaded_relationship_raises(session, statements, relationship_name):
+    """Relationships are never loaded implicitly."""
+    user = session.execute(
+        select_user("auth").where(User.telegram_id == 100)
+    ).scalar_one()
+
+    with pytest.raises(InvalidRequestError):
+        getattr(user, relationship_name)
+    assert len(statements) == 1
+
+
+def test_profile_loads_subscriptions_only(session):
+    """The "profile" profile exposes balance data but not request history."""
+    user = session.execute(
+        select_user("profile").where(User.telegram_id == 100)
+    ).scalar_one()
+
+    assert user.get_total_tokens() == 1000
+    with pytest.raises(InvalidRequestError):
+        user.ai_requests
+
+
+def test_all_profiles_are_valid(session):
+    """Every named profile can be applied to a user query."""
+    for profile in USER_LOADER_PROFILES:
+        user = session.execute(
+            select_user(profile).where(User.telegram_id == 100)
+        ).scalar_one()
+        assert user.telegram_id == 100
+
+
+def test_unknown_profile():
+    """Typos in profile names fail loudly."""
+    with pytest.raises(ValueError):
+        select_user("admin")